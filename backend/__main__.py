@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import socket
@@ -8,8 +9,10 @@ from pathlib import Path
 from typing import Iterable
 
 import uvicorn
+from uvicorn.supervisors import Multiprocess
 
-from .app.config import get_settings
+from .app.config import Settings, get_settings
+from .app.services.invalidation import coordination_backend, database_url
 
 LOGGER = logging.getLogger("backend.server")
 
@@ -37,6 +40,37 @@ def _is_socket_permission_error(error: OSError) -> bool:
     return getattr(error, "errno", None) in {13}
 
 
+def _resolve_workers(settings: Settings) -> int:
+    workers = settings.api_workers
+    if workers > 1 and ":memory:" in database_url(settings):
+        LOGGER.warning("API_WORKERS=%s needs a shared database; an in-memory SQLite database forces 1 worker", workers)
+        return 1
+    if workers > 1 and coordination_backend(settings) is None:
+        LOGGER.warning("INVALIDATION_BUS=off: in-process caches will drift apart between the %s workers", workers)
+    return workers
+
+
+async def _create_schema() -> None:
+    # Done once before forking so the workers do not race each other through CREATE TABLE.
+    from .app.db import get_engine
+    from .app.models.migrations import create_schema
+
+    engine = get_engine()
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(create_schema)
+    finally:
+        await engine.dispose()
+
+
+def _serve(config: uvicorn.Config) -> None:
+    if config.workers > 1:
+        server = uvicorn.Server(config)
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+        return
+    uvicorn.Server(config).run()
+
+
 def main() -> None:
     logging.basicConfig(level=logging.INFO)
 
@@ -48,19 +82,23 @@ def main() -> None:
     except ValueError as exc:  # pragma: no cover - defensive guard
         raise SystemExit(f"Invalid port value provided via environment: {port_value!r}") from exc
 
-    reload_enabled = settings.environment == "development" and settings.auto_reload
+    workers = _resolve_workers(settings)
+    reload_enabled = settings.environment == "development" and settings.auto_reload and workers == 1
     reload_dirs = [str(Path(__file__).resolve().parent / "app")]
+    if workers > 1:
+        asyncio.run(_create_schema())
     config = uvicorn.Config(
         "backend.app.main:app",
         host=host,
         port=port,
         reload=reload_enabled,
         reload_dirs=reload_dirs,
+        workers=workers,
         factory=False,
     )
 
     try:
-        uvicorn.Server(config).run()
+        _serve(config)
         return
     except OSError as error:
         if not _is_socket_permission_error(error):
@@ -80,9 +118,10 @@ def main() -> None:
             port=fallback_port,
             reload=reload_enabled,
             reload_dirs=reload_dirs,
+            workers=workers,
             factory=False,
         )
-        uvicorn.Server(fallback_config).run()
+        _serve(fallback_config)
 
 
 if __name__ == "__main__":  # pragma: no cover - manual invocation entry point
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings
@@ -14,6 +14,13 @@ class Settings(BaseSettings):
     environment: str = Field("development", alias="ENVIRONMENT")
     database_url: Optional[str] = Field(None, alias="DATABASE_URL")
     prisma_database_url: Optional[str] = Field(None, alias="PRISMA_DATABASE_URL")
+    database_read_url: Optional[str] = Field(None, alias="DATABASE_READ_URL")
+    database_pool_size: Optional[int] = Field(None, alias="DATABASE_POOL_SIZE", ge=1)
+    database_max_overflow: Optional[int] = Field(None, alias="DATABASE_MAX_OVERFLOW", ge=0)
+    database_pool_timeout: float = Field(30.0, alias="DATABASE_POOL_TIMEOUT", gt=0)
+    database_pool_recycle: int = Field(1800, alias="DATABASE_POOL_RECYCLE")
+    database_pool_pre_ping: bool = Field(True, alias="DATABASE_POOL_PRE_PING")
+    database_statement_cache_size: int = Field(500, alias="DATABASE_STATEMENT_CACHE_SIZE", ge=0)
     roblox_group_id: int = Field(0, alias="ROBLOX_GROUP_ID")
     open_cloud_api_key: str = Field("", alias="ROBLOX_OPEN_CLOUD_API_KEY")
     default_universe_id: Optional[int] = Field(None, alias="ROBLOX_UNIVERSE_ID")
@@ -30,6 +37,74 @@ class Settings(BaseSettings):
     api_host: str = Field("127.0.0.1", alias="API_HOST")
     api_port: int = Field(8080, alias="API_PORT")
     auto_reload: bool = Field(True, alias="API_AUTO_RELOAD")
+    api_workers: int = Field(1, alias="API_WORKERS", ge=1)
+    metrics_enabled: bool = Field(True, alias="METRICS_ENABLED")
+    metrics_share_interval_seconds: float = Field(5.0, alias="METRICS_SHARE_INTERVAL_SECONDS", gt=0)
+    invalidation_bus: Literal["auto", "postgres", "socket", "off"] = Field("auto", alias="INVALIDATION_BUS")
+    invalidation_bus_dir: Optional[Path] = Field(None, alias="INVALIDATION_BUS_DIR")
+    leader_retry_seconds: float = Field(5.0, alias="LEADER_RETRY_SECONDS", gt=0)
+    roblox_http_max_connections: int = Field(50, alias="ROBLOX_HTTP_MAX_CONNECTIONS", ge=1)
+    roblox_http_max_keepalive: int = Field(20, alias="ROBLOX_HTTP_MAX_KEEPALIVE", ge=0)
+    roblox_http_keepalive_expiry: float = Field(30.0, alias="ROBLOX_HTTP_KEEPALIVE_EXPIRY", ge=0)
+    roblox_http2: bool = Field(True, alias="ROBLOX_HTTP2")
+    roblox_http_timeout: float = Field(30.0, alias="ROBLOX_HTTP_TIMEOUT", gt=0)
+    roblox_groups_rate_per_second: float = Field(10.0, alias="ROBLOX_GROUPS_RATE_PER_SECOND", ge=0)
+    roblox_groups_burst: int = Field(10, alias="ROBLOX_GROUPS_BURST", ge=1)
+    roblox_datastores_rate_per_second: float = Field(20.0, alias="ROBLOX_DATASTORES_RATE_PER_SECOND", ge=0)
+    roblox_datastores_burst: int = Field(40, alias="ROBLOX_DATASTORES_BURST", ge=1)
+    roblox_retry_attempts: int = Field(4, alias="ROBLOX_RETRY_ATTEMPTS", ge=1)
+    roblox_retry_base_delay: float = Field(0.25, alias="ROBLOX_RETRY_BASE_DELAY", ge=0)
+    roblox_retry_max_delay: float = Field(8.0, alias="ROBLOX_RETRY_MAX_DELAY", ge=0)
+    roblox_breaker_failure_threshold: int = Field(5, alias="ROBLOX_BREAKER_FAILURE_THRESHOLD", ge=0)
+    roblox_breaker_reset_seconds: float = Field(30.0, alias="ROBLOX_BREAKER_RESET_SECONDS", gt=0)
+    roblox_outbox_enabled: bool = Field(False, alias="ROBLOX_OUTBOX_ENABLED")
+    roblox_outbox_workers: int = Field(4, alias="ROBLOX_OUTBOX_WORKERS", ge=1)
+    roblox_outbox_batch_size: int = Field(100, alias="ROBLOX_OUTBOX_BATCH_SIZE", ge=1)
+    roblox_outbox_poll_interval_seconds: float = Field(1.0, alias="ROBLOX_OUTBOX_POLL_INTERVAL_SECONDS", gt=0)
+    roblox_outbox_max_attempts: int = Field(8, alias="ROBLOX_OUTBOX_MAX_ATTEMPTS", ge=1)
+    roblox_outbox_retry_base_delay: float = Field(1.0, alias="ROBLOX_OUTBOX_RETRY_BASE_DELAY", ge=0)
+    roblox_outbox_retry_max_delay: float = Field(300.0, alias="ROBLOX_OUTBOX_RETRY_MAX_DELAY", ge=0)
+    roblox_outbox_retention_hours: float = Field(168.0, alias="ROBLOX_OUTBOX_RETENTION_HOURS", ge=0)
+    datastore_mirror_enabled: bool = Field(False, alias="DATASTORE_MIRROR_ENABLED")
+    datastore_mirror_ingests: bool = Field(False, alias="DATASTORE_MIRROR_INGESTS")
+    datastore_mirror_debounce_seconds: float = Field(2.0, alias="DATASTORE_MIRROR_DEBOUNCE_SECONDS", ge=0)
+    datastore_mirror_max_delay_seconds: float = Field(30.0, alias="DATASTORE_MIRROR_MAX_DELAY_SECONDS", ge=0)
+    datastore_mirror_min_interval_seconds: float = Field(6.0, alias="DATASTORE_MIRROR_MIN_INTERVAL_SECONDS", ge=0)
+    datastore_mirror_concurrency: int = Field(8, alias="DATASTORE_MIRROR_CONCURRENCY", ge=1)
+    datastore_mirror_max_keys: int = Field(100000, alias="DATASTORE_MIRROR_MAX_KEYS", ge=1)
+    group_role_cache_ttl_seconds: float = Field(300.0, alias="GROUP_ROLE_CACHE_TTL_SECONDS", ge=0)
+    group_role_cache_max_entries: int = Field(50000, alias="GROUP_ROLE_CACHE_MAX_ENTRIES", ge=1)
+    rank_reconcile_enabled: bool = Field(False, alias="RANK_RECONCILE_ENABLED")
+    rank_reconcile_fix: bool = Field(False, alias="RANK_RECONCILE_FIX")
+    rank_reconcile_interval_seconds: float = Field(21600.0, alias="RANK_RECONCILE_INTERVAL_SECONDS", gt=0)
+    rank_reconcile_page_size: Literal[10, 25, 50, 100] = Field(100, alias="RANK_RECONCILE_PAGE_SIZE")
+    rank_reconcile_max_pages: Optional[int] = Field(None, alias="RANK_RECONCILE_MAX_PAGES", ge=1)
+    punishment_expiry_enabled: bool = Field(False, alias="PUNISHMENT_EXPIRY_ENABLED")
+    punishment_expiry_batch_size: int = Field(100, alias="PUNISHMENT_EXPIRY_BATCH_SIZE", ge=1, le=1000)
+    punishment_expiry_heap_size: int = Field(10000, alias="PUNISHMENT_EXPIRY_HEAP_SIZE", ge=1)
+    punishment_expiry_resync_seconds: float = Field(3600.0, alias="PUNISHMENT_EXPIRY_RESYNC_SECONDS", gt=0)
+    punishment_expiry_retry_seconds: float = Field(60.0, alias="PUNISHMENT_EXPIRY_RETRY_SECONDS", gt=0)
+    points_source: Literal["snapshot", "ledger"] = Field("snapshot", alias="POINTS_SOURCE")
+    points_window_bucket_seconds: int = Field(3600, alias="POINTS_WINDOW_BUCKET_SECONDS", ge=60, le=86400)
+    points_engine_max_players: int = Field(100000, alias="POINTS_ENGINE_MAX_PLAYERS", ge=1)
+    roblox_sync_concurrency: int = Field(16, alias="ROBLOX_SYNC_CONCURRENCY", ge=1)
+    automation_batch_concurrency: int = Field(8, alias="AUTOMATION_BATCH_CONCURRENCY", ge=1)
+    leaderboard_cache_enabled: bool = Field(False, alias="LEADERBOARD_CACHE_ENABLED")
+    ingestion_buffer_enabled: bool = Field(False, alias="INGESTION_BUFFER_ENABLED")
+    ingestion_buffer_window_seconds: float = Field(2.0, alias="INGESTION_BUFFER_WINDOW_SECONDS", gt=0)
+    ingestion_buffer_max_batch: int = Field(500, alias="INGESTION_BUFFER_MAX_BATCH", ge=1)
+    ingestion_buffer_max_pending: int = Field(5000, alias="INGESTION_BUFFER_MAX_PENDING", ge=1)
+    ingestion_buffer_retain_snapshots: bool = Field(False, alias="INGESTION_BUFFER_RETAIN_SNAPSHOTS")
+    ingestion_buffer_submit_timeout: float = Field(5.0, alias="INGESTION_BUFFER_SUBMIT_TIMEOUT", ge=0)
+    ingestion_buffer_max_attempts: int = Field(3, alias="INGESTION_BUFFER_MAX_ATTEMPTS", ge=1)
+    snapshot_storage_mode: Literal["full", "delta"] = Field("full", alias="SNAPSHOT_STORAGE_MODE")
+    snapshot_keyframe_interval: int = Field(50, alias="SNAPSHOT_KEYFRAME_INTERVAL", ge=1)
+    http_leaderboard_max_age: int = Field(15, alias="HTTP_LEADERBOARD_MAX_AGE", ge=0)
+    http_leaderboard_stale_while_revalidate: int = Field(30, alias="HTTP_LEADERBOARD_STALE_WHILE_REVALIDATE", ge=0)
+    snapshot_retention_hours: float = Field(168.0, alias="SNAPSHOT_RETENTION_HOURS", gt=0)
+    snapshot_compaction_enabled: bool = Field(False, alias="SNAPSHOT_COMPACTION_ENABLED")
+    snapshot_compaction_interval_seconds: float = Field(3600.0, alias="SNAPSHOT_COMPACTION_INTERVAL_SECONDS", gt=0)
+    snapshot_compaction_batch_size: int = Field(1000, alias="SNAPSHOT_COMPACTION_BATCH_SIZE", ge=1)
 
     class Config:
         env_file = ".env"
@@ -1,25 +1,148 @@
 from __future__ import annotations
 
+import json
+import logging
+import math
+import time
+from bisect import bisect_left
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional
 
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from .config import get_settings
+from .config import Settings, get_settings
 
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the checkout wait histogram; the last bucket is open-ended.
+CHECKOUT_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+# Dialects with an ``INSERT ... ON CONFLICT`` construct; the batch ingest path needs one.
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
 
 _engine: AsyncEngine | None = None
 _SessionMaker: async_sessionmaker[AsyncSession] | None = None
+_read_engine: AsyncEngine | None = None
+_ReadSessionMaker: async_sessionmaker[AsyncSession] | None = None
+
+
+@dataclass
+class CheckoutStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    wait_buckets: List[int] = field(default_factory=lambda: [0] * (len(CHECKOUT_WAIT_BUCKETS) + 1))
+
+    def record(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self.wait_buckets[bisect_left(CHECKOUT_WAIT_BUCKETS, seconds)] += 1
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """``AsyncAdaptedQueuePool`` that times every checkout.
+
+    The time covers waiting for a free connection and, while the pool is below
+    its size, opening a new one. A sustained tail in the histogram means the
+    pool is too small for the request concurrency.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def _do_get(self):  # type: ignore[override]
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_stats.timeouts += 1
+            raise
+        self.checkout_stats.record(time.perf_counter() - started)
+        return record
+
 
+def database_integration(settings: Optional[Settings] = None) -> Dict[str, Any]:
+    """The ``database`` section of ``backend.integrations.json`` (empty when the file is missing)."""
 
-def create_engine() -> AsyncEngine:
-    settings = get_settings()
+    settings = settings or get_settings()
+    path = Path(settings.config_dir) / "backend.integrations.json"
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            return dict(json.load(handle).get("database", {}))
+    except FileNotFoundError:
+        return {}
+
+
+def read_database_url(settings: Optional[Settings] = None) -> Optional[str]:
+    """The replica URL read-only routes use, or ``None`` when they share the primary."""
+
+    settings = settings or get_settings()
+    enabled = database_integration(settings).get("readReplica")
+    if not settings.database_read_url:
+        if enabled:
+            logger.warning("readReplica is enabled in backend.integrations.json but DATABASE_READ_URL is not set")
+        return None
+    if enabled is False:
+        logger.warning("DATABASE_READ_URL is ignored because readReplica is false in backend.integrations.json")
+        return None
+    return settings.database_read_url
+
+
+def pool_options(settings: Optional[Settings] = None) -> Dict[str, Any]:
+    """Pool arguments for a server database, sized from ``maxConnections`` unless overridden.
+
+    ``maxConnections`` is the connection budget of one database server. Every
+    worker process gets an equal share, two thirds of it kept open and the rest
+    as overflow. The primary and the replica each have their own budget.
+    """
+
+    settings = settings or get_settings()
+    budget = max(2, int(database_integration(settings).get("maxConnections", 15)) // settings.api_workers)
+    pool_size = settings.database_pool_size or math.ceil(budget * 2 / 3)
+    max_overflow = settings.database_max_overflow
+    if max_overflow is None:
+        max_overflow = max(0, budget - pool_size)
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
+
+
+def create_engine(database_url: Optional[str] = None, settings: Optional[Settings] = None) -> AsyncEngine:
+    settings = settings or get_settings()
     database_url = (
-        settings.database_url
+        database_url
+        or settings.database_url
         or settings.prisma_database_url
         or "sqlite+aiosqlite:///:memory:"
     )
-    engine = create_async_engine(database_url, echo=settings.environment == "development", future=True)
+    url = make_url(database_url)
+    if url.get_backend_name() not in _UPSERT_INSERTS:
+        raise RuntimeError(
+            f"unsupported database backend {url.get_backend_name()!r}: "
+            f"DATABASE_URL must point at {' or '.join(sorted(_UPSERT_INSERTS))}"
+        )
+    options: Dict[str, Any] = {}
+    # SQLite keeps the dialect's own pool: one static connection in memory, none kept open for files.
+    if url.get_backend_name() != "sqlite":
+        options.update(pool_options(settings))
+    if url.get_driver_name() == "asyncpg" and "prepared_statement_cache_size" not in url.query:
+        options["connect_args"] = {"prepared_statement_cache_size": settings.database_statement_cache_size}
+    engine = create_async_engine(url, echo=settings.environment == "development", future=True, **options)
     return engine
 
 
@@ -30,6 +153,16 @@ def get_engine() -> AsyncEngine:
     return _engine
 
 
+def get_read_engine() -> AsyncEngine:
+    """Engine for read-only routes: the replica when configured, otherwise the primary."""
+
+    global _read_engine
+    if _read_engine is None:
+        read_url = read_database_url()
+        _read_engine = create_engine(read_url) if read_url else get_engine()
+    return _read_engine
+
+
 def get_session_maker() -> async_sessionmaker[AsyncSession]:
     global _SessionMaker
     if _SessionMaker is None:
@@ -37,6 +170,22 @@ def get_session_maker() -> async_sessionmaker[AsyncSession]:
     return _SessionMaker
 
 
+def get_read_session_maker() -> async_sessionmaker[AsyncSession]:
+    global _ReadSessionMaker
+    if _ReadSessionMaker is None:
+        _ReadSessionMaker = async_sessionmaker(get_read_engine(), expire_on_commit=False)
+    return _ReadSessionMaker
+
+
+async def dispose_engines() -> None:
+    global _engine, _read_engine, _SessionMaker, _ReadSessionMaker
+    engines = {id(engine): engine for engine in (_read_engine, _engine) if engine is not None}
+    _engine = _read_engine = None
+    _SessionMaker = _ReadSessionMaker = None
+    for engine in engines.values():
+        await engine.dispose()
+
+
 @asynccontextmanager
 async def session_scope() -> AsyncGenerator[AsyncSession, None]:
     session_maker = get_session_maker()
@@ -49,9 +198,96 @@ async def session_scope() -> AsyncGenerator[AsyncSession, None]:
             raise
 
 
+@asynccontextmanager
+async def read_session_scope() -> AsyncGenerator[AsyncSession, None]:
+    """Session on the read engine. Nothing is committed; the transaction ends when the session closes."""
+
+    session_maker = get_read_session_maker()
+    async with session_maker() as session:
+        yield session
+
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with session_scope() as session:
         yield session
 
 
-__all__ = ["get_engine", "get_session", "session_scope", "get_session_maker"]
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for read-only routes; may lag the primary by the replica's replication delay."""
+
+    async with read_session_scope() as session:
+        yield session
+
+
+def get_session_factory():
+    """Dependency for handlers that open their own sessions, e.g. inside a streaming response."""
+
+    return session_scope
+
+
+def get_read_session_factory():
+    """Like :func:`get_session_factory`, for read-only handlers."""
+
+    return read_session_scope
+
+
+def _pool_snapshot(engine: AsyncEngine) -> Dict[str, Any]:
+    pool = engine.sync_engine.pool
+    snapshot: Dict[str, Any] = {"url": engine.url.render_as_string(hide_password=True), "pool": type(pool).__name__}
+    if isinstance(pool, InstrumentedQueuePool):
+        stats = pool.checkout_stats
+        snapshot.update(
+            {
+                "size": pool.size(),
+                "checkedOut": pool.checkedout(),
+                "checkedIn": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "maxOverflow": pool._max_overflow,
+                "checkouts": stats.checkouts,
+                "timeouts": stats.timeouts,
+                "waitSecondsTotal": round(stats.wait_seconds_total, 6),
+                "waitSecondsMax": round(stats.wait_seconds_max, 6),
+                "waitSecondsAvg": round(stats.wait_seconds_total / stats.checkouts, 6) if stats.checkouts else 0.0,
+                "waitBuckets": {
+                    **{str(bound): count for bound, count in zip(CHECKOUT_WAIT_BUCKETS, stats.wait_buckets)},
+                    "+Inf": stats.wait_buckets[-1],
+                },
+            }
+        )
+    return snapshot
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Checkout statistics for the primary pool and, when it is separate, the read pool."""
+
+    stats: Dict[str, Any] = {"primary": _pool_snapshot(_engine) if _engine is not None else None, "read": None}
+    if _read_engine is not None and _read_engine is not _engine:
+        stats["read"] = _pool_snapshot(_read_engine)
+    return stats
+
+
+def upsert_insert(session: AsyncSession):
+    """Return the dialect specific ``insert`` construct that supports ``ON CONFLICT``."""
+
+    # create_engine only accepts the dialects listed in ``_UPSERT_INSERTS``.
+    return _UPSERT_INSERTS[session.get_bind().dialect.name]
+
+
+__all__ = [
+    "InstrumentedQueuePool",
+    "create_engine",
+    "dispose_engines",
+    "get_engine",
+    "get_read_engine",
+    "get_read_session",
+    "get_read_session_factory",
+    "get_read_session_maker",
+    "get_session",
+    "get_session_factory",
+    "get_session_maker",
+    "pool_stats",
+    "read_database_url",
+    "read_session_scope",
+    "session_scope",
+    "upsert_insert",
+]
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+
+@dataclass(frozen=True)
+class Validators:
+    """HTTP validators and caching policy for one representation."""
+
+    etag: str
+    last_modified: Optional[datetime] = None
+    cache_control: Optional[str] = None
+
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_http_date(self.last_modified)
+        if self.cache_control:
+            headers["Cache-Control"] = self.cache_control
+        return headers
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over the given parts; equal parts always give the same tag."""
+
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode("utf-8"), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def format_http_date(moment: datetime) -> str:
+    # Naive datetimes in this service are UTC.
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return format_datetime(moment.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match.
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have one second resolution.
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_response(request: Request, response: Response, validators: Validators) -> Optional[Response]:
+    """Attach ``validators`` to ``response`` and return a ``304`` when the client copy is current.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``. Handlers call
+    this before loading or serialising anything so revalidation stays cheap.
+    """
+
+    headers = validators.headers()
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, validators.etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(
+            if_modified_since
+            and validators.last_modified is not None
+            and _not_modified_since(if_modified_since, validators.last_modified)
+        )
+    if fresh:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
+
+__all__ = ["Validators", "conditional_response", "format_http_date", "make_etag"]
@@ -4,9 +4,27 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import get_settings
-from .db import get_engine
-from .models import Base
-from .routes import automation, health, leaderboard, players, roblox, sync
+from .db import dispose_engines, get_engine
+from .metrics import MetricsMiddleware, instrument_database
+from .models.migrations import create_schema
+from .routes import automation, health, leaderboard, metrics, players, roblox, sync
+from .routes.metrics import start_worker_metrics, stop_worker_metrics
+from .services.compaction import start_snapshot_compaction, stop_snapshot_compaction
+from .services.crawl import stop_crawls
+from .services.datastore_mirror import (
+    claim_datastore_mirror,
+    release_datastore_mirror,
+    start_datastore_mirror,
+    stop_datastore_mirror,
+)
+from .services.ingestion_buffer import start_ingestion_buffer, stop_ingestion_buffer
+from .services.invalidation import start_invalidation_bus, stop_invalidation_bus
+from .services.leadership import start_leader_election, stop_leader_election
+from .services.leaderboard_cache import start_leaderboard_cache, stop_leaderboard_cache
+from .services.outbox import start_outbox_dispatcher, stop_outbox_dispatcher
+from .services.punishment_expiry import start_punishment_expiry, stop_punishment_expiry
+from .services.rank_reconciliation import start_rank_reconciliation, stop_rank_reconciliation
+from .services.roblox_client import close_roblox_http_pool, start_roblox_http_pool
 
 app = FastAPI(title="RLE GRPS Backend", version="1.0.0")
 
@@ -21,21 +39,59 @@ if settings.allowed_origins:
         allow_headers=["*"],
     )
 
+if settings.metrics_enabled:
+    # Added last so it wraps every other middleware and times the whole request.
+    app.add_middleware(MetricsMiddleware)
+    instrument_database()
+
+
+async def start_singleton_jobs() -> None:
+    """Jobs that must run in one process only; with ``API_WORKERS > 1`` the elected leader runs them."""
+
+    await start_outbox_dispatcher()
+    await claim_datastore_mirror()
+    start_snapshot_compaction()
+    start_rank_reconciliation()
+    start_punishment_expiry()
+
+
+async def stop_singleton_jobs() -> None:
+    await stop_snapshot_compaction()
+    await stop_rank_reconciliation()
+    await stop_punishment_expiry()
+    await release_datastore_mirror()
+    await stop_outbox_dispatcher()
+
 
 @app.on_event("startup")
 async def on_startup() -> None:
     engine = get_engine()
     async with engine.begin() as connection:
-        await connection.run_sync(Base.metadata.create_all)
+        await connection.run_sync(create_schema)
+    await start_invalidation_bus()
+    start_worker_metrics()
+    await start_roblox_http_pool()
+    await start_leaderboard_cache()
+    await start_ingestion_buffer()
+    await start_datastore_mirror()
+    await start_leader_election(start_singleton_jobs, stop_singleton_jobs)
 
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
-    engine = get_engine()
-    await engine.dispose()
+    await stop_crawls()
+    await stop_leader_election()
+    await stop_ingestion_buffer()
+    await stop_datastore_mirror()
+    await close_roblox_http_pool()
+    await stop_leaderboard_cache()
+    await stop_worker_metrics()
+    await stop_invalidation_bus()
+    await dispose_engines()
 
 
 app.include_router(health.router)
+app.include_router(metrics.router)
 app.include_router(roblox.router)
 app.include_router(players.router)
 app.include_router(leaderboard.router)
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+@dataclass
+class MetricFamily:
+    """One metric as rendered: ``samples`` are ``(suffix, labels, value)`` tuples."""
+
+    name: str
+    type: str
+    documentation: str
+    samples: List[Sample] = field(default_factory=list)
+
+    def add(self, value: float, suffix: str = "", **labels: Any) -> None:
+        self.samples.append((suffix, {key: str(label) for key, label in labels.items()}, float(value)))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, "counter", self.documentation)
+        for labels, value in sorted(self._values.items()):
+            family.samples.append(("", dict(zip(self.labelnames, labels)), value))
+        return family
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last one is +Inf), then sum and count.
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(series[-1]) if series else 0
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, "histogram", self.documentation)
+        for labels, series in sorted(self._series.items()):
+            add_buckets(family, self.buckets, series[:-2], series[-2], dict(zip(self.labelnames, labels)))
+        return family
+
+
+def add_buckets(
+    family: MetricFamily,
+    bounds: Sequence[float],
+    counts: Sequence[float],
+    total: float,
+    labels: Optional[Dict[str, str]] = None,
+) -> None:
+    """Add one histogram series from per-bucket counts, made cumulative as Prometheus expects.
+
+    ``counts`` has one entry per bound plus a final open-ended one, the layout
+    of the ``*_buckets`` lists the services keep for their health endpoints.
+    """
+
+    labels = labels or {}
+    running = 0.0
+    for bound, count in zip(list(bounds) + [math.inf], counts):
+        running += count
+        family.samples.append(("_bucket", {**labels, "le": _format_value(bound)}, running))
+    family.samples.append(("_sum", labels, total))
+    family.samples.append(("_count", labels, running))
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: Any) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            # Re-imports (tests, reloads) get the metric that already holds the values.
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def collect(self) -> List[MetricFamily]:
+        return [metric.collect() for _, metric in sorted(self._metrics.items())]
+
+    def render(self, extra: Iterable[MetricFamily] = ()) -> str:
+        return render(list(self.collect()) + list(extra))
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    lines: List[str] = []
+    for family in families:
+        if not family.samples:
+            continue
+        lines.append(f"# HELP {family.name} {family.documentation}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for suffix, labels, value in family.samples:
+            if labels:
+                rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+                lines.append(f"{family.name}{suffix}{{{rendered}}} {_format_value(value)}")
+            else:
+                lines.append(f"{family.name}{suffix} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def with_labels(families: Iterable[MetricFamily], **labels: str) -> List[MetricFamily]:
+    """Copies of ``families`` with ``labels`` added to every sample."""
+
+    return [
+        MetricFamily(
+            family.name,
+            family.type,
+            family.documentation,
+            [(suffix, {**labels, **sample_labels}, value) for suffix, sample_labels, value in family.samples],
+        )
+        for family in families
+    ]
+
+
+def dump_families(path: Path, families: Iterable[MetricFamily]) -> None:
+    """Write ``families`` to ``path`` for the other workers to read; readers never see a partial file."""
+
+    payload = [[family.name, family.type, family.documentation, family.samples] for family in families]
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(temporary, path)
+
+
+def load_families(path: Path) -> List[MetricFamily]:
+    return [
+        MetricFamily(name, kind, documentation, [(suffix, labels, value) for suffix, labels, value in samples])
+        for name, kind, documentation, samples in json.loads(path.read_text(encoding="utf-8"))
+    ]
+
+
+# Counters and histograms are plain dicts updated in place; gauges are read from the
+# services' snapshot_stats when /metrics is scraped. Values are per worker process;
+# with several workers the /metrics route merges them through the coordination directory.
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "grps_http_requests_total", "HTTP requests by route template and status code.", ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "grps_http_request_duration_seconds", "Time from request to the end of the response body.", ("method", "route")
+)
+HTTP_PHASE = REGISTRY.histogram(
+    "grps_http_request_phase_seconds",
+    "Time a request spent in the database, in Roblox calls or serializing JSON.",
+    ("route", "phase"),
+)
+HTTP_DB_QUERIES = REGISTRY.histogram(
+    "grps_http_request_db_queries", "Database statements executed per request.", ("route",), QUERY_COUNT_BUCKETS
+)
+DB_QUERIES = REGISTRY.counter("grps_db_queries_total", "Database statements executed, in or outside requests.")
+DB_QUERY_SECONDS = REGISTRY.counter("grps_db_query_seconds_total", "Time spent executing database statements.")
+
+
+@dataclass
+class RequestTimings:
+    """Where the current request's time went; filled in by the database events, Roblox calls and ``json_response``."""
+
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    roblox_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar("grps_request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being handled, or ``None`` outside a request."""
+
+    return _timings.get()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and the database/Roblox/serialization split per route.
+
+    Routes are labelled with their template (``/players/{user_id}``), never the
+    raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app: Callable[..., Any]) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def _send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - started
+            _timings.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route, str(status))
+            HTTP_LATENCY.observe(elapsed, method, route)
+            HTTP_DB_QUERIES.observe(timings.db_queries, route)
+            HTTP_PHASE.observe(timings.db_seconds, route, "db")
+            HTTP_PHASE.observe(timings.roblox_seconds, route, "roblox")
+            HTTP_PHASE.observe(timings.serialize_seconds, route, "serialize")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("grps_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get("grps_query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.inc(amount=elapsed)
+    timings = _timings.get()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.db_seconds += elapsed
+
+
+def _handle_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start time.
+    connection = context.connection
+    if connection is not None:
+        started = connection.info.get("grps_query_started")
+        if started:
+            started.pop()
+
+
+def instrument_database() -> None:
+    """Time every statement of every engine; safe to call more than once."""
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Counter",
+    "Histogram",
+    "MetricFamily",
+    "MetricsMiddleware",
+    "REGISTRY",
+    "RequestTimings",
+    "add_buckets",
+    "current_timings",
+    "dump_families",
+    "instrument_database",
+    "load_families",
+    "render",
+    "with_labels",
+]
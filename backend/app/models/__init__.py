@@ -1,3 +1,17 @@
-from .player import Base, Player, PlayerSnapshot
+from .outbox import RobloxOutbox
+from .player import Base, Player, PlayerSnapshot, naive_utc
+from .points import PointsLedgerEntry
+from .rollup import PlayerSnapshotDaily, PlayerSnapshotHourly
+from .sync import SyncCheckpoint
 
-__all__ = ["Base", "Player", "PlayerSnapshot"]
+__all__ = [
+    "Base",
+    "Player",
+    "PlayerSnapshot",
+    "PlayerSnapshotDaily",
+    "PlayerSnapshotHourly",
+    "PointsLedgerEntry",
+    "RobloxOutbox",
+    "SyncCheckpoint",
+    "naive_utc",
+]
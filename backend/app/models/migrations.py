@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import logging
+from typing import List, Tuple
+
+from sqlalchemy import Table, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from .player import Base, Player, PlayerSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Columns added to tables that already exist in deployed databases (the ``players`` and
+# ``player_snapshots`` tables the Prisma schemas create). ``create_all`` never alters an
+# existing table, so :func:`upgrade_schema` adds them. A column listed here must be
+# nullable or carry a ``server_default`` so existing rows get a value.
+ADDED_COLUMNS: Tuple[Tuple[Table, str], ...] = (
+    (Player.__table__, "points_remainder"),
+    (Player.__table__, "snapshot_hash"),
+    (PlayerSnapshot.__table__, "content_hash"),
+    (PlayerSnapshot.__table__, "is_delta"),
+)
+
+# Indexes added to those tables after they were first deployed, for the same reason.
+# They are created with ``IF NOT EXISTS`` (workers may start together) and keep the
+# partial ``WHERE`` clause of their model definition.
+ADDED_INDEXES: Tuple[Tuple[Table, str], ...] = (
+    (Player.__table__, "ix_players_rank_points_kos"),
+    (Player.__table__, "ix_players_kos"),
+    (Player.__table__, "ix_players_wos"),
+    (Player.__table__, "ix_players_updated_at"),
+    (Player.__table__, "ix_players_last_synced_at"),
+    (Player.__table__, "ix_players_punishment_expires_at"),
+    (PlayerSnapshot.__table__, "ix_player_snapshots_user_created_id"),
+)
+
+
+def upgrade_schema(connection: Connection) -> List[str]:
+    """Add the ``ADDED_COLUMNS`` and ``ADDED_INDEXES`` an existing table is missing; returns the names added."""
+
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    added: List[str] = []
+    for table, name in ADDED_COLUMNS:
+        if not inspector.has_table(table.name):
+            continue
+        if name in {column["name"] for column in inspector.get_columns(table.name)}:
+            continue
+        column = CreateColumn(table.c[name]).compile(dialect=connection.dialect)
+        connection.exec_driver_sql(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column}")
+        added.append(f"{table.name}.{name}")
+    for table, name in ADDED_INDEXES:
+        if not inspector.has_table(table.name):
+            continue
+        if name in {index["name"] for index in inspector.get_indexes(table.name)}:
+            continue
+        index = next(index for index in table.indexes if index.name == name)
+        connection.execute(CreateIndex(index, if_not_exists=True))
+        added.append(name)
+    if added:
+        logger.info("Added to existing tables: %s", ", ".join(added))
+    return added
+
+
+def create_schema(connection: Connection) -> None:
+    """Create missing tables, then add missing columns to the existing ones."""
+
+    Base.metadata.create_all(connection)
+    upgrade_schema(connection)
+
+
+__all__ = ["ADDED_COLUMNS", "ADDED_INDEXES", "create_schema", "upgrade_schema"]
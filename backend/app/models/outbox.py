@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, JSON, String
+
+from .player import AutoIncrementId, Base
+
+
+class RobloxOutbox(Base):
+    """Roblox side effect queued in the same transaction as the change that caused it."""
+
+    __tablename__ = "roblox_outbox"
+
+    id = Column(AutoIncrementId, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, nullable=False)
+    kind = Column(String(32), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String(1024), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Partial: the dispatcher's head lookup (oldest pending id per user) reads only this
+        # index, however many delivered rows the table keeps until they are pruned.
+        Index(
+            "ix_roblox_outbox_pending_head",
+            user_id,
+            id,
+            postgresql_where=status == "pending",
+            sqlite_where=status == "pending",
+        ),
+        Index("ix_roblox_outbox_status_created", status, created_at),
+    )
+
+
+__all__ = ["RobloxOutbox"]
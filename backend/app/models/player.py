@@ -1,12 +1,24 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Optional
 
-from sqlalchemy import BigInteger, Boolean, Column, DateTime, Integer, JSON, String
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Float, Index, Integer, JSON, String, false, text
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
+def naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to the naive UTC the ``DateTime`` columns store; naive ones are returned as is."""
+
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# SQLite only autoincrements ``INTEGER PRIMARY KEY`` columns.
+AutoIncrementId = BigInteger().with_variant(Integer, "sqlite")
+
 
 class Player(Base):
     __tablename__ = "players"
@@ -18,6 +30,8 @@ class Player(Base):
     previous_rank = Column(String(64), nullable=True)
     next_rank = Column(String(64), nullable=True)
     rank_points = Column(Integer, nullable=False, default=0)
+    # Fractional points (e.g. 0.25 per KO) not yet applied to ``rank_points``.
+    points_remainder = Column(Float, nullable=False, default=0.0, server_default=text("0"))
     kos = Column(Integer, nullable=False, default=0)
     wos = Column(Integer, nullable=False, default=0)
     warnings = Column(Integer, nullable=False, default=0)
@@ -26,21 +40,43 @@ class Player(Base):
     punishment_expires_at = Column(DateTime, nullable=True)
     privileged = Column(Boolean, nullable=False, default=False)
     metadata_payload = Column("metadata", JSON, nullable=True)
+    snapshot_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     last_synced_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_players_rank_points_kos", rank_points.desc(), kos.desc(), user_id),
+        Index("ix_players_kos", kos.desc()),
+        Index("ix_players_wos", wos.desc()),
+        # Leaderboard validators read max(updated_at) and max(last_synced_at) on every request.
+        Index("ix_players_updated_at", updated_at),
+        Index("ix_players_last_synced_at", last_synced_at),
+        # Partial: most players never carry an expiring punishment.
+        Index(
+            "ix_players_punishment_expires_at",
+            punishment_expires_at,
+            user_id,
+            postgresql_where=punishment_expires_at.isnot(None),
+            sqlite_where=punishment_expires_at.isnot(None),
+        ),
+    )
+
 
 class PlayerSnapshot(Base):
     __tablename__ = "player_snapshots"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    id = Column(AutoIncrementId, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
     payload = Column(JSON, nullable=False)
     source = Column(String(64), nullable=False, default="roblox")
     experience_key = Column(String(128), nullable=True)
     actor_user_id = Column(BigInteger, nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    is_delta = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    __table_args__ = (Index("ix_player_snapshots_user_created_id", user_id, created_at, id),)
 
 
-__all__ = ["Base", "Player", "PlayerSnapshot"]
+__all__ = ["Base", "Player", "PlayerSnapshot", "naive_utc"]
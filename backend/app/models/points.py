@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, Index, Integer, String
+
+from .player import AutoIncrementId, Base
+
+
+class PointsLedgerEntry(Base):
+    """Append-only record of every activity event the points engine evaluated."""
+
+    __tablename__ = "points_ledger"
+
+    id = Column(AutoIncrementId, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, nullable=False)
+    event_type = Column(String(64), nullable=False)
+    weight_key = Column(String(64), nullable=True)
+    magnitude = Column(Float, nullable=False, default=1.0)
+    duration = Column(Float, nullable=True)
+    status = Column(String(16), nullable=False)
+    reason = Column(String(32), nullable=True)
+    base_delta = Column(Float, nullable=False, default=0.0)
+    delta = Column(Float, nullable=False, default=0.0)
+    applied = Column(Integer, nullable=False, default=0)
+    occurred_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_points_ledger_user_occurred", user_id, occurred_at),)
+
+
+__all__ = ["PointsLedgerEntry"]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from .player import Base
+
+
+class _SnapshotRollupColumns:
+    """Per player aggregate of the raw snapshots that fell into one time bucket."""
+
+    user_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    bucket_start = Column(DateTime, primary_key=True)
+    samples = Column(Integer, nullable=False, default=0)
+    first_snapshot_at = Column(DateTime, nullable=False)
+    last_snapshot_at = Column(DateTime, nullable=False)
+    min_rank_points = Column(Integer, nullable=False)
+    max_rank_points = Column(Integer, nullable=False)
+    last_rank_points = Column(Integer, nullable=False)
+    first_kos = Column(Integer, nullable=False)
+    last_kos = Column(Integer, nullable=False)
+    kos_delta = Column(Integer, nullable=False, default=0)
+    first_wos = Column(Integer, nullable=False)
+    last_wos = Column(Integer, nullable=False)
+    wos_delta = Column(Integer, nullable=False, default=0)
+    first_rank = Column(String(64), nullable=True)
+    last_rank = Column(String(64), nullable=True)
+    rank_transitions = Column(Integer, nullable=False, default=0)
+
+
+class PlayerSnapshotHourly(_SnapshotRollupColumns, Base):
+    __tablename__ = "player_snapshot_hourly"
+
+
+class PlayerSnapshotDaily(_SnapshotRollupColumns, Base):
+    __tablename__ = "player_snapshot_daily"
+
+
+__all__ = ["PlayerSnapshotDaily", "PlayerSnapshotHourly"]
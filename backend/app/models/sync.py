@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String
+
+from .player import Base
+
+
+class SyncCheckpoint(Base):
+    __tablename__ = "sync_checkpoints"
+
+    crawl_key = Column(String(191), primary_key=True)
+    cursor = Column(String(1024), nullable=True)
+    status = Column(String(32), nullable=False, default="running")
+    pages = Column(Integer, nullable=False, default=0)
+    entries = Column(Integer, nullable=False, default=0)
+    created = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(1024), nullable=True)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+
+__all__ = ["SyncCheckpoint"]
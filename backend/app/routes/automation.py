@@ -1,14 +1,26 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session
+from ..dependencies import get_automation_service
 from ..models import Player
-from ..schemas import AutomationDecisionResponse, AutomationRequest, PlayerWithContext
+from ..schemas import (
+    AutomationBatchFilter,
+    AutomationBatchRequest,
+    AutomationBatchResponse,
+    AutomationDecisionResponse,
+    AutomationRequest,
+    GroupRoleStatus,
+)
+from ..serialization import json_response
 from ..services.automation import AutomationService
 from ..services.calculations import CalculationService
+from .roblox import _validate_api_key
 
 router = APIRouter(prefix="/automation", tags=["automation"])
 
@@ -27,8 +39,110 @@ async def request_decision(request: AutomationRequest, session: AsyncSession = D
         actor_user_id=request.actor_user_id,
     )
     calculator = CalculationService()
-    payload = calculator.serialize_player(player)
-    return AutomationDecisionResponse(decision=decision, player=PlayerWithContext(**payload))
+    return json_response(
+        {"decision": decision.model_dump(by_alias=True), "player": calculator.serialize_player(player)}
+    )
+
+
+def _filter_statement(criteria: AutomationBatchFilter):
+    statement = select(Player)
+    if criteria.ranks:
+        statement = statement.where(Player.rank.in_(criteria.ranks))
+    if criteria.min_rank_points is not None:
+        statement = statement.where(Player.rank_points >= criteria.min_rank_points)
+    if criteria.max_rank_points is not None:
+        statement = statement.where(Player.rank_points <= criteria.max_rank_points)
+    if criteria.punishment_status is not None:
+        statement = statement.where(Player.punishment_status == criteria.punishment_status)
+    return statement.order_by(Player.user_id).limit(criteria.limit)
+
+
+@router.post("/decisions:batch", response_model=AutomationBatchResponse)
+async def request_decisions_batch(
+    request: AutomationBatchRequest,
+    automation: AutomationService = Depends(get_automation_service),
+) -> AutomationBatchResponse:
+    """Evaluate (and optionally apply) decisions for many players in one transaction.
+
+    Players are loaded with a single query, either by ``userIds`` or by
+    ``filter``. Unknown ids and failed Roblox updates are reported per user.
+    """
+
+    if request.user_ids is not None:
+        requested = list(dict.fromkeys(request.user_ids))
+        statement = select(Player).where(Player.user_id.in_(requested))
+    else:
+        requested = None
+        statement = _filter_statement(request.filter)
+    players = {player.user_id: player for player in (await automation.session.execute(statement)).scalars()}
+
+    outcomes = await automation.evaluate_many(
+        list(players.values()),
+        apply=request.apply,
+        reason=request.reason or "batch automation request",
+        actor_user_id=request.actor_user_id,
+        concurrency=request.concurrency,
+    )
+    by_user = {outcome.player.user_id: outcome for outcome in outcomes}
+
+    results = []
+    for user_id in requested if requested is not None else list(players):
+        outcome = by_user.get(user_id)
+        if outcome is None:
+            results.append({"userId": user_id, "status": "not_found", "decision": None, "player": None, "error": None})
+            continue
+        results.append(
+            {
+                "userId": user_id,
+                "status": "error" if outcome.error else "applied" if outcome.applied else "evaluated",
+                "decision": outcome.decision.model_dump(by_alias=True),
+                "player": automation.calculator.serialize_player(outcome.player),
+                "error": outcome.error,
+            }
+        )
+
+    return json_response(
+        {
+            "processed": len(outcomes),
+            "applied": sum(1 for outcome in outcomes if outcome.applied),
+            "failed": sum(1 for outcome in outcomes if outcome.error),
+            "notFound": sum(1 for result in results if result["status"] == "not_found"),
+            "results": results,
+        }
+    )
+
+
+@router.get("/group-role/{user_id}", response_model=GroupRoleStatus)
+async def group_role(
+    user_id: int,
+    fresh: bool = False,
+    automation: AutomationService = Depends(get_automation_service),
+    api_key: Optional[str] = Header(default=None, alias="x-grps-api-key"),
+) -> GroupRoleStatus:
+    """Compare a player's stored rank with their (TTL-cached) role in the Roblox group."""
+
+    # Every cache miss (and every ``fresh`` call) spends the shared groups API budget.
+    _validate_api_key(api_key)
+    role = await automation.roblox.get_user_group_role(user_id, fresh=fresh)
+    player = await automation.session.get(Player, user_id)
+    descriptor = automation.policy.get_rank(player.rank) if player else None
+    expected_role_id = descriptor.role_id if descriptor else None
+    roblox_rank = automation.policy.get_rank_by_role_id(role.get("id")) if role else None
+    in_sync = None
+    if player is not None:
+        in_sync = role is not None and (
+            role.get("id") == expected_role_id or (roblox_rank is not None and roblox_rank.name == player.rank)
+        )
+    return json_response(
+        {
+            "userId": user_id,
+            "role": role,
+            "dbRank": player.rank if player else None,
+            "expectedRoleId": expected_role_id,
+            "robloxRank": roblox_rank.name if roblox_rank else None,
+            "inSync": in_sync,
+        }
+    )
 
 
 __all__ = ["router"]
@@ -1,10 +1,22 @@
 from __future__ import annotations
 
+import os
 from datetime import datetime
 
 from fastapi import APIRouter
 
-from ..schemas import HealthStatus
+from ..db import pool_stats
+from ..schemas import HealthStatus, HttpPoolStatus, IngestionBufferStatus, RobloxLimitsStatus
+from ..services.datastore_mirror import get_datastore_mirror
+from ..services.group_roles import get_group_role_cache
+from ..services.ingestion_buffer import get_ingestion_buffer
+from ..services.invalidation import get_invalidation_bus
+from ..services.leadership import get_leader_election
+from ..services.outbox import get_outbox_dispatcher
+from ..services.points_engine import get_points_engine
+from ..services.punishment_expiry import get_punishment_expiry_scheduler
+from ..services.roblox_client import get_roblox_http_pool
+from ..services.roblox_resilience import get_roblox_resilience
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -14,4 +26,77 @@ async def live() -> HealthStatus:
     return HealthStatus(status="ok", timestamp=datetime.utcnow())
 
 
+@router.get("/ingestion-buffer", response_model=IngestionBufferStatus)
+async def ingestion_buffer() -> IngestionBufferStatus:
+    buffer = get_ingestion_buffer()
+    if buffer is None:
+        return IngestionBufferStatus(enabled=False)
+    return IngestionBufferStatus(enabled=True, stats=buffer.snapshot_stats())
+
+
+@router.get("/roblox-http", response_model=HttpPoolStatus)
+async def roblox_http() -> HttpPoolStatus:
+    pool = get_roblox_http_pool()
+    if pool is None:
+        return HttpPoolStatus(enabled=False)
+    return HttpPoolStatus(enabled=True, stats=pool.snapshot_stats())
+
+
+@router.get("/roblox-limits", response_model=RobloxLimitsStatus)
+async def roblox_limits() -> RobloxLimitsStatus:
+    return RobloxLimitsStatus(families=get_roblox_resilience().snapshot_stats())
+
+
+@router.get("/roblox-outbox", response_model=HttpPoolStatus)
+async def roblox_outbox() -> HttpPoolStatus:
+    dispatcher = get_outbox_dispatcher()
+    if dispatcher is None:
+        return HttpPoolStatus(enabled=False)
+    return HttpPoolStatus(enabled=True, stats=dispatcher.snapshot_stats())
+
+
+@router.get("/datastore-mirror", response_model=HttpPoolStatus)
+async def datastore_mirror() -> HttpPoolStatus:
+    mirror = get_datastore_mirror()
+    if mirror is None:
+        return HttpPoolStatus(enabled=False)
+    return HttpPoolStatus(enabled=True, stats=mirror.snapshot_stats())
+
+
+@router.get("/group-role-cache", response_model=HttpPoolStatus)
+async def group_role_cache() -> HttpPoolStatus:
+    return HttpPoolStatus(enabled=True, stats=get_group_role_cache().snapshot_stats())
+
+
+@router.get("/points-engine", response_model=HttpPoolStatus)
+async def points_engine() -> HttpPoolStatus:
+    return HttpPoolStatus(enabled=True, stats=get_points_engine().snapshot_stats())
+
+
+@router.get("/punishment-expiry", response_model=HttpPoolStatus)
+async def punishment_expiry() -> HttpPoolStatus:
+    scheduler = get_punishment_expiry_scheduler()
+    if scheduler is None:
+        return HttpPoolStatus(enabled=False)
+    return HttpPoolStatus(enabled=True, stats=scheduler.snapshot_stats())
+
+
+@router.get("/coordination", response_model=HttpPoolStatus)
+async def coordination() -> HttpPoolStatus:
+    bus = get_invalidation_bus()
+    election = get_leader_election()
+    stats = {
+        "pid": os.getpid(),
+        "bus": bus.snapshot_stats() if bus is not None else None,
+        "leader": election.snapshot_stats() if election is not None else None,
+    }
+    return HttpPoolStatus(enabled=bus is not None, stats=stats)
+
+
+@router.get("/database", response_model=HttpPoolStatus)
+async def database() -> HttpPoolStatus:
+    stats = pool_stats()
+    return HttpPoolStatus(enabled=stats["primary"] is not None, stats=stats)
+
+
 __all__ = ["router"]
@@ -1,35 +1,127 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import get_session
-from ..schemas import LeaderboardRecordsResponse, LeaderboardTopResponse
-from ..services.leaderboard import LeaderboardService
+from ..config import get_settings
+from ..db import get_read_session, get_session
+from ..http_cache import Validators, conditional_response, make_etag
+from ..serialization import json_response
+from ..schemas import (
+    LeaderboardAroundResponse,
+    LeaderboardConsistencyReport,
+    LeaderboardPageResponse,
+    LeaderboardRecordsResponse,
+    LeaderboardTopResponse,
+)
+from ..services.leaderboard import LeaderboardService, decode_leaderboard_cursor
+from ..services.leaderboard_cache import get_leaderboard_cache
+from .roblox import _validate_api_key
 
 
 router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
 
 
+async def _leaderboard_validators(request: Request, service: LeaderboardService) -> Validators:
+    """Validators for public leaderboard views, derived from the data ``service`` reads the body from."""
+
+    settings = get_settings()
+    players, latest_update, latest_sync = await service.data_version()
+    return Validators(
+        etag=make_etag("leaderboard", players, latest_update, latest_sync, request.url.path, request.url.query),
+        last_modified=max((moment for moment in (latest_update, latest_sync) if moment is not None), default=None),
+        cache_control=(
+            f"public, max-age={settings.http_leaderboard_max_age}, "
+            f"stale-while-revalidate={settings.http_leaderboard_stale_while_revalidate}"
+        ),
+    )
+
+
 @router.get("/top", response_model=LeaderboardTopResponse)
 async def get_top_players(
+    request: Request,
+    response: Response,
     limit: int = Query(25, ge=1, le=100),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ) -> LeaderboardTopResponse:
     service = LeaderboardService(session)
+    not_modified = conditional_response(request, response, await _leaderboard_validators(request, service))
+    if not_modified is not None:
+        return not_modified
     players = await service.fetch_top_players(limit)
     last_synced_at = players[0].get("lastSyncedAt") if players else None
-    return LeaderboardTopResponse(players=players, lastSyncedAt=last_synced_at)
+    return json_response({"players": players, "lastSyncedAt": last_synced_at}, headers=response.headers)
+
+
+@router.get("/page", response_model=LeaderboardPageResponse)
+async def get_leaderboard_page(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+    session: AsyncSession = Depends(get_read_session),
+) -> LeaderboardPageResponse:
+    service = LeaderboardService(session)
+    not_modified = conditional_response(request, response, await _leaderboard_validators(request, service))
+    if not_modified is not None:
+        return not_modified
+    try:
+        after = decode_leaderboard_cursor(cursor) if cursor else None
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)) from error
+    players, next_cursor = await service.fetch_page(limit, after)
+    return json_response({"players": players, "nextCursor": next_cursor}, headers=response.headers)
+
+
+@router.get("/around/{user_id}", response_model=LeaderboardAroundResponse)
+async def get_leaderboard_around(
+    user_id: int,
+    request: Request,
+    response: Response,
+    radius: int = Query(5, ge=0, le=50),
+    session: AsyncSession = Depends(get_read_session),
+) -> LeaderboardAroundResponse:
+    service = LeaderboardService(session)
+    not_modified = conditional_response(request, response, await _leaderboard_validators(request, service))
+    if not_modified is not None:
+        return not_modified
+    around = await service.fetch_around(user_id, radius)
+    if around is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="player not found")
+    return json_response(around, headers=response.headers)
 
 
 @router.get("/records", response_model=LeaderboardRecordsResponse)
 async def get_record_holders(
+    request: Request,
+    response: Response,
     limit: int = Query(5, ge=1, le=50),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ) -> LeaderboardRecordsResponse:
     service = LeaderboardService(session)
+    not_modified = conditional_response(request, response, await _leaderboard_validators(request, service))
+    if not_modified is not None:
+        return not_modified
     records = await service.fetch_record_holders(limit)
-    return LeaderboardRecordsResponse(**records)
+    return json_response(records, headers=response.headers)
+
+
+@router.get("/consistency", response_model=LeaderboardConsistencyReport)
+async def check_leaderboard_consistency(
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_session),
+    api_key: Optional[str] = Header(default=None, alias="x-grps-api-key"),
+) -> LeaderboardConsistencyReport:
+    # Operator endpoint: it reads up to ``limit`` rows from the primary on every call.
+    _validate_api_key(api_key)
+    # Compared against the primary: the cache follows primary commits, a replica may lag behind it.
+    cache = get_leaderboard_cache()
+    if cache is None:
+        return LeaderboardConsistencyReport(enabled=False)
+    report = await cache.verify(session, limit)
+    return LeaderboardConsistencyReport(enabled=True, **report)
 
 
 __all__ = ["router"]
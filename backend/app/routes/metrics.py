@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from fastapi import APIRouter, HTTPException, Response, status
+
+from ..config import get_settings
+from ..db import CHECKOUT_WAIT_BUCKETS, pool_stats
+from ..metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    MetricFamily,
+    add_buckets,
+    dump_families,
+    load_families,
+    render,
+    with_labels,
+)
+from ..services.datastore_mirror import get_datastore_mirror
+from ..services.group_roles import get_group_role_cache
+from ..services.ingestion_buffer import BATCH_SIZE_BUCKETS, get_ingestion_buffer
+from ..services.invalidation import coordination_backend, coordination_dir, get_invalidation_bus
+from ..services.leaderboard_cache import get_leaderboard_cache
+from ..services.leadership import get_leader_election
+from ..services.outbox import get_outbox_dispatcher
+from ..services.points_engine import get_points_engine
+from ..services.punishment_expiry import get_punishment_expiry_scheduler
+from ..services.roblox_client import get_roblox_http_pool
+from ..services.roblox_resilience import get_roblox_resilience
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["metrics"])
+
+_STARTED_AT = time.time()
+_BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _snake(key: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
+
+
+def _export(
+    prefix: str,
+    stats: Mapping[str, Any],
+    *,
+    gauges: Iterable[str] = (),
+    counters: Iterable[str] = (),
+    **labels: str,
+) -> List[MetricFamily]:
+    """Turn selected ``snapshot_stats`` keys into gauges and counters named ``grps_<prefix>_<key>``."""
+
+    families = []
+    for kind, keys in (("gauge", gauges), ("counter", counters)):
+        for key in keys:
+            value = stats.get(key)
+            if value is None:
+                continue
+            name = f"grps_{prefix}_{_snake(key)}" + ("_total" if kind == "counter" else "")
+            family = MetricFamily(name, kind, f"{key} from the {prefix.replace('_', ' ')} stats.")
+            family.add(float(value), **labels)
+            families.append(family)
+    return families
+
+
+def _merge(families: Iterable[MetricFamily]) -> List[MetricFamily]:
+    # The same metric exported once per label set (pool, family) is rendered as one family.
+    merged: Dict[str, MetricFamily] = {}
+    for family in families:
+        existing = merged.get(family.name)
+        if existing is None:
+            merged[family.name] = family
+        else:
+            existing.samples.extend(family.samples)
+    return list(merged.values())
+
+
+def _database_families() -> List[MetricFamily]:
+    families: List[MetricFamily] = []
+    wait = MetricFamily(
+        "grps_db_pool_checkout_wait_seconds", "histogram", "Time to check a connection out of the pool."
+    )
+    for pool, snapshot in pool_stats().items():
+        if snapshot is None or "checkouts" not in snapshot:
+            continue
+        families += _export(
+            "db_pool",
+            snapshot,
+            gauges=("size", "checkedOut", "checkedIn", "overflow"),
+            counters=("timeouts",),
+            pool=pool,
+        )
+        add_buckets(
+            wait, CHECKOUT_WAIT_BUCKETS, list(snapshot["waitBuckets"].values()), snapshot["waitSecondsTotal"], {"pool": pool}
+        )
+    return families + [wait]
+
+
+def _service_families() -> List[MetricFamily]:
+    families: List[MetricFamily] = []
+
+    buffer = get_ingestion_buffer()
+    if buffer is not None:
+        families += _export(
+            "ingestion_buffer",
+            buffer.snapshot_stats(),
+            gauges=("pending", "pendingPlayers", "capacity"),
+            counters=(
+                "submitted",
+                "coalesced",
+                "rejected",
+                "failedFlushes",
+                "retried",
+                "deadLettered",
+                "dropped",
+                "flushedSnapshots",
+            ),
+        )
+        batches = MetricFamily(
+            "grps_ingestion_buffer_batch_size", "histogram", "Snapshots written per write-behind flush."
+        )
+        add_buckets(batches, BATCH_SIZE_BUCKETS, buffer.stats.batch_size_buckets, buffer.stats.flushed_snapshots)
+        families.append(batches)
+
+    dispatcher = get_outbox_dispatcher()
+    if dispatcher is not None:
+        families += _export(
+            "outbox",
+            dispatcher.snapshot_stats(),
+            gauges=("queued", "inFlight"),
+            counters=("claimed", "delivered", "retried", "deferred", "failed", "pruned"),
+        )
+
+    mirror = get_datastore_mirror()
+    if mirror is not None:
+        families += _export(
+            "datastore_mirror",
+            mirror.snapshot_stats(),
+            gauges=("pending",),
+            counters=("submitted", "coalesced", "skipped", "writes", "failedWrites", "forwarded", "evictions"),
+        )
+
+    scheduler = get_punishment_expiry_scheduler()
+    if scheduler is not None:
+        families += _export(
+            "punishment_expiry", scheduler.snapshot_stats(), gauges=("scheduled",), counters=("lifted", "failed")
+        )
+
+    cache = get_leaderboard_cache()
+    if cache is not None:
+        families += _export("leaderboard_cache", {"players": len(cache)}, gauges=("players",))
+
+    families += _export(
+        "points_engine", get_points_engine().snapshot_stats(), gauges=("players",), counters=("events", "loads")
+    )
+    families += _export(
+        "group_role_cache",
+        get_group_role_cache().snapshot_stats(),
+        gauges=("entries",),
+        counters=("hits", "misses", "coalesced", "invalidations"),
+    )
+
+    pool = get_roblox_http_pool()
+    if pool is not None:
+        families += _export(
+            "roblox_http",
+            pool.snapshot_stats(),
+            gauges=("openConnections",),
+            counters=("requests", "newConnections", "reusedRequests"),
+        )
+
+    for family, stats in get_roblox_resilience().snapshot_stats().items():
+        families += _export(
+            "roblox",
+            {**stats, "breakerState": _BREAKER_STATES.get(stats["breakerState"], 0)},
+            gauges=("breakerState",),
+            counters=("retries", "throttled", "rejected", "limiterWaits", "limiterWaitSeconds"),
+            family=family,
+        )
+
+    bus = get_invalidation_bus()
+    if bus is not None:
+        families += _export(
+            "invalidation",
+            bus.snapshot_stats(),
+            gauges=("peers",),
+            counters=("published", "messagesSent", "received", "dropped", "gaps"),
+        )
+    election = get_leader_election()
+    families += _export(
+        "worker",
+        {"leader": int(election is not None and election.leader), "startTimeSeconds": _STARTED_AT, "pid": os.getpid()},
+        gauges=("leader", "startTimeSeconds", "pid"),
+    )
+    return families
+
+
+def _local_families() -> List[MetricFamily]:
+    return REGISTRY.collect() + _merge(_database_families() + _service_families())
+
+
+# With several workers each one writes its families to ``<coordination dir>/metrics/<pid>.json``
+# every METRICS_SHARE_INTERVAL_SECONDS, and a scrape answered by any worker merges all of them.
+_share_dir: Optional[Path] = None
+_share_interval = 5.0
+_share_task: Optional[asyncio.Task[None]] = None
+
+
+def _worker_file(directory: Path, pid: int) -> Path:
+    return directory / f"{pid}.json"
+
+
+def _share_families(directory: Path) -> None:
+    try:
+        dump_families(_worker_file(directory, os.getpid()), _local_families())
+    except OSError as error:
+        logger.warning("Failed to share this worker's metrics: %s", error)
+
+
+async def _share_periodically(directory: Path, interval: float) -> None:
+    while True:
+        _share_families(directory)
+        await asyncio.sleep(interval)
+
+
+def _peer_families(directory: Path) -> List[MetricFamily]:
+    families: List[MetricFamily] = []
+    stale_before = time.time() - 3 * _share_interval
+    for path in directory.glob("*.json"):
+        if not path.stem.isdigit() or int(path.stem) == os.getpid():
+            continue
+        try:
+            if path.stat().st_mtime < stale_before:
+                # A worker that exited without removing its file.
+                path.unlink(missing_ok=True)
+                continue
+            families += with_labels(load_families(path), worker=path.stem)
+        except (OSError, ValueError) as error:
+            logger.debug("Skipping worker metrics in %s: %s", path, error)
+    return families
+
+
+def start_worker_metrics() -> Optional[asyncio.Task[None]]:
+    """Share this worker's metrics with the others when ``API_WORKERS > 1``."""
+
+    global _share_dir, _share_interval, _share_task
+    settings = get_settings()
+    if not settings.metrics_enabled or coordination_backend(settings) is None or _share_task is not None:
+        return _share_task
+    directory = coordination_dir(settings) / "metrics"
+    directory.mkdir(parents=True, exist_ok=True)
+    _share_dir, _share_interval = directory, settings.metrics_share_interval_seconds
+    _share_task = asyncio.create_task(_share_periodically(directory, _share_interval), name="grps-worker-metrics")
+    return _share_task
+
+
+async def stop_worker_metrics() -> None:
+    global _share_dir, _share_task
+    if _share_task is None:
+        return
+    _share_task.cancel()
+    try:
+        await _share_task
+    except asyncio.CancelledError:
+        pass
+    if _share_dir is not None:
+        _worker_file(_share_dir, os.getpid()).unlink(missing_ok=True)
+    _share_dir, _share_task = None, None
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    if not get_settings().metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="metrics are disabled")
+    families = _local_families()
+    if _share_dir is not None:
+        # Every worker's series, told apart by the ``worker`` label; peers' values are at most one interval old.
+        families = with_labels(families, worker=str(os.getpid())) + _peer_families(_share_dir)
+    body = render(_merge(families))
+    return Response(content=body, media_type=CONTENT_TYPE)
+
+
+__all__ = ["router", "start_worker_metrics", "stop_worker_metrics"]
@@ -1,26 +1,102 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import AsyncIterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import get_session
-from ..models import Player
-from ..schemas import PlayerWithContext
+from ..db import get_read_session, get_read_session_factory
+from ..http_cache import Validators, conditional_response, make_etag
+from ..models import Player, naive_utc
+from ..schemas import PlayerHistoryPage, PlayerWithContext
+from ..serialization import dumps, json_response
 from ..services.calculations import CalculationService
+from ..services.player_history import HistoryCursor, PlayerHistoryService, decode_history_cursor
 
 router = APIRouter(prefix="/players", tags=["players"])
 
 
 @router.get("/{user_id}", response_model=PlayerWithContext)
-async def get_player(user_id: int, session: AsyncSession = Depends(get_session)) -> PlayerWithContext:
-    result = await session.execute(select(Player).where(Player.user_id == user_id))
-    player = result.scalar_one_or_none()
-    if not player:
+async def get_player(
+    user_id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+) -> PlayerWithContext:
+    # Revalidation only needs the two timestamps, not the full row.
+    versions = (
+        await session.execute(select(Player.updated_at, Player.last_synced_at).where(Player.user_id == user_id))
+    ).first()
+    if versions is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="player not found")
     calculator = CalculationService()
-    payload = calculator.serialize_player(player)
-    return PlayerWithContext(**payload)
+    validators = Validators(
+        etag=make_etag("player", user_id, versions.updated_at, versions.last_synced_at, calculator.policy.fingerprint),
+        last_modified=max(moment for moment in versions if moment is not None),
+        cache_control="public, no-cache",
+    )
+    not_modified = conditional_response(request, response, validators)
+    if not_modified is not None:
+        return not_modified
+
+    result = await session.execute(select(Player).where(Player.user_id == user_id))
+    player = result.scalar_one()
+    return json_response(calculator.serialize_player(player), headers=response.headers)
+
+
+@router.get("/{user_id}/history", response_model=PlayerHistoryPage)
+async def get_player_history(
+    user_id: int,
+    since: Optional[datetime] = Query(None, description="Only snapshots recorded at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only snapshots recorded before this time"),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    format: Literal["json", "ndjson"] = Query("json"),
+    session: AsyncSession = Depends(get_read_session),
+    session_factory=Depends(get_read_session_factory),
+):
+    """Page through a player's snapshots oldest first, or stream all of them as NDJSON.
+
+    ``format=ndjson`` ignores ``limit`` and streams every matching snapshot (one
+    JSON object per line) from a server-side cursor.
+    """
+
+    exists = await session.scalar(select(Player.user_id).where(Player.user_id == user_id))
+    if exists is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="player not found")
+    try:
+        after = decode_history_cursor(cursor) if cursor else None
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)) from error
+    # ``created_at`` is naive UTC; comparing it with an aware bound (``...Z``) fails on asyncpg.
+    since, until = naive_utc(since), naive_utc(until)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_history(session_factory, user_id, since, until, after),
+            media_type="application/x-ndjson",
+        )
+
+    items, next_cursor = await PlayerHistoryService(session).page(
+        user_id, limit=limit, since=since, until=until, after=after
+    )
+    return json_response({"userId": user_id, "items": items, "nextCursor": next_cursor})
+
+
+async def _stream_history(
+    session_factory,
+    user_id: int,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    after: Optional[HistoryCursor],
+) -> AsyncIterator[bytes]:
+    # The request session is closed once the handler returns, so the stream owns its own.
+    async with session_factory() as session:
+        async for entry in PlayerHistoryService(session).stream(user_id, since=since, until=until, after=after):
+            yield dumps(entry) + b"\n"
 
 
 __all__ = ["router"]
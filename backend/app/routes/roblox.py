@@ -1,16 +1,30 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, Header, HTTPException, status
+from pydantic import ValidationError
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import get_settings
 from ..db import get_session
-from ..schemas import AutomationDecision, PlayerSnapshotPayload, SnapshotIngestResponse
+from ..models import naive_utc
+from ..schemas import (
+    AutomationDecision,
+    PlayerSnapshotPayload,
+    PointsEventBatchRequest,
+    PointsEventBatchResponse,
+    SnapshotBatchIngestResponse,
+    SnapshotBatchRequest,
+    SnapshotIngestResponse,
+    SnapshotQueuedResponse,
+)
+from ..serialization import json_response
 from ..services.automation import AutomationService
-from ..services.ingestion import IngestionService
+from ..services.ingestion import IngestionService, PendingSnapshot
+from ..services.ingestion_buffer import IngestionBufferFull, get_ingestion_buffer
+from ..services.points_engine import ACCEPTED, CAPPED, IGNORED, REJECTED, PointsEvent, PointsLedgerService
 
 router = APIRouter(prefix="/roblox", tags=["roblox"])
 
@@ -21,7 +35,11 @@ def _validate_api_key(api_key: Optional[str]) -> None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid api key")
 
 
-@router.post("/events/player-activity", response_model=SnapshotIngestResponse)
+@router.post(
+    "/events/player-activity",
+    response_model=SnapshotIngestResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": SnapshotQueuedResponse}},
+)
 async def ingest_player_activity(
     snapshot: PlayerSnapshotPayload,
     experience_key: Optional[str] = Header(default=None, alias="x-roblox-experience"),
@@ -33,18 +51,134 @@ async def ingest_player_activity(
 ) -> SnapshotIngestResponse:
     _validate_api_key(api_key)
 
+    buffer = get_ingestion_buffer()
+    if buffer is not None and not evaluate:
+        try:
+            queued = await buffer.submit(
+                PendingSnapshot(snapshot, experience_key=experience_key, actor_user_id=actor_user_id)
+            )
+        except IngestionBufferFull as error:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(error),
+                headers={"Retry-After": "1"},
+            ) from error
+        response = SnapshotQueuedResponse(userId=snapshot.user_id, pending=queued)
+        return json_response(response.model_dump(by_alias=True), status_code=status.HTTP_202_ACCEPTED)
+
     ingestion = IngestionService(session)
     automation = AutomationService(session)
 
+    if buffer is not None:
+        for earlier in await buffer.take(snapshot.user_id):
+            await ingestion.ingest(
+                earlier.snapshot,
+                experience_key=earlier.experience_key,
+                actor_user_id=earlier.actor_user_id,
+            )
+
     player = await ingestion.ingest(snapshot, experience_key=experience_key, actor_user_id=actor_user_id)
-    player_payload = ingestion.calculator.serialize_player(player)
 
     decision: Optional[AutomationDecision] = None
     if evaluate:
         decision = await automation.evaluate(player, apply=apply, actor_user_id=actor_user_id)
-        player_payload = ingestion.calculator.serialize_player(player)
 
-    return SnapshotIngestResponse(player=player_payload, decision=decision)
+    # Serialised once, after any automation changes have been applied.
+    return json_response(
+        {
+            "player": ingestion.calculator.serialize_player(player),
+            "decision": decision.model_dump(by_alias=True) if decision is not None else None,
+        }
+    )
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'body'}: {detail['msg']}" for detail in error.errors()
+    )
+
+
+@router.post("/events/player-activity:batch", response_model=SnapshotBatchIngestResponse)
+async def ingest_player_activity_batch(
+    batch: SnapshotBatchRequest,
+    experience_key: Optional[str] = Header(default=None, alias="x-roblox-experience"),
+    actor_user_id: Optional[int] = Header(default=None, alias="x-grps-actor"),
+    api_key: Optional[str] = Header(default=None, alias="x-grps-api-key"),
+    session: AsyncSession = Depends(get_session),
+) -> SnapshotBatchIngestResponse:
+    _validate_api_key(api_key)
+
+    results: list[Optional[Dict[str, Any]]] = [None] * len(batch.snapshots)
+    accepted: list[tuple[int, PendingSnapshot]] = []
+    for index, item in enumerate(batch.snapshots):
+        try:
+            snapshot = PlayerSnapshotPayload.model_validate(item)
+        except ValidationError as error:
+            raw_user_id = item.get("userId")
+            results[index] = {
+                "index": index,
+                "userId": raw_user_id if isinstance(raw_user_id, int) else None,
+                "status": "error",
+                "player": None,
+                "error": _format_validation_error(error),
+            }
+            continue
+        accepted.append(
+            (index, PendingSnapshot(snapshot, experience_key=experience_key, actor_user_id=actor_user_id))
+        )
+
+    ingestion = IngestionService(session)
+    outcomes = await ingestion.ingest_many([entry for _, entry in accepted])
+    for (index, entry), outcome in zip(accepted, outcomes):
+        results[index] = {
+            "index": index,
+            "userId": entry.snapshot.user_id,
+            "status": "created" if outcome.created else "unchanged" if outcome.unchanged else "updated",
+            "player": ingestion.calculator.serialize_player(outcome.player),
+            "error": None,
+        }
+
+    failed = sum(1 for result in results if result is not None and result["status"] == "error")
+    return json_response({"processed": len(accepted), "failed": failed, "results": results})
+
+
+@router.post("/events/points:batch", response_model=PointsEventBatchResponse)
+async def ingest_points_events(
+    batch: PointsEventBatchRequest,
+    api_key: Optional[str] = Header(default=None, alias="x-grps-api-key"),
+    session: AsyncSession = Depends(get_session),
+) -> PointsEventBatchResponse:
+    _validate_api_key(api_key)
+    if get_settings().points_source != "ledger":
+        # One owner for rank_points: snapshot totals and ledger awards would overwrite each other.
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="points events need POINTS_SOURCE=ledger; rank points currently come from snapshots",
+        )
+
+    events = [
+        PointsEvent(
+            user_id=item.user_id,
+            type=item.type,
+            magnitude=item.magnitude,
+            duration=item.duration,
+            occurred_at=naive_utc(item.occurred_at),
+            weight_key=item.weight_key,
+        )
+        for item in batch.events
+    ]
+    outcomes = await PointsLedgerService(session).record(events)
+    counts = {ACCEPTED: 0, CAPPED: 0, REJECTED: 0, IGNORED: 0}
+    for outcome in outcomes:
+        counts[outcome.status] += 1
+    return json_response(
+        {
+            "processed": len(outcomes),
+            **counts,
+            "applied": sum(outcome.applied for outcome in outcomes),
+            "results": [outcome.to_payload(index) for index, outcome in enumerate(outcomes)],
+        }
+    )
 
 
 __all__ = ["router"]
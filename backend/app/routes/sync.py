@@ -10,8 +10,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import get_settings
 from ..db import get_session
-from ..schemas import RobloxSyncRequest, RobloxSyncResponse
-from ..services.sync import RobloxSyncService
+from ..schemas import (
+    RobloxCrawlProgress,
+    RobloxCrawlRequest,
+    RobloxCrawlStatusResponse,
+    RobloxSyncRequest,
+    RobloxSyncResponse,
+    RobloxUniverseSyncReport,
+    RobloxUniverseSyncRequest,
+    RobloxUniverseSyncResponse,
+)
+from ..services.crawl import CrawlAlreadyRunning, LeaderboardCrawler, list_crawl_progress, start_crawl
+from ..services.sync import MultiUniverseSyncService, RobloxSyncService
+from .roblox import _validate_api_key
 
 router = APIRouter(prefix="/sync", tags=["sync"])
 
@@ -56,5 +67,80 @@ async def sync_roblox(
     return RobloxSyncResponse(updated=updated, created=created, next_cursor=next_cursor)
 
 
+@router.post("/roblox/universes", response_model=RobloxUniverseSyncResponse)
+async def sync_roblox_universes(
+    request: Request,
+    signature: Optional[str] = Header(default=None, alias="x-grps-signature"),
+    session: AsyncSession = Depends(get_session),
+) -> RobloxUniverseSyncResponse:
+    body = await request.body()
+    _verify_signature(signature, body)
+
+    try:
+        payload = RobloxUniverseSyncRequest.model_validate_json(body or b"{}")
+    except ValidationError as error:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=error.errors()) from error
+
+    service = MultiUniverseSyncService(session)
+    try:
+        reports = await service.sync(limit=payload.limit, cursors=payload.cursors, max_rounds=payload.max_rounds)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(error)) from error
+
+    return RobloxUniverseSyncResponse(
+        universes=[
+            RobloxUniverseSyncReport(
+                key=report.key,
+                universeId=report.universe_id,
+                pages=report.pages,
+                entries=report.entries,
+                applied=report.applied,
+                superseded=report.superseded,
+                skipped=report.skipped,
+                seconds=round(report.seconds, 3),
+                entriesPerSecond=report.entries_per_second,
+                nextCursor=report.next_cursor,
+                error=report.error,
+            )
+            for report in reports
+        ]
+    )
+
+
+@router.post("/roblox/crawl", response_model=RobloxCrawlProgress, status_code=status.HTTP_202_ACCEPTED)
+async def start_roblox_crawl(
+    request: Request,
+    signature: Optional[str] = Header(default=None, alias="x-grps-signature"),
+) -> RobloxCrawlProgress:
+    body = await request.body()
+    _verify_signature(signature, body)
+
+    try:
+        payload = RobloxCrawlRequest.model_validate_json(body or b"{}")
+    except ValidationError as error:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=error.errors()) from error
+
+    try:
+        crawler = LeaderboardCrawler(page_size=payload.limit)
+        progress = await start_crawl(crawler, restart=payload.restart)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(error)) from error
+    except CrawlAlreadyRunning as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error)) from error
+
+    return RobloxCrawlProgress(**progress.to_payload(running=True))
+
+
+@router.get("/roblox/crawl", response_model=RobloxCrawlStatusResponse)
+async def get_roblox_crawl_progress(
+    session: AsyncSession = Depends(get_session),
+    api_key: Optional[str] = Header(default=None, alias="x-grps-api-key"),
+) -> RobloxCrawlStatusResponse:
+    # There is no body to sign, so the status route takes the inbound API key instead.
+    _validate_api_key(api_key)
+    crawls = await list_crawl_progress(session)
+    return RobloxCrawlStatusResponse(crawls=crawls)
+
+
 __all__ = ["router"]
 
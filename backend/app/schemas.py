@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Dict, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, model_validator, validator
 
 AutomationAction = Literal["PROMOTE", "DEMOTE", "SUSPEND", "BAN", "NONE"]
 
@@ -67,6 +67,22 @@ class PlayerWithContext(PlayerRecord):
     decisions_blocked: bool = Field(False, alias="decisionsBlocked")
 
 
+class PlayerHistoryEntry(BaseModel):
+    id: int
+    created_at: datetime = Field(..., alias="createdAt")
+    source: str
+    experience_key: Optional[str] = Field(None, alias="experienceKey")
+    actor_user_id: Optional[int] = Field(None, alias="actorUserId")
+    content_hash: Optional[str] = Field(None, alias="contentHash")
+    snapshot: Dict[str, Any]
+
+
+class PlayerHistoryPage(BaseModel):
+    user_id: int = Field(..., alias="userId")
+    items: List[PlayerHistoryEntry]
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
+
+
 class AutomationDecision(BaseModel):
     action: AutomationAction
     reason: str
@@ -85,6 +101,30 @@ class SnapshotIngestResponse(BaseModel):
     decision: Optional[AutomationDecision] = None
 
 
+class SnapshotQueuedResponse(BaseModel):
+    queued: bool = True
+    user_id: int = Field(..., alias="userId")
+    pending: int
+
+
+class SnapshotBatchRequest(BaseModel):
+    snapshots: List[Dict[str, Any]] = Field(..., min_length=1, max_length=500)
+
+
+class SnapshotBatchItemResult(BaseModel):
+    index: int
+    user_id: Optional[int] = Field(None, alias="userId")
+    status: Literal["created", "updated", "unchanged", "error"]
+    player: Optional[PlayerWithContext] = None
+    error: Optional[str] = None
+
+
+class SnapshotBatchIngestResponse(BaseModel):
+    processed: int
+    failed: int
+    results: List[SnapshotBatchItemResult]
+
+
 class AutomationRequest(BaseModel):
     user_id: int = Field(..., alias="userId")
     actor_user_id: Optional[int] = Field(None, alias="actorUserId")
@@ -92,11 +132,110 @@ class AutomationRequest(BaseModel):
     reason: Optional[str] = None
 
 
+class AutomationBatchFilter(BaseModel):
+    ranks: Optional[List[str]] = None
+    min_rank_points: Optional[int] = Field(None, alias="minRankPoints")
+    max_rank_points: Optional[int] = Field(None, alias="maxRankPoints")
+    punishment_status: Optional[str] = Field(None, alias="punishmentStatus")
+    limit: int = Field(500, ge=1, le=5000)
+
+
+class AutomationBatchRequest(BaseModel):
+    user_ids: Optional[List[int]] = Field(None, alias="userIds", min_length=1, max_length=5000)
+    filter: Optional[AutomationBatchFilter] = None
+    actor_user_id: Optional[int] = Field(None, alias="actorUserId")
+    apply: bool = False
+    reason: Optional[str] = None
+    concurrency: Optional[int] = Field(None, ge=1, le=64)
+
+    @model_validator(mode="after")
+    def _require_target(self) -> "AutomationBatchRequest":
+        if (self.user_ids is None) == (self.filter is None):
+            raise ValueError("provide exactly one of userIds or filter")
+        return self
+
+
+class AutomationBatchItemResult(BaseModel):
+    user_id: int = Field(..., alias="userId")
+    status: Literal["applied", "evaluated", "not_found", "error"]
+    decision: Optional[AutomationDecision] = None
+    player: Optional[PlayerWithContext] = None
+    error: Optional[str] = None
+
+
+class AutomationBatchResponse(BaseModel):
+    processed: int
+    applied: int
+    failed: int
+    not_found: int = Field(..., alias="notFound")
+    results: List[AutomationBatchItemResult]
+
+
+class PointsEventPayload(BaseModel):
+    user_id: int = Field(..., alias="userId")
+    type: str = Field(..., min_length=1, max_length=64)
+    magnitude: float = 1.0
+    duration: Optional[float] = Field(None, ge=0)
+    occurred_at: Optional[datetime] = Field(None, alias="occurredAt")
+    weight_key: Optional[str] = Field(None, alias="weightKey", max_length=64)
+
+    class Config:
+        populate_by_name = True
+
+
+class PointsEventBatchRequest(BaseModel):
+    events: List[PointsEventPayload] = Field(..., min_length=1, max_length=10000)
+
+
+class PointsEventResult(BaseModel):
+    index: int
+    user_id: int = Field(..., alias="userId")
+    type: str
+    status: Literal["accepted", "capped", "rejected", "ignored"]
+    reason: Optional[str] = None
+    base_delta: float = Field(..., alias="baseDelta")
+    delta: float
+    applied: int
+
+
+class PointsEventBatchResponse(BaseModel):
+    processed: int
+    accepted: int
+    capped: int
+    rejected: int
+    ignored: int
+    applied: int
+    results: List[PointsEventResult]
+
+
+class GroupRoleStatus(BaseModel):
+    user_id: int = Field(..., alias="userId")
+    role: Optional[Dict[str, Any]] = None
+    db_rank: Optional[str] = Field(None, alias="dbRank")
+    expected_role_id: Optional[int] = Field(None, alias="expectedRoleId")
+    roblox_rank: Optional[str] = Field(None, alias="robloxRank")
+    in_sync: Optional[bool] = Field(None, alias="inSync")
+
+
 class HealthStatus(BaseModel):
     status: Literal["ok", "degraded", "down"]
     timestamp: datetime
 
 
+class IngestionBufferStatus(BaseModel):
+    enabled: bool
+    stats: Dict[str, Any] = Field(default_factory=dict)
+
+
+class HttpPoolStatus(BaseModel):
+    enabled: bool
+    stats: Dict[str, Any] = Field(default_factory=dict)
+
+
+class RobloxLimitsStatus(BaseModel):
+    families: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+
+
 class LeaderboardPlayer(BaseModel):
     user_id: int = Field(..., alias="userId")
     username: str
@@ -105,6 +244,7 @@ class LeaderboardPlayer(BaseModel):
     kos: Optional[int] = None
     wos: Optional[int] = None
     last_synced_at: Optional[datetime] = Field(None, alias="lastSyncedAt")
+    position: Optional[int] = None
 
 
 class LeaderboardTopResponse(BaseModel):
@@ -112,6 +252,19 @@ class LeaderboardTopResponse(BaseModel):
     last_synced_at: Optional[datetime] = Field(None, alias="lastSyncedAt")
 
 
+class LeaderboardPageResponse(BaseModel):
+    players: list[LeaderboardPlayer]
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
+
+
+class LeaderboardAroundResponse(BaseModel):
+    position: int
+    total_players: int = Field(..., alias="totalPlayers")
+    player: LeaderboardPlayer
+    above: list[LeaderboardPlayer]
+    below: list[LeaderboardPlayer]
+
+
 class LeaderboardRecord(BaseModel):
     user_id: int = Field(..., alias="userId")
     username: str
@@ -124,6 +277,15 @@ class LeaderboardRecordsResponse(BaseModel):
     wos: list[LeaderboardRecord]
 
 
+class LeaderboardConsistencyReport(BaseModel):
+    enabled: bool
+    consistent: Optional[bool] = None
+    checked: int = 0
+    database_players: int = Field(0, alias="databasePlayers")
+    cached_players: int = Field(0, alias="cachedPlayers")
+    mismatches: List[Dict[str, Any]] = Field(default_factory=list)
+
+
 class RobloxSyncRequest(BaseModel):
     activity: Literal["leaderboard"]
     limit: int = Field(100, ge=1, le=500)
@@ -136,21 +298,98 @@ class RobloxSyncResponse(BaseModel):
     next_cursor: Optional[str] = Field(None, alias="nextCursor")
 
 
+class RobloxUniverseSyncRequest(BaseModel):
+    limit: int = Field(100, ge=1, le=500)
+    cursors: Dict[str, Optional[str]] = Field(default_factory=dict)
+    max_rounds: Optional[int] = Field(1, alias="maxRounds", ge=1)
+
+
+class RobloxUniverseSyncReport(BaseModel):
+    key: str
+    universe_id: int = Field(..., alias="universeId")
+    pages: int
+    entries: int
+    applied: int
+    superseded: int
+    skipped: int
+    seconds: float
+    entries_per_second: float = Field(..., alias="entriesPerSecond")
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
+    error: Optional[str] = None
+
+
+class RobloxUniverseSyncResponse(BaseModel):
+    universes: List[RobloxUniverseSyncReport]
+
+
+class RobloxCrawlRequest(BaseModel):
+    limit: int = Field(100, ge=1, le=500)
+    restart: bool = False
+
+
+class RobloxCrawlProgress(BaseModel):
+    crawl_key: str = Field(..., alias="crawlKey")
+    status: str
+    running: bool
+    cursor: Optional[str] = None
+    pages: int
+    entries: int
+    created: int
+    updated: int
+    errors: int
+    last_error: Optional[str] = Field(None, alias="lastError")
+    entries_per_second: Optional[float] = Field(None, alias="entriesPerSecond")
+    started_at: Optional[datetime] = Field(None, alias="startedAt")
+    updated_at: Optional[datetime] = Field(None, alias="updatedAt")
+    completed_at: Optional[datetime] = Field(None, alias="completedAt")
+
+
+class RobloxCrawlStatusResponse(BaseModel):
+    crawls: List[RobloxCrawlProgress]
+
+
 __all__ = [
     "AutomationAction",
+    "AutomationBatchFilter",
+    "AutomationBatchItemResult",
+    "AutomationBatchRequest",
+    "AutomationBatchResponse",
     "AutomationDecision",
     "AutomationDecisionResponse",
     "AutomationRequest",
     "ExperienceContext",
+    "GroupRoleStatus",
     "HealthStatus",
+    "IngestionBufferStatus",
+    "HttpPoolStatus",
+    "RobloxLimitsStatus",
+    "PlayerHistoryEntry",
+    "PlayerHistoryPage",
     "PlayerRecord",
     "PlayerSnapshotPayload",
+    "PointsEventBatchRequest",
+    "PointsEventBatchResponse",
+    "PointsEventPayload",
+    "PointsEventResult",
     "PlayerWithContext",
     "SnapshotIngestResponse",
+    "SnapshotQueuedResponse",
+    "SnapshotBatchRequest",
+    "SnapshotBatchItemResult",
+    "SnapshotBatchIngestResponse",
     "LeaderboardPlayer",
     "LeaderboardTopResponse",
+    "LeaderboardPageResponse",
+    "LeaderboardAroundResponse",
     "LeaderboardRecord",
     "LeaderboardRecordsResponse",
+    "LeaderboardConsistencyReport",
     "RobloxSyncRequest",
     "RobloxSyncResponse",
+    "RobloxUniverseSyncRequest",
+    "RobloxUniverseSyncReport",
+    "RobloxUniverseSyncResponse",
+    "RobloxCrawlRequest",
+    "RobloxCrawlProgress",
+    "RobloxCrawlStatusResponse",
 ]
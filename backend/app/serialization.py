@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Mapping, Optional
+
+from fastapi import Response, status
+
+from .metrics import current_timings
+
+try:  # pragma: no cover - exercised implicitly depending on the environment
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode plain dicts/lists (datetimes and enums included) to compact JSON bytes.
+
+    Uses orjson when it is installed and the standard library otherwise; both
+    emit naive datetimes in the ISO format Pydantic uses.
+    """
+
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def json_response(
+    content: Any,
+    *,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Return ``content`` as an already-encoded JSON response.
+
+    Handlers build response dicts in their final camelCase shape and return this
+    directly, which skips FastAPI's ``response_model`` validation and the second
+    encoding pass. ``response_model`` stays on the route for the OpenAPI schema.
+    """
+
+    started = time.perf_counter()
+    body = dumps(content)
+    timings = current_timings()
+    if timings is not None:
+        timings.serialize_seconds += time.perf_counter() - started
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=dict(headers) if headers is not None else None,
+    )
+
+
+__all__ = ["dumps", "json_response"]
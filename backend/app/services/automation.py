@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import secrets
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import logging
-from typing import Optional
+from typing import List, Optional, Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,6 +13,9 @@ from ..config import get_settings
 from ..models import Player
 from ..schemas import AutomationDecision
 from .calculations import CalculationService
+from .datastore_mirror import get_datastore_mirror, mirror_payload, stage_mirror_write
+from .outbox import DATASTORE_WRITE, GROUP_ROLE, enqueue_outbox
+from .player_events import track_player_change
 from .rank_policy import RankPolicy, get_rank_policy
 from .roblox_client import RobloxClient
 
@@ -18,8 +23,29 @@ from .roblox_client import RobloxClient
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class DecisionOutcome:
+    player: Player
+    decision: AutomationDecision
+    applied: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class LiftOutcome:
+    player: Player
+    restored_rank: Optional[str] = None
+    applied: bool = False
+    error: Optional[str] = None
+
+
 class AutomationService:
-    """Determines and optionally executes GRPS automation decisions."""
+    """Determines and optionally executes GRPS automation decisions.
+
+    With ``ROBLOX_OUTBOX_ENABLED`` the Roblox side effects are queued in the
+    ``roblox_outbox`` table inside the caller's transaction instead of being
+    sent inline; the outbox dispatcher delivers them after the commit.
+    """
 
     def __init__(
         self,
@@ -35,23 +61,138 @@ class AutomationService:
         self.settings = get_settings()
 
     async def evaluate(self, player: Player, *, apply: bool = False, reason: Optional[str] = None, actor_user_id: Optional[int] = None) -> AutomationDecision:
+        decision = self._decide(player, apply=apply, reason=reason)
+        if apply and decision.action != "NONE":
+            await self._apply_decision(player, decision, actor_user_id=actor_user_id)
+        return decision
+
+    async def evaluate_many(
+        self,
+        players: Sequence[Player],
+        *,
+        apply: bool = False,
+        reason: Optional[str] = None,
+        actor_user_id: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> List[DecisionOutcome]:
+        """Evaluate many players and apply their decisions with bounded Roblox concurrency.
+
+        Group role updates run at most ``concurrency`` at a time. Players whose
+        update succeeded are flushed together; a failed update leaves that player
+        untouched and is reported on its outcome instead of aborting the batch.
+        """
+
+        outcomes = [DecisionOutcome(player, self._decide(player, apply=apply, reason=reason)) for player in players]
+        pending = [outcome for outcome in outcomes if apply and outcome.decision.action != "NONE"]
+        if not pending:
+            return outcomes
+
+        semaphore = asyncio.Semaphore(concurrency or self.settings.automation_batch_concurrency)
+
+        async def _stage(outcome: DecisionOutcome) -> None:
+            async with semaphore:
+                try:
+                    await self._stage_decision(outcome.player, outcome.decision)
+                    outcome.applied = True
+                except Exception as exc:
+                    logger.warning("Failed to apply %s for %s: %s", outcome.decision.action, outcome.player.user_id, exc)
+                    outcome.error = str(exc) or exc.__class__.__name__
+
+        await asyncio.gather(*(_stage(outcome) for outcome in pending))
+        applied = [outcome.player for outcome in pending if outcome.applied]
+        if not applied:
+            return outcomes
+
+        await self.session.flush()
+        for player in applied:
+            track_player_change(self.session, player)
+
+        async def _publish(player: Player) -> None:
+            async with semaphore:
+                await self._publish_player_state(player)
+
+        await asyncio.gather(*(_publish(player) for player in applied))
+        return outcomes
+
+    async def lift_punishments(self, players: Sequence[Player], *, concurrency: Optional[int] = None) -> List[LiftOutcome]:
+        """Clear expired punishments and move suspended players back to their rank.
+
+        A player on a punishment rank returns to ``previous_rank``, or to the
+        rank their points earn when that is unknown, through the same group
+        role path as promotions. Failures are reported per player, as in
+        :meth:`evaluate_many`, and leave the player untouched. The warnings the
+        served suspension answered for are recorded as ``warningsServed``, so
+        :meth:`_resolve_action` does not suspend the player again for them.
+        """
+
+        outcomes = [LiftOutcome(player) for player in players]
+        if not outcomes:
+            return outcomes
+        semaphore = asyncio.Semaphore(concurrency or self.settings.automation_batch_concurrency)
+
+        async def _lift(outcome: LiftOutcome) -> None:
+            player = outcome.player
+            async with semaphore:
+                try:
+                    current = self.policy.get_rank(player.rank)
+                    if current is not None and current.is_punishment:
+                        restored = self._restored_rank(player)
+                        if restored is None:
+                            raise ValueError(f"No rank to restore {player.user_id} to")
+                        await self._transition_rank(player, restored)
+                        outcome.restored_rank = restored
+                    player.punishment_status = None
+                    player.punishment_expires_at = None
+                    # The game keeps reporting the warning count, so it is not reset here.
+                    player.metadata_payload = {**(player.metadata_payload or {}), "warningsServed": player.warnings or 0}
+                    player.last_synced_at = datetime.utcnow()
+                    outcome.applied = True
+                except Exception as exc:
+                    logger.warning("Failed to lift the punishment of %s: %s", player.user_id, exc)
+                    outcome.error = str(exc) or exc.__class__.__name__
+
+        await asyncio.gather(*(_lift(outcome) for outcome in outcomes))
+        lifted = [outcome.player for outcome in outcomes if outcome.applied]
+        if not lifted:
+            return outcomes
+
+        await self.session.flush()
+        for player in lifted:
+            track_player_change(self.session, player)
+
+        async def _publish(player: Player) -> None:
+            async with semaphore:
+                await self._publish_player_state(player)
+
+        await asyncio.gather(*(_publish(player) for player in lifted))
+        return outcomes
+
+    def _restored_rank(self, player: Player) -> Optional[str]:
+        previous = self.policy.get_rank(player.previous_rank) if player.previous_rank else None
+        if previous is not None and not previous.is_punishment:
+            return previous.name
+        earned = self.policy.rank_for_points(player.rank_points)
+        if earned is not None and earned.is_punishment:
+            earned = self.policy.next_rank_by_name(earned.name)
+        return earned.name if earned else None
+
+    def _decide(self, player: Player, *, apply: bool, reason: Optional[str]) -> AutomationDecision:
         action, target_rank, message = self._resolve_action(player)
-        decision = AutomationDecision(
+        return AutomationDecision(
             action=action,
-            target_rank=target_rank,
+            targetRank=target_rank,
             reason=reason or message,
             apply=apply,
-            request_id=secrets.token_hex(8),
+            requestId=secrets.token_hex(8),
         )
-        if apply and decision.action != "NONE":
-            await self._apply_decision(player, decision, actor_user_id=actor_user_id)
-        return decision
 
     def _resolve_action(self, player: Player) -> tuple[str, Optional[str], str]:
         punishments = player.punishment_status or ""
         if player.warnings >= 7 or punishments == "Punishment_Severe":
             return "BAN", None, "Warnings exceed severe threshold"
-        if player.warnings >= 4 or punishments == "Trial_Punishment":
+        # Warnings already answered by a served (lifted) suspension do not trigger another one.
+        served = int((player.metadata_payload or {}).get("warningsServed", 0))
+        if (player.warnings >= 4 and player.warnings > served) or punishments == "Trial_Punishment":
             if player.rank != "Suspended":
                 return "SUSPEND", "Suspended", "Trial punishment in effect"
             return "NONE", None, "Player already suspended"
@@ -69,6 +210,14 @@ class AutomationService:
         return "NONE", None, "No action required"
 
     async def _apply_decision(self, player: Player, decision: AutomationDecision, *, actor_user_id: Optional[int] = None) -> None:
+        await self._stage_decision(player, decision)
+        await self.session.flush()
+        track_player_change(self.session, player)
+        await self._publish_player_state(player)
+
+    async def _stage_decision(self, player: Player, decision: AutomationDecision) -> None:
+        """Update the group role (or queue it) and the player in memory; nothing is flushed."""
+
         if decision.action == "SUSPEND":
             await self._transition_rank(player, "Suspended")
             player.punishment_status = "Trial_Punishment"
@@ -80,8 +229,6 @@ class AutomationService:
         elif decision.action == "BAN":
             player.punishment_status = "Punishment_Severe"
         player.last_synced_at = datetime.utcnow()
-        await self.session.flush()
-        await self._publish_player_state(player)
 
     async def _transition_rank(self, player: Player, rank_name: str) -> None:
         role = self.policy.get_rank(rank_name)
@@ -89,7 +236,10 @@ class AutomationService:
             raise ValueError(f"Unknown rank {rank_name}")
         if role.role_id is None:
             raise ValueError(f"Rank {rank_name} missing roleId in configuration")
-        await self.roblox.update_group_role(player.user_id, role.role_id)
+        if self.settings.roblox_outbox_enabled:
+            enqueue_outbox(self.session, player.user_id, GROUP_ROLE, {"roleId": role.role_id, "rank": rank_name})
+        else:
+            await self.roblox.update_group_role(player.user_id, role.role_id)
         player.previous_rank = player.rank
         player.rank = rank_name
 
@@ -102,13 +252,27 @@ class AutomationService:
         scope = settings.datastore_scope or "global"
         key = f"{settings.datastore_key_prefix}{player.user_id}"
 
-        payload = self.calculator.serialize_player(player)
-        serialised = {}
-        for field, value in payload.items():
-            if isinstance(value, datetime):
-                serialised[field] = value.isoformat()
-            else:
-                serialised[field] = value
+        serialised = mirror_payload(self.calculator, player)
+        if get_datastore_mirror() is not None:
+            # The mirror debounces and coalesces writes per key once the transaction commits, then
+            # writes them itself or, with ROBLOX_OUTBOX_ENABLED, through the outbox.
+            stage_mirror_write(self.session, player.user_id, serialised)
+            return
+
+        if settings.roblox_outbox_enabled:
+            enqueue_outbox(
+                self.session,
+                player.user_id,
+                DATASTORE_WRITE,
+                {
+                    "universeId": settings.default_universe_id,
+                    "datastore": datastore,
+                    "scope": scope,
+                    "key": key,
+                    "value": serialised,
+                },
+            )
+            return
 
         try:
             await self.roblox.write_datastore(
@@ -122,4 +286,4 @@ class AutomationService:
             logger.warning("Failed to push player state to Roblox datastore: %s", exc)
 
 
-__all__ = ["AutomationService"]
+__all__ = ["AutomationService", "DecisionOutcome", "LiftOutcome"]
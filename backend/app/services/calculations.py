@@ -42,12 +42,28 @@ class CalculationService:
             "decisions_blocked": decisions_blocked,
         }
 
-    def apply_snapshot(self, player: Player, snapshot: PlayerSnapshotPayload) -> Player:
+    def apply_snapshot(self, player: Player, snapshot: PlayerSnapshotPayload, *, include_points: bool = True) -> Player:
+        """Copy a snapshot onto ``player``.
+
+        With ``include_points=False`` (``POINTS_SOURCE=ledger``) the snapshot's
+        ``rankPoints`` is ignored: ``rank_points`` is left to the points engine
+        and a points-earned rank is derived from the stored total. Punishment
+        and privileged ranks reported by the game are still taken as sent.
+        """
+
+        if not include_points:
+            points = player.rank_points or 0
+            rank = snapshot.rank
+            if rank is None or self.policy.is_earned(rank):
+                earned = self.policy.earned_rank_for_points(points)
+                rank = earned.name if earned else rank
+            snapshot = snapshot.model_copy(update={"rank_points": points, "rank": rank})
         payload = self.build_player_record(snapshot)
         player.username = payload["username"]
         player.display_name = payload["display_name"]
         player.rank = payload["rank"]
-        player.rank_points = payload["rank_points"]
+        if include_points:
+            player.rank_points = payload["rank_points"]
         player.kos = payload["kos"]
         player.wos = payload["wos"]
         player.warnings = payload["warnings"]
@@ -57,7 +73,8 @@ class CalculationService:
         player.privileged = bool(payload["privileged"])
         player.previous_rank = payload["previous_rank"]
         player.next_rank = payload["next_rank"]
-        player.metadata_payload = {"decisionsBlocked": payload["decisions_blocked"]}
+        # Keep keys other writers own, such as the universe that last synced the player.
+        player.metadata_payload = {**(player.metadata_payload or {}), "decisionsBlocked": payload["decisions_blocked"]}
         return player
 
     def serialize_player(self, player: Player) -> dict:
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timedelta
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import Settings, get_settings
+from ..db import session_scope, upsert_insert
+from ..models import PlayerSnapshot, PlayerSnapshotDaily, PlayerSnapshotHourly
+from .snapshot_store import apply_delta, load_base_payload, rebuild_payloads
+
+logger = logging.getLogger(__name__)
+
+RollupKey = Tuple[int, datetime]
+
+
+def _hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class SnapshotRollup:
+    """In-memory form of one hourly or daily rollup row."""
+
+    user_id: int
+    bucket_start: datetime
+    samples: int
+    first_snapshot_at: datetime
+    last_snapshot_at: datetime
+    min_rank_points: int
+    max_rank_points: int
+    last_rank_points: int
+    first_kos: int
+    last_kos: int
+    kos_delta: int
+    first_wos: int
+    last_wos: int
+    wos_delta: int
+    first_rank: Optional[str]
+    last_rank: Optional[str]
+    rank_transitions: int
+
+    @classmethod
+    def from_snapshot(cls, user_id: int, bucket_start: datetime, created_at: datetime, payload: Dict[str, Any]) -> "SnapshotRollup":
+        points = int(payload.get("rank_points") or 0)
+        kos = int(payload.get("kos") or 0)
+        wos = int(payload.get("wos") or 0)
+        rank = payload.get("rank")
+        return cls(
+            user_id=user_id,
+            bucket_start=bucket_start,
+            samples=1,
+            first_snapshot_at=created_at,
+            last_snapshot_at=created_at,
+            min_rank_points=points,
+            max_rank_points=points,
+            last_rank_points=points,
+            first_kos=kos,
+            last_kos=kos,
+            kos_delta=0,
+            first_wos=wos,
+            last_wos=wos,
+            wos_delta=0,
+            first_rank=rank,
+            last_rank=rank,
+            rank_transitions=0,
+        )
+
+    @classmethod
+    def from_row(cls, row: Any) -> "SnapshotRollup":
+        return cls(**{field.name: getattr(row, field.name) for field in fields(cls)})
+
+    def merge(self, other: "SnapshotRollup") -> "SnapshotRollup":
+        """Combine two rollups of the same bucket, whichever order they cover."""
+
+        earlier, later = (self, other) if self.first_snapshot_at <= other.first_snapshot_at else (other, self)
+        transition = int(
+            earlier.last_rank is not None and later.first_rank is not None and earlier.last_rank != later.first_rank
+        )
+        return SnapshotRollup(
+            user_id=self.user_id,
+            bucket_start=self.bucket_start,
+            samples=earlier.samples + later.samples,
+            first_snapshot_at=earlier.first_snapshot_at,
+            last_snapshot_at=later.last_snapshot_at,
+            min_rank_points=min(earlier.min_rank_points, later.min_rank_points),
+            max_rank_points=max(earlier.max_rank_points, later.max_rank_points),
+            last_rank_points=later.last_rank_points,
+            first_kos=earlier.first_kos,
+            last_kos=later.last_kos,
+            kos_delta=later.last_kos - earlier.first_kos,
+            first_wos=earlier.first_wos,
+            last_wos=later.last_wos,
+            wos_delta=later.last_wos - earlier.first_wos,
+            first_rank=earlier.first_rank,
+            last_rank=later.last_rank,
+            rank_transitions=earlier.rank_transitions + later.rank_transitions + transition,
+        )
+
+
+@dataclass
+class CompactionReport:
+    cutoff: datetime
+    batches: int = 0
+    snapshots: int = 0
+    hourly_rows: int = 0
+    daily_rows: int = 0
+    keyframes_promoted: int = 0
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {
+            "cutoff": self.cutoff.isoformat(),
+            "batches": self.batches,
+            "snapshots": self.snapshots,
+            "hourlyRows": self.hourly_rows,
+            "dailyRows": self.daily_rows,
+            "keyframesPromoted": self.keyframes_promoted,
+        }
+
+
+class SnapshotCompactor:
+    """Rolls raw snapshots older than ``retention`` into hourly and daily aggregates.
+
+    Each batch of at most ``batch_size`` raw rows is aggregated, merged into the
+    rollup tables and deleted in its own transaction, so no single transaction
+    holds locks for long. In delta storage mode the first surviving row of each
+    player is rewritten as a keyframe before its predecessors are deleted.
+    """
+
+    def __init__(
+        self,
+        *,
+        retention: timedelta,
+        batch_size: int = 1000,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = session_scope,
+    ) -> None:
+        self.retention = retention
+        self.batch_size = batch_size
+        self._session_factory = session_factory
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SnapshotCompactor":
+        return cls(
+            retention=timedelta(hours=settings.snapshot_retention_hours),
+            batch_size=settings.snapshot_compaction_batch_size,
+        )
+
+    async def run(self, *, now: Optional[datetime] = None, max_batches: Optional[int] = None) -> CompactionReport:
+        report = CompactionReport(cutoff=(now or datetime.utcnow()) - self.retention)
+        while max_batches is None or report.batches < max_batches:
+            async with self._session_factory() as session:
+                compacted = await self._compact_batch(session, report)
+            if not compacted:
+                break
+        return report
+
+    async def _compact_batch(self, session: AsyncSession, report: CompactionReport) -> int:
+        statement = (
+            select(PlayerSnapshot)
+            .where(PlayerSnapshot.created_at < report.cutoff)
+            .order_by(PlayerSnapshot.id)
+            .limit(self.batch_size)
+        )
+        rows = (await session.execute(statement)).scalars().all()
+        if not rows:
+            return 0
+
+        chains: Dict[int, List[PlayerSnapshot]] = {}
+        for row in rows:
+            chains.setdefault(row.user_id, []).append(row)
+
+        hourly: Dict[RollupKey, SnapshotRollup] = {}
+        daily: Dict[RollupKey, SnapshotRollup] = {}
+        latest: Dict[int, Dict[str, Any]] = {}
+        for user_id, chain in chains.items():
+            base = None
+            if chain[0].is_delta:
+                base = await load_base_payload(session, user_id, chain[0].id)
+            for row, payload in rebuild_payloads(chain, base):
+                for rollups, bucket_start in ((hourly, _hour(row.created_at)), (daily, _day(row.created_at))):
+                    sample = SnapshotRollup.from_snapshot(user_id, bucket_start, row.created_at, payload)
+                    current = rollups.get((user_id, bucket_start))
+                    rollups[(user_id, bucket_start)] = sample if current is None else current.merge(sample)
+                latest[user_id] = payload
+
+        ids = [row.id for row in rows]
+        report.keyframes_promoted += await self._promote_successors(session, ids, latest)
+        report.hourly_rows += await self._merge_rollups(session, PlayerSnapshotHourly, hourly)
+        report.daily_rows += await self._merge_rollups(session, PlayerSnapshotDaily, daily)
+        await session.execute(delete(PlayerSnapshot).where(PlayerSnapshot.id.in_(ids)))
+        report.batches += 1
+        report.snapshots += len(rows)
+        return len(rows)
+
+    async def _promote_successors(self, session: AsyncSession, ids: List[int], latest: Dict[int, Dict[str, Any]]) -> int:
+        """Rewrite the first surviving row of each player as a keyframe when it is a delta."""
+
+        successors = (
+            select(func.min(PlayerSnapshot.id))
+            .where(PlayerSnapshot.user_id.in_(list(latest)), PlayerSnapshot.id.notin_(ids))
+            .group_by(PlayerSnapshot.user_id)
+        )
+        statement = select(PlayerSnapshot.id, PlayerSnapshot.user_id, PlayerSnapshot.payload).where(
+            PlayerSnapshot.id.in_(successors), PlayerSnapshot.is_delta.is_(True)
+        )
+        promotions = []
+        for row in (await session.execute(statement)).all():
+            payload = apply_delta(latest[row.user_id], row.payload)
+            promotions.append({"id": row.id, "payload": payload, "is_delta": False})
+        if promotions:
+            await session.execute(update(PlayerSnapshot), promotions)
+        return len(promotions)
+
+    async def _merge_rollups(
+        self,
+        session: AsyncSession,
+        model: Type[Any],
+        rollups: Dict[RollupKey, SnapshotRollup],
+    ) -> int:
+        if not rollups:
+            return 0
+
+        user_ids = {user_id for user_id, _ in rollups}
+        buckets = {bucket_start for _, bucket_start in rollups}
+        existing = await session.execute(
+            select(model).where(model.user_id.in_(user_ids), model.bucket_start.in_(buckets))
+        )
+        for row in existing.scalars():
+            key = (row.user_id, row.bucket_start)
+            if key in rollups:
+                rollups[key] = SnapshotRollup.from_row(row).merge(rollups[key])
+
+        table = model.__table__
+        statement = upsert_insert(session)(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.bucket_start],
+            set_={
+                column.key: statement.excluded[column.key]
+                for column in table.columns
+                if column.key not in {"user_id", "bucket_start"}
+            },
+        )
+        await session.execute(statement, [asdict(rollup) for rollup in rollups.values()])
+        return len(rollups)
+
+
+_task: Optional[asyncio.Task[None]] = None
+
+
+async def _run_periodically(compactor: SnapshotCompactor, interval: float) -> None:
+    while True:
+        try:
+            report = await compactor.run()
+            if report.snapshots:
+                logger.info("Compacted snapshots: %s", report.to_payload())
+        except Exception:
+            logger.exception("Snapshot compaction failed")
+        await asyncio.sleep(interval)
+
+
+def start_snapshot_compaction() -> Optional[asyncio.Task[None]]:
+    global _task
+    settings = get_settings()
+    if not settings.snapshot_compaction_enabled or _task is not None:
+        return _task
+    compactor = SnapshotCompactor.from_settings(settings)
+    _task = asyncio.create_task(
+        _run_periodically(compactor, settings.snapshot_compaction_interval_seconds),
+        name="grps-snapshot-compaction",
+    )
+    return _task
+
+
+async def stop_snapshot_compaction() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
+
+
+__all__ = [
+    "CompactionReport",
+    "SnapshotCompactor",
+    "SnapshotRollup",
+    "start_snapshot_compaction",
+    "stop_snapshot_compaction",
+]
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..db import session_scope, upsert_insert
+from ..models import SyncCheckpoint
+from .roblox_client import RobloxClient
+from .sync import RobloxSyncService
+
+logger = logging.getLogger(__name__)
+
+_PAGES_DONE = object()
+
+
+class CrawlAlreadyRunning(RuntimeError):
+    """Raised when a crawl for the same datastore is already in progress, in this worker or another one."""
+
+
+@dataclass
+class CrawlProgress:
+    crawl_key: str
+    status: str = "running"
+    cursor: Optional[str] = None
+    pages: int = 0
+    entries: int = 0
+    created: int = 0
+    updated: int = 0
+    errors: int = 0
+    last_error: Optional[str] = None
+    resumed: bool = False
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    run_entries: int = 0
+    run_started: float = field(default_factory=time.monotonic)
+
+    @property
+    def entries_per_second(self) -> float:
+        elapsed = time.monotonic() - self.run_started
+        return round(self.run_entries / elapsed, 2) if elapsed > 0 else 0.0
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint: SyncCheckpoint) -> "CrawlProgress":
+        return cls(
+            crawl_key=checkpoint.crawl_key,
+            status=checkpoint.status,
+            cursor=checkpoint.cursor,
+            pages=checkpoint.pages,
+            entries=checkpoint.entries,
+            created=checkpoint.created,
+            updated=checkpoint.updated,
+            errors=checkpoint.errors,
+            last_error=checkpoint.last_error,
+            started_at=checkpoint.started_at,
+            updated_at=checkpoint.updated_at,
+            completed_at=checkpoint.completed_at,
+        )
+
+    def to_payload(self, *, running: bool) -> Dict[str, Any]:
+        return {
+            "crawlKey": self.crawl_key,
+            "status": self.status,
+            "running": running,
+            "cursor": self.cursor,
+            "pages": self.pages,
+            "entries": self.entries,
+            "created": self.created,
+            "updated": self.updated,
+            "errors": self.errors,
+            "lastError": self.last_error,
+            "entriesPerSecond": self.entries_per_second if running else None,
+            "startedAt": self.started_at,
+            "updatedAt": self.updated_at,
+            "completedAt": self.completed_at,
+        }
+
+
+class LeaderboardCrawler:
+    """Walks every cursor page of the leaderboard datastore and checkpoints after each page.
+
+    Listing the next page overlaps with reading and ingesting the current one.
+    Each page is ingested in its own transaction together with the checkpoint
+    row, so an interrupted crawl resumes from the last committed cursor.
+
+    The checkpoint row is also the lock: a crawl starts by moving it to
+    ``running`` with a conditional update, so only one worker crawls a
+    datastore at a time. A ``running`` row that has not advanced for
+    ``stale_after`` seconds belongs to a worker that died and may be taken over.
+    """
+
+    def __init__(
+        self,
+        *,
+        client: Optional[RobloxClient] = None,
+        page_size: int = 100,
+        universe_id: Optional[int] = None,
+        stale_after: float = 600.0,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = session_scope,
+    ) -> None:
+        self.settings = get_settings()
+        self.client = client or RobloxClient()
+        self.page_size = page_size
+        self.universe_id = universe_id or self.settings.default_universe_id
+        if self.universe_id is None:
+            raise ValueError("ROBLOX_UNIVERSE_ID is not configured")
+        self.stale_after = stale_after
+        self._session_factory = session_factory
+        self._producer: Optional["asyncio.Task[None]"] = None
+        self.crawl_key = (
+            f"leaderboard:{self.universe_id}:{self.settings.datastore_name}:{self.settings.datastore_scope}"
+        )
+        self.progress = CrawlProgress(crawl_key=self.crawl_key)
+
+    async def run(self, *, restart: bool = False) -> CrawlProgress:
+        return await self._crawl(await self._begin(restart=restart))
+
+    async def _crawl(self, cursor: Optional[str]) -> CrawlProgress:
+        pages: asyncio.Queue[Union[Tuple[List[Dict[str, Any]], Optional[str]], BaseException, object]] = asyncio.Queue(
+            maxsize=2
+        )
+        self._producer = asyncio.create_task(self._list_pages(cursor, pages), name=f"grps-crawl-pages-{self.crawl_key}")
+        try:
+            while True:
+                item = await pages.get()
+                if item is _PAGES_DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                entries, next_cursor = item
+                await self._ingest_page(entries, next_cursor)
+            await self._finish("completed")
+        except asyncio.CancelledError:
+            await self._finish("interrupted")
+            raise
+        except Exception as error:
+            logger.exception("Leaderboard crawl %s failed", self.crawl_key)
+            self.progress.errors += 1
+            self.progress.last_error = str(error)[:1024]
+            await self._finish("failed")
+        finally:
+            await self._stop_producer()
+        return self.progress
+
+    async def _stop_producer(self) -> None:
+        producer, self._producer = self._producer, None
+        if producer is None:
+            return
+        producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
+        except Exception:  # pragma: no cover - _list_pages hands its errors to the consumer
+            logger.exception("Page listing for crawl %s failed", self.crawl_key)
+
+    async def _list_pages(self, cursor: Optional[str], pages: asyncio.Queue) -> None:
+        try:
+            while True:
+                listing = await self.client.list_datastore_entries(
+                    universe_id=self.universe_id,
+                    datastore_name=self.settings.datastore_name,
+                    scope=self.settings.datastore_scope,
+                    prefix=self.settings.datastore_key_prefix,
+                    limit=self.page_size,
+                    cursor=cursor,
+                )
+                cursor = listing.get("nextPageCursor") or listing.get("nextCursor")
+                await pages.put((listing.get("entries", []), cursor))
+                if not cursor:
+                    break
+            await pages.put(_PAGES_DONE)
+        except Exception as error:
+            await pages.put(error)
+
+    async def _begin(self, *, restart: bool) -> Optional[str]:
+        """Claim the checkpoint row and return the cursor to resume from; raises ``CrawlAlreadyRunning``."""
+
+        now = datetime.utcnow()
+        async with self._session_factory() as session:
+            checkpoint = await session.get(SyncCheckpoint, self.crawl_key)
+            if checkpoint is None:
+                table = SyncCheckpoint.__table__
+                statement = (
+                    upsert_insert(session)(table)
+                    .values(crawl_key=self.crawl_key, status="running", started_at=now, updated_at=now)
+                    .on_conflict_do_nothing(index_elements=[table.c.crawl_key])
+                    .returning(table.c.crawl_key)
+                )
+                if (await session.execute(statement)).scalar() is None:
+                    raise CrawlAlreadyRunning(f"crawl {self.crawl_key} was just started by another worker")
+                checkpoint = await session.get(SyncCheckpoint, self.crawl_key)
+                restart = True
+            else:
+                if checkpoint.status == "running" and checkpoint.updated_at > now - timedelta(seconds=self.stale_after):
+                    raise CrawlAlreadyRunning(f"crawl {self.crawl_key} is already running")
+                # Only succeeds if nobody claimed the row since it was read.
+                claimed = await session.execute(
+                    update(SyncCheckpoint)
+                    .where(
+                        SyncCheckpoint.crawl_key == self.crawl_key,
+                        SyncCheckpoint.status == checkpoint.status,
+                        SyncCheckpoint.updated_at == checkpoint.updated_at,
+                    )
+                    .values(status="running", updated_at=now)
+                )
+                if claimed.rowcount != 1:
+                    raise CrawlAlreadyRunning(f"crawl {self.crawl_key} was just started by another worker")
+                restart = restart or checkpoint.status == "completed"
+                await session.refresh(checkpoint)
+
+            if restart:
+                checkpoint.cursor = None
+                checkpoint.pages = checkpoint.entries = checkpoint.created = checkpoint.updated = 0
+                checkpoint.errors = 0
+                checkpoint.last_error = None
+                checkpoint.started_at = datetime.utcnow()
+                checkpoint.completed_at = None
+            checkpoint.status = "running"
+            await session.flush()
+            self.progress = CrawlProgress.from_checkpoint(checkpoint)
+            self.progress.resumed = not restart
+            return checkpoint.cursor
+
+    async def _ingest_page(self, entries: List[Dict[str, Any]], next_cursor: Optional[str]) -> None:
+        async with self._session_factory() as session:
+            service = RobloxSyncService(session, client=self.client)
+            result = await service.sync_entries(self.universe_id, entries)
+            checkpoint = await session.get(SyncCheckpoint, self.crawl_key)
+            checkpoint.cursor = next_cursor
+            checkpoint.pages += 1
+            checkpoint.entries += result.updated + result.created
+            checkpoint.created += result.created
+            checkpoint.updated += result.updated
+            checkpoint.errors += result.skipped
+            checkpoint.updated_at = datetime.utcnow()
+
+        progress = self.progress
+        progress.cursor = next_cursor
+        progress.pages += 1
+        progress.entries += result.updated + result.created
+        progress.run_entries += result.updated + result.created
+        progress.created += result.created
+        progress.updated += result.updated
+        progress.errors += result.skipped
+        progress.updated_at = checkpoint.updated_at
+
+    async def _finish(self, status: str) -> None:
+        self.progress.status = status
+        if status == "completed":
+            self.progress.completed_at = datetime.utcnow()
+        try:
+            async with self._session_factory() as session:
+                checkpoint = await session.get(SyncCheckpoint, self.crawl_key)
+                checkpoint.status = status
+                checkpoint.errors = self.progress.errors
+                checkpoint.last_error = self.progress.last_error
+                checkpoint.completed_at = self.progress.completed_at
+        except Exception:  # pragma: no cover - the checkpoint cursor is already durable
+            logger.exception("Unable to record %s status for crawl %s", status, self.crawl_key)
+
+
+_crawls: Dict[str, Tuple[LeaderboardCrawler, "asyncio.Task[CrawlProgress]"]] = {}
+
+
+async def start_crawl(crawler: LeaderboardCrawler, *, restart: bool = False) -> CrawlProgress:
+    """Claim the crawl's checkpoint, then run ``crawler`` in the background.
+
+    Only one crawl per datastore may run at once across all workers. The
+    returned progress already reflects the claimed checkpoint (resumed or not).
+    """
+
+    running = _crawls.get(crawler.crawl_key)
+    if running is not None and not running[1].done():
+        raise CrawlAlreadyRunning(f"crawl {crawler.crawl_key} is already running")
+
+    cursor = await crawler._begin(restart=restart)
+    task = asyncio.create_task(crawler._crawl(cursor), name=f"grps-crawl-{crawler.crawl_key}")
+    _crawls[crawler.crawl_key] = (crawler, task)
+    return crawler.progress
+
+
+async def list_crawl_progress(session: AsyncSession) -> List[Dict[str, Any]]:
+    """Combine persisted checkpoints with the live progress of running crawls."""
+
+    result = await session.execute(select(SyncCheckpoint).order_by(SyncCheckpoint.crawl_key))
+    payloads: Dict[str, Dict[str, Any]] = {
+        checkpoint.crawl_key: CrawlProgress.from_checkpoint(checkpoint).to_payload(running=False)
+        for checkpoint in result.scalars().all()
+    }
+    for crawl_key, (crawler, task) in _crawls.items():
+        if not task.done():
+            payloads[crawl_key] = crawler.progress.to_payload(running=True)
+    return [payloads[key] for key in sorted(payloads)]
+
+
+async def stop_crawls() -> None:
+    """Cancel running crawls; their checkpoints are marked ``interrupted`` for resumption."""
+
+    tasks = [task for _, task in _crawls.values() if not task.done()]
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.error("Crawl task ended with an error: %r", result)
+    for crawler, _ in _crawls.values():
+        # Each crawl stops its own producer and records its status, except one cancelled before it started.
+        await crawler._stop_producer()
+        if crawler.progress.status == "running":
+            await crawler._finish("interrupted")
+    _crawls.clear()
+
+
+__all__ = [
+    "CrawlAlreadyRunning",
+    "CrawlProgress",
+    "LeaderboardCrawler",
+    "list_crawl_progress",
+    "start_crawl",
+    "stop_crawls",
+]
@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import Settings, get_settings
+from ..db import session_scope
+from ..models import Player
+from .calculations import CalculationService
+from .invalidation import MIRROR_WRITES, on_invalidation, publish_invalidation
+from .outbox import DATASTORE_WRITE, enqueue_outbox
+from .roblox_client import RobloxClient
+from .snapshot_store import snapshot_hash
+
+logger = logging.getLogger(__name__)
+
+_STAGED_KEY = "grps.datastore_mirror.staged"
+
+# Fields that change on every sync without the mirrored state changing.
+VOLATILE_FIELDS = frozenset({"lastSyncedAt"})
+
+
+def mirror_payload(calculator: CalculationService, player: Player) -> Dict[str, Any]:
+    """Serialise ``player`` into the JSON document stored in the datastore."""
+
+    return {
+        field: value.isoformat() if isinstance(value, datetime) else value
+        for field, value in calculator.serialize_player(player).items()
+    }
+
+
+def mirror_hash(value: Dict[str, Any]) -> str:
+    return snapshot_hash({field: item for field, item in value.items() if field not in VOLATILE_FIELDS})
+
+
+def stage_mirror_write(session: AsyncSession, user_id: int, value: Dict[str, Any]) -> None:
+    """Hand ``value`` to the running mirror once ``session`` commits; the latest staged value wins."""
+
+    staged: Dict[int, Dict[str, Any]] = session.sync_session.info.setdefault(_STAGED_KEY, {})
+    staged[int(user_id)] = value
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_staged(session: Session) -> None:
+    staged: Optional[Dict[int, Dict[str, Any]]] = session.info.pop(_STAGED_KEY, None)
+    if staged and _mirror is not None:
+        for user_id, value in staged.items():
+            _mirror.submit(user_id, value)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_staged(session: Session, previous_transaction) -> None:
+    session.info.pop(_STAGED_KEY, None)
+
+
+@dataclass
+class _PendingWrite:
+    value: Dict[str, Any]
+    digest: str
+    first_at: float
+    last_at: float
+
+
+@dataclass
+class MirrorStats:
+    submitted: int = 0
+    coalesced: int = 0
+    skipped: int = 0
+    writes: int = 0
+    failed_writes: int = 0
+    flushes: int = 0
+    forwarded: int = 0
+    evictions: int = 0
+
+
+class DatastoreMirror:
+    """Debounced, coalescing writer that mirrors player state to the ``GRPS_Points`` datastore.
+
+    Each key keeps only its latest value while it waits. A key is written once
+    ``debounce_seconds`` pass without a newer submit, or after
+    ``max_delay_seconds`` at the latest, and never more often than
+    ``min_interval_seconds``. That interval matches the per-key write cooldown
+    of Roblox datastores. Values whose hash matches the last published one are
+    dropped. Pending writes live in memory only. Anything lost on a crash is
+    mirrored again on the player's next change. The published hash and last
+    write time are kept for the ``max_keys`` most recently written keys; an
+    evicted key is at worst written once more with an unchanged value.
+
+    With ``outbox`` set (``ROBLOX_OUTBOX_ENABLED``) a flush does not call
+    Roblox itself: the due values are queued as ``datastore_write`` outbox
+    entries in one transaction, and the dispatcher delivers them with retries.
+
+    Only the ``owner`` queues and writes, so the debounce and the per-key
+    interval hold across workers. With ``API_WORKERS > 1`` the elected leader
+    owns the mirror and the other workers forward their submits to it over the
+    invalidation bus.
+    """
+
+    def __init__(
+        self,
+        *,
+        universe_id: int,
+        datastore: str,
+        scope: str = "global",
+        key_prefix: str = "player:",
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 30.0,
+        min_interval_seconds: float = 6.0,
+        concurrency: int = 8,
+        max_keys: int = 100_000,
+        mirror_ingests: bool = False,
+        owner: bool = True,
+        outbox: bool = False,
+        client_factory: Callable[[], Any] = RobloxClient,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = session_scope,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.universe_id = universe_id
+        self.datastore = datastore
+        self.scope = scope
+        self.key_prefix = key_prefix
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max(max_delay_seconds, debounce_seconds)
+        self.min_interval_seconds = min_interval_seconds
+        self.concurrency = concurrency
+        self.max_keys = max_keys
+        self.mirror_ingests = mirror_ingests
+        self.owner = owner
+        self.outbox = outbox
+        self._client_factory = client_factory
+        self._session_factory = session_factory
+        self._client: Any = None
+        self.clock = clock
+        self._pending: Dict[int, _PendingWrite] = {}
+        self._published: "OrderedDict[int, str]" = OrderedDict()
+        self._written_at: "OrderedDict[int, float]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+        self.stats = MirrorStats()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "DatastoreMirror":
+        return cls(
+            universe_id=settings.default_universe_id,
+            datastore=settings.datastore_name,
+            scope=settings.datastore_scope or "global",
+            key_prefix=settings.datastore_key_prefix,
+            debounce_seconds=settings.datastore_mirror_debounce_seconds,
+            max_delay_seconds=settings.datastore_mirror_max_delay_seconds,
+            min_interval_seconds=settings.datastore_mirror_min_interval_seconds,
+            concurrency=settings.datastore_mirror_concurrency,
+            max_keys=settings.datastore_mirror_max_keys,
+            mirror_ingests=settings.datastore_mirror_ingests,
+            outbox=settings.roblox_outbox_enabled,
+        )
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="grps-datastore-mirror")
+
+    async def stop(self) -> None:
+        """Stop the timer and write everything still pending, ignoring the debounce."""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush(force=True)
+
+    def submit(self, user_id: int, value: Dict[str, Any]) -> bool:
+        """Queue ``value`` for ``user_id``; returns ``False`` when it matches what is already published."""
+
+        if not self.owner:
+            self.stats.forwarded += 1
+            publish_invalidation(MIRROR_WRITES, [{"userId": int(user_id), "value": value}])
+            return True
+        self.stats.submitted += 1
+        digest = mirror_hash(value)
+        queued = self._pending.get(user_id)
+        if digest == self._published.get(user_id):
+            if queued is not None:
+                # The state went back to what Roblox already has.
+                del self._pending[user_id]
+            self.stats.skipped += 1
+            return False
+
+        now = self.clock()
+        if queued is None:
+            self._pending[user_id] = _PendingWrite(value, digest, first_at=now, last_at=now)
+        else:
+            queued.value, queued.digest, queued.last_at = value, digest, now
+            self.stats.coalesced += 1
+        self._wakeup.set()
+        return True
+
+    def _due_at(self, user_id: int, queued: _PendingWrite) -> float:
+        debounced = min(queued.last_at + self.debounce_seconds, queued.first_at + self.max_delay_seconds)
+        written_at = self._written_at.get(user_id)
+        if written_at is None:
+            return debounced
+        return max(debounced, written_at + self.min_interval_seconds)
+
+    def next_due(self) -> Optional[float]:
+        return min((self._due_at(user_id, queued) for user_id, queued in self._pending.items()), default=None)
+
+    async def flush(self, *, force: bool = False) -> int:
+        """Write every due key (every pending key when ``force``); returns how many were written."""
+
+        async with self._flush_lock:
+            now = self.clock()
+            due = [
+                (user_id, queued)
+                for user_id, queued in self._pending.items()
+                if force or self._due_at(user_id, queued) <= now
+            ]
+            if not due:
+                return 0
+            for user_id, _ in due:
+                del self._pending[user_id]
+
+            if self.outbox:
+                written = await self._enqueue(due)
+            else:
+                semaphore = asyncio.Semaphore(self.concurrency)
+                results = await asyncio.gather(*(self._write(user_id, queued, semaphore) for user_id, queued in due))
+                written = sum(results)
+            self.stats.flushes += 1
+            return written
+
+    async def _enqueue(self, due: List[Tuple[int, _PendingWrite]]) -> int:
+        try:
+            async with self._session_factory() as session:
+                for user_id, queued in due:
+                    enqueue_outbox(
+                        session,
+                        user_id,
+                        DATASTORE_WRITE,
+                        {
+                            "universeId": self.universe_id,
+                            "datastore": self.datastore,
+                            "scope": self.scope,
+                            "key": f"{self.key_prefix}{user_id}",
+                            "value": queued.value,
+                        },
+                    )
+        except Exception as error:
+            self.stats.failed_writes += len(due)
+            logger.warning("Failed to queue %s datastore mirror writes in the outbox: %s", len(due), error)
+            for user_id, queued in due:
+                self._record_write(user_id)
+                self._pending.setdefault(user_id, queued)
+            return 0
+        for user_id, queued in due:
+            self._record_write(user_id, queued.digest)
+        self.stats.writes += len(due)
+        return len(due)
+
+    async def _write(self, user_id: int, queued: _PendingWrite, semaphore: asyncio.Semaphore) -> bool:
+        async with semaphore:
+            try:
+                await self.client.write_datastore(
+                    self.universe_id,
+                    self.datastore,
+                    self.scope,
+                    f"{self.key_prefix}{user_id}",
+                    queued.value,
+                )
+            except Exception as error:
+                self.stats.failed_writes += 1
+                logger.warning("Failed to mirror player %s to the datastore: %s", user_id, error)
+                # Back off for one write interval; a newer submit supersedes the failed value.
+                self._record_write(user_id)
+                self._pending.setdefault(user_id, queued)
+                return False
+            self._record_write(user_id, queued.digest)
+            self.stats.writes += 1
+            return True
+
+    def _record_write(self, user_id: int, digest: Optional[str] = None) -> None:
+        """Remember when ``user_id`` was last written (and what, on success), dropping the oldest keys."""
+
+        self._written_at[user_id] = self.clock()
+        self._written_at.move_to_end(user_id)
+        if digest is not None:
+            self._published[user_id] = digest
+            self._published.move_to_end(user_id)
+        while len(self._written_at) > self.max_keys:
+            evicted, _ = self._written_at.popitem(last=False)
+            self._published.pop(evicted, None)
+            self.stats.evictions += 1
+        while len(self._published) > self.max_keys:
+            self._published.popitem(last=False)
+
+    async def _run(self) -> None:
+        while True:
+            next_due = self.next_due()
+            timeout = None if next_due is None else max(next_due - self.clock(), 0.0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:  # pragma: no cover - individual write failures are handled in _write
+                logger.exception("Datastore mirror flush failed")
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        next_due = self.next_due()
+        return {
+            "owner": self.owner,
+            "outbox": self.outbox,
+            "pending": len(self._pending),
+            "trackedKeys": len(self._published),
+            "maxKeys": self.max_keys,
+            "mirrorIngests": self.mirror_ingests,
+            "submitted": stats.submitted,
+            "coalesced": stats.coalesced,
+            "skipped": stats.skipped,
+            "writes": stats.writes,
+            "failedWrites": stats.failed_writes,
+            "flushes": stats.flushes,
+            "forwarded": stats.forwarded,
+            "evictions": stats.evictions,
+            "nextFlushIn": round(max(next_due - self.clock(), 0.0), 3) if next_due is not None else None,
+        }
+
+
+_mirror: Optional[DatastoreMirror] = None
+
+
+def get_datastore_mirror() -> Optional[DatastoreMirror]:
+    """Return the running mirror, or ``None`` when datastore mirroring is disabled."""
+
+    return _mirror
+
+
+async def start_datastore_mirror() -> Optional[DatastoreMirror]:
+    global _mirror
+    settings = get_settings()
+    if not settings.datastore_mirror_enabled or _mirror is not None:
+        return _mirror
+    if not settings.open_cloud_api_key or not settings.default_universe_id:
+        logger.warning("DATASTORE_MIRROR_ENABLED is set but no Open Cloud key or default universe is configured")
+        return None
+    # Every worker forwards submits; the leader takes ownership in :func:`claim_datastore_mirror`.
+    _mirror = DatastoreMirror.from_settings(settings)
+    _mirror.owner = False
+    return _mirror
+
+
+async def claim_datastore_mirror() -> None:
+    """Make this worker write the mirror; a singleton job run by the elected leader."""
+
+    if _mirror is not None and not _mirror.owner:
+        _mirror.owner = True
+        _mirror.start()
+
+
+async def release_datastore_mirror() -> None:
+    """Write what is pending and go back to forwarding, when this worker stops leading."""
+
+    if _mirror is not None and _mirror.owner:
+        await _mirror.stop()
+        _mirror.owner = False
+
+
+def _submit_forwarded(items: List[Dict[str, Any]]) -> None:
+    if _mirror is not None and _mirror.owner:
+        for item in items:
+            _mirror.submit(int(item["userId"]), item["value"])
+
+
+on_invalidation(MIRROR_WRITES, _submit_forwarded)
+
+
+async def stop_datastore_mirror() -> None:
+    global _mirror
+    if _mirror is None:
+        return
+    mirror, _mirror = _mirror, None
+    await mirror.stop()
+
+
+__all__ = [
+    "DatastoreMirror",
+    "claim_datastore_mirror",
+    "get_datastore_mirror",
+    "mirror_hash",
+    "mirror_payload",
+    "release_datastore_mirror",
+    "stage_mirror_write",
+    "start_datastore_mirror",
+    "stop_datastore_mirror",
+]
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config import Settings, get_settings
+from .invalidation import GROUP_ROLES, RESYNC, on_invalidation
+
+GroupRole = Optional[Dict[str, Any]]
+
+
+@dataclass
+class GroupRoleCacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class GroupRoleCache:
+    """TTL + LRU cache of a user's role in the GRPS group.
+
+    ``None`` (not a member) is cached like any other answer. Concurrent
+    lookups for the same user share one Roblox request.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 50_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[int, Tuple[float, GroupRole]]" = OrderedDict()
+        self._inflight: Dict[int, "asyncio.Future[GroupRole]"] = {}
+        self.stats = GroupRoleCacheStats()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "GroupRoleCache":
+        return cls(
+            ttl_seconds=settings.group_role_cache_ttl_seconds,
+            max_entries=settings.group_role_cache_max_entries,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int) -> Tuple[bool, GroupRole]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return False, None
+        expires_at, role = entry
+        if expires_at <= self.clock():
+            del self._entries[user_id]
+            return False, None
+        self._entries.move_to_end(user_id)
+        return True, role
+
+    def put(self, user_id: int, role: GroupRole) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._entries[user_id] = (self.clock() + self.ttl_seconds, role)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        if self._entries.pop(user_id, None) is not None:
+            self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def lookup(self, user_id: int, fetch: Callable[[int], Awaitable[GroupRole]]) -> GroupRole:
+        hit, role = self.get(user_id)
+        if hit:
+            self.stats.hits += 1
+            return role
+        pending = self._inflight.get(user_id)
+        if pending is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.stats.misses += 1
+        future: "asyncio.Future[GroupRole]" = asyncio.get_running_loop().create_future()
+        self._inflight[user_id] = future
+        try:
+            role = await fetch(user_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # Nobody may be waiting on the shared future; retrieve the exception so it is not logged.
+            future.exception()
+            raise
+        else:
+            self.put(user_id, role)
+            future.set_result(role)
+            return role
+        finally:
+            self._inflight.pop(user_id, None)
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        lookups = stats.hits + stats.misses
+        return {
+            "entries": len(self._entries),
+            "ttlSeconds": self.ttl_seconds,
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "coalesced": stats.coalesced,
+            "evictions": stats.evictions,
+            "invalidations": stats.invalidations,
+            "hitRatio": round(stats.hits / lookups, 4) if lookups else None,
+        }
+
+
+_cache: Optional[GroupRoleCache] = None
+
+
+def get_group_role_cache() -> GroupRoleCache:
+    """Return the process-wide group role cache, created from settings on first use."""
+
+    global _cache
+    if _cache is None:
+        _cache = GroupRoleCache.from_settings(get_settings())
+    return _cache
+
+
+def _invalidate_remote(user_ids: List[int]) -> None:
+    if _cache is not None:
+        for user_id in user_ids:
+            _cache.invalidate(int(user_id))
+
+
+def _clear(items: List[int]) -> None:
+    if _cache is not None:
+        _cache.clear()
+
+
+on_invalidation(GROUP_ROLES, _invalidate_remote)
+on_invalidation(RESYNC, _clear)
+
+
+__all__ = ["GroupRoleCache", "get_group_role_cache"]
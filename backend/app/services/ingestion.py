@@ -1,14 +1,50 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import insert, inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import get_settings
+from ..db import upsert_insert
+from ..metrics import REGISTRY
 from ..models import Player, PlayerSnapshot
 from ..schemas import PlayerSnapshotPayload
 from .calculations import CalculationService
+from .datastore_mirror import get_datastore_mirror, mirror_payload, stage_mirror_write
+from .player_events import track_player_change
+from .snapshot_store import SnapshotRecorder, snapshot_hash
+
+INGESTED_SNAPSHOTS = REGISTRY.counter(
+    "grps_ingest_snapshots_total",
+    "Snapshots ingested by path (single or batch) and outcome (changed or unchanged).",
+    ("path", "outcome"),
+)
+
+
+@dataclass
+class PendingSnapshot:
+    """A validated snapshot together with the request context it arrived with."""
+
+    snapshot: PlayerSnapshotPayload
+    experience_key: Optional[str] = None
+    actor_user_id: Optional[int] = None
+    universe_key: Optional[str] = None
+    # When the snapshot arrived, for snapshots written later than that (the ingestion buffer).
+    received_at: Optional[datetime] = None
+
+
+@dataclass
+class IngestOutcome:
+    player: Player
+    created: bool
+    unchanged: bool = False
+
+
+def _column_values(player: Player) -> Dict[str, object]:
+    return {attribute.columns[0].key: getattr(player, attribute.key) for attribute in inspect(Player).column_attrs}
 
 
 class IngestionService:
@@ -17,23 +53,166 @@ class IngestionService:
     def __init__(self, session: AsyncSession, calculator: Optional[CalculationService] = None):
         self.session = session
         self.calculator = calculator or CalculationService()
+        # With POINTS_SOURCE=ledger the points engine owns rank_points and snapshots never write it.
+        self.points_from_snapshots = get_settings().points_source == "snapshot"
 
     async def ingest(self, snapshot: PlayerSnapshotPayload, *, experience_key: Optional[str] = None, actor_user_id: Optional[int] = None) -> Player:
         player = await self._get_or_create_player(snapshot.user_id)
-        self.calculator.apply_snapshot(player, snapshot)
+        payload = snapshot.model_dump(mode="json")
+        digest = snapshot_hash(payload)
         player.last_synced_at = datetime.utcnow()
 
-        self.session.add(
-            PlayerSnapshot(
-                user_id=snapshot.user_id,
-                payload=snapshot.model_dump(mode="json"),
-                experience_key=experience_key,
-                actor_user_id=actor_user_id,
+        changed = player.snapshot_hash != digest
+        if changed:
+            self.calculator.apply_snapshot(player, snapshot, include_points=self.points_from_snapshots)
+            player.snapshot_hash = digest
+            recorder = SnapshotRecorder(self.session)
+            await recorder.prepare([snapshot.user_id])
+            self.session.add(
+                PlayerSnapshot(
+                    user_id=snapshot.user_id,
+                    experience_key=experience_key,
+                    actor_user_id=actor_user_id,
+                    **recorder.record(snapshot.user_id, payload, digest),
+                )
             )
-        )
         await self.session.flush()
+        track_player_change(self.session, player)
+        INGESTED_SNAPSHOTS.inc("single", "changed" if changed else "unchanged")
+        if changed:
+            self._mirror(player)
         return player
 
+    async def ingest_many(self, entries: Sequence[PendingSnapshot]) -> List[IngestOutcome]:
+        """Persist a batch of snapshots with one player lookup and bulk writes.
+
+        Players are loaded with a single ``IN`` query and written back through one
+        ``INSERT ... ON CONFLICT`` statement, so the returned ``Player`` objects are
+        detached from the session. When a user appears more than once the last
+        snapshot wins for the player row while every distinct snapshot is kept as
+        history; a snapshot identical to the player's latest one only bumps
+        ``last_synced_at``. Snapshots carrying ``received_at`` sync the player as
+        of that time, and the row is left alone when it was synced later (by a
+        direct ingest that overtook them); they are still kept as history.
+        """
+
+        if not entries:
+            return []
+
+        user_ids = {entry.snapshot.user_id for entry in entries}
+        existing = await self._load_players(user_ids)
+        read = {user_id: _column_values(player) for user_id, player in existing.items()}
+        recorder = SnapshotRecorder(self.session)
+        await recorder.prepare(user_ids)
+        now = datetime.utcnow()
+        players: Dict[int, Player] = {}
+        changed: Set[int] = set()
+        outcomes: List[IngestOutcome] = []
+        history: List[dict] = []
+
+        for entry in entries:
+            user_id = entry.snapshot.user_id
+            player = players.get(user_id)
+            created = False
+            if player is None:
+                player = existing.get(user_id)
+                if player is None:
+                    player = Player(user_id=user_id, created_at=now, rank_points=0, points_remainder=0.0)
+                    created = True
+                players[user_id] = player
+
+            player.last_synced_at = entry.received_at or now
+            payload = entry.snapshot.model_dump(mode="json")
+            digest = snapshot_hash(payload)
+            if player.snapshot_hash == digest:
+                outcomes.append(IngestOutcome(player=player, created=created, unchanged=True))
+                continue
+
+            self.calculator.apply_snapshot(player, entry.snapshot, include_points=self.points_from_snapshots)
+            if entry.universe_key:
+                player.metadata_payload = {**(player.metadata_payload or {}), "universe": entry.universe_key}
+            player.snapshot_hash = digest
+            player.updated_at = now
+            outcomes.append(IngestOutcome(player=player, created=created))
+            changed.add(user_id)
+            history.append(
+                {
+                    "user_id": user_id,
+                    "experience_key": entry.experience_key,
+                    "actor_user_id": entry.actor_user_id,
+                    "created_at": now,
+                    **recorder.record(user_id, payload, digest),
+                }
+            )
+
+        written = await self._upsert_players(players.values(), read)
+        if history:
+            await self.session.execute(insert(PlayerSnapshot), history)
+        # A row skipped because it was synced later keeps its newer values; announce only what was written.
+        for user_id in written:
+            track_player_change(self.session, players[user_id])
+            if user_id in changed:
+                self._mirror(players[user_id])
+        unchanged = sum(1 for outcome in outcomes if outcome.unchanged)
+        INGESTED_SNAPSHOTS.inc("batch", "changed", amount=len(outcomes) - unchanged)
+        INGESTED_SNAPSHOTS.inc("batch", "unchanged", amount=unchanged)
+        return outcomes
+
+    def _mirror(self, player: Player) -> None:
+        mirror = get_datastore_mirror()
+        if mirror is not None and mirror.mirror_ingests:
+            stage_mirror_write(self.session, player.user_id, mirror_payload(self.calculator, player))
+
+    async def _load_players(self, user_ids: Iterable[int]) -> Dict[int, Player]:
+        result = await self.session.execute(select(Player).where(Player.user_id.in_(list(user_ids))))
+        players: Dict[int, Player] = {}
+        for player in result.scalars().all():
+            # The batch path writes through a bulk upsert, so keep the unit of work out of it.
+            self.session.expunge(player)
+            players[player.user_id] = player
+        return players
+
+    async def _upsert_players(self, players: Iterable[Player], read: Dict[int, Dict[str, object]]) -> Set[int]:
+        """Insert new players and update existing ones with only the columns this batch changed.
+
+        ``read`` holds the rows as :meth:`_load_players` read them. Automation, punishment
+        expiry, reconciliation and the points engine write the same rows between that read
+        and the upsert, so a column the snapshots left as read is never written back: it
+        would revert their change. Rows that changed the same columns share one statement.
+        A row already synced later than this batch's ``last_synced_at`` is not updated.
+        Returns the ids of the players that were inserted or updated.
+        """
+
+        # The points engine owns the fractional remainder (and, with POINTS_SOURCE=ledger, the
+        # total); never overwrite them with a stale read.
+        kept = {"user_id", "created_at", "points_remainder"}
+        if not self.points_from_snapshots:
+            kept.add("rank_points")
+        table = Player.__table__
+        writable = [column.key for column in table.columns if column.key not in kept]
+        groups: Dict[Tuple[str, ...], List[Dict[str, object]]] = {}
+        for player in players:
+            row = _column_values(player)
+            before = read.get(player.user_id)
+            # A player created by this batch may have been inserted concurrently; then the whole row is ours.
+            changed = tuple(key for key in writable if before is None or row[key] != before[key])
+            groups.setdefault(changed, []).append(row)
+
+        written: Set[int] = set()
+        for changed, rows in groups.items():
+            statement = upsert_insert(self.session)(table)
+            if changed:
+                statement = statement.on_conflict_do_update(
+                    index_elements=[table.c.user_id],
+                    set_={key: statement.excluded[key] for key in changed},
+                    where=table.c.last_synced_at <= statement.excluded.last_synced_at,
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=[table.c.user_id])
+            result = await self.session.execute(statement.returning(table.c.user_id), rows)
+            written.update(int(user_id) for user_id in result.scalars())
+        return written
+
     async def _get_or_create_player(self, user_id: int) -> Player:
         result = await self.session.execute(select(Player).where(Player.user_id == user_id))
         player = result.scalar_one_or_none()
@@ -44,4 +223,4 @@ class IngestionService:
         return player
 
 
-__all__ = ["IngestionService"]
+__all__ = ["IngestOutcome", "IngestionService", "PendingSnapshot"]
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import Settings, get_settings
+from ..db import session_scope
+from .ingestion import IngestionService, PendingSnapshot
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 2500)
+
+# The database is unreachable or busy: retrying later costs no attempt.
+_OUTAGE_ERRORS = (OperationalError, InterfaceError)
+
+
+class IngestionBufferFull(RuntimeError):
+    """Raised when the buffer stays at capacity for longer than the submit timeout."""
+
+
+@dataclass
+class BufferStats:
+    submitted: int = 0
+    coalesced: int = 0
+    rejected: int = 0
+    flushes: int = 0
+    failed_flushes: int = 0
+    retried: int = 0
+    dead_lettered: int = 0
+    dropped: int = 0
+    flushed_snapshots: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    batch_size_buckets: List[int] = field(default_factory=lambda: [0] * (len(BATCH_SIZE_BUCKETS) + 1))
+
+    def observe_batch(self, size: int) -> None:
+        self.flushes += 1
+        self.flushed_snapshots += size
+        self.last_batch_size = size
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.batch_size_buckets[bisect_left(BATCH_SIZE_BUCKETS, size)] += 1
+
+
+class IngestionBuffer:
+    """Write-behind buffer that coalesces snapshots before handing them to ``IngestionService``.
+
+    Snapshots for the same player are merged while they wait (last write wins for
+    the player row) and flushed together in one transaction whenever the window
+    elapses or ``max_batch`` players are pending. Every snapshot is kept as
+    history when ``retain_snapshots`` is set; otherwise only the latest survives.
+
+    When a batch fails because the database is unavailable, it is re-queued
+    whole. Any other failure is retried one player at a time, so one bad
+    snapshot cannot hold back the rest. A player whose snapshots fail
+    ``max_attempts`` flushes in a row is dead-lettered: logged and dropped. A
+    re-queue never grows the buffer past ``max_pending``. Entries that do not
+    fit are dropped, and newer submits win over them.
+    """
+
+    def __init__(
+        self,
+        *,
+        window_seconds: float = 2.0,
+        max_batch: int = 500,
+        max_pending: int = 5000,
+        retain_snapshots: bool = False,
+        submit_timeout: float = 5.0,
+        max_attempts: int = 3,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = session_scope,
+    ) -> None:
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.retain_snapshots = retain_snapshots
+        self.submit_timeout = submit_timeout
+        self.max_attempts = max_attempts
+        self._session_factory = session_factory
+        self._pending: Dict[int, List[PendingSnapshot]] = {}
+        # Failed flushes per player, reset once the player's snapshots are written or dead-lettered.
+        self._attempts: Dict[int, int] = {}
+        self._size = 0
+        self._capacity = asyncio.Condition()
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._closing = False
+        self.stats = BufferStats()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "IngestionBuffer":
+        return cls(
+            window_seconds=settings.ingestion_buffer_window_seconds,
+            max_batch=settings.ingestion_buffer_max_batch,
+            max_pending=settings.ingestion_buffer_max_pending,
+            retain_snapshots=settings.ingestion_buffer_retain_snapshots,
+            submit_timeout=settings.ingestion_buffer_submit_timeout,
+            max_attempts=settings.ingestion_buffer_max_attempts,
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._size
+
+    def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="grps-ingestion-buffer")
+
+    async def stop(self) -> None:
+        """Stop the timer and drain everything that is still pending."""
+
+        self._closing = True
+        self._flush_requested.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def submit(self, entry: PendingSnapshot) -> int:
+        """Queue a snapshot, waiting for capacity when the buffer is full."""
+
+        user_id = entry.snapshot.user_id
+        if entry.received_at is None:
+            # The flush syncs the player as of now, so it cannot overwrite a direct ingest that overtakes it.
+            entry.received_at = datetime.utcnow()
+        async with self._capacity:
+            grows = user_id not in self._pending or self.retain_snapshots
+            if grows and self._size >= self.max_pending:
+                try:
+                    await asyncio.wait_for(
+                        self._capacity.wait_for(lambda: self._size < self.max_pending),
+                        timeout=self.submit_timeout,
+                    )
+                except asyncio.TimeoutError as error:
+                    self.stats.rejected += 1
+                    raise IngestionBufferFull("ingestion buffer is at capacity") from error
+
+            self.stats.submitted += 1
+            queued = self._pending.get(user_id)
+            if queued is None:
+                self._pending[user_id] = [entry]
+                self._size += 1
+            elif self.retain_snapshots:
+                queued.append(entry)
+                self._size += 1
+                self.stats.coalesced += 1
+            else:
+                queued[-1] = entry
+                self.stats.coalesced += 1
+
+            if len(self._pending) >= self.max_batch:
+                self._flush_requested.set()
+            return self._size
+
+    async def take(self, user_id: int) -> List[PendingSnapshot]:
+        """Remove and return the pending snapshots for ``user_id``.
+
+        Used by synchronous ingestion to write a player's buffered snapshots
+        before the new one. A flush that already took them can still commit
+        after the direct write; it only updates the row if it is not older, since
+        buffered snapshots carry the time they were received.
+        """
+
+        async with self._capacity:
+            entries = self._pending.pop(user_id, [])
+            self._size -= len(entries)
+            self._capacity.notify_all()
+            return entries
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            async with self._capacity:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = {}
+                self._size = 0
+                self._capacity.notify_all()
+
+            entries = [entry for queued in batch.values() for entry in queued]
+            try:
+                await self._ingest(entries)
+            except _OUTAGE_ERRORS as error:
+                self.stats.failed_flushes += 1
+                logger.warning("Failed to flush %s buffered snapshots; re-queueing: %s", len(entries), error)
+                await self._requeue(batch)
+                return 0
+            except Exception:
+                self.stats.failed_flushes += 1
+                logger.exception("Failed to flush %s buffered snapshots; retrying player by player", len(entries))
+                return await self._flush_players(batch)
+
+            self._forget_attempts(batch)
+            self.stats.observe_batch(len(entries))
+            return len(entries)
+
+    async def _ingest(self, entries: List[PendingSnapshot]) -> None:
+        async with self._session_factory() as session:
+            await IngestionService(session).ingest_many(entries)
+
+    async def _flush_players(self, batch: Dict[int, List[PendingSnapshot]]) -> int:
+        """Write each player of a failed batch in its own transaction; returns how many snapshots were written."""
+
+        self.stats.retried += 1
+        written: Dict[int, List[PendingSnapshot]] = {}
+        failed: Dict[int, List[PendingSnapshot]] = {}
+        for user_id, entries in batch.items():
+            try:
+                await self._ingest(entries)
+            except _OUTAGE_ERRORS:
+                failed[user_id] = entries
+                continue
+            except Exception as error:
+                attempts = self._attempts.get(user_id, 0) + 1
+                if attempts >= self.max_attempts:
+                    self._attempts.pop(user_id, None)
+                    self.stats.dead_lettered += len(entries)
+                    logger.error(
+                        "Dropping %s buffered snapshots for player %s after %s failed flushes: %s",
+                        len(entries),
+                        user_id,
+                        attempts,
+                        error,
+                    )
+                else:
+                    self._attempts[user_id] = attempts
+                    failed[user_id] = entries
+                continue
+            written[user_id] = entries
+
+        self._forget_attempts(written)
+        if failed:
+            await self._requeue(failed)
+        count = sum(len(entries) for entries in written.values())
+        if count:
+            self.stats.observe_batch(count)
+        return count
+
+    def _forget_attempts(self, batch: Dict[int, List[PendingSnapshot]]) -> None:
+        for user_id in batch:
+            self._attempts.pop(user_id, None)
+
+    async def _requeue(self, batch: Dict[int, List[PendingSnapshot]]) -> None:
+        async with self._capacity:
+            for user_id, entries in batch.items():
+                newer = self._pending.get(user_id)
+                if newer is not None and not self.retain_snapshots:
+                    # A newer snapshot replaces the failed one anyway.
+                    continue
+                if self._size + len(entries) > self.max_pending:
+                    self.stats.dropped += len(entries)
+                    self._attempts.pop(user_id, None)
+                    logger.error(
+                        "Dropping %s failed snapshots for player %s: the buffer is at capacity", len(entries), user_id
+                    )
+                    continue
+                self._pending[user_id] = entries + newer if newer is not None else entries
+                self._size += len(entries)
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.window_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        return {
+            "pending": self._size,
+            "pendingPlayers": len(self._pending),
+            "capacity": self.max_pending,
+            "submitted": stats.submitted,
+            "coalesced": stats.coalesced,
+            "rejected": stats.rejected,
+            "flushes": stats.flushes,
+            "failedFlushes": stats.failed_flushes,
+            "retried": stats.retried,
+            "deadLettered": stats.dead_lettered,
+            "dropped": stats.dropped,
+            "flushedSnapshots": stats.flushed_snapshots,
+            "lastBatchSize": stats.last_batch_size,
+            "maxBatchSize": stats.max_batch_size,
+            "batchSizeBuckets": {
+                **{str(bound): count for bound, count in zip(BATCH_SIZE_BUCKETS, stats.batch_size_buckets)},
+                "+Inf": stats.batch_size_buckets[-1],
+            },
+        }
+
+
+_buffer: Optional[IngestionBuffer] = None
+
+
+def get_ingestion_buffer() -> Optional[IngestionBuffer]:
+    """Return the running buffer, or ``None`` when write-behind ingestion is disabled."""
+
+    return _buffer
+
+
+async def start_ingestion_buffer() -> Optional[IngestionBuffer]:
+    global _buffer
+    settings = get_settings()
+    if not settings.ingestion_buffer_enabled or _buffer is not None:
+        return _buffer
+    _buffer = IngestionBuffer.from_settings(settings)
+    _buffer.start()
+    return _buffer
+
+
+async def stop_ingestion_buffer() -> None:
+    global _buffer
+    if _buffer is None:
+        return
+    buffer, _buffer = _buffer, None
+    await buffer.stop()
+
+
+__all__ = [
+    "IngestionBuffer",
+    "IngestionBufferFull",
+    "get_ingestion_buffer",
+    "start_ingestion_buffer",
+    "stop_ingestion_buffer",
+]
@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import tempfile
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+
+from ..config import Settings, get_settings
+from ..serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Message kinds. ``RESYNC`` is never sent: it is dispatched locally when messages may have been missed.
+PLAYERS = "players"
+GROUP_ROLES = "group_roles"
+POLICIES = "policies"
+# Datastore mirror submits a follower forwards to the worker that owns the mirror.
+MIRROR_WRITES = "mirror_writes"
+RESYNC = "resync"
+
+InvalidationHandler = Callable[[List[Any]], None]
+
+_handlers: Dict[str, List[InvalidationHandler]] = {}
+
+
+def on_invalidation(kind: str, handler: InvalidationHandler) -> None:
+    """Call ``handler`` with the items of every ``kind`` message published by another process."""
+
+    handlers = _handlers.setdefault(kind, [])
+    if handler not in handlers:
+        handlers.append(handler)
+
+
+def dispatch(kind: str, items: List[Any]) -> None:
+    for handler in list(_handlers.get(kind, ())):
+        try:
+            handler(items)
+        except Exception:  # pragma: no cover - a faulty handler must not stop the bus
+            logger.exception("Invalidation handler %r for %s failed", handler, kind)
+
+
+def publish_invalidation(kind: str, items: List[Any]) -> None:
+    """Tell the other processes about ``items``; a no-op when the bus is not running."""
+
+    if _bus is not None and items:
+        _bus.publish(kind, items)
+
+
+def coordination_backend(settings: Settings) -> Optional[str]:
+    """Return ``"postgres"``, ``"socket"`` or ``None`` when processes do not need to coordinate."""
+
+    if settings.invalidation_bus == "off":
+        return None
+    if settings.invalidation_bus != "auto":
+        return settings.invalidation_bus
+    if settings.api_workers <= 1:
+        return None
+    return "postgres" if database_url(settings).startswith("postgresql") else "socket"
+
+
+def database_url(settings: Settings) -> str:
+    return settings.database_url or settings.prisma_database_url or "sqlite+aiosqlite:///:memory:"
+
+
+def asyncpg_dsn(settings: Settings) -> str:
+    """The SQLAlchemy database URL as a plain ``postgresql://`` DSN for a raw asyncpg connection."""
+
+    return make_url(database_url(settings)).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def coordination_dir(settings: Settings) -> Path:
+    """Directory shared by every process that uses the same database (sockets, lock file)."""
+
+    if settings.invalidation_bus_dir is not None:
+        return settings.invalidation_bus_dir
+    digest = hashlib.sha1(database_url(settings).encode("utf-8")).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"grps-{digest}"
+
+
+@dataclass
+class BusStats:
+    published: int = 0
+    messages_sent: int = 0
+    received: int = 0
+    dropped: int = 0
+    gaps: int = 0
+    errors: int = 0
+
+
+class InvalidationBus:
+    """Fans cache invalidations out to the other worker processes.
+
+    Messages are JSON ``{"origin", "seq", "kind", "items"}`` documents, split so
+    each stays under ``max_message_bytes``. Receivers ignore their own messages
+    and dispatch the rest to the handlers registered with
+    :func:`on_invalidation`. The sequence numbers let a receiver spot lost
+    messages. It then dispatches ``RESYNC`` locally, and caches rebuild instead
+    of trusting their contents.
+    """
+
+    backend = "none"
+    max_message_bytes = 60_000
+
+    def __init__(self) -> None:
+        self.origin = uuid.uuid4().hex[:12]
+        self._seq = 0
+        self._last_seen: Dict[str, int] = {}
+        self.stats = BusStats()
+
+    async def start(self) -> None:  # pragma: no cover - implemented by subclasses
+        raise NotImplementedError
+
+    async def stop(self) -> None:  # pragma: no cover - implemented by subclasses
+        raise NotImplementedError
+
+    def _send(self, message: bytes) -> None:  # pragma: no cover - implemented by subclasses
+        raise NotImplementedError
+
+    def publish(self, kind: str, items: List[Any]) -> None:
+        self.stats.published += len(items)
+        for message in self._encode(kind, items):
+            self.stats.messages_sent += 1
+            self._send(message)
+
+    def _encode(self, kind: str, items: List[Any]) -> List[bytes]:
+        # Split greedily by encoded item size; the envelope needs well under 200 bytes.
+        budget = self.max_message_bytes - 200
+        chunks: List[List[bytes]] = [[]]
+        size = 0
+        for item in items:
+            encoded = dumps(item)
+            if chunks[-1] and size + len(encoded) + 1 > budget:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(encoded)
+            size += len(encoded) + 1
+        messages = []
+        for chunk in chunks:
+            self._seq += 1
+            header = dumps({"origin": self.origin, "seq": self._seq, "kind": kind})
+            messages.append(header[:-1] + b',"items":[' + b",".join(chunk) + b"]}")
+        return messages
+
+    def receive(self, raw: bytes) -> None:
+        try:
+            message = json.loads(raw)
+            origin, seq, kind, items = message["origin"], message["seq"], message["kind"], message["items"]
+        except (ValueError, KeyError, TypeError):
+            self.stats.errors += 1
+            logger.warning("Ignoring malformed invalidation message")
+            return
+        if origin == self.origin:
+            return
+        self.stats.received += 1
+        previous = self._last_seen.get(origin)
+        self._last_seen[origin] = seq
+        if previous is not None and seq != previous + 1:
+            self.resync()
+        dispatch(kind, items)
+
+    def resync(self) -> None:
+        self.stats.gaps += 1
+        logger.warning("Invalidation messages may have been lost; resynchronising caches")
+        dispatch(RESYNC, [])
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        return {
+            "backend": self.backend,
+            "origin": self.origin,
+            "published": stats.published,
+            "messagesSent": stats.messages_sent,
+            "received": stats.received,
+            "dropped": stats.dropped,
+            "gaps": stats.gaps,
+            "errors": stats.errors,
+            "peers": len(self._last_seen),
+        }
+
+
+class SocketInvalidationBus(InvalidationBus):
+    """Single-host stand-in for SQLite deployments built on Unix datagram sockets.
+
+    Every process binds ``<directory>/<origin>.sock`` and publishes by sending
+    each message to every other socket in the directory. Sockets whose process
+    is gone are removed by the first sender that finds them dead.
+    """
+
+    backend = "socket"
+
+    def __init__(self, directory: Path) -> None:
+        super().__init__()
+        self.directory = directory
+        self.path = directory / f"{self.origin}.sock"
+        self._socket: Optional[socket.socket] = None
+
+    async def start(self) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("the socket invalidation bus needs Unix domain sockets")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.bind(str(self.path))
+        self._socket = sock
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._drain)
+
+    async def stop(self) -> None:
+        if self._socket is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._socket.fileno())
+        self._socket.close()
+        self._socket = None
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _drain(self) -> None:
+        assert self._socket is not None
+        while True:
+            try:
+                raw = self._socket.recv(self.max_message_bytes + 1024)
+            except (BlockingIOError, InterruptedError):
+                return
+            self.receive(raw)
+
+    def _send(self, message: bytes) -> None:
+        if self._socket is None:
+            return
+        for peer in self.directory.glob("*.sock"):
+            if peer == self.path:
+                continue
+            try:
+                self._socket.sendto(message, str(peer))
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    peer.unlink()
+                except FileNotFoundError:
+                    pass
+            except (BlockingIOError, InterruptedError):
+                # The peer's buffer is full; its sequence check turns this into a resync.
+                self.stats.dropped += 1
+            except OSError as error:
+                self.stats.errors += 1
+                logger.warning("Failed to send an invalidation to %s: %s", peer.name, error)
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """``LISTEN``/``NOTIFY`` on one dedicated asyncpg connection.
+
+    Messages are queued and sent by a background task. A watchdog task notices
+    a dropped connection through asyncpg's termination callback, or through a
+    failed heartbeat every ``heartbeat_seconds`` when the socket dies silently,
+    and re-establishes it with backoff. Every reconnect is followed by a local
+    ``RESYNC``, since notifications sent in the meantime are gone.
+    """
+
+    backend = "postgres"
+    # NOTIFY payloads are limited to 8000 bytes.
+    max_message_bytes = 7_900
+    heartbeat_seconds = 30.0
+
+    def __init__(self, dsn: str, channel: str = "grps_invalidation") -> None:
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self._connection: Any = None
+        self._queue: "asyncio.Queue[bytes]" = asyncio.Queue()
+        # Serialises use of the connection: asyncpg runs one operation at a time.
+        self._lock = asyncio.Lock()
+        self._lost = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._watchdog: Optional[asyncio.Task[None]] = None
+
+    async def start(self) -> None:
+        await self._connect()
+        self._task = asyncio.create_task(self._run(), name="grps-invalidation-bus")
+        self._watchdog = asyncio.create_task(self._watch(), name="grps-invalidation-bus-watchdog")
+
+    async def stop(self) -> None:
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            try:
+                await self._watchdog
+            except asyncio.CancelledError:
+                pass
+            self._watchdog = None
+        if self._task is not None:
+            try:
+                # Give queued messages a moment to go out (the policy reload CLI exits right after publishing).
+                await asyncio.wait_for(self._queue.join(), timeout=5.0)
+            except asyncio.TimeoutError:
+                logger.warning("Dropping %s unsent invalidation messages", self._queue.qsize())
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await connection.close()
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(self.channel, self._on_notification)
+        connection.add_termination_listener(self._on_termination)
+        self._connection = connection
+        self._lost.clear()
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        self.receive(payload.encode("utf-8"))
+
+    def _on_termination(self, connection: Any) -> None:
+        if connection is self._connection:
+            self._lost.set()
+
+    def _send(self, message: bytes) -> None:
+        self._queue.put_nowait(message)
+
+    async def _execute(self, query: str, *args: Any) -> None:
+        """Run ``query``, first reconnecting (and resynchronising) when the connection was lost."""
+
+        async with self._lock:
+            if self._connection is None or self._connection.is_closed() or self._lost.is_set():
+                if self._connection is not None:
+                    self._connection.terminate()
+                    self._connection = None
+                await self._connect()
+                self.resync()
+            await self._connection.execute(query, *args)
+
+    def _connection_failed(self, error: Exception) -> None:
+        self.stats.errors += 1
+        logger.warning("Invalidation bus connection failed: %s", error)
+        self._lost.set()
+
+    async def _run(self) -> None:
+        delay = 0.5
+        while True:
+            message = await self._queue.get()
+            while True:
+                try:
+                    await self._execute("SELECT pg_notify($1, $2)", self.channel, message.decode("utf-8"))
+                    delay = 0.5
+                    self._queue.task_done()
+                    break
+                except Exception as error:
+                    self._connection_failed(error)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30.0)
+
+    async def _watch(self) -> None:
+        # Without this, a dropped LISTEN connection would only be noticed on the next publish
+        # and this worker would miss every invalidation until then.
+        delay = 0.5
+        while True:
+            try:
+                await asyncio.wait_for(self._lost.wait(), timeout=self.heartbeat_seconds)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._execute("SELECT 1")
+                delay = 0.5
+            except Exception as error:
+                self._connection_failed(error)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+
+_bus: Optional[InvalidationBus] = None
+
+
+def get_invalidation_bus() -> Optional[InvalidationBus]:
+    return _bus
+
+
+async def start_invalidation_bus() -> Optional[InvalidationBus]:
+    global _bus
+    settings = get_settings()
+    backend = coordination_backend(settings)
+    if backend is None or _bus is not None:
+        return _bus
+    bus: InvalidationBus
+    if backend == "postgres":
+        bus = PostgresInvalidationBus(asyncpg_dsn(settings))
+    else:
+        bus = SocketInvalidationBus(coordination_dir(settings))
+    await bus.start()
+    _bus = bus
+    logger.info("Invalidation bus started (%s, pid %s)", backend, os.getpid())
+    return bus
+
+
+async def stop_invalidation_bus() -> None:
+    global _bus
+    if _bus is None:
+        return
+    bus, _bus = _bus, None
+    await bus.stop()
+
+
+__all__ = [
+    "GROUP_ROLES",
+    "InvalidationBus",
+    "MIRROR_WRITES",
+    "PLAYERS",
+    "POLICIES",
+    "PostgresInvalidationBus",
+    "RESYNC",
+    "SocketInvalidationBus",
+    "coordination_backend",
+    "get_invalidation_bus",
+    "on_invalidation",
+    "publish_invalidation",
+    "start_invalidation_bus",
+    "stop_invalidation_bus",
+]
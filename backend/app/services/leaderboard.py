@@ -1,12 +1,89 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import Select, desc, select
+from sqlalchemy import Select, and_, asc, desc, func, literal, or_, select, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Player
 from .calculations import CalculationService
+from .leaderboard_cache import LeaderboardCache, get_leaderboard_cache
+
+# ``(rank_points, kos, user_id)`` of a leaderboard row; ordering is points and KOs
+# descending with the user id as an ascending tie-break.
+LeaderboardKey = Tuple[int, int, int]
+
+_ENTRY_COLUMNS = (
+    Player.user_id,
+    Player.username,
+    Player.rank,
+    Player.rank_points,
+    Player.kos,
+    Player.wos,
+    Player.last_synced_at,
+)
+_LEADERBOARD_ORDER = (desc(Player.rank_points), desc(Player.kos), asc(Player.user_id))
+
+
+def encode_leaderboard_cursor(key: LeaderboardKey) -> str:
+    raw = ":".join(str(part) for part in key).encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_leaderboard_cursor(token: str) -> LeaderboardKey:
+    """Parse a cursor produced by :func:`encode_leaderboard_cursor`; raises ``ValueError`` when malformed."""
+
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("ascii")
+        rank_points, kos, user_id = (int(part) for part in raw.split(":"))
+    except (ValueError, UnicodeDecodeError) as error:
+        raise ValueError("invalid leaderboard cursor") from error
+    return rank_points, kos, user_id
+
+
+def _ranked_before(key: LeaderboardKey):
+    rank_points, kos, user_id = key
+    return or_(
+        Player.rank_points > rank_points,
+        and_(Player.rank_points == rank_points, Player.kos > kos),
+        and_(Player.rank_points == rank_points, Player.kos == kos, Player.user_id < user_id),
+    )
+
+
+def _ranked_after(key: LeaderboardKey):
+    rank_points, kos, user_id = key
+    return or_(
+        Player.rank_points < rank_points,
+        and_(Player.rank_points == rank_points, Player.kos < kos),
+        and_(Player.rank_points == rank_points, Player.kos == kos, Player.user_id > user_id),
+    )
+
+
+def _entry_key(entry: Any) -> LeaderboardKey:
+    return int(entry.rank_points), int(entry.kos), int(entry.user_id)
+
+
+# The routes skip response_model validation, so these builders emit every key of
+# ``LeaderboardPlayer``/``LeaderboardRecord``, unset ones as ``None``, exactly as the models dump.
+def _serialize_entry(entry: Any, position: Optional[int] = None) -> Dict[str, object]:
+    return {
+        "userId": entry.user_id,
+        "username": entry.username,
+        "rank": entry.rank,
+        "points": entry.rank_points,
+        "kos": entry.kos,
+        "wos": entry.wos,
+        "lastSyncedAt": entry.last_synced_at,
+        "position": position,
+    }
+
+
+def _serialize_record(board: str, user_id: int, username: str, value: Optional[int]) -> Dict[str, object]:
+    record: Dict[str, object] = {"userId": user_id, "username": username, "kos": None, "wos": None}
+    record[board] = value
+    return record
 
 
 class LeaderboardService:
@@ -17,53 +94,150 @@ class LeaderboardService:
         session: AsyncSession,
         *,
         calculator: Optional[CalculationService] = None,
+        cache: Optional[LeaderboardCache] = None,
     ) -> None:
         self.session = session
         self.calculator = calculator or CalculationService()
+        self.cache = cache or get_leaderboard_cache()
+
+    async def data_version(self) -> Tuple[int, Optional[datetime], Optional[datetime]]:
+        """``(players, latest updated_at, latest last_synced_at)`` of the data the other methods read.
+
+        Taken from the cache when it serves the reads, otherwise from ``session``
+        itself, so a replica that lags behind the primary never pairs old rows
+        with a newer version.
+        """
+
+        if self.cache is not None:
+            return self.cache.version()
+        statement = select(func.count(), func.max(Player.updated_at), func.max(Player.last_synced_at))
+        row = (await self.session.execute(statement.select_from(Player))).one()
+        return int(row[0] or 0), row[1], row[2]
 
     async def fetch_top_players(self, limit: int = 25) -> List[Dict[str, object]]:
-        statement: Select[tuple[Player]] = (
-            select(Player)
-            .order_by(desc(Player.rank_points), desc(Player.kos))
-            .limit(limit)
-        )
+        if self.cache is not None:
+            return [_serialize_entry(entry) for entry in self.cache.top(limit)]
+
+        statement = select(*_ENTRY_COLUMNS).order_by(*_LEADERBOARD_ORDER).limit(limit)
         result = await self.session.execute(statement)
-        players = result.scalars().all()
-        payload: List[Dict[str, object]] = []
-        for player in players:
-            serialised = self.calculator.serialize_player(player)
-            payload.append(
-                {
-                    "userId": serialised["userId"],
-                    "username": serialised["username"],
-                    "rank": serialised["rank"],
-                    "points": serialised["rankPoints"],
-                    "kos": serialised["kos"],
-                    "wos": serialised["wos"],
-                    "lastSyncedAt": serialised.get("lastSyncedAt"),
-                }
-            )
-        return payload
+        return [_serialize_entry(row) for row in result]
 
-    async def fetch_record_holders(self, limit: int = 5) -> Dict[str, List[Dict[str, object]]]:
-        kos_statement: Select[tuple[Player]] = select(Player).order_by(desc(Player.kos)).limit(limit)
-        wos_statement: Select[tuple[Player]] = select(Player).order_by(desc(Player.wos)).limit(limit)
+    async def fetch_page(
+        self, limit: int, after: Optional[LeaderboardKey] = None
+    ) -> Tuple[List[Dict[str, object]], Optional[str]]:
+        """Return ``limit`` players ranked just below ``after`` (from the top when ``None``).
 
-        kos_result = await self.session.execute(kos_statement)
-        wos_result = await self.session.execute(wos_statement)
+        Pages are keyed on ``(rank_points, kos, user_id)`` so they stay stable while
+        other players move. With the cache a page is a slice at any depth; without
+        it the rows come from a keyset query, but numbering them counts every player
+        ranked ahead, which is an index range scan that grows with the page's depth.
+        """
 
-        def _to_record(player: Player, field: str) -> Dict[str, object]:
-            value = getattr(player, field)
-            return {
-                "userId": int(player.user_id),
-                "username": player.username,
-                field: int(value) if value is not None else None,
-            }
+        if self.cache is not None:
+            start = self.cache.index_after(*after) if after is not None else 0
+            entries = self.cache.slice(start, start + limit + 1)
+        else:
+            statement = select(*_ENTRY_COLUMNS).order_by(*_LEADERBOARD_ORDER).limit(limit + 1)
+            if after is not None:
+                statement = statement.where(_ranked_after(after))
+            entries = (await self.session.execute(statement)).all()
+            start = await self._count_before(_entry_key(entries[0])) if after is not None and entries else 0
+
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        players = [_serialize_entry(entry, start + offset + 1) for offset, entry in enumerate(entries)]
+        next_cursor = encode_leaderboard_cursor(_entry_key(entries[-1])) if has_more else None
+        return players, next_cursor
+
+    async def fetch_around(self, user_id: int, radius: int = 5) -> Optional[Dict[str, Any]]:
+        """Return the exact position of ``user_id`` with up to ``radius`` neighbours on each side."""
+
+        if self.cache is not None:
+            index = self.cache.index_of(user_id)
+            if index is None:
+                return None
+            entries = self.cache.slice(index - radius, index + radius + 1)
+            first_position = max(index - radius, 0) + 1
+            return self._around_payload(user_id, index + 1, first_position, entries, len(self.cache))
+
+        player = (await self.session.execute(select(*_ENTRY_COLUMNS).where(Player.user_id == user_id))).first()
+        if player is None:
+            return None
+        key = _entry_key(player)
+        above_statement = (
+            select(*_ENTRY_COLUMNS)
+            .where(_ranked_before(key))
+            .order_by(asc(Player.rank_points), asc(Player.kos), desc(Player.user_id))
+            .limit(radius)
+        )
+        below_statement = select(*_ENTRY_COLUMNS).where(_ranked_after(key)).order_by(*_LEADERBOARD_ORDER).limit(radius)
+        above = list(reversed((await self.session.execute(above_statement)).all()))
+        below = (await self.session.execute(below_statement)).all()
+        position = await self._count_before(key) + 1
+        total = await self.session.scalar(select(func.count()).select_from(Player))
+        entries = [*above, player, *below]
+        return self._around_payload(user_id, position, position - len(above), entries, int(total or 0))
 
+    async def _count_before(self, key: LeaderboardKey) -> int:
+        count = await self.session.scalar(select(func.count()).select_from(Player).where(_ranked_before(key)))
+        return int(count or 0)
+
+    @staticmethod
+    def _around_payload(
+        user_id: int, position: int, first_position: int, entries: List[Any], total: int
+    ) -> Dict[str, Any]:
+        players = [_serialize_entry(entry, first_position + offset) for offset, entry in enumerate(entries)]
+        split = position - first_position
         return {
-            "kos": [_to_record(player, "kos") for player in kos_result.scalars().all()],
-            "wos": [_to_record(player, "wos") for player in wos_result.scalars().all()],
+            "position": position,
+            "totalPlayers": total,
+            "player": players[split],
+            "above": players[:split],
+            "below": players[split + 1 :],
         }
 
+    async def fetch_record_holders(self, limit: int = 5) -> Dict[str, List[Dict[str, object]]]:
+        if self.cache is not None:
+            return {
+                "kos": [
+                    _serialize_record("kos", entry.user_id, entry.username, entry.kos)
+                    for entry in self.cache.top_by_kos(limit)
+                ],
+                "wos": [
+                    _serialize_record("wos", entry.user_id, entry.username, entry.wos)
+                    for entry in self.cache.top_by_wos(limit)
+                ],
+            }
+
+        def _board(field: str) -> Select:
+            column = getattr(Player, field)
+            ranked = (
+                select(
+                    literal(field).label("board"),
+                    Player.user_id,
+                    Player.username,
+                    column.label("value"),
+                )
+                .order_by(desc(column), asc(Player.user_id))
+                .limit(limit)
+                .subquery()
+            )
+            return select(ranked)
+
+        # Both boards come back in a single round-trip; UNION ALL does not promise
+        # to keep each branch's order, so the (at most 2 * limit) rows are sorted here.
+        # Ties go to the lower user id, as in the cache.
+        result = await self.session.execute(union_all(_board("kos"), _board("wos")))
+        rows = sorted(
+            result.all(),
+            key=lambda row: (-(row.value if row.value is not None else -1), row.user_id),
+        )
+
+        records: Dict[str, List[Dict[str, object]]] = {"kos": [], "wos": []}
+        for row in rows:
+            value = int(row.value) if row.value is not None else None
+            records[row.board].append(_serialize_record(row.board, int(row.user_id), row.username, value))
+        return records
+
 
-__all__ = ["LeaderboardService"]
+__all__ = ["LeaderboardKey", "LeaderboardService", "decode_leaderboard_cursor", "encode_leaderboard_cursor"]
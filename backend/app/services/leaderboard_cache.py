@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import zip_longest
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import asc, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..db import session_scope
+from ..models import Player
+from .invalidation import RESYNC, on_invalidation
+from .player_events import PlayerChange, subscribe, unsubscribe
+
+logger = logging.getLogger(__name__)
+
+PointsKey = Tuple[int, int, int]
+StatKey = Tuple[int, int]
+
+
+class LeaderboardCache:
+    """Materialised leaderboard kept in sorted arrays and updated on every committed player change.
+
+    ``_by_points`` holds ``(-rank_points, -kos, user_id)`` keys, and ``_by_kos``/``_by_wos``
+    hold ``(-value, user_id)``, so ascending order is leaderboard order and every
+    lookup or update is a bisection.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[int, PlayerChange] = {}
+        self._by_points: List[PointsKey] = []
+        self._by_kos: List[StatKey] = []
+        self._by_wos: List[StatKey] = []
+        self._latest_update: Optional[datetime] = None
+        self._latest_sync: Optional[datetime] = None
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def version(self) -> Tuple[int, Optional[datetime], Optional[datetime]]:
+        """``(players, latest updated_at, latest last_synced_at)`` of the cached rows, as the database reports them."""
+
+        return len(self._entries), self._latest_update, self._latest_sync
+
+    def _track_update(self, entry: PlayerChange) -> None:
+        if entry.updated_at is not None and (self._latest_update is None or entry.updated_at > self._latest_update):
+            self._latest_update = entry.updated_at
+        # Unchanged snapshots only move last_synced_at, which the body serialises as ``lastSyncedAt``.
+        if entry.last_synced_at is not None and (
+            self._latest_sync is None or entry.last_synced_at > self._latest_sync
+        ):
+            self._latest_sync = entry.last_synced_at
+
+    @staticmethod
+    def _points_key(entry: PlayerChange) -> PointsKey:
+        return (-entry.rank_points, -entry.kos, entry.user_id)
+
+    async def load(self, session: AsyncSession) -> None:
+        result = await session.execute(
+            select(
+                Player.user_id,
+                Player.username,
+                Player.rank,
+                Player.rank_points,
+                Player.kos,
+                Player.wos,
+                Player.last_synced_at,
+                Player.updated_at,
+            )
+        )
+        self.replace(PlayerChange(**row._mapping) for row in result)
+
+    def replace(self, entries: Iterable[PlayerChange]) -> None:
+        self._entries = {entry.user_id: entry for entry in entries}
+        self._by_points = sorted(self._points_key(entry) for entry in self._entries.values())
+        self._by_kos = sorted((-entry.kos, entry.user_id) for entry in self._entries.values())
+        self._by_wos = sorted((-entry.wos, entry.user_id) for entry in self._entries.values())
+        self._latest_update = self._latest_sync = None
+        for entry in self._entries.values():
+            self._track_update(entry)
+        self.ready = True
+
+    def apply(self, changes: Iterable[PlayerChange]) -> None:
+        for change in changes:
+            self.upsert(change)
+
+    def upsert(self, entry: PlayerChange) -> None:
+        previous = self._entries.get(entry.user_id)
+        if previous is not None:
+            _discard(self._by_points, self._points_key(previous))
+            _discard(self._by_kos, (-previous.kos, previous.user_id))
+            _discard(self._by_wos, (-previous.wos, previous.user_id))
+        self._entries[entry.user_id] = entry
+        self._track_update(entry)
+        insort(self._by_points, self._points_key(entry))
+        insort(self._by_kos, (-entry.kos, entry.user_id))
+        insort(self._by_wos, (-entry.wos, entry.user_id))
+
+    def remove(self, user_id: int) -> None:
+        previous = self._entries.pop(user_id, None)
+        if previous is None:
+            return
+        _discard(self._by_points, self._points_key(previous))
+        _discard(self._by_kos, (-previous.kos, previous.user_id))
+        _discard(self._by_wos, (-previous.wos, previous.user_id))
+
+    def top(self, limit: int) -> List[PlayerChange]:
+        return self.slice(0, limit)
+
+    def slice(self, start: int, stop: int) -> List[PlayerChange]:
+        """Players at zero-based leaderboard indexes ``start`` up to ``stop``."""
+
+        return [self._entries[key[2]] for key in self._by_points[max(start, 0):stop]]
+
+    def index_of(self, user_id: int) -> Optional[int]:
+        """Zero-based leaderboard index of ``user_id`` in O(log n), or ``None`` when unknown."""
+
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return bisect_left(self._by_points, self._points_key(entry))
+
+    def index_after(self, rank_points: int, kos: int, user_id: int) -> int:
+        """Index of the first player ranked below the given ``(rank_points, kos, user_id)`` key."""
+
+        return bisect_right(self._by_points, (-rank_points, -kos, user_id))
+
+    def top_by_kos(self, limit: int) -> List[PlayerChange]:
+        return [self._entries[key[1]] for key in self._by_kos[:limit]]
+
+    def top_by_wos(self, limit: int) -> List[PlayerChange]:
+        return [self._entries[key[1]] for key in self._by_wos[:limit]]
+
+    async def verify(self, session: AsyncSession, limit: int = 100) -> Dict[str, Any]:
+        """Compare the cached top ``limit`` rows against the database."""
+
+        statement = (
+            select(Player.user_id, Player.rank_points, Player.kos, Player.wos)
+            .order_by(desc(Player.rank_points), desc(Player.kos), asc(Player.user_id))
+            .limit(limit)
+        )
+        database_rows = [tuple(row) for row in (await session.execute(statement)).all()]
+        cached_rows = [(entry.user_id, entry.rank_points, entry.kos, entry.wos) for entry in self.top(limit)]
+        total = await session.scalar(select(func.count()).select_from(Player))
+
+        mismatches = [
+            {
+                "position": position + 1,
+                "database": list(expected) if expected else None,
+                "cache": list(actual) if actual else None,
+            }
+            for position, (expected, actual) in enumerate(zip_longest(database_rows, cached_rows))
+            if expected != actual
+        ]
+        return {
+            "consistent": not mismatches and total == len(self._entries),
+            "checked": max(len(database_rows), len(cached_rows)),
+            "databasePlayers": int(total or 0),
+            "cachedPlayers": len(self._entries),
+            "mismatches": mismatches,
+        }
+
+
+def _discard(keys: List[Any], key: Any) -> None:
+    index = bisect_left(keys, key)
+    if index < len(keys) and keys[index] == key:
+        del keys[index]
+
+
+_cache: Optional[LeaderboardCache] = None
+
+
+def get_leaderboard_cache() -> Optional[LeaderboardCache]:
+    """Return the materialised leaderboard once it has been built, otherwise ``None``."""
+
+    if _cache is not None and _cache.ready:
+        return _cache
+    return None
+
+
+async def start_leaderboard_cache() -> Optional[LeaderboardCache]:
+    global _cache
+    if not get_settings().leaderboard_cache_enabled or _cache is not None:
+        return _cache
+    cache = LeaderboardCache()
+    async with session_scope() as session:
+        await cache.load(session)
+    subscribe(cache.apply)
+    _cache = cache
+    logger.info("Leaderboard cache built with %s players", len(cache))
+    return cache
+
+
+async def _reload(cache: LeaderboardCache) -> None:
+    try:
+        async with session_scope() as session:
+            await cache.load(session)
+    except Exception:  # pragma: no cover - the next resync or restart rebuilds it
+        logger.exception("Failed to rebuild the leaderboard cache")
+
+
+_reload_task: Optional[asyncio.Task[None]] = None
+
+
+def _resync(items: List[Any]) -> None:
+    # Changes from another worker may have been missed; rebuild from the database.
+    global _reload_task
+    if _cache is not None and (_reload_task is None or _reload_task.done()):
+        _reload_task = asyncio.get_running_loop().create_task(_reload(_cache))
+
+
+on_invalidation(RESYNC, _resync)
+
+
+async def stop_leaderboard_cache() -> None:
+    global _cache
+    if _cache is None:
+        return
+    unsubscribe(_cache.apply)
+    _cache = None
+
+
+__all__ = ["LeaderboardCache", "get_leaderboard_cache", "start_leaderboard_cache", "stop_leaderboard_cache"]
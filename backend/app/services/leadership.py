@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..config import get_settings
+from .invalidation import asyncpg_dsn, coordination_backend, coordination_dir
+
+try:  # pragma: no cover - exercised implicitly depending on the platform
+    import fcntl
+except ImportError:  # pragma: no cover - fcntl is POSIX only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant shared by every worker; identifies the GRPS leader advisory lock.
+ADVISORY_LOCK_KEY = 0x47525053
+
+
+class FileLeaderLock:
+    """Exclusive ``flock`` on a file; the kernel releases it if the process dies."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._handle: Any = None
+
+    async def acquire(self) -> bool:
+        if fcntl is None:
+            raise RuntimeError("file leader locks need fcntl (POSIX)")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = self.path.open("a+")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            return False
+        self._handle = handle
+        return True
+
+    async def held(self) -> bool:
+        return self._handle is not None
+
+    async def release(self) -> None:
+        if self._handle is None:
+            return
+        fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+        self._handle.close()
+        self._handle = None
+
+
+class PostgresLeaderLock:
+    """Session-level ``pg_try_advisory_lock`` on a dedicated connection.
+
+    The lock lives as long as the connection, so a crashed leader or a lost
+    connection frees it for another worker.
+    """
+
+    def __init__(self, dsn: str, key: int = ADVISORY_LOCK_KEY) -> None:
+        self.dsn = dsn
+        self.key = key
+        self._connection: Any = None
+
+    async def acquire(self) -> bool:
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        if await connection.fetchval("SELECT pg_try_advisory_lock($1)", self.key):
+            self._connection = connection
+            return True
+        await connection.close()
+        return False
+
+    async def held(self) -> bool:
+        if self._connection is None or self._connection.is_closed():
+            return False
+        try:
+            await self._connection.fetchval("SELECT 1")
+        except Exception:
+            return False
+        return True
+
+    async def release(self) -> None:
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        try:
+            await connection.execute("SELECT pg_advisory_unlock($1)", self.key)
+        finally:
+            await connection.close()
+
+
+class LeaderElection:
+    """Runs ``on_elected`` in exactly one worker and hands over when that worker goes away.
+
+    Followers retry the lock every ``retry_seconds``; the leader checks it at
+    the same pace and runs ``on_demoted`` if it was lost. Without a lock (a
+    single process) this process leads straight away.
+    """
+
+    def __init__(
+        self,
+        lock: Any,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        *,
+        retry_seconds: float = 5.0,
+    ) -> None:
+        self.lock = lock
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.retry_seconds = retry_seconds
+        self.leader = False
+        self.elections = 0
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def start(self) -> None:
+        if self.lock is None:
+            await self._elect()
+            return
+        self._task = asyncio.create_task(self._run(), name="grps-leader-election")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.leader:
+            await self._demote()
+        if self.lock is not None:
+            await self.lock.release()
+
+    async def _elect(self) -> None:
+        self.leader = True
+        self.elections += 1
+        logger.info("This worker now runs the singleton jobs")
+        await self.on_elected()
+
+    async def _demote(self) -> None:
+        self.leader = False
+        await self.on_demoted()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not self.leader and await self.lock.acquire():
+                    await self._elect()
+                elif self.leader and not await self.lock.held():
+                    logger.warning("Lost the leader lock; stopping singleton jobs")
+                    await self._demote()
+                    await self.lock.release()
+            except Exception:
+                logger.exception("Leader election failed")
+            await asyncio.sleep(self.retry_seconds)
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        return {
+            "leader": self.leader,
+            "lock": type(self.lock).__name__ if self.lock is not None else None,
+            "elections": self.elections,
+        }
+
+
+_election: Optional[LeaderElection] = None
+
+
+def get_leader_election() -> Optional[LeaderElection]:
+    return _election
+
+
+async def start_leader_election(
+    on_elected: Callable[[], Awaitable[None]],
+    on_demoted: Callable[[], Awaitable[None]],
+) -> LeaderElection:
+    global _election
+    if _election is not None:
+        return _election
+    settings = get_settings()
+    backend = coordination_backend(settings)
+    lock: Any = None
+    if backend == "postgres":
+        lock = PostgresLeaderLock(asyncpg_dsn(settings))
+    elif backend == "socket":
+        lock = FileLeaderLock(coordination_dir(settings) / "leader.lock")
+    _election = LeaderElection(lock, on_elected, on_demoted, retry_seconds=settings.leader_retry_seconds)
+    await _election.start()
+    return _election
+
+
+async def stop_leader_election() -> None:
+    global _election
+    if _election is None:
+        return
+    election, _election = _election, None
+    await election.stop()
+
+
+__all__ = [
+    "FileLeaderLock",
+    "LeaderElection",
+    "PostgresLeaderLock",
+    "get_leader_election",
+    "start_leader_election",
+    "stop_leader_election",
+]
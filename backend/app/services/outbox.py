@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import Settings, get_settings
+from ..db import session_scope
+from ..models import RobloxOutbox
+from .roblox_client import RobloxClient
+from .roblox_resilience import RobloxCircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+GROUP_ROLE = "group_role"
+DATASTORE_WRITE = "datastore_write"
+
+PENDING = "pending"
+DELIVERED = "delivered"
+FAILED = "failed"
+
+_ENQUEUED_KEY = "grps.outbox.enqueued"
+
+
+def enqueue_outbox(session: AsyncSession, user_id: int, kind: str, payload: Dict[str, Any]) -> RobloxOutbox:
+    """Add a side effect to ``session``; it is only delivered if the transaction commits."""
+
+    entry = RobloxOutbox(user_id=int(user_id), kind=kind, payload=payload, status=PENDING, attempts=0)
+    session.add(entry)
+    session.sync_session.info[_ENQUEUED_KEY] = True
+    return entry
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session: Session) -> None:
+    if session.info.pop(_ENQUEUED_KEY, False) and _dispatcher is not None:
+        _dispatcher.notify()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_enqueued(session: Session, previous_transaction) -> None:
+    session.info.pop(_ENQUEUED_KEY, None)
+
+
+@dataclass
+class OutboxStats:
+    claimed: int = 0
+    delivered: int = 0
+    retried: int = 0
+    deferred: int = 0
+    failed: int = 0
+    pruned: int = 0
+    last_error: Optional[str] = None
+
+
+@dataclass
+class _Claimed:
+    id: int
+    user_id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class OutboxDispatcher:
+    """Delivers queued Roblox side effects with a pool of asyncio workers.
+
+    Only the oldest pending entry of each user is claimed, so a user's role
+    updates and datastore writes are applied in the order they were committed
+    and a retrying entry holds back the ones queued after it. No database
+    connection is held while Roblox is called. Delivery is at-least-once: an
+    entry interrupted by a crash is sent again, which is safe because both
+    kinds of side effect are idempotent. Delivered and failed entries are
+    deleted once they are older than ``retention_hours`` (``0`` keeps them).
+    Run one dispatcher per database.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 4,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_attempts: int = 8,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+        retention_hours: float = 168.0,
+        prune_interval: float = 300.0,
+        prune_batch_size: int = 1000,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = session_scope,
+        client_factory: Callable[[], Any] = RobloxClient,
+    ) -> None:
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retention_hours = retention_hours
+        self.prune_interval = prune_interval
+        self.prune_batch_size = prune_batch_size
+        self._pruned_at: Optional[float] = None
+        self._session_factory = session_factory
+        self._client_factory = client_factory
+        self._client: Any = None
+        self._queue: asyncio.Queue[_Claimed] = asyncio.Queue()
+        self._in_flight: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task[None]] = []
+        self.stats = OutboxStats()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "OutboxDispatcher":
+        return cls(
+            workers=settings.roblox_outbox_workers,
+            batch_size=settings.roblox_outbox_batch_size,
+            poll_interval=settings.roblox_outbox_poll_interval_seconds,
+            max_attempts=settings.roblox_outbox_max_attempts,
+            base_delay=settings.roblox_outbox_retry_base_delay,
+            max_delay=settings.roblox_outbox_retry_max_delay,
+            retention_hours=settings.roblox_outbox_retention_hours,
+        )
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._claim_loop(), name="grps-outbox-claimer")]
+        self._tasks += [
+            asyncio.create_task(self._worker(), name=f"grps-outbox-worker-{index}") for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the workers; entries that were in flight stay pending and are retried later."""
+
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._in_flight.clear()
+        self._queue = asyncio.Queue()
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Claim one round of due entries and deliver them inline; returns how many were processed."""
+
+        claimed = await self._claim(now or datetime.utcnow())
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def _bounded(entry: _Claimed) -> None:
+            async with semaphore:
+                await self._process(entry)
+
+        await asyncio.gather(*(_bounded(entry) for entry in claimed))
+        return len(claimed)
+
+    async def prune(self, now: Optional[datetime] = None) -> int:
+        """Delete delivered and failed entries past the retention window; returns how many went."""
+
+        if self.retention_hours <= 0:
+            return 0
+        cutoff = (now or datetime.utcnow()) - timedelta(hours=self.retention_hours)
+        expired = (
+            select(RobloxOutbox.id)
+            .where(RobloxOutbox.status.in_((DELIVERED, FAILED)), RobloxOutbox.created_at < cutoff)
+            .limit(self.prune_batch_size)
+        )
+        pruned = 0
+        while True:
+            # Bounded batches keep each delete transaction short.
+            async with self._session_factory() as session:
+                ids = (await session.execute(expired)).scalars().all()
+                if ids:
+                    await session.execute(delete(RobloxOutbox).where(RobloxOutbox.id.in_(ids)))
+            pruned += len(ids)
+            if len(ids) < self.prune_batch_size:
+                break
+        self.stats.pruned += pruned
+        return pruned
+
+    async def _prune_if_due(self) -> None:
+        now = time.monotonic()
+        if self._pruned_at is not None and now - self._pruned_at < self.prune_interval:
+            return
+        self._pruned_at = now
+        try:
+            await self.prune()
+        except Exception:
+            logger.exception("Failed to prune the Roblox outbox")
+
+    async def _claim(self, now: datetime) -> List[_Claimed]:
+        heads = (
+            select(func.min(RobloxOutbox.id))
+            .where(RobloxOutbox.status == PENDING)
+            .group_by(RobloxOutbox.user_id)
+        )
+        statement = (
+            select(
+                RobloxOutbox.id,
+                RobloxOutbox.user_id,
+                RobloxOutbox.kind,
+                RobloxOutbox.payload,
+                RobloxOutbox.attempts,
+            )
+            .where(RobloxOutbox.id.in_(heads), RobloxOutbox.available_at <= now)
+            .order_by(RobloxOutbox.id)
+            .limit(self.batch_size + len(self._in_flight))
+        )
+        async with self._session_factory() as session:
+            rows = (await session.execute(statement)).all()
+
+        claimed = []
+        for row in rows:
+            if row.user_id in self._in_flight or len(claimed) >= self.batch_size:
+                continue
+            self._in_flight.add(row.user_id)
+            claimed.append(_Claimed(row.id, row.user_id, row.kind, row.payload, row.attempts))
+        self.stats.claimed += len(claimed)
+        return claimed
+
+    async def _deliver(self, entry: _Claimed) -> None:
+        payload = entry.payload
+        if entry.kind == GROUP_ROLE:
+            await self.client.update_group_role(entry.user_id, payload["roleId"])
+        elif entry.kind == DATASTORE_WRITE:
+            await self.client.write_datastore(
+                payload["universeId"],
+                payload["datastore"],
+                payload["scope"],
+                payload["key"],
+                payload["value"],
+            )
+        else:
+            raise ValueError(f"Unknown outbox entry kind {entry.kind!r}")
+
+    def _backoff(self, attempts: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempts - 1)))
+
+    async def _process(self, entry: _Claimed) -> None:
+        now = datetime.utcnow()
+        values: Dict[str, Any] = {"id": entry.id}
+        try:
+            await self._deliver(entry)
+        except RobloxCircuitOpenError as error:
+            # Roblox is known to be down; wait for the breaker without spending an attempt.
+            values.update(available_at=now + timedelta(seconds=error.retry_in), last_error=str(error)[:1024])
+            self.stats.deferred += 1
+        except Exception as error:
+            attempts = entry.attempts + 1
+            message = (str(error) or error.__class__.__name__)[:1024]
+            values.update(attempts=attempts, last_error=message)
+            self.stats.last_error = message
+            if attempts >= self.max_attempts:
+                values["status"] = FAILED
+                self.stats.failed += 1
+                logger.error("Giving up on outbox entry %s (%s for %s): %s", entry.id, entry.kind, entry.user_id, message)
+            else:
+                values["available_at"] = now + timedelta(seconds=self._backoff(attempts))
+                self.stats.retried += 1
+        else:
+            values.update(status=DELIVERED, attempts=entry.attempts + 1, delivered_at=now, last_error=None)
+            self.stats.delivered += 1
+
+        try:
+            async with self._session_factory() as session:
+                await session.execute(update(RobloxOutbox), [values])
+        finally:
+            self._in_flight.discard(entry.user_id)
+
+    async def _claim_loop(self) -> None:
+        while True:
+            try:
+                for entry in await self._claim(datetime.utcnow()):
+                    self._queue.put_nowait(entry)
+            except Exception:
+                logger.exception("Failed to claim Roblox outbox entries")
+            await self._prune_if_due()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _worker(self) -> None:
+        while True:
+            entry = await self._queue.get()
+            try:
+                await self._process(entry)
+            except Exception:
+                logger.exception("Failed to record outbox entry %s", entry.id)
+            finally:
+                self._queue.task_done()
+                # The user's next entry may now be claimable.
+                self._wakeup.set()
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "inFlight": len(self._in_flight),
+            "claimed": stats.claimed,
+            "delivered": stats.delivered,
+            "retried": stats.retried,
+            "deferred": stats.deferred,
+            "failed": stats.failed,
+            "pruned": stats.pruned,
+            "lastError": stats.last_error,
+        }
+
+
+_dispatcher: Optional[OutboxDispatcher] = None
+
+
+def get_outbox_dispatcher() -> Optional[OutboxDispatcher]:
+    """Return the running dispatcher, or ``None`` when the outbox is disabled."""
+
+    return _dispatcher
+
+
+async def start_outbox_dispatcher() -> Optional[OutboxDispatcher]:
+    global _dispatcher
+    settings = get_settings()
+    if not settings.roblox_outbox_enabled or _dispatcher is not None:
+        return _dispatcher
+    _dispatcher = OutboxDispatcher.from_settings(settings)
+    _dispatcher.start()
+    return _dispatcher
+
+
+async def stop_outbox_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is None:
+        return
+    dispatcher, _dispatcher = _dispatcher, None
+    await dispatcher.stop()
+
+
+__all__ = [
+    "DATASTORE_WRITE",
+    "DELIVERED",
+    "FAILED",
+    "GROUP_ROLE",
+    "OutboxDispatcher",
+    "PENDING",
+    "enqueue_outbox",
+    "get_outbox_dispatcher",
+    "start_outbox_dispatcher",
+    "stop_outbox_dispatcher",
+]
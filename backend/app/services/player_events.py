@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models import Player
+from .invalidation import PLAYERS, RESYNC, on_invalidation, publish_invalidation
+
+logger = logging.getLogger(__name__)
+
+_TRACKED_KEY = "grps.player_changes"
+_COMMITTED_KEY = "grps.player_changes.committed"
+
+
+@dataclass(frozen=True)
+class PlayerChange:
+    """Column values of a player row as they were committed."""
+
+    user_id: int
+    username: str
+    rank: str
+    rank_points: int
+    kos: int
+    wos: int
+    last_synced_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    punishment_expires_at: Optional[datetime] = None
+
+    @classmethod
+    def from_player(cls, player: Player) -> "PlayerChange":
+        return cls(
+            user_id=int(player.user_id),
+            username=player.username,
+            rank=player.rank,
+            rank_points=int(player.rank_points or 0),
+            kos=int(player.kos or 0),
+            wos=int(player.wos or 0),
+            last_synced_at=player.last_synced_at,
+            updated_at=player.updated_at,
+            punishment_expires_at=player.punishment_expires_at,
+        )
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "PlayerChange":
+        """Rebuild a change received from another process (datetimes arrive as ISO strings)."""
+
+        values = dict(payload)
+        for field in _DATETIME_FIELDS:
+            if isinstance(values.get(field), str):
+                values[field] = datetime.fromisoformat(values[field])
+        return cls(**values)
+
+
+_DATETIME_FIELDS = ("last_synced_at", "updated_at", "punishment_expires_at")
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    """Count of the committed player changes this process has seen, local or from the bus.
+
+    It differs between workers, so nothing shared with clients (such as an
+    ``ETag``) may be derived from it; leaderboard validators use the data itself.
+    """
+
+    counter: int
+    changed_at: datetime
+
+
+PlayerChangeListener = Callable[[List[PlayerChange]], None]
+
+_listeners: List[PlayerChangeListener] = []
+_version = DataVersion(counter=0, changed_at=datetime.utcnow())
+
+
+def current_version() -> DataVersion:
+    return _version
+
+
+def bump_version() -> DataVersion:
+    global _version
+    _version = DataVersion(counter=_version.counter + 1, changed_at=datetime.utcnow())
+    return _version
+
+
+def subscribe(listener: PlayerChangeListener) -> None:
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def unsubscribe(listener: PlayerChangeListener) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def track_player_change(session: AsyncSession, player: Player) -> None:
+    """Announce ``player`` to the change listeners once ``session`` commits.
+
+    Nothing is published when the transaction rolls back, so in-process views
+    such as the leaderboard cache only ever reflect committed rows.
+    """
+
+    tracked: Dict[int, Player] = session.sync_session.info.setdefault(_TRACKED_KEY, {})
+    tracked[int(player.user_id)] = player
+
+
+@event.listens_for(Session, "before_commit")
+def _capture_changes(session: Session) -> None:
+    tracked: Optional[Dict[int, Player]] = session.info.pop(_TRACKED_KEY, None)
+    if tracked:
+        session.info[_COMMITTED_KEY] = [PlayerChange.from_player(player) for player in tracked.values()]
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session) -> None:
+    changes: Optional[List[PlayerChange]] = session.info.pop(_COMMITTED_KEY, None)
+    if not changes:
+        return
+    _notify(changes)
+    publish_invalidation(PLAYERS, [asdict(change) for change in changes])
+
+
+def _notify(changes: List[PlayerChange]) -> None:
+    bump_version()
+    for listener in list(_listeners):
+        try:
+            listener(changes)
+        except Exception:  # pragma: no cover - a faulty listener must not break the commit path
+            logger.exception("Player change listener %r failed", listener)
+
+
+def _apply_remote_changes(items: List[Dict[str, Any]]) -> None:
+    """Changes committed by another worker reach the same listeners as local ones."""
+
+    _notify([PlayerChange.from_payload(item) for item in items])
+
+
+on_invalidation(PLAYERS, _apply_remote_changes)
+on_invalidation(RESYNC, lambda items: bump_version())
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session: Session, previous_transaction) -> None:
+    session.info.pop(_TRACKED_KEY, None)
+    session.info.pop(_COMMITTED_KEY, None)
+
+
+__all__ = [
+    "DataVersion",
+    "PlayerChange",
+    "bump_version",
+    "current_version",
+    "subscribe",
+    "track_player_change",
+    "unsubscribe",
+]
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import PlayerSnapshot
+from .snapshot_store import PayloadRebuilder, load_base_payload
+
+HistoryCursor = Tuple[datetime, int]
+
+_COLUMNS = (
+    PlayerSnapshot.id,
+    PlayerSnapshot.created_at,
+    PlayerSnapshot.source,
+    PlayerSnapshot.experience_key,
+    PlayerSnapshot.actor_user_id,
+    PlayerSnapshot.content_hash,
+    PlayerSnapshot.is_delta,
+    PlayerSnapshot.payload,
+)
+
+
+def encode_history_cursor(created_at: datetime, snapshot_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{snapshot_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_history_cursor(token: str) -> HistoryCursor:
+    """Parse a cursor produced by :func:`encode_history_cursor`; raises ``ValueError`` when malformed."""
+
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+        created_at, snapshot_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), int(snapshot_id)
+    except (ValueError, UnicodeDecodeError) as error:
+        raise ValueError("invalid history cursor") from error
+
+
+class PlayerHistoryService:
+    """Reads a player's snapshot history in ``(created_at, id)`` order.
+
+    Rows are fetched as column tuples rather than entities so nothing piles up
+    in the session identity map, and delta rows are expanded to full payloads.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def _statement(
+        self,
+        user_id: int,
+        *,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        after: Optional[HistoryCursor],
+    ):
+        statement = select(*_COLUMNS).where(PlayerSnapshot.user_id == user_id)
+        if since is not None:
+            statement = statement.where(PlayerSnapshot.created_at >= since)
+        if until is not None:
+            statement = statement.where(PlayerSnapshot.created_at < until)
+        if after is not None:
+            created_at, snapshot_id = after
+            statement = statement.where(
+                or_(
+                    PlayerSnapshot.created_at > created_at,
+                    and_(PlayerSnapshot.created_at == created_at, PlayerSnapshot.id > snapshot_id),
+                )
+            )
+        return statement.order_by(PlayerSnapshot.created_at, PlayerSnapshot.id)
+
+    async def page(
+        self,
+        user_id: int,
+        *,
+        limit: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[HistoryCursor] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        statement = self._statement(user_id, since=since, until=until, after=after).limit(limit + 1)
+        rows = (await self.session.execute(statement)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return [], None
+
+        rebuilder = await self._rebuilder(user_id, rows[0])
+        items = [self._serialize(row, rebuilder.apply(row)) for row in rows]
+        next_cursor = encode_history_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+        return items, next_cursor
+
+    async def stream(
+        self,
+        user_id: int,
+        *,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[HistoryCursor] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every matching entry through a server-side cursor, ``batch_size`` rows at a time."""
+
+        statement = self._statement(user_id, since=since, until=until, after=after)
+        # Resolve the delta base before the cursor is opened so the connection is not shared mid-stream.
+        first = (await self.session.execute(statement.limit(1))).first()
+        if first is None:
+            return
+        rebuilder = await self._rebuilder(user_id, first)
+
+        result = await self.session.stream(statement.execution_options(yield_per=batch_size))
+        async for row in result:
+            yield self._serialize(row, rebuilder.apply(row))
+
+    async def _rebuilder(self, user_id: int, first_row: Any) -> PayloadRebuilder:
+        base = None
+        if first_row.is_delta:
+            base = await load_base_payload(self.session, user_id, first_row.id)
+        return PayloadRebuilder(base)
+
+    @staticmethod
+    def _serialize(row: Any, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "createdAt": row.created_at,
+            "source": row.source,
+            "experienceKey": row.experience_key,
+            "actorUserId": row.actor_user_id,
+            "contentHash": row.content_hash,
+            "snapshot": snapshot,
+        }
+
+
+__all__ = ["PlayerHistoryService", "decode_history_cursor", "encode_history_cursor"]
@@ -0,0 +1,574 @@
+from __future__ import annotations
+
+import json
+import math
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import bindparam, case, event, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import Settings, get_settings
+from ..metrics import REGISTRY
+from ..models import Player, PointsLedgerEntry
+from .invalidation import PLAYERS, POLICIES, RESYNC, on_invalidation
+from .player_events import track_player_change
+from .rank_policy import RankPolicy, get_rank_policy
+
+POINTS_EVENTS = REGISTRY.counter("grps_points_events_total", "Points events recorded in the ledger, by status.", ("status",))
+
+# Aliases accepted by ``shared/points.lua``.
+EVENT_WEIGHT_KEYS = {
+    "activity": "activity_tick_5min",
+    "activity_tick_5min": "activity_tick_5min",
+    "training": "training_complete",
+    "training_complete": "training_complete",
+    "operation": "operation_complete",
+    "operation_complete": "operation_complete",
+    "ko": "ko",
+    "wo": "wo",
+    "recommendation_cmd": "recommendation_cmd",
+    "recommendation_ccm": "recommendation_ccm",
+}
+
+ACCEPTED = "accepted"
+CAPPED = "capped"
+REJECTED = "rejected"
+IGNORED = "ignored"
+
+KO_COOLDOWN = "KO_COOLDOWN"
+ACTIVITY_TOO_SHORT = "ACTIVITY_TOO_SHORT"
+UNKNOWN_EVENT = "UNKNOWN_EVENT"
+UNKNOWN_PLAYER = "UNKNOWN_PLAYER"
+
+_EPOCH = datetime(1970, 1, 1)
+_DAY_SECONDS = 86_400
+_WEEK_SECONDS = 7 * _DAY_SECONDS
+_FORGET_KEY = "grps.points.touched"
+
+
+def _seconds(moment: datetime) -> float:
+    return (moment - _EPOCH).total_seconds()
+
+
+@dataclass(frozen=True)
+class PointsPolicy:
+    """Weights, caps and anti-abuse thresholds from ``policy.points.json``."""
+
+    weights: Mapping[str, float]
+    daily_cap: float = math.inf
+    weekly_cap: float = math.inf
+    ko_cooldown_seconds: float = 0.0
+    activity_min_seconds: float = 0.0
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, Any]) -> "PointsPolicy":
+        caps = payload.get("caps") or {}
+        anti_abuse = payload.get("anti_abuse") or {}
+        return cls(
+            weights={key: float(value) for key, value in (payload.get("weights") or {}).items()},
+            daily_cap=float(caps.get("daily", math.inf)),
+            weekly_cap=float(caps.get("weekly", math.inf)),
+            ko_cooldown_seconds=float(anti_abuse.get("ko_cooldown_seconds") or 0),
+            activity_min_seconds=float(anti_abuse.get("activity_min_seconds") or 0),
+        )
+
+    @classmethod
+    def from_config(cls) -> "PointsPolicy":
+        path = Path(get_settings().config_dir) / "policy.points.json"
+        with path.open("r", encoding="utf-8") as handle:
+            return cls.from_payload(json.load(handle))
+
+    def resolve_weight_key(self, event_type: str, weight_key: Optional[str] = None) -> Optional[str]:
+        return weight_key or EVENT_WEIGHT_KEYS.get(event_type)
+
+
+@lru_cache(maxsize=1)
+def get_points_policy() -> PointsPolicy:
+    return PointsPolicy.from_config()
+
+
+@dataclass
+class PointsEvent:
+    user_id: int
+    type: str
+    magnitude: float = 1.0
+    duration: Optional[float] = None
+    occurred_at: Optional[datetime] = None
+    weight_key: Optional[str] = None
+
+
+@dataclass
+class PointsResult:
+    event: PointsEvent
+    status: str
+    occurred_at: datetime
+    weight_key: Optional[str] = None
+    reason: Optional[str] = None
+    base_delta: float = 0.0
+    delta: float = 0.0
+    applied: int = 0
+
+    def to_payload(self, index: int) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "userId": self.event.user_id,
+            "type": self.event.type,
+            "status": self.status,
+            "reason": self.reason,
+            "baseDelta": self.base_delta,
+            "delta": self.delta,
+            "applied": self.applied,
+        }
+
+
+class SlidingWindow:
+    """Sum of the amounts added during the last ``span`` buckets."""
+
+    __slots__ = ("span", "buckets", "total")
+
+    def __init__(self, span: int) -> None:
+        self.span = span
+        self.buckets: Deque[List[float]] = deque()
+        self.total = 0.0
+
+    def expire(self, bucket: int) -> None:
+        buckets = self.buckets
+        horizon = bucket - self.span
+        while buckets and buckets[0][0] <= horizon:
+            self.total -= buckets.popleft()[1]
+        if not buckets:
+            self.total = 0.0
+
+    def add(self, bucket: int, amount: float) -> None:
+        buckets = self.buckets
+        if buckets and buckets[-1][0] >= bucket:
+            # Late events are charged to the newest bucket so they can never free headroom.
+            buckets[-1][1] += amount
+        else:
+            buckets.append([bucket, amount])
+        self.total += amount
+
+
+class PlayerPointsState:
+    __slots__ = ("daily", "weekly", "last_ko_at", "remainder")
+
+    def __init__(self, daily_span: int, weekly_span: int, remainder: float = 0.0) -> None:
+        self.daily = SlidingWindow(daily_span)
+        self.weekly = SlidingWindow(weekly_span)
+        self.last_ko_at: Optional[float] = None
+        self.remainder = remainder
+
+
+@dataclass
+class PointsEngineStats:
+    events: int = 0
+    loads: int = 0
+    evictions: int = 0
+    by_status: Dict[str, int] = field(default_factory=lambda: {ACCEPTED: 0, CAPPED: 0, REJECTED: 0, IGNORED: 0})
+
+
+class PointsEngine:
+    """In-memory evaluator mirroring ``shared/points.lua``.
+
+    Daily and weekly caps are enforced with sliding windows made of
+    ``bucket_seconds`` buckets. Only positive awards count towards the caps, so
+    penalties never free headroom. As in the Lua helper, a positive delta is
+    clamped to the remaining headroom, and a negative one to ``-daily``. A
+    player's state is loaded from the ledger the first time they are seen
+    (see :class:`PointsLedgerService`). The least recently used states are
+    dropped beyond ``max_players``. :meth:`evaluate` never awaits, so
+    concurrent requests cannot interleave inside one evaluation.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[PointsPolicy] = None,
+        *,
+        bucket_seconds: int = 3600,
+        max_players: int = 100_000,
+    ) -> None:
+        self.policy = policy or get_points_policy()
+        self.bucket_seconds = bucket_seconds
+        self.daily_span = math.ceil(_DAY_SECONDS / bucket_seconds)
+        self.weekly_span = math.ceil(_WEEK_SECONDS / bucket_seconds)
+        self.max_players = max_players
+        self._states: "OrderedDict[int, PlayerPointsState]" = OrderedDict()
+        self.stats = PointsEngineStats()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "PointsEngine":
+        return cls(bucket_seconds=settings.points_window_bucket_seconds, max_players=settings.points_engine_max_players)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._states
+
+    def missing(self, user_ids: Iterable[int]) -> List[int]:
+        return [user_id for user_id in user_ids if user_id not in self._states]
+
+    def forget(self, user_ids: Iterable[int]) -> None:
+        for user_id in user_ids:
+            self._states.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._states.clear()
+
+    def load(
+        self,
+        user_id: int,
+        *,
+        remainder: float,
+        history: Iterable[Tuple[Optional[str], datetime, float]] = (),
+    ) -> None:
+        """Seed a player's state from ``(weight_key, occurred_at, delta)`` rows of the last week.
+
+        A state that appeared while the rows were being read is kept; it already
+        reflects everything this process evaluated.
+        """
+
+        if user_id in self._states:
+            return
+        state = PlayerPointsState(self.daily_span, self.weekly_span, remainder or 0.0)
+        for weight_key, occurred_at, delta in sorted(history, key=lambda row: row[1]):
+            timestamp = _seconds(occurred_at)
+            if delta > 0:
+                bucket = int(timestamp // self.bucket_seconds)
+                state.daily.add(bucket, delta)
+                state.weekly.add(bucket, delta)
+            if weight_key == "ko":
+                state.last_ko_at = timestamp
+        self._states[user_id] = state
+        self.stats.loads += 1
+        while len(self._states) > self.max_players:
+            self._states.popitem(last=False)
+            self.stats.evictions += 1
+
+    def evaluate(self, event: PointsEvent, now: datetime) -> PointsResult:
+        occurred_at = min(event.occurred_at or now, now)
+        self.stats.events += 1
+        state = self._states.get(event.user_id)
+        if state is None:
+            return self._count(PointsResult(event, IGNORED, occurred_at, reason=UNKNOWN_PLAYER))
+        self._states.move_to_end(event.user_id)
+
+        policy = self.policy
+        weight_key = policy.resolve_weight_key(event.type, event.weight_key)
+        weight = policy.weights.get(weight_key) if weight_key else None
+        if weight is None:
+            return self._count(PointsResult(event, IGNORED, occurred_at, weight_key=weight_key, reason=UNKNOWN_EVENT))
+
+        timestamp = _seconds(occurred_at)
+        if weight_key == "ko" and policy.ko_cooldown_seconds > 0:
+            if state.last_ko_at is not None and timestamp - state.last_ko_at < policy.ko_cooldown_seconds:
+                return self._count(PointsResult(event, REJECTED, occurred_at, weight_key=weight_key, reason=KO_COOLDOWN))
+            state.last_ko_at = timestamp
+        elif weight_key == "activity_tick_5min" and policy.activity_min_seconds > 0:
+            if (event.duration or 0) < policy.activity_min_seconds:
+                return self._count(
+                    PointsResult(event, REJECTED, occurred_at, weight_key=weight_key, reason=ACTIVITY_TOO_SHORT)
+                )
+
+        base_delta = weight * event.magnitude
+        bucket = int(timestamp // self.bucket_seconds)
+        state.daily.expire(bucket)
+        state.weekly.expire(bucket)
+        headroom = min(policy.daily_cap - state.daily.total, policy.weekly_cap - state.weekly.total)
+        delta = base_delta
+        if delta > headroom:
+            delta = max(headroom, 0.0)
+        elif delta < -policy.daily_cap:
+            delta = -policy.daily_cap
+        if delta > 0:
+            state.daily.add(bucket, delta)
+            state.weekly.add(bucket, delta)
+
+        total = state.remainder + delta
+        applied = math.floor(total + 1e-9)
+        state.remainder = round(total - applied, 9)
+        return self._count(
+            PointsResult(
+                event,
+                ACCEPTED if delta == base_delta else CAPPED,
+                occurred_at,
+                weight_key=weight_key,
+                base_delta=base_delta,
+                delta=delta,
+                applied=applied,
+            )
+        )
+
+    def evaluate_many(self, events: Sequence[PointsEvent], now: datetime) -> List[PointsResult]:
+        return [self.evaluate(event, now) for event in events]
+
+    def remainder(self, user_id: int) -> float:
+        return self._states[user_id].remainder
+
+    def _count(self, result: PointsResult) -> PointsResult:
+        self.stats.by_status[result.status] += 1
+        return result
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        return {
+            "players": len(self._states),
+            "maxPlayers": self.max_players,
+            "bucketSeconds": self.bucket_seconds,
+            "events": stats.events,
+            "loads": stats.loads,
+            "evictions": stats.evictions,
+            **stats.by_status,
+        }
+
+
+class PointsLedgerService:
+    """Evaluates activity events with the shared engine and persists the outcome.
+
+    Players the engine has not seen are loaded in one query, together with
+    their last week of ledger rows. Every evaluated event is appended to
+    ``points_ledger`` with one bulk insert. Player totals move with one atomic
+    ``rank_points = rank_points + applied`` update, floored at zero, which also
+    moves players on a points-earned rank to the rank their new total reaches.
+    If the transaction rolls back, the touched players are dropped from the
+    engine and reloaded from the ledger on their next event.
+
+    With ``API_WORKERS > 1`` every worker has its own engine, so ``lock_players``
+    (on by default there) locks the players' rows for the transaction and
+    reloads their state under the lock. Caps and the remainder are therefore
+    evaluated against every committed event, whichever worker recorded it.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        engine: Optional[PointsEngine] = None,
+        rank_policy: Optional[RankPolicy] = None,
+        *,
+        lock_players: Optional[bool] = None,
+    ):
+        self.session = session
+        self.engine = engine or get_points_engine()
+        self.rank_policy = rank_policy or get_rank_policy()
+        self.lock_players = get_settings().api_workers > 1 if lock_players is None else lock_players
+
+    async def record(self, events: Sequence[PointsEvent], *, now: Optional[datetime] = None) -> List[PointsResult]:
+        if not events:
+            return []
+        now = now or datetime.utcnow()
+        user_ids = {event.user_id for event in events}
+        if self.lock_players:
+            await self._lock(user_ids)
+        await self._load_missing(user_ids, now)
+
+        results = self.engine.evaluate_many(events, now)
+        touched: List[Tuple[PointsEngine, Set[int]]] = self.session.sync_session.info.setdefault(_FORGET_KEY, [])
+        touched.append((self.engine, user_ids))
+        try:
+            await self._persist(results, now)
+        except Exception:
+            self.engine.forget(user_ids)
+            raise
+        for result in results:
+            POINTS_EVENTS.inc(result.status)
+        return results
+
+    async def _lock(self, user_ids: Set[int]) -> None:
+        """Hold the rows of ``user_ids`` until the transaction ends and drop their cached state.
+
+        Rows are locked in ``user_id`` order so overlapping batches cannot deadlock.
+        """
+
+        ordered = sorted(user_ids)
+        if self.session.get_bind().dialect.name == "sqlite":
+            # No row locks in SQLite: a no-op write takes the database write lock before anything is read.
+            table = Player.__table__
+            await self.session.execute(
+                update(table)
+                .where(table.c.user_id.in_(ordered))
+                .values(user_id=table.c.user_id, updated_at=table.c.updated_at)
+            )
+        else:
+            await self.session.execute(
+                select(Player.user_id).where(Player.user_id.in_(ordered)).order_by(Player.user_id).with_for_update()
+            )
+        # Another worker may have recorded events for them since they were cached.
+        self.engine.forget(user_ids)
+
+    async def _load_missing(self, user_ids: Set[int], now: datetime) -> None:
+        missing = self.engine.missing(user_ids)
+        if not missing:
+            return
+        remainders = dict(
+            (await self.session.execute(select(Player.user_id, Player.points_remainder).where(Player.user_id.in_(missing)))).all()
+        )
+        if not remainders:
+            return
+        history: Dict[int, List[Tuple[Optional[str], datetime, float]]] = {user_id: [] for user_id in remainders}
+        rows = await self.session.execute(
+            select(
+                PointsLedgerEntry.user_id,
+                PointsLedgerEntry.weight_key,
+                PointsLedgerEntry.occurred_at,
+                PointsLedgerEntry.delta,
+            ).where(
+                PointsLedgerEntry.user_id.in_(list(remainders)),
+                PointsLedgerEntry.occurred_at >= now - timedelta(days=7),
+                PointsLedgerEntry.status.in_((ACCEPTED, CAPPED)),
+            )
+        )
+        for user_id, weight_key, occurred_at, delta in rows:
+            history[user_id].append((weight_key, occurred_at, delta))
+        for user_id, remainder in remainders.items():
+            self.engine.load(user_id, remainder=remainder or 0.0, history=history[user_id])
+
+    async def _persist(self, results: Sequence[PointsResult], now: datetime) -> None:
+        ledger = []
+        applied: Dict[int, int] = {}
+        for result in results:
+            event = result.event
+            if result.reason == UNKNOWN_PLAYER:
+                continue
+            ledger.append(
+                {
+                    "user_id": event.user_id,
+                    "event_type": event.type,
+                    "weight_key": result.weight_key,
+                    "magnitude": event.magnitude,
+                    "duration": event.duration,
+                    "status": result.status,
+                    "reason": result.reason,
+                    "base_delta": result.base_delta,
+                    "delta": result.delta,
+                    "applied": result.applied,
+                    "occurred_at": result.occurred_at,
+                    "created_at": now,
+                }
+            )
+            if result.delta:
+                applied[event.user_id] = applied.get(event.user_id, 0) + result.applied
+        if ledger:
+            await self.session.execute(insert(PointsLedgerEntry.__table__), ledger)
+        if not applied:
+            return
+
+        table = Player.__table__
+        total = table.c.rank_points + bindparam("b_applied")
+        total = case((total < 0, 0), else_=total)
+        statement = (
+            update(table)
+            .where(table.c.user_id == bindparam("b_user_id"))
+            .values(
+                rank_points=total,
+                points_remainder=bindparam("b_remainder"),
+                updated_at=now,
+                **self._reclassify(table, total),
+            )
+        )
+        await self.session.execute(
+            statement,
+            [
+                {"b_user_id": user_id, "b_applied": points, "b_remainder": self.engine.remainder(user_id)}
+                for user_id, points in applied.items()
+            ],
+        )
+        changed = await self.session.execute(
+            select(Player).where(Player.user_id.in_(list(applied))).execution_options(populate_existing=True)
+        )
+        for player in changed.scalars():
+            track_player_change(self.session, player)
+
+    def _reclassify(self, table, total) -> Dict[str, Any]:
+        """``SET`` clauses moving players on a points-earned rank to the one ``total`` reaches.
+
+        Punishment and privileged ranks are left alone; they change through
+        automation decisions. Like ``CalculationService.apply_snapshot``, the
+        neighbouring ranks are those of the rank name.
+        """
+
+        policy = self.rank_policy
+        earned = policy.earned_ranks()
+        if not earned:
+            return {}
+        # Plain comparisons: an expanding IN cannot be used with the executemany update.
+        reclassified = or_(*(table.c.rank == rank.name for rank in earned))
+
+        def by_total(column, value) -> Any:
+            # Highest threshold first; the lowest earned rank is the floor.
+            whens = [(total >= rank.min_points, value(rank)) for rank in reversed(earned[1:])]
+            derived = case(*whens, else_=value(earned[0])) if whens else value(earned[0])
+            return case((reclassified, derived), else_=column)
+
+        return {
+            "rank": by_total(table.c.rank, lambda rank: rank.name),
+            "previous_rank": by_total(
+                table.c.previous_rank, lambda rank: getattr(policy.previous_rank_by_name(rank.name), "name", None)
+            ),
+            "next_rank": by_total(
+                table.c.next_rank, lambda rank: getattr(policy.next_rank_by_name(rank.name), "name", None)
+            ),
+        }
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_touched(session: Session) -> None:
+    session.info.pop(_FORGET_KEY, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_touched(session: Session, previous_transaction) -> None:
+    for engine, user_ids in session.info.pop(_FORGET_KEY, None) or ():
+        engine.forget(user_ids)
+
+
+_engine: Optional[PointsEngine] = None
+
+
+def get_points_engine() -> PointsEngine:
+    """Return the process-wide engine, created from settings on first use."""
+
+    global _engine
+    if _engine is None:
+        _engine = PointsEngine.from_settings(get_settings())
+    return _engine
+
+
+def _forget_remote(items: List[Dict[str, Any]]) -> None:
+    # Another worker moved these players; their windows and remainder are reloaded from the ledger.
+    if _engine is not None:
+        _engine.forget(int(item["user_id"]) for item in items)
+
+
+def _reload_policy(items: List[Any]) -> None:
+    get_points_policy.cache_clear()
+    if _engine is not None:
+        _engine.policy = get_points_policy()
+
+
+def _clear_engine(items: List[Any]) -> None:
+    if _engine is not None:
+        _engine.clear()
+
+
+on_invalidation(PLAYERS, _forget_remote)
+on_invalidation(POLICIES, _reload_policy)
+on_invalidation(RESYNC, _clear_engine)
+
+
+__all__ = [
+    "ACCEPTED",
+    "CAPPED",
+    "EVENT_WEIGHT_KEYS",
+    "IGNORED",
+    "PointsEngine",
+    "PointsEvent",
+    "PointsLedgerService",
+    "PointsPolicy",
+    "PointsResult",
+    "REJECTED",
+    "get_points_engine",
+    "get_points_policy",
+]
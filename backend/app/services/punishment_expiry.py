@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import Settings, get_settings
+from ..db import session_scope
+from ..models import Player, naive_utc
+from .automation import AutomationService
+from .player_events import PlayerChange, subscribe, unsubscribe
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExpiryStats:
+    rebuilds: int = 0
+    wakeups: int = 0
+    batches: int = 0
+    lifted: int = 0
+    failed: int = 0
+    stale: int = 0
+    last_error: Optional[str] = None
+
+
+class PunishmentExpiryScheduler:
+    """Lifts expired punishments at the moment they expire.
+
+    The earliest ``heap_size`` expiries sit in a min-heap of
+    ``(punishment_expires_at, user_id)``. It is built from
+    ``ix_players_punishment_expires_at`` at start-up and kept current from
+    committed player changes. The loop sleeps until the head is due, or until a
+    change schedules an earlier expiry. Expiries past the loaded window
+    (``horizon``) are read from the index once the heap runs dry. Due players are
+    re-read from the database, which stays the source of truth, and lifted in
+    batches through :meth:`AutomationService.lift_punishments`. A failed lift is
+    retried after ``retry_seconds``. Every ``resync_seconds`` the heap is
+    rebuilt, which picks up expiries written by other processes.
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size: int = 100,
+        heap_size: int = 10_000,
+        resync_seconds: float = 3600.0,
+        retry_seconds: float = 60.0,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = session_scope,
+        service_factory: Callable[[AsyncSession], AutomationService] = AutomationService,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ) -> None:
+        self.batch_size = batch_size
+        self.heap_size = heap_size
+        self.resync_seconds = resync_seconds
+        self.retry_seconds = retry_seconds
+        self._session_factory = session_factory
+        self._service_factory = service_factory
+        self.clock = clock
+        self._heap: List[Tuple[datetime, int]] = []
+        # Live entry per user; heap entries that disagree with it are stale and skipped.
+        self._scheduled: Dict[int, datetime] = {}
+        # Expiries later than this were left in the index; ``None`` means the heap holds all of them.
+        self._horizon: Optional[datetime] = None
+        # Changes committed while a rebuild reads the index, replayed on top of its result.
+        self._replay: Optional[List[PlayerChange]] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+        self.stats = ExpiryStats()
+
+    @classmethod
+    def from_settings(cls, settings: Settings, **overrides: Any) -> "PunishmentExpiryScheduler":
+        options: Dict[str, Any] = {
+            "batch_size": settings.punishment_expiry_batch_size,
+            "heap_size": settings.punishment_expiry_heap_size,
+            "resync_seconds": settings.punishment_expiry_resync_seconds,
+            "retry_seconds": settings.punishment_expiry_retry_seconds,
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    def __len__(self) -> int:
+        return len(self._scheduled)
+
+    async def rebuild(self) -> int:
+        """Reload the earliest ``heap_size`` expiries from the index; returns how many were loaded."""
+
+        self._replay = []
+        try:
+            async with self._session_factory() as session:
+                rows = (
+                    await session.execute(
+                        select(Player.punishment_expires_at, Player.user_id)
+                        .where(Player.punishment_expires_at.isnot(None))
+                        .order_by(Player.punishment_expires_at, Player.user_id)
+                        .limit(self.heap_size)
+                    )
+                ).all()
+            replay = self._replay
+        finally:
+            self._replay = None
+        self._heap = [(naive_utc(expires_at), int(user_id)) for expires_at, user_id in rows]
+        heapq.heapify(self._heap)
+        self._scheduled = {user_id: expires_at for expires_at, user_id in self._heap}
+        self._horizon = naive_utc(rows[-1][0]) if len(rows) >= self.heap_size else None
+        self.apply(replay)
+        self.stats.rebuilds += 1
+        self._wakeup.set()
+        return len(rows)
+
+    def schedule(self, user_id: int, expires_at: Optional[datetime]) -> None:
+        """Track (or, with ``None``, stop tracking) the punishment expiry of ``user_id``."""
+
+        expires_at = naive_utc(expires_at)
+        if expires_at is None or (self._horizon is not None and expires_at > self._horizon):
+            self._scheduled.pop(user_id, None)
+            return
+        if self._scheduled.get(user_id) == expires_at:
+            return
+        self._scheduled[user_id] = expires_at
+        heapq.heappush(self._heap, (expires_at, user_id))
+        if len(self._scheduled) > self.heap_size:
+            self._shrink()
+        elif len(self._heap) > 2 * self.heap_size:
+            self._compact()
+        if self._heap[0] == (expires_at, user_id):
+            self._wakeup.set()
+
+    def apply(self, changes: List[PlayerChange]) -> None:
+        if self._replay is not None:
+            self._replay.extend(changes)
+        for change in changes:
+            self.schedule(change.user_id, change.punishment_expires_at)
+
+    def _compact(self) -> None:
+        self._heap = [(expires_at, user_id) for user_id, expires_at in self._scheduled.items()]
+        heapq.heapify(self._heap)
+
+    def _shrink(self) -> None:
+        keep = heapq.nsmallest(self.heap_size, ((expires_at, user_id) for user_id, expires_at in self._scheduled.items()))
+        self._scheduled = {user_id: expires_at for expires_at, user_id in keep}
+        self._horizon = keep[-1][0]
+        self._compact()
+
+    def next_due(self) -> Optional[datetime]:
+        heap = self._heap
+        while heap and self._scheduled.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+            self.stats.stale += 1
+        return heap[0][0] if heap else None
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        due: List[int] = []
+        while len(due) < self.batch_size:
+            next_due = self.next_due()
+            if next_due is None or next_due > now:
+                break
+            _, user_id = heapq.heappop(self._heap)
+            del self._scheduled[user_id]
+            due.append(user_id)
+        return due
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Lift one batch of due punishments; returns how many players were processed."""
+
+        now = now or self.clock()
+        due = self._pop_due(now)
+        if not due and self._horizon is not None and self.next_due() is None:
+            await self.rebuild()
+            due = self._pop_due(now)
+        if not due:
+            return 0
+
+        self.stats.batches += 1
+        retry_at = now + timedelta(seconds=self.retry_seconds)
+        retries: List[int] = []
+        try:
+            async with self._session_factory() as session:
+                players = (
+                    await session.execute(select(Player).where(Player.user_id.in_(due)).order_by(Player.user_id))
+                ).scalars().all()
+                expired = []
+                for player in players:
+                    expires_at = naive_utc(player.punishment_expires_at)
+                    if expires_at is not None and expires_at <= now:
+                        expired.append(player)
+                    else:
+                        # Extended or cleared since it was scheduled.
+                        self.schedule(int(player.user_id), expires_at)
+                outcomes = await self._service_factory(session).lift_punishments(expired)
+                for outcome in outcomes:
+                    if outcome.applied:
+                        self.stats.lifted += 1
+                    else:
+                        self.stats.failed += 1
+                        self.stats.last_error = outcome.error
+                        retries.append(int(outcome.player.user_id))
+        except Exception as error:
+            logger.exception("Failed to lift expired punishments")
+            self.stats.failed += len(due)
+            self.stats.last_error = str(error) or error.__class__.__name__
+            retries = due
+        for user_id in retries:
+            self.schedule(user_id, retry_at)
+        return len(due)
+
+    def start(self) -> None:
+        if self._task is None:
+            subscribe(self.apply)
+            self._task = asyncio.create_task(self._run(), name="grps-punishment-expiry")
+
+    async def stop(self) -> None:
+        unsubscribe(self.apply)
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        resync_at = loop.time()
+        while True:
+            try:
+                if loop.time() >= resync_at:
+                    await self.rebuild()
+                    resync_at = loop.time() + self.resync_seconds
+                if await self.run_once() >= self.batch_size:
+                    continue
+                next_due = self.next_due()
+                if next_due is None and self._horizon is not None:
+                    # The batch drained the heap; the rest is still in the index.
+                    continue
+            except Exception:
+                logger.exception("Punishment expiry scheduler failed")
+                next_due = None
+            self._wakeup.clear()
+            timeout = max(resync_at - loop.time(), 0.0)
+            if next_due is not None:
+                timeout = min(timeout, max((next_due - self.clock()).total_seconds(), 0.0))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.stats.wakeups += 1
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        next_due = self.next_due()
+        return {
+            "scheduled": len(self._scheduled),
+            "heapSize": self.heap_size,
+            "horizon": self._horizon.isoformat() if self._horizon else None,
+            "nextDueAt": next_due.isoformat() if next_due else None,
+            "rebuilds": stats.rebuilds,
+            "wakeups": stats.wakeups,
+            "batches": stats.batches,
+            "lifted": stats.lifted,
+            "failed": stats.failed,
+            "staleEntries": stats.stale,
+            "lastError": stats.last_error,
+        }
+
+
+_scheduler: Optional[PunishmentExpiryScheduler] = None
+
+
+def get_punishment_expiry_scheduler() -> Optional[PunishmentExpiryScheduler]:
+    """Return the running scheduler, or ``None`` when punishment expiry is disabled."""
+
+    return _scheduler
+
+
+def start_punishment_expiry() -> Optional[PunishmentExpiryScheduler]:
+    global _scheduler
+    settings = get_settings()
+    if not settings.punishment_expiry_enabled or _scheduler is not None:
+        return _scheduler
+    _scheduler = PunishmentExpiryScheduler.from_settings(settings)
+    _scheduler.start()
+    return _scheduler
+
+
+async def stop_punishment_expiry() -> None:
+    global _scheduler
+    if _scheduler is None:
+        return
+    scheduler, _scheduler = _scheduler, None
+    await scheduler.stop()
+
+
+__all__ = [
+    "PunishmentExpiryScheduler",
+    "get_punishment_expiry_scheduler",
+    "start_punishment_expiry",
+    "stop_punishment_expiry",
+]
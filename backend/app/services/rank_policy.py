@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+import hashlib
 import json
+from bisect import bisect_right
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
 
 from ..config import get_settings
+from .invalidation import POLICIES, on_invalidation
+
+try:  # pragma: no cover - exercised implicitly depending on the environment
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
 
 
 @dataclass(frozen=True)
@@ -29,6 +37,32 @@ class RankPolicy:
         ordered = sorted(ranks, key=lambda rank: rank.min_points)
         self._ranks: List[Rank] = ordered
         self._by_name: Dict[str, Rank] = {rank.name: rank for rank in ordered}
+        self._thresholds: List[int] = [rank.min_points for rank in ordered]
+        self._index_by_name: Dict[str, int] = {rank.name: index for index, rank in enumerate(ordered)}
+        # Ranks reached on points alone; punishment and privileged ranks are assigned by decisions.
+        self._earned: List[Rank] = [rank for rank in ordered if not rank.is_punishment and not rank.privileged]
+        self._earned_thresholds: List[int] = [rank.min_points for rank in self._earned]
+        self._by_role_id: Dict[int, Rank] = {}
+        for rank in ordered:
+            if rank.role_id is not None:
+                self._by_role_id.setdefault(rank.role_id, rank)
+        # Identifies the policy content so derived values (e.g. HTTP validators) change with it.
+        self.fingerprint = hashlib.sha1(repr(ordered).encode("utf-8")).hexdigest()[:16]
+
+        # _next_from[i] is the first non-punishment rank at or after position i.
+        self._next_from: List[Optional[Rank]] = [None] * (len(ordered) + 1)
+        for index in range(len(ordered) - 1, -1, -1):
+            rank = ordered[index]
+            self._next_from[index] = rank if not rank.is_punishment else self._next_from[index + 1]
+
+        self._next_by_name: Dict[str, Optional[Rank]] = {}
+        self._previous_by_name: Dict[str, Optional[Rank]] = {}
+        previous: Optional[Rank] = None
+        for index, rank in enumerate(ordered):
+            self._previous_by_name[rank.name] = previous
+            self._next_by_name[rank.name] = self._next_from[index + 1]
+            if not rank.is_punishment:
+                previous = rank
 
     @classmethod
     def from_config(cls) -> "RankPolicy":
@@ -56,22 +90,34 @@ class RankPolicy:
     def get_rank(self, name: str) -> Optional[Rank]:
         return self._by_name.get(name)
 
+    def get_rank_by_role_id(self, role_id: Optional[int]) -> Optional[Rank]:
+        """Return the rank mapped to a Roblox group role id (the lowest rank wins on duplicates)."""
+
+        if role_id is None:
+            return None
+        return self._by_role_id.get(role_id)
+
     def rank_for_points(self, points: int) -> Optional[Rank]:
-        current = None
-        for rank in self._ranks:
-            if points >= rank.min_points:
-                current = rank
-            else:
-                break
-        return current
+        index = bisect_right(self._thresholds, points)
+        return self._ranks[index - 1] if index else None
+
+    def earned_ranks(self) -> List[Rank]:
+        return list(self._earned)
+
+    def is_earned(self, rank_name: Optional[str]) -> bool:
+        descriptor = self._by_name.get(rank_name) if rank_name else None
+        return descriptor is not None and not descriptor.is_punishment and not descriptor.privileged
+
+    def earned_rank_for_points(self, points: int) -> Optional[Rank]:
+        """The highest points-earned rank ``points`` reach (the lowest one below every threshold)."""
+
+        if not self._earned:
+            return None
+        index = bisect_right(self._earned_thresholds, points)
+        return self._earned[max(index - 1, 0)]
 
     def next_rank(self, points: int) -> Optional[Rank]:
-        candidate = None
-        for rank in self._ranks:
-            if points < rank.min_points and not rank.is_punishment:
-                candidate = rank
-                break
-        return candidate
+        return self._next_from[bisect_right(self._thresholds, points)]
 
     def previous_rank(self, points: int) -> Optional[Rank]:
         current = self.rank_for_points(points)
@@ -80,28 +126,24 @@ class RankPolicy:
         return self.previous_rank_by_name(current.name)
 
     def previous_rank_by_name(self, name: str) -> Optional[Rank]:
-        descriptor = self._by_name.get(name)
-        if descriptor is None:
-            return None
-        index = self._ranks.index(descriptor)
-        while index > 0:
-            index -= 1
-            candidate = self._ranks[index]
-            if not candidate.is_punishment:
-                return candidate
-        return None
+        return self._previous_by_name.get(name)
 
     def next_rank_by_name(self, name: str) -> Optional[Rank]:
-        descriptor = self._by_name.get(name)
-        if descriptor is None:
-            return None
-        index = self._ranks.index(descriptor)
-        while index + 1 < len(self._ranks):
-            index += 1
-            candidate = self._ranks[index]
-            if not candidate.is_punishment:
-                return candidate
-        return None
+        return self._next_by_name.get(name)
+
+    def classify_points(self, points: Sequence[int]) -> List[Optional[Rank]]:
+        """Resolve ``rank_for_points`` for many values at once.
+
+        Uses a single vectorised ``searchsorted`` when NumPy is installed and
+        falls back to per-value bisection otherwise.
+        """
+
+        ranks: List[Optional[Rank]] = [None, *self._ranks]
+        if np is not None:
+            positions = np.searchsorted(np.asarray(self._thresholds), np.asarray(points), side="right")
+            return [ranks[position] for position in positions.tolist()]
+        thresholds = self._thresholds
+        return [ranks[bisect_right(thresholds, value)] for value in points]
 
     def adjacent_ranks(self, current_name: Optional[str]) -> tuple[Optional[Rank], Optional[Rank]]:
         if current_name:
@@ -110,7 +152,7 @@ class RankPolicy:
             descriptor = None
         if descriptor is None:
             return None, self._ranks[0] if self._ranks else None
-        index = self._ranks.index(descriptor)
+        index = self._index_by_name[descriptor.name]
         previous = None
         next_rank = None
         if index > 0:
@@ -133,4 +175,7 @@ def get_rank_policy() -> RankPolicy:
     return RankPolicy.from_config()
 
 
+on_invalidation(POLICIES, lambda items: get_rank_policy.cache_clear())
+
+
 __all__ = ["Rank", "RankPolicy", "get_rank_policy"]
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import Settings, get_settings
+from ..db import session_scope
+from ..models import Player, RobloxOutbox
+from .outbox import GROUP_ROLE, PENDING
+from .player_events import track_player_change
+from .rank_policy import RankPolicy, get_rank_policy
+from .roblox_client import RobloxClient
+
+logger = logging.getLogger(__name__)
+
+RANK_DRIFT = "rank_drift"
+UNKNOWN_ROLE = "unknown_role"
+
+
+@dataclass
+class RankMismatch:
+    user_id: int
+    username: Optional[str]
+    kind: str
+    db_rank: Optional[str]
+    expected_role_id: Optional[int]
+    roblox_role_id: Optional[int]
+    roblox_role_name: Optional[str]
+    roblox_rank: Optional[str]
+    fixed: bool = False
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {
+            "userId": self.user_id,
+            "username": self.username,
+            "kind": self.kind,
+            "dbRank": self.db_rank,
+            "expectedRoleId": self.expected_role_id,
+            "robloxRoleId": self.roblox_role_id,
+            "robloxRoleName": self.roblox_role_name,
+            "robloxRank": self.roblox_rank,
+            "fixed": self.fixed,
+        }
+
+
+@dataclass
+class ReconcileReport:
+    fix: bool
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    complete: bool = False
+    pages: int = 0
+    members: int = 0
+    checked: int = 0
+    in_sync: int = 0
+    pending_role_updates: int = 0
+    untracked_members: int = 0
+    mismatches: int = 0
+    unknown_roles: int = 0
+    fixed: int = 0
+    missing_from_group: Optional[int] = None
+    samples: List[RankMismatch] = field(default_factory=list)
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {
+            "fix": self.fix,
+            "complete": self.complete,
+            "startedAt": self.started_at.isoformat(),
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+            "requests": self.pages,
+            "members": self.members,
+            "checked": self.checked,
+            "inSync": self.in_sync,
+            "pendingRoleUpdates": self.pending_role_updates,
+            "untrackedMembers": self.untracked_members,
+            "mismatches": self.mismatches,
+            "unknownRoles": self.unknown_roles,
+            "fixed": self.fixed,
+            "missingFromGroup": self.missing_from_group,
+            "samples": [mismatch.to_payload() for mismatch in self.samples],
+        }
+
+
+class RankReconciler:
+    """Compares ``players.rank`` with the roles members actually hold in the Roblox group.
+
+    The group's member list is paged in bulk. Each page holds up to 100 members
+    with their roles, so a full pass costs ``ceil(members / page_size)``
+    requests through the rate-limited ``groups`` family. The next page is
+    requested while the current one is compared. A member whose Roblox role
+    maps to a different rank is a ``rank_drift``; with ``fix`` the player row
+    is rewritten to the Roblox rank, since manual group ranking is the usual
+    cause. Roles the policy does not know are reported as ``unknown_role`` and
+    never fixed. Players with a group role update still pending in the outbox
+    are skipped: Roblox has not caught up with their rank yet, and a fix would
+    undo the decision that queued the update.
+    """
+
+    def __init__(
+        self,
+        *,
+        fix: bool = False,
+        page_size: int = 100,
+        max_pages: Optional[int] = None,
+        sample_limit: int = 100,
+        client: Optional[RobloxClient] = None,
+        policy: Optional[RankPolicy] = None,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = session_scope,
+    ) -> None:
+        self.fix = fix
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.sample_limit = sample_limit
+        self.client = client or RobloxClient()
+        self.policy = policy or get_rank_policy()
+        self._session_factory = session_factory
+
+    @classmethod
+    def from_settings(cls, settings: Settings, **overrides: Any) -> "RankReconciler":
+        options: Dict[str, Any] = {
+            "fix": settings.rank_reconcile_fix,
+            "page_size": settings.rank_reconcile_page_size,
+            "max_pages": settings.rank_reconcile_max_pages,
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    async def run(self) -> ReconcileReport:
+        report = ReconcileReport(fix=self.fix)
+        seen: Set[int] = set()
+        next_page = asyncio.create_task(self.client.list_group_members(limit=self.page_size))
+        try:
+            while True:
+                page = await next_page
+                report.pages += 1
+                cursor = page.get("nextPageCursor")
+                more = bool(cursor) and (self.max_pages is None or report.pages < self.max_pages)
+                if more:
+                    next_page = asyncio.create_task(self.client.list_group_members(cursor=cursor, limit=self.page_size))
+                await self._reconcile_page(page.get("data", []), report, seen)
+                if not more:
+                    report.complete = not cursor
+                    break
+        except BaseException:
+            if not next_page.done():
+                next_page.cancel()
+            raise
+
+        if report.complete:
+            report.missing_from_group = await self._count_missing(seen)
+        report.finished_at = datetime.utcnow()
+        return report
+
+    async def _reconcile_page(self, members: List[Dict[str, Any]], report: ReconcileReport, seen: Set[int]) -> None:
+        roles: Dict[int, Dict[str, Any]] = {}
+        for member in members:
+            user_id = (member.get("user") or {}).get("userId")
+            if user_id is None:
+                continue
+            roles[int(user_id)] = member.get("role") or {}
+            self.client.role_cache.put(int(user_id), member.get("role"))
+        report.members += len(roles)
+        seen.update(roles)
+        if not roles:
+            return
+
+        async with self._session_factory() as session:
+            players = (await session.execute(select(Player).where(Player.user_id.in_(list(roles))))).scalars().all()
+            report.untracked_members += len(roles) - len(players)
+            pending = set(
+                (
+                    await session.scalars(
+                        select(RobloxOutbox.user_id).where(
+                            RobloxOutbox.user_id.in_(list(roles)),
+                            RobloxOutbox.kind == GROUP_ROLE,
+                            RobloxOutbox.status == PENDING,
+                        )
+                    )
+                ).all()
+            )
+            for player in players:
+                if player.user_id in pending:
+                    report.pending_role_updates += 1
+                    continue
+                report.checked += 1
+                mismatch = self._compare(player, roles[player.user_id])
+                if mismatch is None:
+                    report.in_sync += 1
+                    continue
+                if mismatch.kind == UNKNOWN_ROLE:
+                    report.unknown_roles += 1
+                else:
+                    report.mismatches += 1
+                    if self.fix:
+                        player.previous_rank = player.rank
+                        player.rank = mismatch.roblox_rank
+                        track_player_change(session, player)
+                        mismatch.fixed = True
+                        report.fixed += 1
+                if len(report.samples) < self.sample_limit:
+                    report.samples.append(mismatch)
+
+    def _compare(self, player: Player, role: Dict[str, Any]) -> Optional[RankMismatch]:
+        role_id = role.get("id")
+        current = self.policy.get_rank(player.rank)
+        expected_role_id = current.role_id if current else None
+        if role_id is not None and role_id == expected_role_id:
+            return None
+        roblox_rank = self.policy.get_rank_by_role_id(role_id)
+        if roblox_rank is not None and roblox_rank.name == player.rank:
+            return None
+        return RankMismatch(
+            user_id=int(player.user_id),
+            username=player.username,
+            kind=RANK_DRIFT if roblox_rank is not None else UNKNOWN_ROLE,
+            db_rank=player.rank,
+            expected_role_id=expected_role_id,
+            roblox_role_id=role_id,
+            roblox_role_name=role.get("name"),
+            roblox_rank=roblox_rank.name if roblox_rank else None,
+        )
+
+    async def _count_missing(self, seen: Set[int]) -> int:
+        """Count tracked players that are no longer in the group (only meaningful after a full pass)."""
+
+        missing = 0
+        async with self._session_factory() as session:
+            result = await session.stream_scalars(select(Player.user_id).execution_options(yield_per=5000))
+            async for user_id in result:
+                if user_id not in seen:
+                    missing += 1
+        return missing
+
+
+_task: Optional[asyncio.Task[None]] = None
+
+
+async def _run_periodically(interval: float) -> None:
+    while True:
+        try:
+            report = await RankReconciler.from_settings(get_settings()).run()
+            logger.info("Rank reconciliation: %s", {k: v for k, v in report.to_payload().items() if k != "samples"})
+        except Exception:
+            logger.exception("Rank reconciliation failed")
+        await asyncio.sleep(interval)
+
+
+def start_rank_reconciliation() -> Optional[asyncio.Task[None]]:
+    global _task
+    settings = get_settings()
+    if not settings.rank_reconcile_enabled or _task is not None:
+        return _task
+    if not settings.roblox_group_id:
+        logger.warning("RANK_RECONCILE_ENABLED is set but ROBLOX_GROUP_ID is not configured")
+        return None
+    _task = asyncio.create_task(
+        _run_periodically(settings.rank_reconcile_interval_seconds),
+        name="grps-rank-reconciliation",
+    )
+    return _task
+
+
+async def stop_rank_reconciliation() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
+
+
+__all__ = [
+    "RANK_DRIFT",
+    "RankMismatch",
+    "RankReconciler",
+    "ReconcileReport",
+    "UNKNOWN_ROLE",
+    "start_rank_reconciliation",
+    "stop_rank_reconciliation",
+]
@@ -1,51 +1,248 @@
 from __future__ import annotations
 
+import importlib.util
+import logging
+from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
+import httpcore
 import httpx
 
-from ..config import get_settings
+from ..config import Settings, get_settings
+from .group_roles import GroupRoleCache, get_group_role_cache
+from .invalidation import GROUP_ROLES, publish_invalidation
+from .roblox_resilience import DATASTORES, GROUPS, IDEMPOTENT_METHODS, RobloxResilience, get_roblox_resilience
 
 ROBLOX_API_BASE = "https://apis.roblox.com"
 ROBLOX_GROUPS_BASE = "https://groups.roblox.com"
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    new_connections: int = 0
+    tls_handshakes: int = 0
+    closed_connections: int = 0
+
+    @property
+    def reused_requests(self) -> int:
+        return max(self.requests - self.new_connections, 0)
+
+
+class RobloxHttpPool:
+    """Application scoped ``httpx.AsyncClient`` shared by every ``RobloxClient``.
+
+    Connections to ``apis.roblox.com`` and ``groups.roblox.com`` are kept alive
+    between calls; the httpcore trace hook counts how many requests had to open
+    a new connection so reuse can be monitored.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 50,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested for Roblox APIs but the 'h2' package is missing; using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.stats = PoolStats()
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            transport=transport,
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RobloxHttpPool":
+        return cls(
+            max_connections=settings.roblox_http_max_connections,
+            max_keepalive=settings.roblox_http_max_keepalive,
+            keepalive_expiry=settings.roblox_http_keepalive_expiry,
+            http2=settings.roblox_http2,
+            timeout=settings.roblox_http_timeout,
+        )
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            self.stats.tls_handshakes += 1
+        elif event_name == "connection.close.complete":
+            self.stats.closed_connections += 1
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        self.stats.requests += 1
+        return await self.client.request(method, url, extensions={"trace": self._trace}, **kwargs)
+
+    def open_connections(self) -> Optional[int]:
+        """Connections currently held by the pool, or ``None`` when they cannot be read.
+
+        httpx has no public API for this, so it reads ``AsyncHTTPTransport._pool``
+        (checked against httpx 0.27, pinned in ``requirements.txt``). A custom
+        transport or an httpx release that moves the attribute reports ``None``
+        instead of failing the health check.
+        """
+
+        transport = self.client._transport
+        pool = getattr(transport, "_pool", None) if isinstance(transport, httpx.AsyncHTTPTransport) else None
+        if not isinstance(pool, httpcore.AsyncConnectionPool):
+            return None
+        return len(pool.connections)
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        return {
+            "http2": self.http2,
+            "openConnections": self.open_connections(),
+            "requests": stats.requests,
+            "newConnections": stats.new_connections,
+            "reusedRequests": stats.reused_requests,
+            "tlsHandshakes": stats.tls_handshakes,
+            "closedConnections": stats.closed_connections,
+            "reuseRatio": round(stats.reused_requests / stats.requests, 4) if stats.requests else None,
+        }
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_pool: Optional[RobloxHttpPool] = None
+
+
+def get_roblox_http_pool() -> Optional[RobloxHttpPool]:
+    """Return the shared pool created on startup, or ``None`` outside the app lifecycle."""
+
+    return _pool
+
+
+async def start_roblox_http_pool() -> RobloxHttpPool:
+    global _pool
+    if _pool is None:
+        _pool = RobloxHttpPool.from_settings(get_settings())
+    return _pool
+
+
+async def close_roblox_http_pool() -> None:
+    global _pool
+    if _pool is None:
+        return
+    pool, _pool = _pool, None
+    await pool.aclose()
+
 
 class RobloxClient:
-    """Thin wrapper around Roblox Open Cloud REST endpoints."""
+    """Thin wrapper around Roblox Open Cloud REST endpoints.
+
+    Every call goes through the shared :class:`RobloxResilience` guard for its
+    endpoint family (rate limit, retries, circuit breaker).
+    """
 
-    def __init__(self, api_key: Optional[str] = None, group_id: Optional[int] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        group_id: Optional[int] = None,
+        *,
+        http_pool: Optional[RobloxHttpPool] = None,
+        resilience: Optional[RobloxResilience] = None,
+        role_cache: Optional[GroupRoleCache] = None,
+    ):
         settings = get_settings()
         self.api_key = api_key or settings.open_cloud_api_key
         self.group_id = group_id or settings.roblox_group_id
-        self.timeout = 30.0
+        self.timeout = settings.roblox_http_timeout
+        self.http_pool = http_pool or get_roblox_http_pool()
+        self.resilience = resilience or get_roblox_resilience()
+        self.role_cache = role_cache if role_cache is not None else get_group_role_cache()
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        *,
+        json: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> httpx.Response:
+        headers = {"x-api-key": self.api_key, "Content-Type": "application/json"}
+        if self.http_pool is not None:
+            return await self.http_pool.request(method, url, headers=headers, json=json, params=params)
+        # Outside the FastAPI lifecycle (scripts, tests) fall back to a one-off client.
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            return await client.request(method, url, headers=headers, json=json, params=params)
 
     async def _request(
         self,
         method: str,
         url: str,
         *,
+        family: str,
         json: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
+        idempotent: Optional[bool] = None,
     ) -> Dict[str, Any]:
-        headers = {"x-api-key": self.api_key, "Content-Type": "application/json"}
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.request(method, url, headers=headers, json=json, params=params)
-            response.raise_for_status()
-            if response.content:
-                return response.json()
-            return {}
+        retryable = idempotent if idempotent is not None else method.upper() in IDEMPOTENT_METHODS
+        response = await self.resilience.call(
+            family,
+            lambda: self._send(method, url, json=json, params=params),
+            retryable=retryable,
+        )
+        response.raise_for_status()
+        if response.content:
+            return response.json()
+        return {}
+
+    async def get_user_group_role(self, user_id: int, *, fresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Return the user's role in the configured group, served from the TTL cache unless ``fresh``."""
 
-    async def get_user_group_role(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if fresh:
+            role = await self._fetch_user_group_role(user_id)
+            self.role_cache.put(user_id, role)
+            return role
+        return await self.role_cache.lookup(user_id, self._fetch_user_group_role)
+
+    async def _fetch_user_group_role(self, user_id: int) -> Optional[Dict[str, Any]]:
         url = f"{ROBLOX_GROUPS_BASE}/v1/users/{user_id}/groups/roles"
-        payload = await self._request("GET", url)
+        payload = await self._request("GET", url, family=GROUPS)
         for entry in payload.get("data", []):
             if entry.get("group", {}).get("id") == self.group_id:
                 return entry.get("role")
         return None
 
+    async def list_group_members(
+        self,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort_order: str = "Asc",
+    ) -> Dict[str, Any]:
+        """Return one page of group members with their roles (``limit`` is 10, 25, 50 or 100)."""
+
+        url = f"{ROBLOX_GROUPS_BASE}/v1/groups/{self.group_id}/users"
+        params: Dict[str, Any] = {"limit": limit, "sortOrder": sort_order}
+        if cursor:
+            params["cursor"] = cursor
+        return await self._request("GET", url, family=GROUPS, params=params)
+
     async def update_group_role(self, user_id: int, role_id: int) -> None:
         url = f"{ROBLOX_GROUPS_BASE}/v1/groups/{self.group_id}/users/{user_id}"
-        await self._request("PATCH", url, json={"roleId": role_id})
+        # Setting a role is idempotent, so it is safe to retry after throttling or a 5xx.
+        try:
+            await self._request("PATCH", url, family=GROUPS, json={"roleId": role_id}, idempotent=True)
+        finally:
+            self.role_cache.invalidate(user_id)
+            publish_invalidation(GROUP_ROLES, [user_id])
 
     async def list_datastore_entries(
         self,
@@ -71,7 +268,7 @@ class RobloxClient:
         if cursor:
             params["cursor"] = cursor
 
-        return await self._request("GET", url, params=params)
+        return await self._request("GET", url, family=DATASTORES, params=params)
 
     async def read_datastore_entry(
         self,
@@ -89,14 +286,21 @@ class RobloxClient:
             "scope": scope,
             "entryKey": key,
         }
-        return await self._request("GET", url, params=params)
+        return await self._request("GET", url, family=DATASTORES, params=params)
 
     async def write_datastore(self, universe_id: int, datastore_name: str, scope: str, key: str, value: Dict[str, Any]) -> None:
         url = (
             f"{ROBLOX_API_BASE}/datastores/v1/universes/{universe_id}/standard-datastores/datastore/entries/entry"
         )
         params = {"datastoreName": datastore_name, "scope": scope, "entryKey": key}
-        await self._request("POST", url, json=value, params=params)
+        # Set Entry overwrites the key with the same value, so retries cannot double-apply.
+        await self._request("POST", url, family=DATASTORES, json=value, params=params, idempotent=True)
 
 
-__all__ = ["RobloxClient"]
+__all__ = [
+    "RobloxClient",
+    "RobloxHttpPool",
+    "close_roblox_http_pool",
+    "get_roblox_http_pool",
+    "start_roblox_http_pool",
+]
@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from ..config import Settings, get_settings
+from ..metrics import REGISTRY, current_timings
+
+logger = logging.getLogger(__name__)
+
+GROUPS = "groups"
+DATASTORES = "datastores"
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+Clock = Callable[[], float]
+
+ROBLOX_LATENCY = REGISTRY.histogram(
+    "grps_roblox_request_duration_seconds", "Duration of each Roblox API attempt by endpoint family.", ("family",)
+)
+ROBLOX_RESPONSES = REGISTRY.counter(
+    "grps_roblox_responses_total",
+    "Roblox API attempts by endpoint family and status code (\"error\" for transport errors).",
+    ("family", "status"),
+)
+
+
+class RobloxCircuitOpenError(httpx.HTTPError):
+    """Raised without touching the network while an endpoint family's breaker is open."""
+
+    def __init__(self, family: str, retry_in: float) -> None:
+        super().__init__(f"Roblox {family} API circuit is open; retry in {retry_in:.1f}s")
+        self.family = family
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value: Optional[str], *, now: Optional[datetime] = None) -> Optional[float]:
+    """Return the delay requested by a ``Retry-After`` header (delta-seconds or HTTP date)."""
+
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max((when - now).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """Async token bucket; ``rate <= 0`` disables limiting.
+
+    Waiters queue on a lock so tokens are handed out in arrival order, and
+    :meth:`pause` drains the bucket until a server supplied ``Retry-After``
+    has elapsed.
+    """
+
+    def __init__(self, rate: float, burst: int, *, clock: Clock = time.monotonic) -> None:
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.clock = clock
+        self.tokens = float(self.capacity)
+        self.updated = clock()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds: float) -> None:
+        now = self.clock()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self._refill(now)
+        self.tokens = 0.0
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping as needed; returns the seconds spent waiting."""
+
+        if self.rate <= 0 and self.paused_until <= self.clock():
+            return 0.0
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = self.clock()
+                delay = self.paused_until - now
+                if delay <= 0:
+                    if self.rate <= 0:
+                        return waited
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class CircuitBreaker:
+    """Classic closed → open → half-open breaker counting consecutive failures."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, *, clock: Clock = time.monotonic) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+        self._probe_started = 0.0
+
+    def retry_in(self) -> float:
+        if self.state != self.OPEN:
+            return 0.0
+        return max(self.opened_at + self.reset_timeout - self.clock(), 0.0)
+
+    def allow(self) -> bool:
+        """Return whether a call may proceed; an expired open breaker lets one probe through.
+
+        A probe that never reports back (see :meth:`release_probe`) stops
+        blocking the slot after ``reset_timeout``.
+        """
+
+        if self.failure_threshold <= 0 or self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if self.retry_in() > 0:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self._probing and self.clock() - self._probe_started < self.reset_timeout:
+            return False
+        self._probing = True
+        self._probe_started = self.clock()
+        return True
+
+    def release_probe(self) -> None:
+        """Free the half-open probe slot of a call that ended without an outcome (e.g. cancelled)."""
+
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.failure_threshold <= 0:
+            return
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning("Roblox circuit opened after %s consecutive failures", self.failures)
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+
+
+@dataclass
+class FamilyStats:
+    requests: int = 0
+    attempts: int = 0
+    retries: int = 0
+    throttled: int = 0
+    failures: int = 0
+    rejected: int = 0
+    limiter_waits: int = 0
+    limiter_wait_seconds: float = 0.0
+    max_limiter_wait_seconds: float = 0.0
+
+
+class EndpointGuard:
+    """Rate limiter, breaker and counters for one Roblox endpoint family."""
+
+    def __init__(self, family: str, bucket: TokenBucket, breaker: CircuitBreaker) -> None:
+        self.family = family
+        self.bucket = bucket
+        self.breaker = breaker
+        self.stats = FamilyStats()
+
+    async def acquire(self) -> bool:
+        """Wait for the breaker and the limiter; returns whether this attempt is the half-open probe."""
+
+        if not self.breaker.allow():
+            self.stats.rejected += 1
+            raise RobloxCircuitOpenError(self.family, self.breaker.retry_in())
+        probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+        try:
+            waited = await self.bucket.acquire()
+        except BaseException:
+            if probe:
+                self.breaker.release_probe()
+            raise
+        if waited > 0:
+            self.stats.limiter_waits += 1
+            self.stats.limiter_wait_seconds += waited
+            self.stats.max_limiter_wait_seconds = max(self.stats.max_limiter_wait_seconds, waited)
+        self.stats.attempts += 1
+        return probe
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        return {
+            "requests": stats.requests,
+            "attempts": stats.attempts,
+            "retries": stats.retries,
+            "throttled": stats.throttled,
+            "failures": stats.failures,
+            "rejected": stats.rejected,
+            "limiterWaits": stats.limiter_waits,
+            "limiterWaitSeconds": round(stats.limiter_wait_seconds, 6),
+            "maxLimiterWaitSeconds": round(stats.max_limiter_wait_seconds, 6),
+            "breakerState": self.breaker.state,
+            "breakerFailures": self.breaker.failures,
+            "breakerOpened": self.breaker.times_opened,
+            "breakerRetryIn": round(self.breaker.retry_in(), 3),
+        }
+
+
+class RobloxResilience:
+    """Per-family guards plus the retry policy applied by ``RobloxClient``.
+
+    Retries use full-jitter exponential backoff and only happen for idempotent
+    calls. A 429 pauses the whole family's bucket for ``Retry-After``, capped at
+    ``max_delay``; a longer ``Retry-After`` is not waited out inside the request
+    and the 429 is returned instead. 5xx responses and transport errors count
+    towards the breaker.
+    """
+
+    def __init__(
+        self,
+        *,
+        rates: Optional[Dict[str, float]] = None,
+        bursts: Optional[Dict[str, int]] = None,
+        max_attempts: int = 4,
+        base_delay: float = 0.25,
+        max_delay: float = 8.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Clock = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ) -> None:
+        self.rates = rates or {}
+        self.bursts = bursts or {}
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.guards: Dict[str, EndpointGuard] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RobloxResilience":
+        return cls(
+            rates={GROUPS: settings.roblox_groups_rate_per_second, DATASTORES: settings.roblox_datastores_rate_per_second},
+            bursts={GROUPS: settings.roblox_groups_burst, DATASTORES: settings.roblox_datastores_burst},
+            max_attempts=settings.roblox_retry_attempts,
+            base_delay=settings.roblox_retry_base_delay,
+            max_delay=settings.roblox_retry_max_delay,
+            failure_threshold=settings.roblox_breaker_failure_threshold,
+            reset_timeout=settings.roblox_breaker_reset_seconds,
+        )
+
+    def guard(self, family: str) -> EndpointGuard:
+        guard = self.guards.get(family)
+        if guard is None:
+            rate = self.rates.get(family, 0.0)
+            bucket = TokenBucket(rate, self.bursts.get(family, max(int(rate), 1)), clock=self.clock)
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout, clock=self.clock)
+            guard = self.guards[family] = EndpointGuard(family, bucket, breaker)
+        return guard
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def call(
+        self,
+        family: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+        *,
+        retryable: bool,
+    ) -> httpx.Response:
+        """Run ``send`` under the family's limiter and breaker, retrying when allowed.
+
+        The final response is returned even when it is an error so the caller
+        decides how to surface it; transport errors on the last attempt propagate.
+        """
+
+        started = time.perf_counter()
+        try:
+            return await self._call(family, send, retryable=retryable)
+        finally:
+            timings = current_timings()
+            if timings is not None:
+                # Limiter waits and retry backoff included: this is what the request waited for.
+                timings.roblox_seconds += time.perf_counter() - started
+
+    async def _call(
+        self,
+        family: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+        *,
+        retryable: bool,
+    ) -> httpx.Response:
+        guard = self.guard(family)
+        guard.stats.requests += 1
+        attempts = self.max_attempts if retryable else 1
+        attempt = 0
+        while True:
+            attempt += 1
+            probe = await guard.acquire()
+            sent = time.perf_counter()
+            try:
+                response = await send()
+            except httpx.TransportError:
+                ROBLOX_LATENCY.observe(time.perf_counter() - sent, family)
+                ROBLOX_RESPONSES.inc(family, "error")
+                guard.stats.failures += 1
+                guard.breaker.record_failure()
+                if attempt >= attempts:
+                    raise
+                delay = self.backoff(attempt)
+            except BaseException:
+                # Cancelled, or failed before reaching Roblox: no outcome to record, but the probe slot must not leak.
+                if probe:
+                    guard.breaker.release_probe()
+                raise
+            else:
+                ROBLOX_LATENCY.observe(time.perf_counter() - sent, family)
+                ROBLOX_RESPONSES.inc(family, str(response.status_code))
+                if response.status_code not in RETRYABLE_STATUSES:
+                    guard.breaker.record_success()
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    guard.stats.throttled += 1
+                    # Throttling means Roblox is up; release a half-open probe without tripping the breaker.
+                    guard.breaker.record_success()
+                    if retry_after is not None:
+                        guard.bucket.pause(min(retry_after, self.max_delay))
+                else:
+                    guard.stats.failures += 1
+                    guard.breaker.record_failure()
+                if attempt >= attempts or (retry_after is not None and retry_after > self.max_delay):
+                    return response
+                delay = retry_after if retry_after is not None else self.backoff(attempt)
+            guard.stats.retries += 1
+            if delay > 0:
+                await self.sleep(delay)
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        for family in (GROUPS, DATASTORES):
+            self.guard(family)
+        return {family: guard.snapshot_stats() for family, guard in sorted(self.guards.items())}
+
+
+_resilience: Optional[RobloxResilience] = None
+
+
+def get_roblox_resilience() -> RobloxResilience:
+    """Return the process-wide limiter/breaker registry, created from settings on first use."""
+
+    global _resilience
+    if _resilience is None:
+        _resilience = RobloxResilience.from_settings(get_settings())
+    return _resilience
+
+
+def reset_roblox_resilience() -> None:
+    global _resilience
+    _resilience = None
+
+
+__all__ = [
+    "CircuitBreaker",
+    "DATASTORES",
+    "EndpointGuard",
+    "GROUPS",
+    "RobloxCircuitOpenError",
+    "RobloxResilience",
+    "TokenBucket",
+    "get_roblox_resilience",
+    "parse_retry_after",
+    "reset_roblox_resilience",
+]
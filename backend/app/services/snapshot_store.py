@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..models import PlayerSnapshot
+
+REMOVED_KEY = "__removed__"
+
+
+def snapshot_hash(payload: Dict[str, Any]) -> str:
+    """Stable content hash of a JSON snapshot payload."""
+
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def diff_payload(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level fields of ``current`` that differ from ``previous``."""
+
+    delta = {key: value for key, value in current.items() if key not in previous or previous[key] != value}
+    removed = sorted(key for key in previous if key not in current)
+    if removed:
+        delta[REMOVED_KEY] = removed
+    return delta
+
+
+def apply_delta(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    merged = {**base, **{key: value for key, value in delta.items() if key != REMOVED_KEY}}
+    for key in delta.get(REMOVED_KEY, ()):
+        merged.pop(key, None)
+    return merged
+
+
+class PayloadRebuilder:
+    """Folds keyframe and delta rows of one player, in id order, into full payloads."""
+
+    def __init__(self, base: Optional[Dict[str, Any]] = None) -> None:
+        self.current = base
+
+    def apply(self, row: Any) -> Dict[str, Any]:
+        if row.is_delta:
+            if self.current is None:
+                raise ValueError(f"Snapshot {row.id} is a delta without a preceding keyframe")
+            self.current = apply_delta(self.current, row.payload)
+        else:
+            self.current = dict(row.payload)
+        return self.current
+
+
+def rebuild_payloads(rows: Iterable[Any], base: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Yield ``(row, full_payload)`` for rows of one player in ``(created_at, id)`` order.
+
+    ``base`` is the full payload just before the first row; it is only needed
+    when the sequence starts on a delta row.
+    """
+
+    rebuilder = PayloadRebuilder(base)
+    for row in rows:
+        yield row, rebuilder.apply(row)
+
+
+@dataclass
+class _ChainState:
+    payload: Dict[str, Any]
+    deltas: int
+
+
+class SnapshotRecorder:
+    """Builds ``player_snapshots`` rows in full or delta mode.
+
+    In delta mode each row stores only the fields that changed since the
+    previous snapshot, with a full keyframe every ``keyframe_interval`` rows so
+    reconstruction never has to replay an unbounded chain.
+    """
+
+    def __init__(self, session: AsyncSession, *, mode: Optional[str] = None, keyframe_interval: Optional[int] = None):
+        settings = get_settings()
+        self.session = session
+        self.mode = mode or settings.snapshot_storage_mode
+        self.keyframe_interval = keyframe_interval or settings.snapshot_keyframe_interval
+        self._chains: Dict[int, Optional[_ChainState]] = {}
+
+    async def prepare(self, user_ids: Iterable[int]) -> None:
+        """Load the latest full payload for each player (delta mode only), in one query."""
+
+        if self.mode != "delta":
+            return
+        missing = [user_id for user_id in set(user_ids) if user_id not in self._chains]
+        if not missing:
+            return
+        for user_id in missing:
+            self._chains[user_id] = None
+
+        keyframes = (
+            select(PlayerSnapshot.user_id, func.max(PlayerSnapshot.id).label("keyframe_id"))
+            .where(PlayerSnapshot.user_id.in_(missing), PlayerSnapshot.is_delta.is_(False))
+            .group_by(PlayerSnapshot.user_id)
+            .subquery()
+        )
+        statement = (
+            select(PlayerSnapshot)
+            .join(
+                keyframes,
+                and_(PlayerSnapshot.user_id == keyframes.c.user_id, PlayerSnapshot.id >= keyframes.c.keyframe_id),
+            )
+            .order_by(PlayerSnapshot.user_id, PlayerSnapshot.id)
+        )
+        rows: Dict[int, List[PlayerSnapshot]] = {}
+        for row in (await self.session.execute(statement)).scalars():
+            rows.setdefault(row.user_id, []).append(row)
+        for user_id, chain in rows.items():
+            _, latest = list(rebuild_payloads(chain))[-1]
+            self._chains[user_id] = _ChainState(payload=latest, deltas=len(chain) - 1)
+
+    def record(self, user_id: int, payload: Dict[str, Any], digest: str) -> Dict[str, Any]:
+        """Return the column values for the history row of ``payload``."""
+
+        if self.mode != "delta":
+            return {"payload": payload, "is_delta": False, "content_hash": digest}
+
+        chain = self._chains.get(user_id)
+        if chain is None or chain.deltas + 1 >= self.keyframe_interval:
+            self._chains[user_id] = _ChainState(payload=payload, deltas=0)
+            return {"payload": payload, "is_delta": False, "content_hash": digest}
+
+        delta = diff_payload(chain.payload, payload)
+        self._chains[user_id] = _ChainState(payload=payload, deltas=chain.deltas + 1)
+        return {"payload": delta, "is_delta": True, "content_hash": digest}
+
+
+async def load_base_payload(session: AsyncSession, user_id: int, before_id: int) -> Optional[Dict[str, Any]]:
+    """Full payload of the latest snapshot of ``user_id`` with an id below ``before_id``.
+
+    Used to resume reconstruction part way through a delta chain.
+    """
+
+    keyframe_id = await session.scalar(
+        select(func.max(PlayerSnapshot.id)).where(
+            PlayerSnapshot.user_id == user_id,
+            PlayerSnapshot.id < before_id,
+            PlayerSnapshot.is_delta.is_(False),
+        )
+    )
+    if keyframe_id is None:
+        return None
+    statement = (
+        select(PlayerSnapshot)
+        .where(PlayerSnapshot.user_id == user_id, PlayerSnapshot.id >= keyframe_id, PlayerSnapshot.id < before_id)
+        .order_by(PlayerSnapshot.id)
+    )
+    rows = (await session.execute(statement)).scalars().all()
+    _, latest = list(rebuild_payloads(rows))[-1]
+    return latest
+
+
+async def reconstruct_history(session: AsyncSession, user_id: int) -> List[Tuple[PlayerSnapshot, Dict[str, Any]]]:
+    """Return every snapshot of ``user_id`` with its full payload rebuilt from keyframes and deltas."""
+
+    statement = (
+        select(PlayerSnapshot)
+        .where(PlayerSnapshot.user_id == user_id)
+        .order_by(PlayerSnapshot.created_at, PlayerSnapshot.id)
+    )
+    rows: Sequence[PlayerSnapshot] = (await session.execute(statement)).scalars().all()
+    return list(rebuild_payloads(rows))
+
+
+__all__ = [
+    "PayloadRebuilder",
+    "SnapshotRecorder",
+    "apply_delta",
+    "diff_payload",
+    "load_base_payload",
+    "rebuild_payloads",
+    "reconstruct_history",
+    "snapshot_hash",
+]
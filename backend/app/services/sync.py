@@ -1,20 +1,40 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Dict, Optional, Tuple
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import httpx
 from pydantic import ValidationError
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import get_settings
+from ..metrics import REGISTRY
 from ..models import Player
 from ..schemas import PlayerSnapshotPayload
-from .ingestion import IngestionService
+from .ingestion import IngestionService, PendingSnapshot
 from .roblox_client import RobloxClient
+from .universes import UniverseConfig, get_universe_registry
 
 logger = logging.getLogger(__name__)
 
+SYNC_PAGES = REGISTRY.counter("grps_sync_pages_total", "Datastore pages listed by leaderboard syncs.", ("universe",))
+SYNC_ENTRIES = REGISTRY.counter(
+    "grps_sync_entries_total",
+    "Datastore entries seen by leaderboard syncs, by whether a valid snapshot was read (read or skipped).",
+    ("universe", "result"),
+)
+
+
+@dataclass
+class SyncPageResult:
+    updated: int = 0
+    created: int = 0
+    skipped: int = 0
+
 
 class RobloxSyncService:
     """Synchronise Roblox DataStore snapshots into the local database."""
@@ -24,11 +44,28 @@ class RobloxSyncService:
         session: AsyncSession,
         *,
         client: Optional[RobloxClient] = None,
+        concurrency: Optional[int] = None,
+        universe: Optional[UniverseConfig] = None,
     ) -> None:
         self.session = session
-        self.client = client or RobloxClient()
         self.settings = get_settings()
         self.ingestion = IngestionService(session)
+        self.universe = universe
+        if universe is not None:
+            self.client = client or RobloxClient(api_key=universe.api_key)
+            self.universe_id: Optional[int] = universe.universe_id
+            self.datastore_name = universe.datastore_name
+            self.datastore_scope = universe.scope
+            self.key_prefix = universe.key_prefix
+            self.concurrency = concurrency or universe.concurrency
+        else:
+            self.client = client or RobloxClient()
+            self.universe_id = self.settings.default_universe_id
+            self.datastore_name = self.settings.datastore_name
+            self.datastore_scope = self.settings.datastore_scope
+            self.key_prefix = self.settings.datastore_key_prefix
+            self.concurrency = concurrency or self.settings.roblox_sync_concurrency
+        self._universe_label = universe.key if universe is not None else "default"
 
     async def sync_leaderboard(
         self,
@@ -36,29 +73,47 @@ class RobloxSyncService:
         limit: int = 100,
         cursor: Optional[str] = None,
     ) -> Tuple[int, int, Optional[str]]:
-        universe_id = self.settings.default_universe_id
+        universe_id = self.universe_id
         if universe_id is None:
             raise ValueError("ROBLOX_UNIVERSE_ID is not configured")
 
-        datastore_name = self.settings.datastore_name
-        scope = self.settings.datastore_scope
-        prefix = self.settings.datastore_key_prefix
+        entries, next_cursor = await self.list_page(limit=limit, cursor=cursor)
+        result = await self.sync_entries(universe_id, entries)
 
+        await self.session.commit()
+        return result.updated, result.created, next_cursor
+
+    async def list_page(self, *, limit: int, cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         listing = await self.client.list_datastore_entries(
-            universe_id=universe_id,
-            datastore_name=datastore_name,
-            scope=scope,
-            prefix=prefix,
+            universe_id=self.universe_id,
+            datastore_name=self.datastore_name,
+            scope=self.datastore_scope,
+            prefix=self.key_prefix,
             limit=limit,
             cursor=cursor,
         )
-
         entries = listing.get("entries", [])
         next_cursor = listing.get("nextPageCursor") or listing.get("nextCursor")
+        SYNC_PAGES.inc(self._universe_label)
+        return entries, next_cursor
+
+    async def sync_entries(self, universe_id: int, entries: List[Dict[str, object]]) -> SyncPageResult:
+        """Read a page of datastore entries concurrently and bulk ingest the valid snapshots."""
 
-        created = 0
-        updated = 0
+        snapshots = await self.read_entries(universe_id, entries)
+        outcomes = await self.ingestion.ingest_many(snapshots)
+        created = sum(1 for outcome in outcomes if outcome.created)
+        return SyncPageResult(
+            updated=len(outcomes) - created,
+            created=created,
+            skipped=len(entries) - len(outcomes),
+        )
+
+    async def read_entries(self, universe_id: int, entries: Sequence[Dict[str, object]]) -> List[PendingSnapshot]:
+        """Fetch and validate the snapshots behind a page of entries, bounded by ``concurrency``."""
 
+        prefix = self.key_prefix
+        keyed: List[Tuple[str, int]] = []
         for entry in entries:
             key = entry.get("entryKey") or entry.get("key")
             if not key:
@@ -69,39 +124,52 @@ class RobloxSyncService:
             if user_id is None:
                 logger.warning("Unable to extract userId from key '%s'", key)
                 continue
+            keyed.append((key, user_id))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._read_snapshot(universe_id, key, user_id, semaphore) for key, user_id in keyed)
+        )
+        snapshots = [snapshot for snapshot in results if snapshot is not None]
+        SYNC_ENTRIES.inc(self._universe_label, "read", amount=len(snapshots))
+        SYNC_ENTRIES.inc(self._universe_label, "skipped", amount=len(entries) - len(snapshots))
+        return snapshots
 
+    async def _read_snapshot(
+        self,
+        universe_id: int,
+        key: str,
+        user_id: int,
+        semaphore: asyncio.Semaphore,
+    ) -> Optional[PendingSnapshot]:
+        async with semaphore:
             try:
                 payload = await self.client.read_datastore_entry(
                     universe_id=universe_id,
-                    datastore_name=datastore_name,
+                    datastore_name=self.datastore_name,
                     key=key,
-                    scope=scope,
+                    scope=self.datastore_scope,
                 )
             except httpx.HTTPStatusError as error:  # pragma: no cover - network errors
                 logger.error("Failed to fetch datastore entry %s: %s", key, error)
-                continue
-
-            if not isinstance(payload, dict):
-                logger.warning("Datastore entry %s returned non-JSON payload", key)
-                continue
-
-            snapshot_dict = self._build_snapshot(payload, user_id)
-            try:
-                snapshot = PlayerSnapshotPayload.model_validate(snapshot_dict)
-            except ValidationError as error:
-                logger.error("Invalid snapshot payload for user %s: %s", user_id, error)
-                continue
+                return None
 
-            existing = await self.session.get(Player, user_id)
-            await self.ingestion.ingest(snapshot, experience_key=payload.get("experienceKey"))
+        if not isinstance(payload, dict):
+            logger.warning("Datastore entry %s returned non-JSON payload", key)
+            return None
 
-            if existing:
-                updated += 1
-            else:
-                created += 1
+        snapshot_dict = self._build_snapshot(payload, user_id)
+        try:
+            snapshot = PlayerSnapshotPayload.model_validate(snapshot_dict)
+        except ValidationError as error:
+            logger.error("Invalid snapshot payload for user %s: %s", user_id, error)
+            return None
 
-        await self.session.commit()
-        return updated, created, next_cursor
+        return PendingSnapshot(
+            snapshot,
+            experience_key=payload.get("experienceKey"),
+            universe_key=self.universe.key if self.universe else None,
+        )
 
     @staticmethod
     def _extract_user_id(key: str, prefix: Optional[str]) -> Optional[int]:
@@ -138,5 +206,143 @@ class RobloxSyncService:
         }
 
 
-__all__ = ["RobloxSyncService"]
+@dataclass
+class UniverseSyncReport:
+    key: str
+    universe_id: int
+    pages: int = 0
+    entries: int = 0
+    applied: int = 0
+    superseded: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+    next_cursor: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def entries_per_second(self) -> float:
+        return round(self.entries / self.seconds, 2) if self.seconds > 0 else 0.0
+
+
+class MultiUniverseSyncService:
+    """Fan leaderboard syncs out over every universe declared in ``backend.integrations.json``.
+
+    Each round reads one page from every universe that still has pages left,
+    concurrently and with a client and concurrency budget per universe. Players
+    are owned by the highest precedence universe that has reported them (the
+    default universe first, then declaration order): a snapshot is only applied
+    when no higher precedence universe supplied it in the same round or owns the
+    stored row, so the end state does not depend on crawl timing.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        *,
+        universes: Optional[Sequence[UniverseConfig]] = None,
+        clients: Optional[Dict[str, RobloxClient]] = None,
+    ) -> None:
+        self.session = session
+        self.universes = list(universes if universes is not None else get_universe_registry())
+        clients = clients or {}
+        self.services = {
+            universe.key: RobloxSyncService(session, client=clients.get(universe.key), universe=universe)
+            for universe in self.universes
+        }
+        self.ingestion = IngestionService(session)
+
+    async def sync(
+        self,
+        *,
+        limit: int = 100,
+        cursors: Optional[Dict[str, Optional[str]]] = None,
+        max_rounds: Optional[int] = 1,
+    ) -> List[UniverseSyncReport]:
+        if not self.universes:
+            raise ValueError("No Roblox universes are configured")
+
+        cursors = cursors or {}
+        reports = {
+            universe.key: UniverseSyncReport(
+                key=universe.key,
+                universe_id=universe.universe_id,
+                next_cursor=cursors.get(universe.key),
+            )
+            for universe in self.universes
+        }
+        active = list(self.universes)
+        rounds = 0
+        while active and (max_rounds is None or rounds < max_rounds):
+            rounds += 1
+            pages = await asyncio.gather(
+                *(self._read_page(universe, reports[universe.key], limit) for universe in active)
+            )
+            await self._merge_and_ingest(zip(active, pages), reports)
+            await self.session.commit()
+            active = [
+                universe
+                for universe in active
+                if reports[universe.key].next_cursor and reports[universe.key].error is None
+            ]
+        return [reports[universe.key] for universe in self.universes]
+
+    async def _read_page(self, universe: UniverseConfig, report: UniverseSyncReport, limit: int) -> List[PendingSnapshot]:
+        service = self.services[universe.key]
+        started = time.monotonic()
+        try:
+            entries, report.next_cursor = await service.list_page(limit=limit, cursor=report.next_cursor)
+            snapshots = await service.read_entries(universe.universe_id, entries)
+        except Exception as error:
+            logger.exception("Leaderboard sync for universe %s failed", universe.key)
+            report.error = str(error)
+            return []
+        finally:
+            report.seconds += time.monotonic() - started
+
+        report.pages += 1
+        report.entries += len(entries)
+        report.skipped += len(entries) - len(snapshots)
+        return snapshots
+
+    async def _merge_and_ingest(
+        self,
+        pages: Iterable[Tuple[UniverseConfig, List[PendingSnapshot]]],
+        reports: Dict[str, UniverseSyncReport],
+    ) -> None:
+        winners: Dict[int, Tuple[UniverseConfig, PendingSnapshot]] = {}
+        for universe, snapshots in pages:
+            for pending in snapshots:
+                user_id = pending.snapshot.user_id
+                current = winners.get(user_id)
+                if current is not None and current[0].priority <= universe.priority:
+                    reports[universe.key].superseded += 1
+                    continue
+                if current is not None:
+                    reports[current[0].key].superseded += 1
+                winners[user_id] = (universe, pending)
+
+        if not winners:
+            return
+
+        priorities = {universe.key: universe.priority for universe in self.universes}
+        owners = await self._load_owners(winners.keys())
+        accepted: List[PendingSnapshot] = []
+        for user_id, (universe, pending) in winners.items():
+            owner_priority = priorities.get(owners.get(user_id))
+            if owner_priority is not None and owner_priority < universe.priority:
+                reports[universe.key].superseded += 1
+                continue
+            reports[universe.key].applied += 1
+            accepted.append(pending)
+
+        await self.ingestion.ingest_many(accepted)
+
+    async def _load_owners(self, user_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        result = await self.session.execute(
+            select(Player.user_id, Player.metadata_payload).where(Player.user_id.in_(list(user_ids)))
+        )
+        return {user_id: (metadata or {}).get("universe") for user_id, metadata in result.all()}
+
+
+__all__ = ["MultiUniverseSyncService", "RobloxSyncService", "SyncPageResult", "UniverseSyncReport"]
 
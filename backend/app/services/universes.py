@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+USER_ID_PLACEHOLDER = "{userId}"
+
+
+@dataclass(frozen=True)
+class UniverseConfig:
+    key: str
+    universe_id: int
+    api_key: str
+    datastore_name: str
+    scope: str
+    key_prefix: str
+    priority: int
+    concurrency: int
+
+
+def _resolve_env(name: Optional[str], settings: Settings) -> Optional[str]:
+    if not name:
+        return None
+    value = os.getenv(name)
+    if value:
+        return value
+    # The primary universe is usually configured through Settings/.env rather than the process env.
+    fallbacks = {
+        "ROBLOX_UNIVERSE_ID": settings.default_universe_id,
+        "ROBLOX_OPEN_CLOUD_API_KEY": settings.open_cloud_api_key,
+    }
+    fallback = fallbacks.get(name)
+    return str(fallback) if fallback else None
+
+
+def _parse_universe(
+    descriptor: Dict[str, Any],
+    defaults: Dict[str, Any],
+    priority: int,
+    settings: Settings,
+) -> Optional[UniverseConfig]:
+    key = descriptor["key"]
+    raw_universe_id = _resolve_env(descriptor.get("universeIdEnv") or defaults.get("universeIdEnv"), settings)
+    if not raw_universe_id:
+        logger.debug("Universe %s has no universe id configured; skipping", key)
+        return None
+    try:
+        universe_id = int(raw_universe_id)
+    except ValueError:
+        logger.warning("Universe %s has a non-numeric universe id %r; skipping", key, raw_universe_id)
+        return None
+
+    datastore = {**defaults.get("datastore", {}), **descriptor.get("datastore", {})}
+    key_format = datastore.get("keyFormat", f"{settings.datastore_key_prefix}{USER_ID_PLACEHOLDER}")
+    return UniverseConfig(
+        key=key,
+        universe_id=universe_id,
+        api_key=_resolve_env(descriptor.get("apiKeyEnv") or defaults.get("apiKeyEnv"), settings) or "",
+        datastore_name=datastore.get("name", settings.datastore_name),
+        scope=datastore.get("scope", settings.datastore_scope),
+        key_prefix=key_format.split(USER_ID_PLACEHOLDER, 1)[0],
+        priority=priority,
+        concurrency=int(descriptor.get("syncConcurrency", settings.roblox_sync_concurrency)),
+    )
+
+
+def load_universes(settings: Optional[Settings] = None) -> List[UniverseConfig]:
+    """Load the universes declared in ``backend.integrations.json`` that have credentials.
+
+    Universes are ordered by precedence: the ``defaultUniverseKey`` first, then
+    the order in which they are declared.
+    """
+
+    settings = settings or get_settings()
+    path = Path(settings.config_dir) / "backend.integrations.json"
+    with path.open("r", encoding="utf-8") as handle:
+        roblox = json.load(handle).get("roblox", {})
+
+    descriptors = list(roblox.get("universes", []))
+    default_key = roblox.get("defaultUniverseKey")
+    descriptors.sort(key=lambda descriptor: descriptor.get("key") != default_key)
+
+    universes: List[UniverseConfig] = []
+    for priority, descriptor in enumerate(descriptors):
+        universe = _parse_universe(descriptor, roblox, priority, settings)
+        if universe is not None:
+            universes.append(universe)
+    return universes
+
+
+@lru_cache(maxsize=1)
+def get_universe_registry() -> List[UniverseConfig]:
+    return load_universes()
+
+
+__all__ = ["UniverseConfig", "get_universe_registry", "load_universes"]
@@ -0,0 +1 @@
+"""Standalone performance benchmarks for the GRPS backend (not collected by pytest)."""
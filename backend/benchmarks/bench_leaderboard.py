@@ -0,0 +1,152 @@
+"""Compare the legacy ORM leaderboard queries with the indexed projection queries.
+
+Usage::
+
+    python -m backend.benchmarks.bench_leaderboard --players 100000
+
+The database is a temporary SQLite file unless ``--database-url`` points at
+Postgres. The legacy path loads full ``Player`` entities, runs
+``CalculationService.serialize_player`` per row and issues two record-holder
+queries; the current path uses column projections, the composite indexes and a
+single ``UNION ALL`` for record holders.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import desc, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from ..app.models import Base, Player
+from ..app.services.calculations import CalculationService
+from ..app.services.leaderboard import LeaderboardService
+
+
+async def legacy_top_players(session: AsyncSession, calculator: CalculationService, limit: int) -> List[Dict[str, object]]:
+    result = await session.execute(select(Player).order_by(desc(Player.rank_points), desc(Player.kos)).limit(limit))
+    payload = []
+    for player in result.scalars().all():
+        serialised = calculator.serialize_player(player)
+        payload.append(
+            {
+                "userId": serialised["userId"],
+                "username": serialised["username"],
+                "rank": serialised["rank"],
+                "points": serialised["rankPoints"],
+                "kos": serialised["kos"],
+                "wos": serialised["wos"],
+                "lastSyncedAt": serialised.get("lastSyncedAt"),
+            }
+        )
+    return payload
+
+
+async def legacy_record_holders(session: AsyncSession, limit: int) -> Dict[str, List[int]]:
+    kos = await session.execute(select(Player).order_by(desc(Player.kos)).limit(limit))
+    wos = await session.execute(select(Player).order_by(desc(Player.wos)).limit(limit))
+    return {
+        "kos": [player.user_id for player in kos.scalars().all()],
+        "wos": [player.user_id for player in wos.scalars().all()],
+    }
+
+
+async def _seed(session_maker: async_sessionmaker[AsyncSession], players: int) -> None:
+    rng = random.Random(42)
+    batch = []
+    async with session_maker() as session:
+        for user_id in range(1, players + 1):
+            batch.append(
+                {
+                    "user_id": user_id,
+                    "username": f"Trooper{user_id}",
+                    "rank": "Initiate",
+                    "rank_points": rng.randint(0, 50_000),
+                    "kos": rng.randint(0, 5_000),
+                    "wos": rng.randint(0, 5_000),
+                    "metadata_payload": {"decisionsBlocked": False, "notes": "x" * 64},
+                }
+            )
+            if len(batch) == 5_000:
+                await session.execute(insert(Player), batch)
+                batch.clear()
+        if batch:
+            await session.execute(insert(Player), batch)
+        await session.commit()
+
+
+async def _time(label: str, iterations: int, call: Callable[[], Awaitable[object]]) -> float:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    median = statistics.median(samples)
+    print(f"{label:<40} median {median:8.3f} ms   p95 {sorted(samples)[int(len(samples) * 0.95) - 1]:8.3f} ms")
+    return median
+
+
+async def run(database_url: str, players: int, iterations: int, limit: int, *, indexes: bool = True) -> None:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+        if not indexes:
+            for index in Player.__table__.indexes:
+                await connection.run_sync(index.drop)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    print(f"Seeding {players} players ...")
+    await _seed(session_maker, players)
+
+    calculator = CalculationService()
+    async with session_maker() as session:
+        service = LeaderboardService(session, cache=None)
+        service.cache = None
+
+        async def _fresh(call: Callable[[AsyncSession], Awaitable[object]]) -> object:
+            session.expunge_all()
+            return await call(session)
+
+        legacy_top = await _time(
+            f"legacy top {limit} (ORM + serialize)",
+            iterations,
+            lambda: _fresh(lambda s: legacy_top_players(s, calculator, limit)),
+        )
+        current_top = await _time(
+            f"projection top {limit}", iterations, lambda: _fresh(lambda s: service.fetch_top_players(limit))
+        )
+        legacy_records = await _time(
+            "legacy record holders (2 queries)", iterations, lambda: _fresh(lambda s: legacy_record_holders(s, 5))
+        )
+        current_records = await _time(
+            "record holders (UNION ALL)", iterations, lambda: _fresh(lambda s: service.fetch_record_holders(5))
+        )
+
+    print(f"top players speed-up:    {legacy_top / current_top:5.2f}x")
+    print(f"record holders speed-up: {legacy_records / current_records:5.2f}x")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--without-indexes", action="store_true", help="drop the leaderboard indexes first")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}"
+        asyncio.run(run(database_url, args.players, args.iterations, args.limit, indexes=not args.without_indexes))
+
+
+if __name__ == "__main__":  # pragma: no cover - manual invocation entry point
+    main()
@@ -0,0 +1,94 @@
+"""Time leaderboard position lookups and deep pages on the in-memory leaderboard.
+
+Usage::
+
+    python -m backend.benchmarks.bench_leaderboard_position --players 1000000
+
+Builds a ``LeaderboardCache`` from synthetic players (no database) and reports
+per-call latency of ``LeaderboardService.fetch_around`` and of keyset pages taken
+from random depths.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, List
+
+from ..app.services.leaderboard import LeaderboardService
+from ..app.services.leaderboard_cache import LeaderboardCache
+from ..app.services.player_events import PlayerChange
+
+
+def _build_cache(players: int) -> LeaderboardCache:
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    cache = LeaderboardCache()
+    cache.replace(
+        PlayerChange(
+            user_id=user_id,
+            username=f"Trooper{user_id}",
+            rank="Initiate",
+            rank_points=rng.randint(0, 50_000),
+            kos=rng.randint(0, 5_000),
+            wos=rng.randint(0, 5_000),
+            last_synced_at=now,
+            updated_at=now,
+        )
+        for user_id in range(1, players + 1)
+    )
+    return cache
+
+
+async def _time(label: str, iterations: int, call: Callable[[], Awaitable[object]]) -> None:
+    samples: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    print(
+        f"{label:<32} median {statistics.median(samples):7.4f} ms   "
+        f"p99 {samples[max(int(len(samples) * 0.99) - 1, 0)]:7.4f} ms"
+    )
+
+
+async def run(players: int, iterations: int, radius: int, page_size: int) -> None:
+    started = time.perf_counter()
+    cache = _build_cache(players)
+    print(f"Built cache with {players} players in {time.perf_counter() - started:.1f} s")
+
+    # The cache path never touches the session.
+    service = LeaderboardService(session=None, cache=cache)  # type: ignore[arg-type]
+    rng = random.Random(7)
+
+    await _time(
+        f"around (radius {radius})",
+        iterations,
+        lambda: service.fetch_around(rng.randint(1, players), radius),
+    )
+
+    async def _deep_page() -> None:
+        index = rng.randint(0, players - 2)
+        [anchor] = cache.slice(index, index + 1)
+        await service.fetch_page(page_size, (anchor.rank_points, anchor.kos, anchor.user_id))
+
+    await _time(f"page of {page_size} at random depth", iterations, _deep_page)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=2_000)
+    parser.add_argument("--radius", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.players, args.iterations, args.radius, args.page_size))
+
+
+if __name__ == "__main__":  # pragma: no cover - manual invocation entry point
+    main()
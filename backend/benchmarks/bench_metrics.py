@@ -0,0 +1,82 @@
+"""Measure what the /metrics instrumentation adds to a request.
+
+Usage::
+
+    python -m backend.benchmarks.bench_metrics --iterations 5000
+
+Times a single histogram observation and counter increment, then sends the
+same requests through a small FastAPI app with and without
+:class:`backend.app.metrics.MetricsMiddleware` (in process, over
+``httpx.ASGITransport``) and reports the difference per request. A full
+scrape of the registry is timed last.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Callable, List
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from ..app.metrics import REGISTRY, MetricsMiddleware, Registry
+from ..app.serialization import json_response
+
+
+def _time(label: str, iterations: int, call: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    per_call = (time.perf_counter() - started) / iterations * 1_000_000
+    print(f"{label:<44} {per_call:8.3f} us")
+    return per_call
+
+
+def _app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/players/{user_id}")
+    async def player(user_id: int):
+        return json_response({"userId": user_id, "username": f"Trooper{user_id}", "rankPoints": 150})
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def _requests(app: FastAPI, iterations: int) -> float:
+    samples: List[float] = []
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for user_id in range(iterations):
+            started = time.perf_counter()
+            await client.get(f"/players/{user_id % 1000}")
+            samples.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5_000)
+    args = parser.parse_args()
+
+    registry = Registry()
+    histogram = registry.histogram("bench_seconds", "Benchmark histogram.", ("method", "route"))
+    counter = registry.counter("bench_total", "Benchmark counter.", ("method", "route", "status"))
+    _time("histogram observe", args.iterations * 20, lambda: histogram.observe(0.012, "GET", "/players/{user_id}"))
+    _time("counter inc", args.iterations * 20, lambda: counter.inc("GET", "/players/{user_id}", "200"))
+
+    asyncio.run(_requests(_app(False), args.iterations))  # warm-up: imports, pydantic and httpx caches
+    plain = asyncio.run(_requests(_app(False), args.iterations))
+    instrumented = asyncio.run(_requests(_app(True), args.iterations))
+    print(f"{'request without middleware':<44} {plain:8.3f} us (median)")
+    print(f"{'request with middleware':<44} {instrumented:8.3f} us (median)")
+    print(f"overhead: {instrumented - plain:.2f} us per request ({(instrumented - plain) / plain:.1%})")
+
+    _time("scrape (render registry)", max(args.iterations // 50, 1), REGISTRY.render)
+
+
+if __name__ == "__main__":  # pragma: no cover - manual invocation entry point
+    main()
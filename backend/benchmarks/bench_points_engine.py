@@ -0,0 +1,120 @@
+"""Measure points engine throughput, in memory and with ledger persistence.
+
+Usage::
+
+    python -m backend.benchmarks.bench_points_engine --players 10000 --events 200000
+
+The first figure is :meth:`PointsEngine.evaluate_many` alone: sliding-window caps,
+KO cooldowns and remainder carry for a realistic event mix. The second sends
+the same mix through :class:`PointsLedgerService` in batches, as
+``POST /roblox/events/points:batch`` does. Each batch is one bulk ledger insert
+plus one executemany ``rank_points`` update and a commit. The database is a
+temporary SQLite file unless ``--database-url`` points at Postgres.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from ..app.models import Base, Player, PointsLedgerEntry
+from ..app.services.points_engine import PointsEngine, PointsEvent, PointsLedgerService
+
+_MIX = (
+    ("activity", 0.55),
+    ("ko", 0.30),
+    ("wo", 0.10),
+    ("training", 0.04),
+    ("operation", 0.01),
+)
+
+
+def _events(players: int, count: int, start: datetime) -> List[PointsEvent]:
+    rng = random.Random(42)
+    kinds = [kind for kind, _ in _MIX]
+    weights = [weight for _, weight in _MIX]
+    spacing = timedelta(hours=24) / count
+    return [
+        PointsEvent(
+            user_id=rng.randint(1, players),
+            type=kind,
+            duration=rng.choice((120.0, 300.0, 300.0, 300.0)) if kind == "activity" else None,
+            occurred_at=start + spacing * index,
+        )
+        for index, kind in enumerate(rng.choices(kinds, weights, k=count))
+    ]
+
+
+def _report(label: str, events: int, elapsed: float) -> None:
+    print(f"{label:<36} {events / elapsed:12,.0f} events/s   ({elapsed:.3f} s for {events:,})")
+
+
+def bench_engine(players: int, events: List[PointsEvent], now: datetime) -> None:
+    engine = PointsEngine(max_players=players)
+    for user_id in range(1, players + 1):
+        engine.load(user_id, remainder=0.0)
+    started = time.perf_counter()
+    results = engine.evaluate_many(events, now)
+    _report("engine only (evaluate_many)", len(results), time.perf_counter() - started)
+    print(f"  statuses: {engine.snapshot_stats()}")
+
+
+async def bench_ledger(database_url: str, players: int, events: List[PointsEvent], batch_size: int, now: datetime) -> None:
+    db = create_async_engine(database_url)
+    async with db.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(db, expire_on_commit=False)
+    async with session_maker() as session:
+        rows = [
+            {"user_id": user_id, "username": f"Trooper{user_id}", "rank": "Initiate", "rank_points": 0}
+            for user_id in range(1, players + 1)
+        ]
+        for offset in range(0, len(rows), 5_000):
+            await session.execute(insert(Player), rows[offset : offset + 5_000])
+        await session.commit()
+
+    engine = PointsEngine(max_players=players)
+    started = time.perf_counter()
+    for offset in range(0, len(events), batch_size):
+        async with session_maker() as session:
+            await PointsLedgerService(session, engine).record(events[offset : offset + batch_size], now=now)
+            await session.commit()
+    _report(f"ledger persistence (batch {batch_size})", len(events), time.perf_counter() - started)
+
+    async with session_maker() as session:
+        ledger_rows = (await session.execute(select(func.count()).select_from(PointsLedgerEntry))).scalar_one()
+    print(f"  ledger rows: {ledger_rows:,}; players loaded from the database: {engine.stats.loads:,}")
+    await db.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=2_000)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--skip-ledger", action="store_true", help="only measure the in-memory engine")
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    events = _events(args.players, args.events, now - timedelta(hours=24))
+    bench_engine(args.players, events, now)
+    if args.skip_ledger:
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}"
+        asyncio.run(bench_ledger(database_url, args.players, events, args.batch_size, now))
+
+
+if __name__ == "__main__":  # pragma: no cover - manual invocation entry point
+    main()
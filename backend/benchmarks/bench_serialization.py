@@ -0,0 +1,118 @@
+"""Compare the response_model serialisation path with the single-pass JSON path.
+
+Usage::
+
+    python -m backend.benchmarks.bench_serialization --iterations 20000
+
+The legacy path mirrors what FastAPI does for a ``response_model`` route:
+``serialize_player`` builds a dict, ``PlayerWithContext(**payload)`` validates it,
+FastAPI re-validates and dumps the model in JSON mode, and ``JSONResponse``
+encodes it with the standard library. The fast path encodes the
+``serialize_player`` dict directly with :func:`backend.app.serialization.dumps`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+
+from ..app.models import Player
+from ..app.schemas import LeaderboardTopResponse, PlayerWithContext
+from ..app.serialization import dumps, orjson
+from ..app.services.calculations import CalculationService
+
+
+def _player(user_id: int) -> Player:
+    now = datetime.utcnow()
+    return Player(
+        user_id=user_id,
+        username=f"Trooper{user_id}",
+        display_name=f"Trooper {user_id}",
+        rank="Shock Trooper I",
+        previous_rank="Initiate",
+        next_rank="Shock Trooper II",
+        rank_points=150 + user_id,
+        kos=12,
+        wos=3,
+        warnings=0,
+        recommendations=1,
+        privileged=False,
+        punishment_status=None,
+        punishment_expires_at=None,
+        metadata_payload={"decisionsBlocked": False},
+        created_at=now,
+        last_synced_at=now,
+    )
+
+
+def _time(label: str, iterations: int, call: Callable[[], bytes]) -> float:
+    samples: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    median = statistics.median(samples)
+    print(f"{label:<44} median {median:8.2f} us")
+    return median
+
+
+def _legacy_encode(adapter: TypeAdapter, model: object) -> bytes:
+    validated = adapter.validate_python(model)
+    content = adapter.dump_python(validated, mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--leaderboard-size", type=int, default=100)
+    args = parser.parse_args()
+
+    calculator = CalculationService()
+    player = _player(1)
+    player_adapter = TypeAdapter(PlayerWithContext)
+    print(f"encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+
+    legacy = _time(
+        "player: response_model path",
+        args.iterations,
+        lambda: _legacy_encode(player_adapter, PlayerWithContext(**calculator.serialize_player(player))),
+    )
+    fast = _time("player: single pass", args.iterations, lambda: dumps(calculator.serialize_player(player)))
+    print(f"player saving: {legacy - fast:.2f} us per response ({legacy / fast:.1f}x)")
+
+    board = [
+        {
+            "userId": user_id,
+            "username": f"Trooper{user_id}",
+            "rank": "Initiate",
+            "points": 1_000 - user_id,
+            "kos": user_id,
+            "wos": 0,
+            "lastSyncedAt": datetime.utcnow(),
+        }
+        for user_id in range(1, args.leaderboard_size + 1)
+    ]
+    board_adapter = TypeAdapter(LeaderboardTopResponse)
+    iterations = max(args.iterations // 10, 1)
+    legacy = _time(
+        f"top {args.leaderboard_size}: response_model path",
+        iterations,
+        lambda: _legacy_encode(board_adapter, LeaderboardTopResponse(players=board, lastSyncedAt=None)),
+    )
+    fast = _time(
+        f"top {args.leaderboard_size}: single pass",
+        iterations,
+        lambda: dumps({"players": board, "lastSyncedAt": None}),
+    )
+    print(f"leaderboard saving: {legacy - fast:.2f} us per response ({legacy / fast:.1f}x)")
+
+
+if __name__ == "__main__":  # pragma: no cover - manual invocation entry point
+    main()
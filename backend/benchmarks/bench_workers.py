@@ -0,0 +1,176 @@
+"""Load-test the HTTP server with one and with several worker processes.
+
+Usage::
+
+    python -m backend.benchmarks.bench_workers --workers 1 2 4 --requests 4000 --concurrency 64
+
+For each worker count this starts ``python -m backend`` with ``API_WORKERS``
+set, against a temporary SQLite file seeded with ``--players`` rows. It then
+fires a mix of ``GET /players/{id}`` and ``GET /leaderboard/top`` requests
+from a single client and reports requests per second next to the speed-up
+over the first run. The socket invalidation bus and the file leader lock are
+used exactly as in production. Pass ``--database-url`` to load-test Postgres
+instead, which the caller must have migrated and seeded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from ..app.models import Base, Player
+
+
+async def _seed(database_url: str, players: int) -> None:
+    engine = create_async_engine(database_url)
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            rng = random.Random(7)
+            await connection.execute(
+                insert(Player.__table__),
+                [
+                    {
+                        "user_id": user_id,
+                        "username": f"User{user_id}",
+                        "rank": "Initiate",
+                        "rank_points": rng.randint(0, 5_000),
+                        "kos": rng.randint(0, 500),
+                        "wos": rng.randint(0, 500),
+                    }
+                    for user_id in range(1, players + 1)
+                ],
+            )
+    finally:
+        await engine.dispose()
+
+
+def _start_server(workers: int, port: int, database_url: str, bus_dir: Path) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        API_WORKERS=str(workers),
+        API_PORT=str(port),
+        API_HOST="127.0.0.1",
+        ENVIRONMENT="production",
+        API_AUTO_RELOAD="false",
+        LEADERBOARD_CACHE_ENABLED="true",
+        DATABASE_URL=database_url,
+        INVALIDATION_BUS_DIR=str(bus_dir),
+    )
+    for key in ("GRPS_BACKEND_PORT", "PORT", "GRPS_BACKEND_HOST"):
+        env.pop(key, None)
+    return subprocess.Popen(
+        [sys.executable, "-m", "backend"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+async def _wait_ready(client: httpx.AsyncClient, workers: int, timeout: float = 30.0) -> None:
+    # Every worker answers /health/coordination with its own pid; wait until all of them have.
+    # Closing the connection each time lets the kernel hand the next one to another worker.
+    deadline = time.perf_counter() + timeout
+    pids = set()
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.get("/health/coordination", headers={"Connection": "close"})
+            if response.status_code == 200:
+                pids.add(response.json()["stats"]["pid"])
+                if len(pids) >= workers:
+                    return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise RuntimeError(f"server did not start {workers} workers within {timeout:.0f}s")
+
+
+async def _load(client: httpx.AsyncClient, players: int, requests: int, concurrency: int) -> float:
+    rng = random.Random(11)
+    paths = [
+        "/leaderboard/top?limit=50" if rng.random() < 0.2 else f"/players/{rng.randint(1, players)}"
+        for _ in range(requests)
+    ]
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    failures = 0
+
+    async def _worker() -> None:
+        nonlocal failures
+        while not queue.empty():
+            try:
+                response = await client.get(queue.get_nowait())
+            except httpx.TransportError:
+                failures += 1
+                continue
+            if response.status_code != 200:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if failures:
+        print(f"  warning: {failures} requests failed")
+    return requests / elapsed
+
+
+async def _bench_one(args: argparse.Namespace, workers: int, port: int, database_url: str, bus_dir: Path) -> float:
+    server = _start_server(workers, port, database_url, bus_dir)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30.0) as client:
+            await _wait_ready(client, workers)
+            await _load(client, args.players, min(args.requests, 500), args.concurrency)  # warm up
+            return await _load(client, args.players, args.requests, args.concurrency)
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(server.pid, signal.SIGKILL)
+            server.wait()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        database_url: Optional[str] = args.database_url
+        if database_url is None:
+            database_url = f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}"
+            await _seed(database_url, args.players)
+        baseline: Optional[float] = None
+        results: List[str] = []
+        for index, workers in enumerate(args.workers):
+            rate = await _bench_one(args, workers, args.port + index, database_url, Path(directory) / "bus")
+            baseline = baseline or rate
+            results.append(f"{workers:>3} worker(s) {rate:12,.0f} req/s   x{rate / baseline:.2f}")
+            print(results[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=4_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=18_700)
+    parser.add_argument("--database-url", default=None, help="Use an existing, seeded database instead of SQLite")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
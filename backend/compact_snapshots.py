@@ -0,0 +1,54 @@
+"""Roll raw player snapshots into hourly/daily aggregates and prune them.
+
+Usage::
+
+    python -m backend.compact_snapshots --older-than-hours 168 --batch-size 1000
+
+Defaults come from ``SNAPSHOT_RETENTION_HOURS`` and
+``SNAPSHOT_COMPACTION_BATCH_SIZE``. Every batch is committed on its own, so the
+command can be interrupted and re-run safely.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+from datetime import timedelta
+from typing import Optional, Sequence
+
+from .app.config import get_settings
+from .app.db import get_engine
+from .app.models.migrations import create_schema
+from .app.services.compaction import SnapshotCompactor
+
+
+def _parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--older-than-hours", type=float, default=settings.snapshot_retention_hours)
+    parser.add_argument("--batch-size", type=int, default=settings.snapshot_compaction_batch_size)
+    parser.add_argument("--max-batches", type=int, default=None, help="stop after this many batches")
+    return parser.parse_args(argv)
+
+
+async def _compact(args: argparse.Namespace) -> None:
+    engine = get_engine()
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(create_schema)
+        compactor = SnapshotCompactor(retention=timedelta(hours=args.older_than_hours), batch_size=args.batch_size)
+        report = await compactor.run(max_batches=args.max_batches)
+        print(json.dumps(report.to_payload(), indent=2))
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_compact(_parse_args(argv)))
+
+
+if __name__ == "__main__":  # pragma: no cover - manual invocation entry point
+    main()
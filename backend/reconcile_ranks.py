@@ -0,0 +1,62 @@
+"""Compare players.rank with the roles members hold in the Roblox group.
+
+Usage::
+
+    python -m backend.reconcile_ranks [--fix] [--max-pages 50]
+
+Members are read in pages of ``RANK_RECONCILE_PAGE_SIZE`` (up to 100), so a
+full pass costs one groups API request per page. Without ``--fix`` the command
+only reports; with it, drifted player rows are rewritten to the Roblox rank and
+the changes are published on the invalidation bus so running workers refresh
+their caches.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Optional, Sequence
+
+from .app.config import get_settings
+from .app.db import get_engine
+from .app.models.migrations import create_schema
+from .app.services.invalidation import start_invalidation_bus, stop_invalidation_bus
+from .app.services.rank_reconciliation import RankReconciler
+
+
+def _parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fix", action="store_true", default=settings.rank_reconcile_fix)
+    parser.add_argument("--page-size", type=int, choices=(10, 25, 50, 100), default=settings.rank_reconcile_page_size)
+    parser.add_argument("--max-pages", type=int, default=settings.rank_reconcile_max_pages, help="stop after this many pages")
+    return parser.parse_args(argv)
+
+
+async def _reconcile(args: argparse.Namespace) -> None:
+    engine = get_engine()
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(create_schema)
+        if args.fix:
+            # Committed fixes are announced to the workers like any other player change.
+            await start_invalidation_bus()
+        reconciler = RankReconciler.from_settings(
+            get_settings(), fix=args.fix, page_size=args.page_size, max_pages=args.max_pages
+        )
+        report = await reconciler.run()
+        print(json.dumps(report.to_payload(), indent=2))
+    finally:
+        await stop_invalidation_bus()
+        await engine.dispose()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_reconcile(_parse_args(argv)))
+
+
+if __name__ == "__main__":  # pragma: no cover - manual invocation entry point
+    main()
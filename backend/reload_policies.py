@@ -0,0 +1,42 @@
+"""Tell every running worker to reload the policy files from CONFIG_DIR.
+
+Usage::
+
+    python -m backend.reload_policies
+
+Workers cache ``policy.ranks.json`` and ``policy.points.json`` after the first
+read. This publishes a ``policies`` message on the invalidation bus (Postgres
+``LISTEN/NOTIFY`` or the local socket directory, as configured), and each worker
+drops its cached copies. Without a bus, that is with a single worker, restart
+the service instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+
+from .app.services.invalidation import POLICIES, publish_invalidation, start_invalidation_bus, stop_invalidation_bus
+
+
+async def _reload() -> int:
+    bus = await start_invalidation_bus()
+    if bus is None:
+        print("No invalidation bus is configured (API_WORKERS=1 or INVALIDATION_BUS=off); restart the service instead.")
+        return 1
+    try:
+        publish_invalidation(POLICIES, ["reload"])
+    finally:
+        await stop_invalidation_bus()
+    print(f"Policy reload published on the {bus.backend} bus.")
+    return 0
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_reload()))
+
+
+if __name__ == "__main__":  # pragma: no cover - manual invocation entry point
+    main()
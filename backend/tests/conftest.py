@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.app.models import Base
+
+
+@pytest_asyncio.fixture
+async def session() -> AsyncSession:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_maker() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_factory(session: AsyncSession):
+    """``session_scope`` replacement bound to the test database."""
+
+    session_maker = async_sessionmaker(session.bind, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def _scope():
+        async with session_maker() as scoped:
+            yield scoped
+            await scoped.commit()
+
+    return _scope
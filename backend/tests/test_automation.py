@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List, Tuple
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import get_settings
+from backend.app.dependencies import get_automation_service
+from backend.app.main import app
+from backend.app.models import Player
+from backend.app.routes import roblox as roblox_route
+from backend.app.services.automation import AutomationService
+
+
+class FakeGroupClient:
+    def __init__(self, failing: Tuple[int, ...] = ()) -> None:
+        self.failing = failing
+        self.updates: List[Tuple[int, int]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def update_group_role(self, user_id: int, role_id: int) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if user_id in self.failing:
+                raise RuntimeError("roblox unavailable")
+            self.updates.append((user_id, role_id))
+        finally:
+            self.in_flight -= 1
+
+    async def write_datastore(self, *args, **kwargs) -> None:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_batch_decisions_apply_with_bounded_concurrency(session: AsyncSession) -> None:
+    # Users 1-6 have enough warnings to be suspended, 7 is below its rank threshold, 8 needs nothing.
+    session.add_all(
+        [
+            *(
+                Player(user_id=user_id, username=f"User{user_id}", rank="Initiate", rank_points=10, kos=0, wos=0, warnings=5)
+                for user_id in range(1, 7)
+            ),
+            Player(user_id=7, username="User7", rank="Shock Trooper II", rank_points=20, kos=0, wos=0),
+            Player(user_id=8, username="User8", rank="Initiate", rank_points=10, kos=0, wos=0),
+        ]
+    )
+    await session.commit()
+    client = FakeGroupClient(failing=(3,))
+
+    app.dependency_overrides[get_automation_service] = lambda: AutomationService(session, roblox_client=client)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            response = await http.post(
+                "/automation/decisions:batch",
+                json={"userIds": [*range(1, 9), 99], "apply": True, "concurrency": 2},
+            )
+            rejected = await http.post("/automation/decisions:batch", json={"apply": True})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["processed"], body["applied"], body["failed"], body["notFound"]) == (8, 6, 1, 1)
+    statuses = {result["userId"]: result["status"] for result in body["results"]}
+    assert statuses[3] == "error"
+    assert statuses[7] == "applied"
+    assert statuses[8] == "evaluated"
+    assert statuses[99] == "not_found"
+    assert client.max_in_flight == 2
+    assert (7, 4) in client.updates
+
+    await session.commit()
+    assert (await session.get(Player, 1)).rank == "Suspended"
+    assert (await session.get(Player, 3)).rank == "Initiate"
+    assert rejected.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_group_role_lookup_requires_an_api_key(session: AsyncSession, monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = get_settings().model_copy(update={"inbound_api_keys": ["secret"]})
+    monkeypatch.setattr(roblox_route, "get_settings", lambda: settings)
+    client = FakeGroupClient()
+
+    app.dependency_overrides[get_automation_service] = lambda: AutomationService(session, roblox_client=client)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            response = await http.get("/automation/group-role/1", params={"fresh": "true"})
+    finally:
+        app.dependency_overrides.clear()
+
+    # Rejected before the client is asked (the fake has no role lookup and would answer 500).
+    assert response.status_code == 401
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models import PlayerSnapshot, PlayerSnapshotDaily, PlayerSnapshotHourly
+from backend.app.services.compaction import SnapshotCompactor
+from backend.app.services.snapshot_store import reconstruct_history
+
+NOW = datetime(2024, 5, 10, 12, 0)
+
+
+def _row(user_id: int, created_at: datetime, *, points: int, kos: int, rank: str, delta: bool = False) -> PlayerSnapshot:
+    payload = {"rank_points": points, "kos": kos, "rank": rank}
+    if not delta:
+        payload.update({"user_id": user_id, "username": f"User{user_id}", "wos": 0})
+    return PlayerSnapshot(user_id=user_id, created_at=created_at, payload=payload, is_delta=delta)
+
+
+@pytest.mark.asyncio
+async def test_compaction_rolls_up_and_prunes_in_batches(session: AsyncSession, session_factory) -> None:
+    old = NOW - timedelta(days=10)
+    session.add_all(
+        [
+            _row(1, old.replace(hour=1, minute=5), points=10, kos=1, rank="Initiate"),
+            _row(1, old.replace(hour=1, minute=40), points=40, kos=3, rank="Initiate", delta=True),
+            _row(1, old.replace(hour=2, minute=10), points=120, kos=4, rank="Shock Trooper I", delta=True),
+            _row(2, old.replace(hour=1, minute=20), points=5, kos=0, rank="Initiate"),
+            _row(1, NOW - timedelta(hours=1), points=150, kos=6, rank="Shock Trooper I", delta=True),
+        ]
+    )
+    await session.commit()
+
+    compactor = SnapshotCompactor(retention=timedelta(days=7), batch_size=2, session_factory=session_factory)
+    report = await compactor.run(now=NOW)
+
+    assert (report.batches, report.snapshots, report.keyframes_promoted) == (2, 4, 2)
+    hourly = {
+        (row.user_id, row.bucket_start.hour): row
+        for row in (await session.execute(select(PlayerSnapshotHourly))).scalars()
+    }
+    assert set(hourly) == {(1, 1), (1, 2), (2, 1)}
+    first_hour = hourly[(1, 1)]
+    assert (first_hour.samples, first_hour.min_rank_points, first_hour.max_rank_points) == (2, 10, 40)
+    assert first_hour.kos_delta == 2
+
+    daily = (
+        await session.execute(select(PlayerSnapshotDaily).where(PlayerSnapshotDaily.user_id == 1))
+    ).scalar_one()
+    assert (daily.samples, daily.last_rank_points, daily.kos_delta, daily.rank_transitions) == (3, 120, 3, 1)
+
+    assert await session.scalar(select(func.count()).select_from(PlayerSnapshot)) == 1
+    [(survivor, payload)] = await reconstruct_history(session, 1)
+    assert survivor.is_delta is False
+    assert (payload["username"], payload["rank_points"]) == ("User1", 150)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models import RobloxOutbox
+from backend.app.schemas import PlayerSnapshotPayload
+from backend.app.services import datastore_mirror, invalidation
+from backend.app.services.datastore_mirror import DatastoreMirror
+from backend.app.services.ingestion import IngestionService
+from backend.app.services.invalidation import SocketInvalidationBus
+from backend.app.services.outbox import DATASTORE_WRITE, PENDING
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RecordingClient:
+    def __init__(self) -> None:
+        self.writes: List[Tuple[str, Dict[str, Any]]] = []
+
+    async def write_datastore(self, universe_id: int, datastore: str, scope: str, key: str, value: Dict[str, Any]) -> None:
+        self.writes.append((key, value))
+
+
+def _mirror(clock: FakeClock, client: RecordingClient, **overrides: Any) -> DatastoreMirror:
+    options = dict(debounce_seconds=2, max_delay_seconds=10, min_interval_seconds=6)
+    options.update(overrides)
+    return DatastoreMirror(universe_id=1, datastore="GRPS_Points", client_factory=lambda: client, clock=clock, **options)
+
+
+@pytest.mark.asyncio
+async def test_mirror_debounces_coalesces_and_skips_published_state() -> None:
+    clock, client = FakeClock(), RecordingClient()
+    mirror = _mirror(clock, client)
+
+    for points in (10, 20, 30):
+        mirror.submit(7, {"rankPoints": points, "lastSyncedAt": str(clock.now)})
+        clock.now += 1
+    assert await mirror.flush() == 0  # the last submit is only a second old
+    clock.now += 1
+    assert await mirror.flush() == 1
+    assert client.writes == [("player:7", {"rankPoints": 30, "lastSyncedAt": "102.0"})]
+
+    # Only the volatile sync timestamp changed, so nothing is queued.
+    assert mirror.submit(7, {"rankPoints": 30, "lastSyncedAt": "later"}) is False
+
+    # A real change waits for the per-key write interval even after the debounce.
+    mirror.submit(7, {"rankPoints": 40})
+    clock.now += 3
+    assert await mirror.flush() == 0
+    clock.now += 3
+    assert await mirror.flush() == 1
+
+    # A value that returns to the published state cancels the pending write.
+    mirror.submit(7, {"rankPoints": 50})
+    mirror.submit(7, {"rankPoints": 40})
+    assert mirror.pending == 0
+
+    stats = mirror.snapshot_stats()
+    assert (stats["writes"], stats["coalesced"], stats["skipped"]) == (2, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_continuous_updates_are_flushed_by_max_delay() -> None:
+    clock, client = FakeClock(), RecordingClient()
+    mirror = _mirror(clock, client)
+    for second in range(10):
+        mirror.submit(1, {"rankPoints": second})
+        assert await mirror.flush() == 0
+        clock.now += 1
+    assert await mirror.flush() == 1
+    assert client.writes[0][1] == {"rankPoints": 9}
+
+
+@pytest.mark.asyncio
+async def test_published_hashes_are_capped_to_the_most_recent_keys() -> None:
+    clock, client = FakeClock(), RecordingClient()
+    mirror = _mirror(clock, client, max_keys=2)
+    for user_id in (1, 2, 3):
+        mirror.submit(user_id, {"rankPoints": 10})
+        clock.now += 2
+        assert await mirror.flush() == 1
+
+    stats = mirror.snapshot_stats()
+    assert (stats["trackedKeys"], stats["evictions"]) == (2, 1)
+    # Key 1 was evicted, so an unchanged value is written again; key 3 is still known.
+    assert mirror.submit(3, {"rankPoints": 10}) is False
+    assert mirror.submit(1, {"rankPoints": 10}) is True
+
+
+@pytest.mark.asyncio
+async def test_committed_ingests_are_mirrored(session: AsyncSession, monkeypatch: pytest.MonkeyPatch) -> None:
+    clock, client = FakeClock(), RecordingClient()
+    mirror = _mirror(clock, client, mirror_ingests=True)
+    monkeypatch.setattr(datastore_mirror, "_mirror", mirror)
+    service = IngestionService(session)
+    snapshot = PlayerSnapshotPayload.model_validate({"userId": 9, "username": "Nine", "rankPoints": 60, "kos": 1, "wos": 0})
+
+    await service.ingest(snapshot)
+    await session.rollback()
+    assert mirror.pending == 0
+
+    await service.ingest(snapshot)
+    await session.commit()
+    assert mirror.pending == 1
+    assert await mirror.flush(force=True) == 1
+    key, value = client.writes[0]
+    assert key == "player:9"
+    assert value["rankPoints"] == 60 and isinstance(value["createdAt"], str)
+
+
+@pytest.mark.asyncio
+async def test_followers_forward_submits_to_the_owning_worker(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    clock, client = FakeClock(), RecordingClient()
+    leader, follower = _mirror(clock, client), _mirror(clock, client, owner=False)
+    follower_bus, leader_bus = SocketInvalidationBus(tmp_path), SocketInvalidationBus(tmp_path)
+    await follower_bus.start()
+    await leader_bus.start()
+    monkeypatch.setattr(invalidation, "_bus", follower_bus)
+    monkeypatch.setattr(datastore_mirror, "_mirror", leader)
+    try:
+        follower.submit(7, {"rankPoints": 10})
+        follower.submit(7, {"rankPoints": 20})
+        for _ in range(20):
+            await asyncio.sleep(0.01)
+    finally:
+        await follower_bus.stop()
+        await leader_bus.stop()
+
+    # Only the owner queues, so both submits coalesce into one debounced write.
+    assert (follower.pending, follower.stats.forwarded) == (0, 2)
+    assert (leader.pending, leader.stats.coalesced) == (1, 1)
+    clock.now += 2
+    assert await leader.flush() == 1
+    assert client.writes == [("player:7", {"rankPoints": 20})]
+
+
+@pytest.mark.asyncio
+async def test_flushes_go_through_the_outbox_when_it_is_enabled(session: AsyncSession, session_factory) -> None:
+    clock, client = FakeClock(), RecordingClient()
+    mirror = _mirror(clock, client, outbox=True, session_factory=session_factory)
+    mirror.submit(7, {"rankPoints": 10})
+    mirror.submit(7, {"rankPoints": 20})
+    mirror.submit(8, {"rankPoints": 30})
+
+    assert await mirror.flush(force=True) == 2
+    assert client.writes == []
+    entries = (await session.execute(select(RobloxOutbox).order_by(RobloxOutbox.id))).scalars().all()
+    assert [(entry.user_id, entry.kind, entry.status) for entry in entries] == [
+        (7, DATASTORE_WRITE, PENDING),
+        (8, DATASTORE_WRITE, PENDING),
+    ]
+    assert entries[0].payload == {
+        "universeId": 1,
+        "datastore": "GRPS_Points",
+        "scope": "global",
+        "key": "player:7",
+        "value": {"rankPoints": 20},
+    }
+    # Queued values count as published.
+    assert mirror.submit(7, {"rankPoints": 20}) is False
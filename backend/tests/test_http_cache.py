@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.db import get_read_session
+from backend.app.main import app
+from backend.app.schemas import PlayerSnapshotPayload
+from backend.app.services.ingestion import IngestionService, PendingSnapshot
+from backend.app.services.leaderboard import LeaderboardService
+from backend.app.services.leaderboard_cache import LeaderboardCache
+from backend.app.services.player_events import bump_version, subscribe, unsubscribe
+
+
+async def _ingest(session: AsyncSession, user_id: int, points: int) -> None:
+    snapshot = PlayerSnapshotPayload.model_validate(
+        {"userId": user_id, "username": f"User{user_id}", "rankPoints": points, "kos": 1, "wos": 0}
+    )
+    await IngestionService(session).ingest(snapshot)
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_player_and_leaderboard_revalidate_with_etags(session: AsyncSession) -> None:
+    await _ingest(session, 1, 100)
+
+    async def _override_session():
+        yield session
+
+    app.dependency_overrides[get_read_session] = _override_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            player = await client.get("/players/1")
+            board = await client.get("/leaderboard/top", params={"limit": 10})
+            player_etag, board_etag = player.headers["etag"], board.headers["etag"]
+
+            cached_player = await client.get("/players/1", headers={"If-None-Match": player_etag})
+            revalidate = {"If-None-Match": board_etag}
+            cached_board = await client.get("/leaderboard/top", params={"limit": 10}, headers=revalidate)
+            other_limit = await client.get("/leaderboard/top", params={"limit": 5}, headers=revalidate)
+            since = await client.get("/players/1", headers={"If-Modified-Since": player.headers["last-modified"]})
+
+            await _ingest(session, 1, 250)
+            changed_player = await client.get("/players/1", headers={"If-None-Match": player_etag})
+            changed_board = await client.get("/leaderboard/top", params={"limit": 10}, headers=revalidate)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert player.status_code == board.status_code == 200
+    assert player.headers["cache-control"] == "public, no-cache"
+    assert board.headers["cache-control"].startswith("public, max-age=")
+    assert cached_player.status_code == cached_board.status_code == since.status_code == 304
+    assert cached_player.content == b""
+    assert cached_board.headers["etag"] == board_etag
+    assert other_limit.status_code == 200
+
+    assert changed_player.status_code == 200
+    assert changed_player.json()["rankPoints"] == 250
+    assert changed_player.headers["etag"] != player_etag
+    assert changed_board.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_etag_follows_the_rows_it_was_read_from(session: AsyncSession) -> None:
+    await _ingest(session, 1, 100)
+
+    async def _override_session():
+        yield session
+
+    app.dependency_overrides[get_read_session] = _override_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            board = await client.get("/leaderboard/top")
+            # A commit announced by the primary that the read session cannot see yet.
+            bump_version()
+            lagging = await client.get("/leaderboard/top", headers={"If-None-Match": board.headers["etag"]})
+            await _ingest(session, 2, 50)
+            caught_up = await client.get("/leaderboard/top", headers={"If-None-Match": board.headers["etag"]})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert lagging.status_code == 304
+    assert caught_up.status_code == 200
+    assert [player["userId"] for player in caught_up.json()["players"]] == [1, 2]
+    assert caught_up.headers["etag"] != board.headers["etag"]
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_etag_changes_when_only_last_synced_at_moves(session: AsyncSession) -> None:
+    await _ingest(session, 1, 100)
+    cache = LeaderboardCache()
+    await cache.load(session)
+
+    async def _override_session():
+        yield session
+
+    app.dependency_overrides[get_read_session] = _override_session
+    subscribe(cache.apply)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            board = await client.get("/leaderboard/top")
+            # The same snapshot again: nothing but last_synced_at (served as lastSyncedAt) changes.
+            snapshot = PlayerSnapshotPayload.model_validate(
+                {"userId": 1, "username": "User1", "rankPoints": 100, "kos": 1, "wos": 0}
+            )
+            outcomes = await IngestionService(session).ingest_many([PendingSnapshot(snapshot)])
+            await session.commit()
+            resynced = await client.get("/leaderboard/top", headers={"If-None-Match": board.headers["etag"]})
+    finally:
+        unsubscribe(cache.apply)
+        app.dependency_overrides.clear()
+
+    assert outcomes[0].unchanged
+    assert resynced.status_code == 200
+    assert resynced.json()["players"][0]["lastSyncedAt"] != board.json()["players"][0]["lastSyncedAt"]
+    # The cache and the database report the same version, so both paths build the same ETag.
+    assert await LeaderboardService(session, cache=cache).data_version() == await LeaderboardService(session).data_version()
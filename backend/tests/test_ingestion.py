@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.db import get_session
+from backend.app.main import app
+from backend.app.models import Player, PlayerSnapshot
+from backend.app.schemas import PlayerSnapshotPayload
+from backend.app.services.ingestion import IngestionService, PendingSnapshot, _column_values
+
+
+def _snapshot(user_id: int, points: int, **extra) -> PlayerSnapshotPayload:
+    return PlayerSnapshotPayload.model_validate(
+        {"userId": user_id, "username": f"User{user_id}", "rankPoints": points, "kos": 1, "wos": 0, **extra}
+    )
+
+
+@pytest.mark.asyncio
+async def test_ingest_many_upserts_players_and_keeps_history(session: AsyncSession) -> None:
+    session.add(Player(user_id=1, username="Old", rank="Initiate", rank_points=0, kos=0, wos=0))
+    await session.commit()
+
+    service = IngestionService(session)
+    outcomes = await service.ingest_many(
+        [
+            PendingSnapshot(_snapshot(1, 160), experience_key="nexus"),
+            PendingSnapshot(_snapshot(2, 60)),
+            PendingSnapshot(_snapshot(2, 320)),
+        ]
+    )
+    await session.commit()
+
+    assert [outcome.created for outcome in outcomes] == [False, True, False]
+    players = {player.user_id: player for player in (await session.execute(select(Player))).scalars()}
+    assert players[1].username == "User1"
+    assert players[1].rank == "Shock Trooper II"
+    assert players[2].rank_points == 320
+    assert players[2].rank == "Volt Specialist I"
+    history = await session.scalar(select(func.count()).select_from(PlayerSnapshot))
+    assert history == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_reports_per_item_errors(session: AsyncSession) -> None:
+    async def _override_session():
+        yield session
+
+    app.dependency_overrides[get_session] = _override_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post(
+                "/roblox/events/player-activity:batch",
+                json={
+                    "snapshots": [
+                        {"userId": 5, "username": "Kilo", "rankPoints": 55, "kos": 2, "wos": 1},
+                        {"userId": 6, "username": "Lima", "rankPoints": -1, "kos": 0, "wos": 0},
+                    ]
+                },
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["processed"] == 1
+    assert body["failed"] == 1
+    assert body["results"][0]["status"] == "created"
+    assert body["results"][0]["player"]["rank"] == "Shock Trooper I"
+    assert body["results"][1]["status"] == "error"
+    assert body["results"][1]["userId"] == 6
+    assert "rankPoints" in body["results"][1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_batch_upsert_keeps_columns_changed_since_the_read(session: AsyncSession, session_factory) -> None:
+    session.add(Player(user_id=1, username="User1", rank="Shock Trooper I", rank_points=60, kos=1, wos=0))
+    await session.commit()
+
+    service = IngestionService(session)
+    existing = await service._load_players([1])
+    read = {1: _column_values(existing[1])}
+    # Automation suspends the player after the batch read the row.
+    async with session_factory() as other:
+        suspended = await other.get(Player, 1)
+        suspended.punishment_status = "Trial_Punishment"
+        await other.commit()
+
+    player = existing[1]
+    player.kos = 4
+    player.last_synced_at = datetime.utcnow()
+    await service._upsert_players([player], read)
+    await session.commit()
+
+    session.expire_all()
+    stored = await session.get(Player, 1)
+    assert (stored.kos, stored.punishment_status) == (4, "Trial_Punishment")
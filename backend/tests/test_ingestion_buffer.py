@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import List, Set
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models import Player, PlayerSnapshot
+from backend.app.schemas import PlayerSnapshotPayload
+from backend.app.services.ingestion import IngestionService, PendingSnapshot
+from backend.app.services.ingestion_buffer import IngestionBuffer, IngestionBufferFull
+from backend.app.services.player_events import subscribe, unsubscribe
+
+
+def _entry(user_id: int, points: int) -> PendingSnapshot:
+    payload = {"userId": user_id, "username": f"User{user_id}", "rankPoints": points, "kos": 0, "wos": 0}
+    return PendingSnapshot(PlayerSnapshotPayload.model_validate(payload))
+
+
+def _factory(session: AsyncSession):
+    @asynccontextmanager
+    async def _scope():
+        yield session
+        await session.commit()
+
+    return _scope
+
+
+@pytest.mark.asyncio
+async def test_buffer_coalesces_snapshots_per_player(session: AsyncSession) -> None:
+    buffer = IngestionBuffer(session_factory=_factory(session))
+    await buffer.submit(_entry(1, 10))
+    await buffer.submit(_entry(1, 60))
+    await buffer.submit(_entry(2, 200))
+
+    assert buffer.pending == 2
+    assert await buffer.flush() == 2
+
+    player = await session.get(Player, 1)
+    assert player.rank_points == 60
+    assert await session.scalar(select(func.count()).select_from(PlayerSnapshot)) == 2
+    stats = buffer.snapshot_stats()
+    assert stats["coalesced"] == 1
+    assert stats["lastBatchSize"] == 2
+    assert stats["batchSizeBuckets"]["10"] == 1
+
+
+@pytest.mark.asyncio
+async def test_buffer_retains_history_and_applies_backpressure(session: AsyncSession) -> None:
+    buffer = IngestionBuffer(
+        session_factory=_factory(session),
+        max_pending=2,
+        retain_snapshots=True,
+        submit_timeout=0.01,
+    )
+    await buffer.submit(_entry(1, 10))
+    await buffer.submit(_entry(1, 20))
+    with pytest.raises(IngestionBufferFull):
+        await buffer.submit(_entry(1, 30))
+
+    await buffer.stop()
+    assert buffer.pending == 0
+    assert await session.scalar(select(func.count()).select_from(PlayerSnapshot)) == 2
+    assert (await session.get(Player, 1)).rank_points == 20
+
+
+class _FailingBuffer(IngestionBuffer):
+    """Fails batches containing a ``poison`` player, or every batch during an ``outage``."""
+
+    poison: Set[int] = set()
+    outage = False
+    arriving: List[PendingSnapshot] = []
+
+    async def _ingest(self, entries: List[PendingSnapshot]) -> None:
+        if self.outage:
+            # Submits keep arriving while the flush is in progress.
+            for entry in self.arriving:
+                await self.submit(entry)
+            self.arriving = []
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        if any(entry.snapshot.user_id in self.poison for entry in entries):
+            raise ValueError("bad snapshot")
+        await super()._ingest(entries)
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_isolate_poison_snapshots_and_respect_capacity(session: AsyncSession) -> None:
+    buffer = _FailingBuffer(session_factory=_factory(session), max_pending=3, max_attempts=2)
+    buffer.poison = {3}
+    for user_id in (1, 2, 3):
+        await buffer.submit(_entry(user_id, 10 * user_id))
+
+    # The good players are written one by one; the poison one waits for another attempt.
+    assert await buffer.flush() == 2
+    assert buffer.pending == 1
+    assert await session.scalar(select(func.count()).select_from(Player)) == 2
+    assert await buffer.flush() == 0
+    assert buffer.pending == 0
+    assert buffer.snapshot_stats()["deadLettered"] == 1
+
+    # An outage re-queues without spending attempts, but never past capacity.
+    buffer.outage = True
+    buffer.arriving = [_entry(4, 40)]
+    for user_id in (5, 6, 7):
+        await buffer.submit(_entry(user_id, 10))
+    assert await buffer.flush() == 0
+    assert buffer.pending == 3
+    stats = buffer.snapshot_stats()
+    assert (stats["dropped"], stats["retried"], stats["failedFlushes"]) == (1, 2, 3)
+
+    buffer.outage = False
+    assert await buffer.flush() == 3
+    assert await session.get(Player, 4) is not None
+
+
+@pytest.mark.asyncio
+async def test_flush_does_not_overwrite_a_newer_direct_ingest(session: AsyncSession, session_factory) -> None:
+    class _OvertakenBuffer(IngestionBuffer):
+        async def _ingest(self, entries: List[PendingSnapshot]) -> None:
+            # A direct ingest commits a newer snapshot after the flush took the buffered one.
+            async with session_factory() as direct:
+                await IngestionService(direct).ingest(_entry(1, 300).snapshot)
+                await direct.commit()
+            await super()._ingest(entries)
+
+    published: List[int] = []
+
+    def _listener(changes) -> None:
+        published.extend(change.rank_points for change in changes)
+
+    buffer = _OvertakenBuffer(session_factory=_factory(session))
+    await buffer.submit(_entry(1, 10))
+    subscribe(_listener)
+    try:
+        assert await buffer.flush() == 1
+    finally:
+        unsubscribe(_listener)
+
+    session.expire_all()
+    assert (await session.get(Player, 1)).rank_points == 300
+    # The skipped row is not announced with the stale values either.
+    assert published == [300]
+    assert await session.scalar(select(func.count()).select_from(PlayerSnapshot)) == 2
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models import Player
+from backend.app.services import invalidation
+from backend.app.services.invalidation import PostgresInvalidationBus, SocketInvalidationBus
+from backend.app.services.leaderboard_cache import LeaderboardCache
+from backend.app.services.leadership import FileLeaderLock, LeaderElection
+from backend.app.services.player_events import PlayerChange, current_version, subscribe, track_player_change, unsubscribe
+
+
+async def _settle() -> None:
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_committed_changes_reach_other_workers(
+    session: AsyncSession, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    sender, receiver = SocketInvalidationBus(tmp_path), SocketInvalidationBus(tmp_path)
+    await sender.start()
+    await receiver.start()
+    monkeypatch.setattr(invalidation, "_bus", sender)
+    received: List[PlayerChange] = []
+    subscribe(received.extend)
+    try:
+        player = Player(user_id=7, username="Trooper", rank="Initiate", rank_points=40, kos=3, wos=1)
+        session.add(player)
+        await session.flush()
+        track_player_change(session, player)
+        version = current_version().counter
+        await session.commit()
+        await _settle()
+    finally:
+        unsubscribe(received.extend)
+        await sender.stop()
+        await receiver.stop()
+
+    # Local listeners run on commit; the bus delivers the same change again, as it would to another worker.
+    assert len(received) == 2
+    assert received[0] == received[1]
+    assert received[0].user_id == 7 and received[0].rank_points == 40
+    assert current_version().counter == version + 2
+
+    # Leaderboard validators come from the data, so a worker fed by the bus agrees with one that read the database.
+    from_bus, from_database = LeaderboardCache(), LeaderboardCache()
+    from_bus.replace([])
+    from_bus.apply(received[1:])
+    await from_database.load(session)
+    assert from_bus.version() == from_database.version() == (1, player.updated_at, player.last_synced_at)
+    assert (sender.stats.messages_sent, receiver.stats.received, receiver.stats.gaps) == (1, 1, 0)
+    assert not (tmp_path / f"{sender.origin}.sock").exists()
+
+
+@pytest.mark.asyncio
+async def test_large_batches_are_split_and_lost_messages_trigger_a_resync(tmp_path: Path) -> None:
+    sender, receiver = SocketInvalidationBus(tmp_path), SocketInvalidationBus(tmp_path)
+    sender.max_message_bytes = 1_000
+    await sender.start()
+    await receiver.start()
+    try:
+        sender.publish(invalidation.GROUP_ROLES, list(range(1_000_000, 1_000_300)))
+        await _settle()
+        assert sender.stats.messages_sent == receiver.stats.received > 1
+        assert receiver.stats.gaps == 0
+
+        sender._seq += 1  # a message the receiver never saw
+        sender.publish(invalidation.GROUP_ROLES, [1])
+        await _settle()
+        assert receiver.stats.gaps == 1
+    finally:
+        await sender.stop()
+        await receiver.stop()
+
+
+class _FakeConnection:
+    """Just enough of an asyncpg connection for :class:`PostgresInvalidationBus`."""
+
+    def __init__(self) -> None:
+        self.closed = False
+        self.broken = False
+        self.queries: List[str] = []
+        self._on_termination: List[Any] = []
+
+    async def add_listener(self, channel: str, callback: Any) -> None:
+        pass
+
+    def add_termination_listener(self, callback: Any) -> None:
+        self._on_termination.append(callback)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def execute(self, query: str, *args: Any) -> None:
+        if self.broken:
+            raise ConnectionResetError("connection reset by peer")
+        self.queries.append(query)
+
+    def terminate(self) -> None:
+        self.closed = True
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def drop(self) -> None:
+        self.closed = True
+        for callback in self._on_termination:
+            callback(self)
+
+
+@pytest.mark.asyncio
+async def test_dropped_listen_connection_reconnects_without_a_publish(monkeypatch: pytest.MonkeyPatch) -> None:
+    import asyncpg
+
+    connections: List[_FakeConnection] = []
+
+    async def _connect(dsn: str) -> _FakeConnection:
+        connections.append(_FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(asyncpg, "connect", _connect)
+    bus = PostgresInvalidationBus("postgresql://bus")
+    bus.heartbeat_seconds = 0.05
+    await bus.start()
+    try:
+        connections[0].drop()
+        await _settle()
+        assert len(connections) == 2
+        assert bus.stats.gaps == 1
+        assert "SELECT 1" in connections[1].queries
+
+        # A socket that dies silently is caught by the heartbeat and replaced after the backoff.
+        connections[1].broken = True
+        for _ in range(100):
+            if len(connections) == 3:
+                break
+            await asyncio.sleep(0.02)
+        assert len(connections) == 3
+        assert (bus.stats.gaps, bus.stats.errors) == (2, 1)
+    finally:
+        await bus.stop()
+    assert connections[-1].closed
+
+
+@pytest.mark.asyncio
+async def test_leader_lock_hands_singleton_jobs_over(tmp_path: Path) -> None:
+    events: List[str] = []
+
+    def _election(name: str) -> LeaderElection:
+        async def _elected() -> None:
+            events.append(f"{name} elected")
+
+        async def _demoted() -> None:
+            events.append(f"{name} demoted")
+
+        return LeaderElection(FileLeaderLock(tmp_path / "leader.lock"), _elected, _demoted, retry_seconds=0.01)
+
+    first, second = _election("first"), _election("second")
+    await first.start()
+    await _settle()
+    await second.start()
+    await _settle()
+    assert (first.leader, second.leader) == (True, False)
+
+    await first.stop()
+    await _settle()
+    await second.stop()
+    assert events == ["first elected", "first demoted", "second elected", "second demoted"]
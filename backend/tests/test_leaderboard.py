@@ -1,22 +1,11 @@
 from __future__ import annotations
 
 import pytest
-import pytest_asyncio
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.app.models import Base, Player
-from backend.app.services.leaderboard import LeaderboardService
-
-
-@pytest_asyncio.fixture
-async def session() -> AsyncSession:
-    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
-    async with engine.begin() as connection:
-        await connection.run_sync(Base.metadata.create_all)
-    session_maker = async_sessionmaker(engine, expire_on_commit=False)
-    async with session_maker() as session:
-        yield session
-    await engine.dispose()
+from backend.app.models import Player
+from backend.app.services.leaderboard import LeaderboardService, decode_leaderboard_cursor
+from backend.app.services.leaderboard_cache import LeaderboardCache
 
 
 @pytest.mark.asyncio
@@ -96,3 +85,58 @@ async def test_fetch_record_holders_returns_distinct_lists(session: AsyncSession
 
     assert [entry["userId"] for entry in records["kos"]] == [11, 10]
     assert [entry["userId"] for entry in records["wos"]] == [12, 10]
+
+
+@pytest.mark.asyncio
+async def test_pages_and_positions_match_between_cache_and_sql(session: AsyncSession) -> None:
+    # Ties on points and KOs are broken by user id.
+    session.add_all(
+        Player(
+            user_id=user_id,
+            username=f"User{user_id}",
+            rank="Initiate",
+            rank_points=(user_id % 4) * 10,
+            kos=user_id % 2,
+            wos=0,
+        )
+        for user_id in range(1, 13)
+    )
+    await session.commit()
+    cache = LeaderboardCache()
+    await cache.load(session)
+
+    for service in (LeaderboardService(session, cache=cache), LeaderboardService(session)):
+        pages, cursor = [], None
+        while True:
+            players, cursor = await service.fetch_page(5, decode_leaderboard_cursor(cursor) if cursor else None)
+            pages.append(players)
+            if cursor is None:
+                break
+        ordered = [entry for page in pages for entry in page]
+        assert [len(page) for page in pages] == [5, 5, 2]
+        assert [entry["position"] for entry in ordered] == list(range(1, 13))
+        assert [entry["userId"] for entry in ordered[:4]] == [3, 7, 11, 2]
+
+        around = await service.fetch_around(7, radius=2)
+        assert (around["position"], around["totalPlayers"]) == (2, 12)
+        assert [entry["userId"] for entry in around["above"]] == [3]
+        assert [entry["userId"] for entry in around["below"]] == [11, 2]
+        assert around["below"][1]["position"] == 4
+        assert await service.fetch_around(999) is None
+
+
+@pytest.mark.asyncio
+async def test_record_holder_ties_match_between_cache_and_sql(session: AsyncSession) -> None:
+    # Inserted in descending id order so storage order disagrees with the user id tie-break.
+    session.add_all(
+        Player(user_id=user_id, username=f"User{user_id}", rank="Initiate", rank_points=0, kos=7, wos=user_id % 2)
+        for user_id in (25, 24, 23, 22, 21)
+    )
+    await session.commit()
+    cache = LeaderboardCache()
+    await cache.load(session)
+
+    for service in (LeaderboardService(session, cache=cache), LeaderboardService(session)):
+        records = await service.fetch_record_holders(limit=3)
+        assert [entry["userId"] for entry in records["kos"]] == [21, 22, 23]
+        assert [entry["userId"] for entry in records["wos"]] == [21, 23, 25]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import get_settings
+from backend.app.db import get_session
+from backend.app.main import app
+from backend.app.models import Player
+from backend.app.routes import roblox as roblox_route
+from backend.app.schemas import PlayerSnapshotPayload
+from backend.app.services.ingestion import IngestionService, PendingSnapshot
+from backend.app.services.leaderboard import LeaderboardService
+from backend.app.services.leaderboard_cache import LeaderboardCache
+from backend.app.services.player_events import subscribe, unsubscribe
+
+
+def _entry(user_id: int, points: int, kos: int, wos: int = 0) -> PendingSnapshot:
+    payload = {"userId": user_id, "username": f"User{user_id}", "rankPoints": points, "kos": kos, "wos": wos}
+    return PendingSnapshot(PlayerSnapshotPayload.model_validate(payload))
+
+
+@pytest.mark.asyncio
+async def test_cache_tracks_committed_changes_only(session: AsyncSession) -> None:
+    session.add_all(
+        [
+            Player(user_id=1, username="Alpha", rank="Initiate", rank_points=100, kos=3, wos=1),
+            Player(user_id=2, username="Bravo", rank="Initiate", rank_points=200, kos=1, wos=9),
+        ]
+    )
+    await session.commit()
+
+    cache = LeaderboardCache()
+    await cache.load(session)
+    subscribe(cache.apply)
+    try:
+        ingestion = IngestionService(session)
+        await ingestion.ingest_many([_entry(1, 500, 3)])
+        await session.rollback()
+        assert [entry.user_id for entry in cache.top(2)] == [2, 1]
+
+        await ingestion.ingest_many([_entry(1, 500, 3), _entry(3, 200, 8, 4)])
+        await session.commit()
+    finally:
+        unsubscribe(cache.apply)
+
+    assert [entry.user_id for entry in cache.top(3)] == [1, 3, 2]
+    service = LeaderboardService(session, cache=cache)
+    records = await service.fetch_record_holders(limit=2)
+    assert [entry["userId"] for entry in records["kos"]] == [3, 1]
+    assert [entry["userId"] for entry in records["wos"]] == [2, 3]
+    assert (await cache.verify(session))["consistent"] is True
+
+    cache.remove(3)
+    report = await cache.verify(session)
+    assert report["consistent"] is False
+    assert report["mismatches"][0]["position"] == 2
+
+
+@pytest.mark.asyncio
+async def test_consistency_check_requires_an_api_key(session: AsyncSession, monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = get_settings().model_copy(update={"inbound_api_keys": ["secret"]})
+    monkeypatch.setattr(roblox_route, "get_settings", lambda: settings)
+
+    async def _override_session():
+        yield session
+
+    app.dependency_overrides[get_session] = _override_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            anonymous = await client.get("/leaderboard/consistency")
+            wrong_key = await client.get("/leaderboard/consistency", headers={"x-grps-api-key": "guess"})
+            operator = await client.get("/leaderboard/consistency", headers={"x-grps-api-key": "secret"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert anonymous.status_code == 401
+    assert wrong_key.status_code == 401
+    assert operator.status_code == 200
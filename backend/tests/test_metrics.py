@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.db import get_read_session
+from backend.app.main import app
+from backend.app.metrics import HTTP_DB_QUERIES, HTTP_REQUESTS, MetricFamily, Registry, add_buckets, dump_families
+from backend.app.routes import metrics as metrics_route
+from backend.app.schemas import PlayerSnapshotPayload
+from backend.app.services.ingestion import IngestionService
+
+
+def test_histograms_render_cumulative_buckets() -> None:
+    registry = Registry()
+    latency = registry.histogram("test_latency_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, "/a")
+    requests = registry.counter("test_requests_total", "Test requests.", ("route",))
+    requests.inc("/a")
+    assert registry.counter("test_requests_total", "Registered again.", ("route",)) is requests
+
+    extra = MetricFamily("test_batch_size", "histogram", "Precomputed buckets.")
+    add_buckets(extra, (1, 10), [2, 0, 1], 25.0)
+    text = registry.render([extra])
+
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count{route="/a"} 4' in text
+    assert 'test_requests_total{route="/a"} 1' in text
+    assert 'test_batch_size_bucket{le="10"} 2' in text
+    assert "test_batch_size_count 3" in text
+    assert text.endswith("\n")
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template(session: AsyncSession) -> None:
+    snapshot = PlayerSnapshotPayload.model_validate(
+        {"userId": 7, "username": "User7", "rankPoints": 10, "kos": 0, "wos": 0}
+    )
+    await IngestionService(session).ingest(snapshot)
+    await session.commit()
+
+    async def _override_session():
+        yield session
+
+    route = "/players/{user_id}"
+    requests_before = HTTP_REQUESTS.value("GET", route, "200")
+    observed_before = HTTP_DB_QUERIES.count(route)
+    app.dependency_overrides[get_read_session] = _override_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            player = await client.get("/players/7")
+            missing = await client.get("/no-such-route")
+            scrape = await client.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert player.status_code == 200
+    assert missing.status_code == 404
+    assert HTTP_REQUESTS.value("GET", route, "200") == requests_before + 1
+    assert HTTP_DB_QUERIES.count(route) == observed_before + 1
+    assert HTTP_REQUESTS.value("GET", "unmatched", "404") >= 1
+
+    assert scrape.status_code == 200
+    assert scrape.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = scrape.text
+    assert 'grps_http_requests_total{method="GET",route="/players/{user_id}",status="200"}' in body
+    assert "/players/7" not in body
+    assert 'grps_http_request_phase_seconds_count{route="/players/{user_id}",phase="db"}' in body
+    assert "grps_db_queries_total" in body
+    assert "grps_worker_leader 0" in body
+
+
+@pytest.mark.asyncio
+async def test_scrapes_merge_every_workers_metrics(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    peer = Registry()
+    requests = peer.counter("grps_http_requests_total", "Peer requests.", ("method", "route", "status"))
+    requests.inc("GET", "/players/{user_id}", "200")
+    dump_families(tmp_path / "4242.json", peer.collect())
+    dump_families(tmp_path / "4343.json", peer.collect())
+    stale = time.time() - 60
+    os.utime(tmp_path / "4343.json", (stale, stale))
+    monkeypatch.setattr(metrics_route, "_share_dir", tmp_path)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        scrape = await client.get("/metrics")
+
+    body = scrape.text
+    assert body.count("# TYPE grps_http_requests_total counter") == 1
+    assert 'grps_http_requests_total{worker="4242",method="GET",route="/players/{user_id}",status="200"} 1' in body
+    assert f'grps_worker_pid{{worker="{os.getpid()}"}} {os.getpid()}' in body
+    # A worker that went away without cleaning up is dropped.
+    assert 'worker="4343"' not in body
+    assert not (tmp_path / "4343.json").exists()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.app.models import Player, PlayerSnapshot
+from backend.app.models.migrations import ADDED_COLUMNS, ADDED_INDEXES, create_schema
+
+# ``players`` and ``player_snapshots`` as the original Prisma schema created them.
+LEGACY_TABLES = (
+    """
+    CREATE TABLE players (
+        user_id BIGINT PRIMARY KEY, username TEXT NOT NULL, display_name TEXT, rank TEXT NOT NULL,
+        previous_rank TEXT, next_rank TEXT, rank_points INTEGER NOT NULL DEFAULT 0, kos INTEGER NOT NULL DEFAULT 0,
+        wos INTEGER NOT NULL DEFAULT 0, warnings INTEGER NOT NULL DEFAULT 0,
+        recommendations INTEGER NOT NULL DEFAULT 0, privileged BOOLEAN NOT NULL DEFAULT 0,
+        punishment_status TEXT, punishment_expires_at TIMESTAMP, metadata JSON,
+        created_at TIMESTAMP NOT NULL, last_synced_at TIMESTAMP NOT NULL, updated_at TIMESTAMP NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE player_snapshots (
+        id INTEGER PRIMARY KEY, user_id BIGINT NOT NULL, payload JSON NOT NULL, source TEXT NOT NULL DEFAULT 'roblox',
+        experience_key TEXT, actor_user_id BIGINT, created_at TIMESTAMP NOT NULL
+    )
+    """,
+)
+
+
+@pytest.mark.asyncio
+async def test_existing_tables_gain_the_added_columns() -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        async with engine.begin() as connection:
+            for statement in LEGACY_TABLES:
+                await connection.execute(text(statement))
+            await connection.execute(
+                text(
+                    "INSERT INTO players (user_id, username, rank, created_at, last_synced_at, updated_at) "
+                    "VALUES (1, 'Legacy', 'Initiate', '2024-01-01', '2024-01-01', '2024-01-01')"
+                )
+            )
+            await connection.execute(
+                text("INSERT INTO player_snapshots (user_id, payload, created_at) VALUES (1, '{}', '2024-01-01')")
+            )
+            await connection.run_sync(create_schema)
+            columns = await connection.run_sync(
+                lambda sync: {
+                    table.name: {column["name"] for column in inspect(sync).get_columns(table.name)}
+                    for table, _ in ADDED_COLUMNS
+                }
+            )
+            indexes = await connection.run_sync(
+                lambda sync: {
+                    index["name"] for table, _ in ADDED_INDEXES for index in inspect(sync).get_indexes(table.name)
+                }
+            )
+            partial = await connection.scalar(
+                text("SELECT sql FROM sqlite_master WHERE name = 'ix_players_punishment_expires_at'")
+            )
+            # Running it again finds nothing left to add.
+            await connection.run_sync(create_schema)
+
+        for table, name in ADDED_COLUMNS:
+            assert name in columns[table.name]
+        assert {name for _, name in ADDED_INDEXES} <= indexes
+        assert "WHERE punishment_expires_at IS NOT NULL" in partial
+        async with async_sessionmaker(engine)() as session:
+            player = (await session.execute(select(Player))).scalar_one()
+            snapshot = (await session.execute(select(PlayerSnapshot))).scalar_one()
+        assert (player.rank_points, player.points_remainder, player.snapshot_hash) == (0, 0.0, None)
+        assert (snapshot.content_hash, snapshot.is_delta) == (None, False)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, List, Tuple
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import get_settings
+from backend.app.models import Player, RobloxOutbox
+from backend.app.services import automation as automation_module
+from backend.app.services.automation import AutomationService
+from backend.app.services.outbox import DATASTORE_WRITE, DELIVERED, FAILED, GROUP_ROLE, PENDING, OutboxDispatcher
+
+
+class InlineCallForbidden:
+    async def update_group_role(self, user_id: int, role_id: int) -> None:
+        raise AssertionError("group role must be queued, not sent inline")
+
+    async def write_datastore(self, *args: Any) -> None:
+        raise AssertionError("datastore write must be queued, not sent inline")
+
+
+class RecordingClient:
+    def __init__(self, fail_first_for: int) -> None:
+        self.fail_first_for = fail_first_for
+        self.calls: List[Tuple[int, str]] = []
+
+    async def update_group_role(self, user_id: int, role_id: int) -> None:
+        if user_id == self.fail_first_for:
+            self.fail_first_for = 0
+            raise RuntimeError("HTTP 503")
+        self.calls.append((user_id, GROUP_ROLE))
+
+    async def write_datastore(self, universe_id: int, datastore: str, scope: str, key: str, value: dict) -> None:
+        self.calls.append((value["userId"], DATASTORE_WRITE))
+
+
+@pytest.mark.asyncio
+async def test_side_effects_are_queued_and_delivered_in_order_per_user(
+    session: AsyncSession, session_factory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    settings = get_settings().model_copy(
+        update={"roblox_outbox_enabled": True, "open_cloud_api_key": "key", "default_universe_id": 42}
+    )
+    monkeypatch.setattr(automation_module, "get_settings", lambda: settings)
+    players = [
+        Player(user_id=user_id, username=f"User{user_id}", rank="Initiate", rank_points=10, kos=0, wos=0, warnings=5)
+        for user_id in (1, 2)
+    ]
+    session.add_all(players)
+    await session.commit()
+
+    automation = AutomationService(session, roblox_client=InlineCallForbidden())
+    outcomes = await automation.evaluate_many(players, apply=True)
+    await session.commit()
+
+    assert all(outcome.applied for outcome in outcomes)
+    rows = (await session.execute(select(RobloxOutbox).order_by(RobloxOutbox.id))).scalars().all()
+    assert [(row.user_id, row.kind) for row in rows] == [
+        (1, GROUP_ROLE),
+        (2, GROUP_ROLE),
+        (1, DATASTORE_WRITE),
+        (2, DATASTORE_WRITE),
+    ]
+    assert rows[2].payload["key"].endswith("1") and rows[2].payload["universeId"] == 42
+
+    client = RecordingClient(fail_first_for=1)
+    dispatcher = OutboxDispatcher(session_factory=session_factory, client_factory=lambda: client, base_delay=60)
+    assert await dispatcher.run_once() == 2
+    # User 1's role update is backing off, so its datastore write must not overtake it.
+    assert await dispatcher.run_once() == 1
+    assert await dispatcher.run_once() == 0
+    assert await dispatcher.run_once(now=datetime.utcnow() + timedelta(hours=1)) == 1
+    assert await dispatcher.run_once() == 1
+
+    assert [call for call in client.calls if call[0] == 1] == [(1, GROUP_ROLE), (1, DATASTORE_WRITE)]
+    assert [call for call in client.calls if call[0] == 2] == [(2, GROUP_ROLE), (2, DATASTORE_WRITE)]
+    session.expire_all()
+    rows = (await session.execute(select(RobloxOutbox).order_by(RobloxOutbox.id))).scalars().all()
+    assert {row.status for row in rows} == {DELIVERED}
+    assert rows[0].attempts == 2 and rows[0].last_error is None
+    stats = dispatcher.snapshot_stats()
+    assert (stats["delivered"], stats["retried"], stats["inFlight"]) == (4, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_prune_deletes_finished_entries_past_retention(session: AsyncSession, session_factory) -> None:
+    now = datetime.utcnow()
+    old = now - timedelta(days=8)
+    session.add_all(
+        [
+            RobloxOutbox(user_id=1, kind=GROUP_ROLE, payload={}, status=DELIVERED, created_at=old, delivered_at=old),
+            RobloxOutbox(user_id=2, kind=GROUP_ROLE, payload={}, status=FAILED, created_at=old),
+            RobloxOutbox(user_id=3, kind=GROUP_ROLE, payload={}, status=PENDING, created_at=old),
+            RobloxOutbox(user_id=4, kind=GROUP_ROLE, payload={}, status=DELIVERED, created_at=now, delivered_at=now),
+        ]
+    )
+    await session.commit()
+
+    dispatcher = OutboxDispatcher(session_factory=session_factory, retention_hours=168, prune_batch_size=1)
+    assert await dispatcher.prune(now) == 2
+
+    session.expire_all()
+    rows = (await session.execute(select(RobloxOutbox).order_by(RobloxOutbox.user_id))).scalars().all()
+    assert [(row.user_id, row.status) for row in rows] == [(3, PENDING), (4, DELIVERED)]
+    assert dispatcher.snapshot_stats()["pruned"] == 2
+    assert await OutboxDispatcher(session_factory=session_factory, retention_hours=0).prune(now) == 0
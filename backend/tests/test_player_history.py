@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.db import get_read_session, get_read_session_factory
+from backend.app.main import app
+from backend.app.models import Player, PlayerSnapshot
+
+START = datetime(2024, 1, 1)
+
+
+async def _seed(session: AsyncSession) -> None:
+    session.add(Player(user_id=3, username="Echo", rank="Initiate", rank_points=0, kos=0, wos=0))
+    session.add(PlayerSnapshot(user_id=3, created_at=START, payload={"username": "Echo", "rank_points": 0}))
+    for minute in range(1, 5):
+        session.add(
+            PlayerSnapshot(
+                user_id=3,
+                created_at=START + timedelta(minutes=minute),
+                payload={"rank_points": minute * 10},
+                is_delta=True,
+            )
+        )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_history_pages_with_cursor_and_streams_ndjson(session: AsyncSession, session_factory) -> None:
+    await _seed(session)
+
+    async def _override_session():
+        yield session
+
+    app.dependency_overrides[get_read_session] = _override_session
+    app.dependency_overrides[get_read_session_factory] = lambda: session_factory
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            pages = []
+            params = {"limit": 2, "since": (START + timedelta(minutes=1)).isoformat()}
+            while True:
+                response = await client.get("/players/3/history", params=params)
+                assert response.status_code == 200
+                body = response.json()
+                pages.append(body["items"])
+                if body["nextCursor"] is None:
+                    break
+                params["cursor"] = body["nextCursor"]
+
+            streamed = await client.get("/players/3/history", params={"format": "ndjson"})
+            missing = await client.get("/players/404/history")
+            invalid = await client.get("/players/3/history", params={"cursor": "not-a-cursor"})
+            # Aware bounds are compared in UTC: 01:01+01:00 is the first delta, until excludes the last.
+            aware = await client.get(
+                "/players/3/history", params={"since": "2024-01-01T01:01:00+01:00", "until": "2024-01-01T00:04:00Z"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [len(items) for items in pages] == [2, 2]
+    paged = [item for items in pages for item in items]
+    assert [item["snapshot"] for item in paged] == [
+        {"username": "Echo", "rank_points": points} for points in (10, 20, 30, 40)
+    ]
+
+    assert streamed.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert len(lines) == 5
+    assert lines[1:] == paged
+
+    assert [item["snapshot"]["rank_points"] for item in aware.json()["items"]] == [10, 20, 30]
+    assert missing.status_code == 404
+    assert invalid.status_code == 400
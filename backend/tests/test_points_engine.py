@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import get_settings
+from backend.app.models import Player, PointsLedgerEntry
+from backend.app.schemas import PlayerSnapshotPayload
+from backend.app.services import ingestion as ingestion_module
+from backend.app.services.ingestion import IngestionService, PendingSnapshot
+from backend.app.services.points_engine import (
+    ACCEPTED,
+    CAPPED,
+    IGNORED,
+    REJECTED,
+    PointsEngine,
+    PointsEvent,
+    PointsLedgerService,
+    PointsPolicy,
+)
+
+POLICY = PointsPolicy.from_payload(
+    {
+        "weights": {"activity_tick_5min": 1, "training_complete": 15, "ko": 0.25, "wo": -0.1},
+        "caps": {"daily": 20, "weekly": 50},
+        "anti_abuse": {"ko_cooldown_seconds": 30, "activity_min_seconds": 300},
+    }
+)
+NOW = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def _engine(*user_ids: int) -> PointsEngine:
+    engine = PointsEngine(POLICY)
+    for user_id in user_ids:
+        engine.load(user_id, remainder=0.0)
+    return engine
+
+
+def test_engine_applies_weights_cooldowns_and_remainders() -> None:
+    engine = _engine(1)
+
+    def at(seconds: int) -> datetime:
+        return NOW - timedelta(seconds=600 - seconds)
+
+    results = engine.evaluate_many(
+        [
+            PointsEvent(1, "training", occurred_at=at(0)),
+            PointsEvent(1, "activity", duration=120, occurred_at=at(1)),
+            PointsEvent(1, "ko", occurred_at=at(10)),
+            PointsEvent(1, "ko", occurred_at=at(20)),
+            PointsEvent(1, "ko", occurred_at=at(40)),
+            PointsEvent(1, "ko", occurred_at=at(80)),
+            PointsEvent(1, "ko", occurred_at=at(120)),
+            PointsEvent(1, "dance", occurred_at=at(130)),
+            PointsEvent(2, "training", occurred_at=at(140)),
+        ],
+        NOW,
+    )
+
+    statuses = [result.status for result in results]
+    assert statuses == [ACCEPTED, REJECTED, ACCEPTED, REJECTED, ACCEPTED, ACCEPTED, ACCEPTED, IGNORED, IGNORED]
+    reasons = [result.reason for result in results if result.reason]
+    assert reasons == ["ACTIVITY_TOO_SHORT", "KO_COOLDOWN", "UNKNOWN_EVENT", "UNKNOWN_PLAYER"]
+    # Four accepted KOs at 0.25 carry over into a single whole point.
+    assert [result.applied for result in results if result.weight_key == "ko"] == [0, 0, 0, 0, 1]
+    assert engine.remainder(1) == 0.0
+
+
+def test_engine_clamps_to_daily_cap_and_slides_the_window() -> None:
+    engine = _engine(1)
+    first = engine.evaluate(PointsEvent(1, "training", occurred_at=NOW - timedelta(hours=2)), NOW)
+    capped = engine.evaluate(PointsEvent(1, "training", occurred_at=NOW - timedelta(hours=1)), NOW)
+    full = engine.evaluate(PointsEvent(1, "training", occurred_at=NOW), NOW)
+    penalty = engine.evaluate(PointsEvent(1, "wo", magnitude=3, occurred_at=NOW), NOW)
+
+    assert (first.status, first.applied) == (ACCEPTED, 15)
+    assert (capped.status, capped.delta, capped.applied) == (CAPPED, 5, 5)
+    assert (full.status, full.applied) == (CAPPED, 0)
+    # Penalties are not capped by the headroom and do not free any of it.
+    assert (penalty.status, penalty.applied) == (ACCEPTED, -1)
+
+    later = NOW + timedelta(hours=21)
+    still_full = engine.evaluate(PointsEvent(1, "training", occurred_at=later), later)
+    later += timedelta(hours=1)
+    freed = engine.evaluate(PointsEvent(1, "training", occurred_at=later), later)
+    assert (still_full.status, still_full.delta) == (CAPPED, 0)
+    assert (freed.status, freed.delta) == (ACCEPTED, 15)
+
+
+@pytest.mark.asyncio
+async def test_ledger_service_persists_entries_and_reloads_state(session: AsyncSession) -> None:
+    session.add(Player(user_id=1, username="Trooper", rank="Initiate", rank_points=2, kos=0, wos=0))
+    await session.commit()
+    engine = PointsEngine(POLICY)
+
+    results = await PointsLedgerService(session, engine).record(
+        [
+            PointsEvent(1, "training", occurred_at=NOW - timedelta(minutes=5)),
+            PointsEvent(1, "ko", occurred_at=NOW - timedelta(seconds=10)),
+            PointsEvent(1, "wo", magnitude=40, occurred_at=NOW),
+            PointsEvent(99, "training", occurred_at=NOW),
+        ],
+        now=NOW,
+    )
+    await session.commit()
+
+    assert [result.status for result in results] == [ACCEPTED, ACCEPTED, ACCEPTED, IGNORED]
+    player = (await session.execute(select(Player).where(Player.user_id == 1))).scalar_one()
+    # 2 + 15 + 0.25 - 4 = 13.25: 13 whole points and a 0.25 remainder.
+    assert (player.rank_points, player.points_remainder) == (13, 0.25)
+    entries = (await session.execute(select(PointsLedgerEntry).order_by(PointsLedgerEntry.id))).scalars().all()
+    assert [(entry.weight_key, entry.delta, entry.applied) for entry in entries] == [
+        ("training_complete", 15, 15),
+        ("ko", 0.25, 0),
+        ("wo", -4, -4),
+    ]
+
+    # A fresh engine rebuilds the window, the KO cooldown and the remainder from the database.
+    engine.forget([1])
+    results = await PointsLedgerService(session, engine).record(
+        [
+            PointsEvent(1, "ko", occurred_at=NOW + timedelta(seconds=10)),
+            PointsEvent(1, "training", occurred_at=NOW + timedelta(seconds=20)),
+        ],
+        now=NOW + timedelta(seconds=20),
+    )
+    await session.rollback()
+
+    assert [(result.status, result.delta) for result in results] == [(REJECTED, 0), (CAPPED, 4.75)]
+    assert 1 not in engine
+
+
+@pytest.mark.asyncio
+async def test_ledger_owns_rank_points_and_reclassifies_earned_ranks(
+    session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    session.add_all(
+        [
+            Player(user_id=1, username="Earned", rank="Initiate", rank_points=40, kos=0, wos=0),
+            Player(user_id=2, username="Suspended", rank="Suspended", rank_points=40, kos=0, wos=0),
+        ]
+    )
+    await session.commit()
+    await PointsLedgerService(session, PointsEngine(POLICY)).record(
+        [PointsEvent(1, "training", occurred_at=NOW), PointsEvent(2, "training", occurred_at=NOW)], now=NOW
+    )
+    await session.commit()
+
+    players = {player.user_id: player for player in (await session.execute(select(Player))).scalars()}
+    assert (players[1].rank_points, players[1].rank) == (55, "Shock Trooper I")
+    assert (players[1].previous_rank, players[1].next_rank) == ("Initiate", "Shock Trooper II")
+    # Punishment (and privileged) ranks only change through automation decisions.
+    assert (players[2].rank_points, players[2].rank) == (55, "Suspended")
+
+    settings = get_settings().model_copy(update={"points_source": "ledger"})
+    monkeypatch.setattr(ingestion_module, "get_settings", lambda: settings)
+    stale = {"userId": 1, "username": "Earned", "rankPoints": 10, "rank": "Initiate", "kos": 3, "wos": 0}
+    await IngestionService(session).ingest(PlayerSnapshotPayload.model_validate(stale))
+    await session.commit()
+    await IngestionService(session).ingest_many(
+        [PendingSnapshot(PlayerSnapshotPayload.model_validate({**stale, "kos": 4}))]
+    )
+    await session.commit()
+
+    player = (
+        await session.execute(select(Player).where(Player.user_id == 1).execution_options(populate_existing=True))
+    ).scalar_one()
+    assert (player.rank_points, player.rank, player.kos) == (55, "Shock Trooper I", 4)
+
+
+@pytest.mark.asyncio
+async def test_locked_players_share_caps_and_remainders_across_workers(session: AsyncSession) -> None:
+    session.add(Player(user_id=1, username="Trooper", rank="Initiate", rank_points=0, kos=0, wos=0))
+    await session.commit()
+    first, second = PointsEngine(POLICY), PointsEngine(POLICY)
+    # The second worker cached the player before the first one recorded anything.
+    second.load(1, remainder=0.0)
+
+    await PointsLedgerService(session, first, lock_players=True).record(
+        [PointsEvent(1, "training", occurred_at=NOW), PointsEvent(1, "ko", occurred_at=NOW)], now=NOW
+    )
+    await session.commit()
+    later = NOW + timedelta(minutes=1)
+    results = await PointsLedgerService(session, second, lock_players=True).record(
+        [PointsEvent(1, "training", occurred_at=later)], now=later
+    )
+    await session.commit()
+
+    assert [(result.status, result.delta) for result in results] == [(CAPPED, 4.75)]
+    player = (
+        await session.execute(select(Player).where(Player.user_id == 1).execution_options(populate_existing=True))
+    ).scalar_one()
+    assert (player.rank_points, player.points_remainder) == (20, 0.0)
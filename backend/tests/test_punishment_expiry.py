@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models import Player
+from backend.app.services.automation import AutomationService
+from backend.app.services.player_events import track_player_change
+from backend.app.services.punishment_expiry import PunishmentExpiryScheduler
+
+NOW = datetime(2024, 5, 1, 12, 0, 0)
+
+
+class FakeGroupClient:
+    def __init__(self, failing: Tuple[int, ...] = ()) -> None:
+        self.failing = failing
+        self.updates: List[Tuple[int, int]] = []
+
+    async def update_group_role(self, user_id: int, role_id: int) -> None:
+        if user_id in self.failing:
+            raise RuntimeError("roblox unavailable")
+        self.updates.append((user_id, role_id))
+
+
+def _suspended(user_id: int, expires_at: datetime, previous_rank: str = "Shock Trooper I") -> Player:
+    return Player(
+        user_id=user_id,
+        username=f"User{user_id}",
+        rank="Suspended",
+        previous_rank=previous_rank,
+        rank_points=60,
+        kos=0,
+        wos=0,
+        punishment_status="Trial_Punishment",
+        punishment_expires_at=expires_at,
+    )
+
+
+@pytest.mark.asyncio
+async def test_due_punishments_are_lifted_in_batches(session: AsyncSession, session_factory) -> None:
+    session.add_all(
+        [
+            _suspended(1, NOW - timedelta(minutes=5)),
+            _suspended(2, NOW - timedelta(minutes=1), previous_rank="Suspended"),
+            _suspended(3, NOW - timedelta(seconds=1)),
+            _suspended(4, NOW + timedelta(days=3)),
+            Player(user_id=5, username="User5", rank="Initiate", rank_points=0, kos=0, wos=0),
+        ]
+    )
+    await session.commit()
+    client = FakeGroupClient(failing=(3,))
+    scheduler = PunishmentExpiryScheduler(
+        batch_size=2,
+        retry_seconds=30,
+        session_factory=session_factory,
+        service_factory=lambda scoped: AutomationService(scoped, roblox_client=client),
+        clock=lambda: NOW,
+    )
+
+    assert await scheduler.rebuild() == 4
+    assert scheduler.next_due() == NOW - timedelta(minutes=5)
+    assert await scheduler.run_once() == 2
+    assert await scheduler.run_once() == 1
+    assert await scheduler.run_once() == 0
+
+    rows = {
+        player.user_id: player
+        for player in (await session.execute(select(Player).execution_options(populate_existing=True))).scalars()
+    }
+    # User 2 has no usable previous rank and returns to the rank their points earn.
+    assert [(rows[user_id].rank, rows[user_id].punishment_status) for user_id in (1, 2, 3, 4)] == [
+        ("Shock Trooper I", None),
+        ("Shock Trooper I", None),
+        ("Suspended", "Trial_Punishment"),
+        ("Suspended", "Trial_Punishment"),
+    ]
+    assert rows[1].punishment_expires_at is None
+    assert sorted(client.updates) == [(1, 4), (2, 4)]
+    # The failed lift is retried later, ahead of user 4.
+    assert scheduler.next_due() == NOW + timedelta(seconds=30)
+    assert (scheduler.stats.lifted, scheduler.stats.failed, len(scheduler)) == (2, 1, 2)
+
+
+@pytest.mark.asyncio
+async def test_lifted_suspension_is_not_reapplied_for_the_same_warnings(session: AsyncSession) -> None:
+    player = _suspended(1, NOW - timedelta(minutes=5))
+    player.warnings = 5
+    session.add(player)
+    await session.commit()
+    service = AutomationService(session, roblox_client=FakeGroupClient())
+
+    (outcome,) = await service.lift_punishments([player])
+    assert outcome.applied and player.rank == "Shock Trooper I"
+    decision = await service.evaluate(player, apply=True)
+    assert decision.action == "NONE"
+    assert (player.rank, player.punishment_status) == ("Shock Trooper I", None)
+
+    # A new warning after the lift counts again.
+    player.warnings = 6
+    assert (await service.evaluate(player, apply=False)).action == "SUSPEND"
+
+
+@pytest.mark.asyncio
+async def test_heap_keeps_a_bounded_window_and_skips_stale_entries(session: AsyncSession, session_factory) -> None:
+    session.add_all([_suspended(user_id, NOW + timedelta(hours=user_id)) for user_id in range(1, 6)])
+    await session.commit()
+    scheduler = PunishmentExpiryScheduler(heap_size=3, session_factory=session_factory, clock=lambda: NOW)
+
+    assert await scheduler.rebuild() == 3
+    assert scheduler.snapshot_stats()["horizon"] == (NOW + timedelta(hours=3)).isoformat()
+
+    # An earlier expiry pushes the latest one back out to the index.
+    scheduler.schedule(9, datetime(2024, 5, 1, 10, 30, tzinfo=timezone(timedelta(hours=-2))))
+    assert scheduler.next_due() == NOW + timedelta(minutes=30)
+    assert scheduler.snapshot_stats()["horizon"] == (NOW + timedelta(hours=2)).isoformat()
+
+    scheduler.schedule(9, None)
+    scheduler.schedule(1, NOW + timedelta(days=1))
+    assert scheduler.next_due() == NOW + timedelta(hours=2)
+    assert len(scheduler) == 1
+    assert scheduler.stats.stale == 2
+
+
+@pytest.mark.asyncio
+async def test_committed_expiry_wakes_the_running_scheduler(session: AsyncSession, session_factory) -> None:
+    session.add(Player(user_id=1, username="User1", rank="Initiate", rank_points=0, kos=0, wos=0))
+    await session.commit()
+    client = FakeGroupClient()
+    scheduler = PunishmentExpiryScheduler(
+        session_factory=session_factory,
+        service_factory=lambda scoped: AutomationService(scoped, roblox_client=client),
+    )
+    scheduler.start()
+    try:
+        await asyncio.sleep(0.05)
+        player = (await session.execute(select(Player))).scalar_one()
+        player.rank, player.previous_rank = "Suspended", "Initiate"
+        player.punishment_status = "Trial_Punishment"
+        player.punishment_expires_at = datetime.utcnow() + timedelta(milliseconds=100)
+        await session.flush()
+        track_player_change(session, player)
+        await session.commit()
+
+        for _ in range(100):
+            if scheduler.stats.lifted:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        await scheduler.stop()
+
+    assert scheduler.stats.lifted == 1
+    assert scheduler.stats.rebuilds == 1
+    assert client.updates == [(1, 1)]
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.app.services import rank_policy as rank_policy_module
+from backend.app.services.rank_policy import Rank, RankPolicy
+
+
+@pytest.fixture
+def policy() -> RankPolicy:
+    return RankPolicy(
+        [
+            Rank("Suspended", 0, 0, "Trial", is_punishment=True),
+            Rank("Initiate", 0, 0, "LR"),
+            Rank("Trooper", 50, 0, "LR"),
+            Rank("Probation", 100, 0, "Trial", is_punishment=True),
+            Rank("Sergeant", 150, 0, "MR"),
+        ]
+    )
+
+
+def test_point_lookups_skip_punishment_ranks(policy: RankPolicy) -> None:
+    assert policy.rank_for_points(-1) is None
+    assert policy.rank_for_points(0).name == "Initiate"
+    assert policy.rank_for_points(149).name == "Probation"
+    assert policy.next_rank(60).name == "Sergeant"
+    assert policy.next_rank(150) is None
+    assert policy.next_rank_by_name("Trooper").name == "Sergeant"
+    assert policy.previous_rank_by_name("Sergeant").name == "Trooper"
+    assert policy.previous_rank_by_name("Trooper").name == "Initiate"
+    assert policy.previous_rank_by_name("Unknown") is None
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_classify_points_matches_rank_for_points(
+    policy: RankPolicy, use_numpy: bool, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    if not use_numpy:
+        monkeypatch.setattr(rank_policy_module, "np", None)
+    elif rank_policy_module.np is None:
+        pytest.skip("numpy is not installed")
+
+    points = [-5, 0, 49, 50, 99, 100, 150, 10_000]
+    expected = [policy.rank_for_points(value) for value in points]
+    assert policy.classify_points(points) == expected
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models import Player, RobloxOutbox
+from backend.app.services.group_roles import GroupRoleCache
+from backend.app.services.outbox import DELIVERED, GROUP_ROLE, enqueue_outbox
+from backend.app.services.rank_reconciliation import RANK_DRIFT, UNKNOWN_ROLE, RankReconciler
+from backend.app.services.roblox_client import RobloxClient, RobloxHttpPool
+from backend.app.services.roblox_resilience import RobloxResilience
+
+
+def _member(user_id: int, role_id: int, name: str) -> Dict[str, Any]:
+    return {"user": {"userId": user_id, "username": f"User{user_id}"}, "role": {"id": role_id, "name": name}}
+
+
+class PagedGroupClient:
+    def __init__(self, pages: List[List[Dict[str, Any]]]) -> None:
+        self.pages = pages
+        self.requests: List[Optional[str]] = []
+        self.role_cache = GroupRoleCache()
+
+    async def list_group_members(self, *, cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        self.requests.append(cursor)
+        index = int(cursor or 0)
+        next_cursor = str(index + 1) if index + 1 < len(self.pages) else None
+        return {"data": self.pages[index], "nextPageCursor": next_cursor}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_reports_then_fixes_drifted_ranks(session: AsyncSession, session_factory) -> None:
+    session.add_all(
+        [
+            Player(user_id=1, username="Drifted", rank="Initiate", rank_points=60, kos=0, wos=0),
+            Player(user_id=2, username="Synced", rank="Shock Trooper I", rank_points=60, kos=0, wos=0),
+            Player(user_id=3, username="Guest", rank="Initiate", rank_points=0, kos=0, wos=0),
+            Player(user_id=5, username="Left", rank="Initiate", rank_points=0, kos=0, wos=0),
+        ]
+    )
+    await session.commit()
+    pages = [
+        [_member(1, 5, "Shock Trooper II"), _member(2, 4, "Shock Trooper I")],
+        [_member(3, 999, "Guest"), _member(4, 1, "Initiate")],
+    ]
+
+    client = PagedGroupClient(pages)
+    report = await RankReconciler(client=client, session_factory=session_factory).run()
+    payload = report.to_payload()
+    assert client.requests == [None, "1"]
+    assert (payload["requests"], payload["members"], payload["checked"], payload["inSync"]) == (2, 4, 3, 1)
+    assert (payload["mismatches"], payload["unknownRoles"], payload["fixed"]) == (1, 1, 0)
+    assert (payload["untrackedMembers"], payload["missingFromGroup"], payload["complete"]) == (1, 1, True)
+    assert {sample["userId"]: sample["kind"] for sample in payload["samples"]} == {1: RANK_DRIFT, 3: UNKNOWN_ROLE}
+    assert client.role_cache.get(1) == (True, {"id": 5, "name": "Shock Trooper II"})
+
+    partial = await RankReconciler(client=PagedGroupClient(pages), max_pages=1, session_factory=session_factory).run()
+    assert (partial.complete, partial.missing_from_group) == (False, None)
+
+    # A decision's role update is still queued: Roblox has not caught up, so the row is left alone.
+    enqueue_outbox(session, 1, GROUP_ROLE, {"rank": "Initiate"})
+    await session.commit()
+    waiting = await RankReconciler(client=PagedGroupClient(pages), fix=True, session_factory=session_factory).run()
+    assert (waiting.pending_role_updates, waiting.checked, waiting.fixed) == (1, 2, 0)
+
+    await session.execute(update(RobloxOutbox).values(status=DELIVERED))
+    await session.commit()
+    fixed = await RankReconciler(client=PagedGroupClient(pages), fix=True, session_factory=session_factory).run()
+    assert fixed.fixed == 1
+    session.expire_all()
+    drifted = (await session.execute(select(Player).where(Player.user_id == 1))).scalar_one()
+    assert (drifted.rank, drifted.previous_rank) == ("Shock Trooper II", "Initiate")
+
+
+@pytest.mark.asyncio
+async def test_group_role_lookups_are_cached_coalesced_and_invalidated() -> None:
+    calls: List[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.method)
+        if request.method == "PATCH":
+            return httpx.Response(200)
+        return httpx.Response(200, json={"data": [{"group": {"id": 7}, "role": {"id": 4, "name": "Shock Trooper I"}}]})
+
+    clock = [0.0]
+    cache = GroupRoleCache(ttl_seconds=60, clock=lambda: clock[0])
+    pool = RobloxHttpPool(http2=False, transport=httpx.MockTransport(handler))
+    try:
+        client = RobloxClient(api_key="key", group_id=7, http_pool=pool, resilience=RobloxResilience(), role_cache=cache)
+        roles = await asyncio.gather(*(client.get_user_group_role(1) for _ in range(5)))
+        assert roles == [{"id": 4, "name": "Shock Trooper I"}] * 5
+        assert calls == ["GET"]
+
+        clock[0] = 61
+        await client.get_user_group_role(1)
+        await client.update_group_role(1, 5)
+        await client.get_user_group_role(1)
+    finally:
+        await pool.aclose()
+
+    assert calls == ["GET", "GET", "PATCH", "GET"]
+    stats = cache.snapshot_stats()
+    assert (stats["misses"], stats["hits"] + stats["coalesced"], stats["invalidations"]) == (3, 4, 1)
+
+    fetched: List[int] = []
+
+    async def _slow_fetch(user_id: int) -> Dict[str, Any]:
+        fetched.append(user_id)
+        await asyncio.sleep(0.01)
+        return {"id": 5}
+
+    await asyncio.gather(*(cache.lookup(2, _slow_fetch) for _ in range(3)))
+    assert fetched == [2]
+    assert cache.snapshot_stats()["coalesced"] >= 2
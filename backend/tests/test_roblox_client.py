@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from backend.app.services.roblox_client import RobloxClient, RobloxHttpPool
+from backend.app.services.roblox_resilience import (
+    RobloxCircuitOpenError,
+    RobloxResilience,
+    TokenBucket,
+    parse_retry_after,
+)
+
+
+@pytest.mark.asyncio
+async def test_client_routes_requests_through_shared_pool() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers["x-api-key"])
+        return httpx.Response(200, json={"data": [{"group": {"id": 7}, "role": {"id": 4, "name": "Shock Trooper I"}}]})
+
+    pool = RobloxHttpPool(http2=False, transport=httpx.MockTransport(handler))
+    try:
+        client = RobloxClient(api_key="key", group_id=7, http_pool=pool)
+        role = await client.get_user_group_role(1)
+        await client.get_user_group_role(2)
+    finally:
+        await pool.aclose()
+
+    assert role == {"id": 4, "name": "Shock Trooper I"}
+    assert seen == ["key", "key"]
+    stats = pool.snapshot_stats()
+    assert stats["requests"] == 2
+    assert stats["http2"] is False
+    # A mock transport has no connection pool to inspect.
+    assert stats["openConnections"] is None
+
+    idle = RobloxHttpPool(http2=False)
+    try:
+        assert idle.snapshot_stats()["openConnections"] == 0
+    finally:
+        await idle.aclose()
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_idempotent_writes_retry_and_honour_retry_after() -> None:
+    statuses = iter([429, 503, 200])
+    sleeps: list[float] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = next(statuses)
+        headers = {"Retry-After": "2"} if status == 429 else {}
+        return httpx.Response(status, headers=headers)
+
+    async def _sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    resilience = RobloxResilience(max_attempts=3, base_delay=0.5, sleep=_sleep)
+    pool = RobloxHttpPool(http2=False, transport=httpx.MockTransport(handler))
+    try:
+        client = RobloxClient(api_key="key", group_id=7, http_pool=pool, resilience=resilience)
+        await client.update_group_role(1, 4)
+    finally:
+        await pool.aclose()
+
+    assert sleeps[0] == 2.0
+    assert 0 <= sleeps[1] <= 1.0
+    stats = resilience.snapshot_stats()["groups"]
+    assert (stats["attempts"], stats["retries"], stats["throttled"], stats["failures"]) == (3, 2, 1, 1)
+    assert stats["breakerState"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_fails_fast_and_recovers_after_probe() -> None:
+    clock = _FakeClock()
+    calls: list[str] = []
+    healthy = False
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json={}) if healthy else httpx.Response(500)
+
+    async def _sleep(delay: float) -> None:
+        return None
+
+    resilience = RobloxResilience(max_attempts=2, failure_threshold=3, reset_timeout=30, clock=clock, sleep=_sleep)
+    pool = RobloxHttpPool(http2=False, transport=httpx.MockTransport(handler))
+    try:
+        client = RobloxClient(api_key="key", group_id=7, http_pool=pool, resilience=resilience)
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.read_datastore_entry(1, "PlayerData", key="a")
+        with pytest.raises(RobloxCircuitOpenError):
+            await client.read_datastore_entry(1, "PlayerData", key="b")
+        assert len(calls) == 3
+        # Only the datastores family is affected.
+        assert resilience.snapshot_stats()["groups"]["breakerState"] == "closed"
+
+        clock.now = 31
+        healthy = True
+        assert await client.read_datastore_entry(1, "PlayerData", key="c") == {}
+    finally:
+        await pool.aclose()
+
+    stats = resilience.snapshot_stats()["datastores"]
+    assert stats["rejected"] == 1
+    assert stats["breakerOpened"] == 1
+    assert stats["breakerState"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_requests_and_reports_wait() -> None:
+    bucket = TokenBucket(rate=100, burst=1)
+    assert await bucket.acquire() == 0
+    waited = await bucket.acquire()
+    assert waited == pytest.approx(0.01, abs=0.005)
+
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=datetime(2015, 10, 21, 7, 27, 30, tzinfo=timezone.utc)) == 30
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_frees_the_breaker_and_long_retry_after_is_not_waited_out() -> None:
+    clock = _FakeClock()
+    sleeps: list[float] = []
+    hang = asyncio.Event()
+
+    async def _sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    resilience = RobloxResilience(
+        max_attempts=3, max_delay=8, failure_threshold=1, reset_timeout=30, clock=clock, sleep=_sleep
+    )
+
+    async def _fail() -> httpx.Response:
+        return httpx.Response(500)
+
+    async def _hang() -> httpx.Response:
+        await hang.wait()
+        return httpx.Response(200)
+
+    async def _ok() -> httpx.Response:
+        return httpx.Response(200)
+
+    await resilience.call("groups", _fail, retryable=False)
+    clock.now = 31
+    probe = asyncio.create_task(resilience.call("groups", _hang, retryable=False))
+    await asyncio.sleep(0)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    # The cancelled probe reported nothing; the next call becomes the probe and closes the breaker.
+    assert (await resilience.call("groups", _ok, retryable=False)).status_code == 200
+    assert resilience.snapshot_stats()["groups"]["breakerState"] == "closed"
+
+    async def _throttled() -> httpx.Response:
+        return httpx.Response(429, headers={"Retry-After": "3600"})
+
+    response = await resilience.call("groups", _throttled, retryable=True)
+    assert response.status_code == 429
+    assert sleeps == []
+    assert resilience.guard("groups").bucket.paused_until <= clock.now + 8
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Type
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models import Player
+from backend.app.schemas import (
+    LeaderboardAroundResponse,
+    LeaderboardPageResponse,
+    LeaderboardRecordsResponse,
+    LeaderboardTopResponse,
+    PlayerWithContext,
+)
+from backend.app.serialization import dumps
+from backend.app.services.calculations import CalculationService
+from backend.app.services.leaderboard import LeaderboardService
+from backend.app.services.leaderboard_cache import LeaderboardCache
+
+
+def _assert_matches_model(model: Type[BaseModel], payload: Dict[str, Any]) -> None:
+    expected = model(**payload).model_dump(mode="json", by_alias=True)
+    assert json.loads(dumps(payload)) == expected
+
+
+def test_fast_path_matches_response_model_output() -> None:
+    player = Player(
+        user_id=42,
+        username="Golf",
+        display_name=None,
+        rank="Shock Trooper I",
+        previous_rank="Initiate",
+        next_rank="Shock Trooper II",
+        rank_points=150,
+        kos=12,
+        wos=3,
+        warnings=0,
+        recommendations=1,
+        privileged=False,
+        punishment_status=None,
+        punishment_expires_at=datetime(2024, 3, 1, 12, 0),
+        metadata_payload={"decisionsBlocked": False, "universe": "main"},
+        created_at=datetime(2024, 1, 1, 8, 30, 15, 123456),
+        last_synced_at=datetime(2024, 2, 1),
+    )
+    _assert_matches_model(PlayerWithContext, CalculationService().serialize_player(player))
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_fast_paths_match_response_model_output(session: AsyncSession) -> None:
+    session.add_all(
+        [
+            Player(user_id=1, username="Alpha", rank="Initiate", rank_points=30, kos=5, wos=1),
+            Player(user_id=2, username="Bravo", rank="Initiate", rank_points=20, kos=9, wos=0),
+            Player(user_id=3, username="Charlie", rank="Initiate", rank_points=10, kos=1, wos=4),
+        ]
+    )
+    await session.commit()
+    cache = LeaderboardCache()
+    await cache.load(session)
+
+    for service in (LeaderboardService(session), LeaderboardService(session, cache=cache)):
+        top = await service.fetch_top_players(2)
+        _assert_matches_model(LeaderboardTopResponse, {"players": top, "lastSyncedAt": top[0]["lastSyncedAt"]})
+        players, next_cursor = await service.fetch_page(2)
+        _assert_matches_model(LeaderboardPageResponse, {"players": players, "nextCursor": next_cursor})
+        _assert_matches_model(LeaderboardAroundResponse, await service.fetch_around(2, 1))
+        records = await service.fetch_record_holders(2)
+        _assert_matches_model(LeaderboardRecordsResponse, records)
+        assert records["kos"][0] == {"userId": 2, "username": "Bravo", "kos": 9, "wos": None}
+        assert top[0]["position"] is None
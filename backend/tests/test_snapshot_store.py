@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import get_settings
+from backend.app.models import Player, PlayerSnapshot
+from backend.app.schemas import PlayerSnapshotPayload
+from backend.app.services.ingestion import IngestionService, PendingSnapshot
+from backend.app.services import snapshot_store
+from backend.app.services.snapshot_store import apply_delta, diff_payload, reconstruct_history
+
+
+def _snapshot(user_id: int, points: int, kos: int = 1) -> PlayerSnapshotPayload:
+    return PlayerSnapshotPayload.model_validate(
+        {"userId": user_id, "username": f"User{user_id}", "rankPoints": points, "kos": kos, "wos": 0}
+    )
+
+
+def test_diff_round_trips_changed_and_removed_fields() -> None:
+    previous = {"a": 1, "b": {"x": 1}, "c": 3}
+    current = {"a": 1, "b": {"x": 2}, "d": 4}
+
+    delta = diff_payload(previous, current)
+
+    assert delta == {"b": {"x": 2}, "d": 4, "__removed__": ["c"]}
+    assert apply_delta(previous, delta) == current
+
+
+@pytest.mark.asyncio
+async def test_identical_snapshots_only_bump_last_synced(session: AsyncSession) -> None:
+    service = IngestionService(session)
+    player = await service.ingest(_snapshot(1, 100))
+    await session.commit()
+    first_sync = player.last_synced_at
+
+    await service.ingest(_snapshot(1, 100))
+    outcomes = await service.ingest_many([PendingSnapshot(_snapshot(1, 100))])
+    await session.commit()
+
+    assert outcomes[0].unchanged
+    assert await session.scalar(select(func.count()).select_from(PlayerSnapshot)) == 1
+    stored = await session.get(Player, 1, populate_existing=True)
+    assert stored.last_synced_at >= first_sync
+    assert stored.snapshot_hash is not None
+
+
+@pytest.mark.asyncio
+async def test_delta_mode_reconstructs_full_history(session: AsyncSession, monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = get_settings().model_copy(update={"snapshot_storage_mode": "delta", "snapshot_keyframe_interval": 3})
+    monkeypatch.setattr(snapshot_store, "get_settings", lambda: settings)
+
+    service = IngestionService(session)
+    for points in [10, 20, 20, 30, 40, 50]:
+        await service.ingest_many([PendingSnapshot(_snapshot(7, points, kos=points // 10))])
+        await session.commit()
+
+    rows = (await session.execute(select(PlayerSnapshot).order_by(PlayerSnapshot.id))).scalars().all()
+    assert [row.is_delta for row in rows] == [False, True, True, False, True]
+    assert "username" not in rows[1].payload
+
+    history = await reconstruct_history(session, 7)
+    assert [payload["rank_points"] for _, payload in history] == [10, 20, 30, 40, 50]
+    assert all(payload["username"] == "User7" for _, payload in history)
+    assert [row.content_hash for row, _ in history] == [row.content_hash for row in rows]
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Optional
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import get_settings
+from backend.app.db import get_session
+from backend.app.main import app
+from backend.app.models import Player, SyncCheckpoint
+from backend.app.routes import roblox as roblox_route
+from backend.app.schemas import PlayerSnapshotPayload
+from backend.app.services.crawl import CrawlAlreadyRunning, LeaderboardCrawler, start_crawl, stop_crawls
+from backend.app.services.ingestion import IngestionService
+from backend.app.services.sync import MultiUniverseSyncService, RobloxSyncService
+from backend.app.services.universes import UniverseConfig
+
+
+class FakeDatastoreClient:
+    def __init__(self, pages: Dict[Optional[str], Dict[str, Any]], values: Dict[str, Dict[str, Any]]) -> None:
+        self.pages = pages
+        self.values = values
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def list_datastore_entries(self, universe_id: int, datastore_name: str, **kwargs: Any) -> Dict[str, Any]:
+        page = self.pages[kwargs.get("cursor")]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    async def read_datastore_entry(self, universe_id: int, datastore_name: str, *, key: str, scope: str) -> Dict[str, Any]:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.values[key]
+
+
+def _service(session: AsyncSession, client: FakeDatastoreClient, **kwargs: Any) -> RobloxSyncService:
+    service = RobloxSyncService(session, client=client, **kwargs)
+    service.universe_id = 99
+    return service
+
+
+@pytest.mark.asyncio
+async def test_sync_leaderboard_reads_entries_concurrently(session: AsyncSession) -> None:
+    session.add(Player(user_id=1, username="Known", rank="Initiate", rank_points=0, kos=0, wos=0))
+    await session.commit()
+
+    values = {f"player:{user_id}": {"username": f"User{user_id}", "rankPoints": user_id * 100} for user_id in range(1, 7)}
+    page = {"entries": [{"entryKey": key} for key in values] + [{"entryKey": "player:abc"}], "nextPageCursor": "next"}
+    client = FakeDatastoreClient({None: page}, values)
+
+    updated, created, next_cursor = await _service(session, client, concurrency=3).sync_leaderboard(limit=10)
+
+    assert (updated, created, next_cursor) == (1, 5, "next")
+    assert client.max_in_flight == 3
+    assert (await session.get(Player, 6)).rank_points == 600
+
+
+@pytest.mark.asyncio
+async def test_crawl_checkpoints_each_page_and_resumes(session: AsyncSession, session_factory) -> None:
+    values = {f"player:{user_id}": {"username": f"User{user_id}", "rankPoints": 10} for user_id in range(1, 5)}
+    pages: Dict[Optional[str], Any] = {
+        None: {"entries": [{"entryKey": "player:1"}, {"entryKey": "player:2"}], "nextPageCursor": "p2"},
+        "p2": RuntimeError("datastore throttled"),
+    }
+    client = FakeDatastoreClient(pages, values)
+    crawler = LeaderboardCrawler(client=client, universe_id=99, session_factory=session_factory)
+
+    progress = await crawler.run()
+    assert progress.status == "failed"
+    checkpoint = await session.get(SyncCheckpoint, crawler.crawl_key)
+    assert (checkpoint.cursor, checkpoint.pages, checkpoint.entries) == ("p2", 1, 2)
+
+    pages["p2"] = {"entries": [{"entryKey": "player:3"}, {"entryKey": "player:4"}], "nextPageCursor": None}
+    progress = await LeaderboardCrawler(client=client, universe_id=99, session_factory=session_factory).run()
+
+    assert progress.resumed is True
+    assert progress.status == "completed"
+    assert (progress.pages, progress.entries, progress.created) == (2, 4, 4)
+    await session.refresh(checkpoint)
+    assert checkpoint.status == "completed"
+    assert checkpoint.cursor is None
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_row_lets_one_worker_crawl_at_a_time(session: AsyncSession, session_factory) -> None:
+    values = {"player:1": {"username": "User1", "rankPoints": 10}}
+    client = FakeDatastoreClient({None: {"entries": [{"entryKey": "player:1"}], "nextPageCursor": None}}, values)
+
+    def _crawler(**kwargs: Any) -> LeaderboardCrawler:
+        return LeaderboardCrawler(client=client, universe_id=99, session_factory=session_factory, **kwargs)
+
+    # Another worker holds the checkpoint: it claimed the row and has not finished yet.
+    holder = _crawler()
+    await holder._begin(restart=False)
+    with pytest.raises(CrawlAlreadyRunning):
+        await start_crawl(_crawler())
+
+    # A claim that stopped advancing is taken over, and the response reflects the claimed checkpoint.
+    progress = await start_crawl(_crawler(stale_after=0), restart=True)
+    assert (progress.status, progress.resumed) == ("running", False)
+    await stop_crawls()
+    checkpoint = await session.get(SyncCheckpoint, holder.crawl_key)
+    await session.refresh(checkpoint)
+    assert checkpoint.status in ("completed", "interrupted")
+
+
+@pytest.mark.asyncio
+async def test_crawl_status_requires_an_api_key(session: AsyncSession, monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = get_settings().model_copy(update={"inbound_api_keys": ["secret"]})
+    monkeypatch.setattr(roblox_route, "get_settings", lambda: settings)
+
+    async def _override_session():
+        yield session
+
+    app.dependency_overrides[get_session] = _override_session
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            anonymous = await client.get("/sync/roblox/crawl")
+            operator = await client.get("/sync/roblox/crawl", headers={"x-grps-api-key": "secret"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert anonymous.status_code == 401
+    assert operator.status_code == 200
+
+
+def _universe(key: str, priority: int) -> UniverseConfig:
+    return UniverseConfig(
+        key=key,
+        universe_id=100 + priority,
+        api_key=f"{key}-key",
+        datastore_name="GRPS_Points",
+        scope="global",
+        key_prefix="player:",
+        priority=priority,
+        concurrency=4,
+    )
+
+
+@pytest.mark.asyncio
+async def test_multi_universe_sync_applies_precedence(session: AsyncSession) -> None:
+    nexus = FakeDatastoreClient(
+        {None: {"entries": [{"entryKey": "player:1"}], "nextPageCursor": None}},
+        {"player:1": {"username": "Nexus", "rankPoints": 100}},
+    )
+    training = FakeDatastoreClient(
+        {
+            None: {"entries": [{"entryKey": "player:1"}, {"entryKey": "player:2"}], "nextPageCursor": "t2"},
+            "t2": {"entries": [{"entryKey": "player:1"}], "nextPageCursor": None},
+        },
+        {"player:1": {"username": "Training", "rankPoints": 900}, "player:2": {"username": "Recruit", "rankPoints": 5}},
+    )
+    service = MultiUniverseSyncService(
+        session,
+        universes=[_universe("nexus", 0), _universe("training_site", 1)],
+        clients={"nexus": nexus, "training_site": training},
+    )
+
+    reports = {report.key: report for report in await service.sync(limit=10, max_rounds=None)}
+
+    player = await session.get(Player, 1)
+    assert player.username == "Nexus"
+    assert player.metadata_payload["universe"] == "nexus"
+    assert (await session.get(Player, 2)).metadata_payload["universe"] == "training_site"
+    assert (reports["nexus"].pages, reports["nexus"].applied) == (1, 1)
+    assert (reports["training_site"].pages, reports["training_site"].applied) == (2, 1)
+    assert reports["training_site"].superseded == 2
+
+    # A plain ingest keeps the owner, so the lower-priority universe still loses on the next sync.
+    await IngestionService(session).ingest(
+        PlayerSnapshotPayload.model_validate({"userId": 1, "username": "Nexus", "rankPoints": 120, "kos": 1, "wos": 0})
+    )
+    await session.commit()
+    assert (await session.get(Player, 1)).metadata_payload["universe"] == "nexus"
+    nexus.pages = {None: {"entries": [], "nextPageCursor": None}}
+    training.pages = {None: {"entries": [{"entryKey": "player:1"}], "nextPageCursor": None}}
+    await service.sync(limit=10)
+    player = await session.get(Player, 1, populate_existing=True)
+    assert (player.username, player.rank_points) == ("Nexus", 120)